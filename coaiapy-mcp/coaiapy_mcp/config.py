@@ -23,6 +23,8 @@ ALL_TOOLS = {
     # Redis
     "coaia_tash",
     "coaia_fetch",
+    "coaia_tash_many",
+    "coaia_fetch_many",
     # Trace creation and management
     "coaia_fuse_trace_create",
     "coaia_fuse_add_observation",
@@ -56,6 +58,8 @@ MINIMAL_TOOLS = {
     # Redis
     "coaia_tash",
     "coaia_fetch",
+    "coaia_tash_many",
+    "coaia_fetch_many",
     # Trace creation and management
     "coaia_fuse_trace_create",
     "coaia_fuse_add_observation",
@@ -111,6 +111,33 @@ def create_server() -> Server:
                 }
             ))
 
+        if feature_config.is_tool_enabled("coaia_tash_many"):
+            tool_definitions.append(types.Tool(
+                name="coaia_tash_many",
+                description="Stash several key-value pairs to Redis in one round trip",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "items": {"type": "object", "additionalProperties": {"type": "string"}, "description": "Mapping of Redis key to value"},
+                        "ttl": {"type": "integer", "description": "Optional expiry in seconds for every key"},
+                    },
+                    "required": ["items"],
+                }
+            ))
+
+        if feature_config.is_tool_enabled("coaia_fetch_many"):
+            tool_definitions.append(types.Tool(
+                name="coaia_fetch_many",
+                description="Fetch several values from Redis in one round trip",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "keys": {"type": "array", "items": {"type": "string"}, "description": "Redis keys to fetch"},
+                    },
+                    "required": ["keys"],
+                }
+            ))
+
         # Langfuse trace tools
         if feature_config.is_tool_enabled("coaia_fuse_trace_create"):
             tool_definitions.append(types.Tool(
@@ -176,6 +203,9 @@ def create_server() -> Server:
                 "properties": {
                     "trace_id": {"type": "string", "description": "Trace identifier to retrieve"},
                     "json_output": {"type": "boolean", "description": "Return raw JSON data instead of formatted tree", "default": False},
+                    "max_depth": {"type": "integer", "description": "Only expand this many observation levels in the tree (for very large traces)"},
+                    "max_children": {"type": "integer", "description": "Show at most this many children per observation in the tree"},
+                    "include_payloads": {"type": "boolean", "description": "Include observation input/output payloads (set false for structure only)", "default": True},
                 },
                 "required": ["trace_id"],
             }
@@ -190,6 +220,9 @@ def create_server() -> Server:
                 "properties": {
                     "trace_id": {"type": "string", "description": "Trace identifier to view"},
                     "json_output": {"type": "boolean", "description": "Return raw JSON data instead of formatted tree", "default": False},
+                    "max_depth": {"type": "integer", "description": "Only expand this many observation levels in the tree (for very large traces)"},
+                    "max_children": {"type": "integer", "description": "Show at most this many children per observation in the tree"},
+                    "include_payloads": {"type": "boolean", "description": "Include observation input/output payloads (set false for structure only)", "default": True},
                 },
                 "required": ["trace_id"],
             }
@@ -229,6 +262,8 @@ def create_server() -> Server:
                     "page": {"type": "integer", "description": "Page number (starts at 1)", "default": 1},
                     "limit": {"type": "integer", "description": "Items per page (default 50)", "default": 50},
                     "json_output": {"type": "boolean", "description": "Return raw JSON data instead of formatted table", "default": False},
+                    "include_observations": {"type": "boolean", "description": "Attach each trace's observations", "default": False},
+                    "observations_mode": {"type": "string", "enum": ["concurrent", "bulk"], "description": "How observations are fetched: parallel per-trace requests (concurrent) or one time-window query grouped by trace (bulk)", "default": "concurrent"},
                 },
             }
         ))
@@ -672,6 +707,8 @@ async def main_async():
     except Exception as e:
         logger.error(f"Server error: {e}", exc_info=True)
         sys.exit(1)
+    finally:
+        await tools.close_async_redis()
 
 
 def main():
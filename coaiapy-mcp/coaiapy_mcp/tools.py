@@ -10,8 +10,15 @@ instead of using subprocess wrappers. This provides:
 """
 
 import os
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Optional, List
 import redis
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # redis < 4.2
+    aioredis = None
 from langfuse import Langfuse
 
 # Import from coaiapy
@@ -35,10 +42,11 @@ try:
         get_comment_by_id,
         post_comment,
         list_traces,
-        list_projects,
+        get_current_project_info,
         get_trace_with_observations,
         format_traces_table,
-        format_trace_tree,
+        iter_trace_tree_lines,
+        TraceTreeIndex,
         upload_and_attach_media,
         get_media,
         format_media_display,
@@ -61,6 +69,10 @@ except Exception as e:
 # Try direct URL first (handles SSL automatically), fall back to component config
 redis_client = None
 REDIS_AVAILABLE = False
+# Connection settings of the working sync client, reused for the async client
+_redis_async_url = None
+_redis_async_kwargs = None
+REDIS_MAX_CONNECTIONS = int(os.getenv("COAIAPY_MCP_REDIS_MAX_CONNECTIONS", "20"))
 
 # Check for direct Redis URL from environment
 redis_url = os.getenv('REDIS_URL') or os.getenv('KV_URL')
@@ -69,6 +81,7 @@ if redis_url:
         redis_client = redis.from_url(redis_url, decode_responses=True)
         redis_client.ping()
         REDIS_AVAILABLE = True
+        _redis_async_url = redis_url
     except Exception as e:
         print(f"Warning: Redis connection failed with URL: {e}")
         redis_client = None
@@ -77,7 +90,7 @@ if redis_url:
 if not REDIS_AVAILABLE:
     redis_config = config.get("jtaleconf", {})
     try:
-        redis_client = redis.Redis(
+        _redis_async_kwargs = dict(
             host=redis_config.get("host", "localhost"),
             port=redis_config.get("port", 6379),
             db=redis_config.get("db", 0),
@@ -86,6 +99,7 @@ if not REDIS_AVAILABLE:
             ssl_cert_reqs="none" if redis_config.get("ssl") else "required",
             decode_responses=True,
         )
+        redis_client = redis.Redis(**_redis_async_kwargs)
         # Test connection
         redis_client.ping()
         REDIS_AVAILABLE = True
@@ -93,6 +107,70 @@ if not REDIS_AVAILABLE:
         print(f"Warning: Redis not available: {e}")
         redis_client = None
         REDIS_AVAILABLE = False
+        _redis_async_kwargs = None
+
+# Async Redis client used by the tool handlers. redis.asyncio connections are
+# bound to the event loop that opened them, so the pooled client is created
+# lazily and rebuilt (closing the previous one) if the running loop changes.
+_async_redis_client = None
+_async_redis_loop = None
+
+
+async def _aclose_redis(client, loop=None):
+    """Close a redis.asyncio client and its pool, on its own loop if that loop is still running."""
+    close = getattr(client, "aclose", None) or client.close  # redis < 5.0.1 only has close()
+    try:
+        if loop is not None and loop.is_running() and loop is not asyncio.get_running_loop():
+            await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(close(), loop))
+        else:
+            await close()
+    except Exception:
+        # The old loop may already be closed; its sockets are dropped with the pool
+        pass
+
+
+async def close_async_redis():
+    """Close the pooled async Redis client (called on server shutdown)."""
+    global _async_redis_client, _async_redis_loop
+    client, loop = _async_redis_client, _async_redis_loop
+    _async_redis_client = _async_redis_loop = None
+    if client is not None:
+        await _aclose_redis(client, loop)
+
+
+async def _get_async_redis():
+    """Return the pooled async Redis client for the running loop (None if unsupported)."""
+    global _async_redis_client, _async_redis_loop
+    if aioredis is None or not REDIS_AVAILABLE:
+        return None
+    loop = asyncio.get_running_loop()
+    client = _async_redis_client
+    if client is None or _async_redis_loop is not loop:
+        previous, previous_loop = _async_redis_client, _async_redis_loop
+        if _redis_async_url:
+            client = aioredis.from_url(
+                _redis_async_url, decode_responses=True, max_connections=REDIS_MAX_CONNECTIONS
+            )
+        elif _redis_async_kwargs:
+            client = aioredis.Redis(
+                max_connections=REDIS_MAX_CONNECTIONS, **_redis_async_kwargs
+            )
+        else:
+            return None
+        # Swap before awaiting so concurrent callers share the new client
+        _async_redis_client, _async_redis_loop = client, loop
+        if previous is not None:
+            await _aclose_redis(previous, previous_loop)
+    return client
+
+
+def _redis_pipeline_set(items: Dict[str, str], ttl: Optional[int]) -> List[Any]:
+    """Pipelined SETs on the sync client (fallback when redis.asyncio is missing)."""
+    pipe = redis_client.pipeline(transaction=False)
+    for key, value in items.items():
+        pipe.set(key, value, ex=ttl)
+    return pipe.execute()
+
 
 # Initialize Langfuse client
 try:
@@ -107,6 +185,25 @@ except Exception as e:
     langfuse_client = None
     LANGFUSE_AVAILABLE = False
 
+# Bounded executor for blocking calls (coaiapy/requests, sync redis).
+# Tool handlers await these off the event loop, so one slow Langfuse request
+# no longer stalls concurrent tool invocations from other agents.
+# Size via COAIAPY_MCP_MAX_WORKERS (default 8).
+try:
+    MAX_BLOCKING_WORKERS = max(1, int(os.getenv("COAIAPY_MCP_MAX_WORKERS", "8")))
+except ValueError:
+    MAX_BLOCKING_WORKERS = 8
+_blocking_executor = ThreadPoolExecutor(
+    max_workers=MAX_BLOCKING_WORKERS, thread_name_prefix="coaiapy-mcp"
+)
+
+
+async def _run_blocking(func, *args, **kwargs):
+    """Run a blocking callable in the bounded executor and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_blocking_executor, functools.partial(func, *args, **kwargs))
+
+
 # Initialize Pipeline Template Loader
 try:
     pipeline_loader = TemplateLoader()
@@ -139,7 +236,11 @@ async def coaia_tash(key: str, value: str) -> Dict[str, Any]:
         }
     
     try:
-        redis_client.set(key, value)
+        client = await _get_async_redis()
+        if client is not None:
+            await client.set(key, value)
+        else:
+            await _run_blocking(redis_client.set, key, value)
         return {
             "success": True,
             "message": f"Stored '{key}' in Redis"
@@ -168,7 +269,11 @@ async def coaia_fetch(key: str) -> Dict[str, Any]:
         }
     
     try:
-        value = redis_client.get(key)
+        client = await _get_async_redis()
+        if client is not None:
+            value = await client.get(key)
+        else:
+            value = await _run_blocking(redis_client.get, key)
         if value is None:
             return {
                 "success": False,
@@ -184,6 +289,88 @@ async def coaia_fetch(key: str) -> Dict[str, Any]:
             "error": f"Redis error: {str(e)}"
         }
 
+async def coaia_tash_many(items: Dict[str, str], ttl: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Stash several key-value pairs to Redis in one pipelined round trip.
+    
+    Args:
+        items: Mapping of Redis key to value
+        ttl: Optional expiry in seconds applied to every key
+        
+    Returns:
+        Dict with success status and stored keys/error
+    """
+    if not REDIS_AVAILABLE:
+        return {
+            "success": False,
+            "error": "Redis is not available. Check configuration and Redis server."
+        }
+    if not items:
+        return {
+            "success": False,
+            "error": "No items provided"
+        }
+    
+    try:
+        client = await _get_async_redis()
+        if client is not None:
+            async with client.pipeline(transaction=False) as pipe:
+                for key, value in items.items():
+                    pipe.set(key, value, ex=ttl)
+                await pipe.execute()
+        else:
+            await _run_blocking(_redis_pipeline_set, items, ttl)
+        return {
+            "success": True,
+            "message": f"Stored {len(items)} keys in Redis",
+            "keys": list(items.keys())
+        }
+    except redis.RedisError as e:
+        return {
+            "success": False,
+            "error": f"Redis error: {str(e)}"
+        }
+
+
+async def coaia_fetch_many(keys: List[str]) -> Dict[str, Any]:
+    """
+    Fetch several values from Redis with a single MGET.
+    
+    Args:
+        keys: Redis keys to fetch
+        
+    Returns:
+        Dict with success status, found values and missing keys, or error
+    """
+    if not REDIS_AVAILABLE:
+        return {
+            "success": False,
+            "error": "Redis is not available. Check configuration and Redis server."
+        }
+    if not keys:
+        return {
+            "success": False,
+            "error": "No keys provided"
+        }
+    
+    try:
+        client = await _get_async_redis()
+        if client is not None:
+            values = await client.mget(keys)
+        else:
+            values = await _run_blocking(redis_client.mget, keys)
+        found = {k: v for k, v in zip(keys, values) if v is not None}
+        return {
+            "success": True,
+            "values": found,
+            "missing": [k for k, v in zip(keys, values) if v is None]
+        }
+    except redis.RedisError as e:
+        return {
+            "success": False,
+            "error": f"Redis error: {str(e)}"
+        }
+
 
 # ============================================================================
 # Langfuse Trace Tools
@@ -221,7 +408,7 @@ async def coaia_fuse_trace_create(
     
     try:
         # Use coaiapy's add_trace function which handles the API call
-        result = add_trace(
+        result = await _run_blocking(add_trace,
             trace_id=trace_id,
             user_id=user_id,
             session_id=session_id,
@@ -286,7 +473,7 @@ async def coaia_fuse_add_observation(
     
     try:
         # Use coaiapy's add_observation function
-        result = add_observation(
+        result = await _run_blocking(add_observation,
             observation_id=observation_id,
             trace_id=trace_id,
             observation_type=observation_type,
@@ -335,7 +522,7 @@ async def coaia_fuse_trace_patch_output(
 
     try:
         # Use coaiapy's patch_trace_output function
-        result = patch_trace_output(
+        result = await _run_blocking(patch_trace_output,
             trace_id=trace_id,
             output_data=output_data,
         )
@@ -355,13 +542,22 @@ async def coaia_fuse_trace_patch_output(
         }
 
 
-async def coaia_fuse_trace_get(trace_id: str, json_output: bool = False) -> Dict[str, Any]:
+async def coaia_fuse_trace_get(
+    trace_id: str,
+    json_output: bool = False,
+    max_depth: Optional[int] = None,
+    max_children: Optional[int] = None,
+    include_payloads: bool = True,
+) -> Dict[str, Any]:
     """
     Get a specific trace by ID from Langfuse with all its observations.
 
     Args:
         trace_id: Unique trace identifier
         json_output: If True, return raw JSON; if False, return formatted tree
+        max_depth: Only expand this many observation levels in the tree
+        max_children: Show at most this many children per observation in the tree
+        include_payloads: If False, drop input/output payloads (structure only)
 
     Returns:
         Dict with success status and trace data/error with proper Langfuse URL
@@ -374,7 +570,8 @@ async def coaia_fuse_trace_get(trace_id: str, json_output: bool = False) -> Dict
 
     try:
         # Fetch trace with observations
-        trace_data = get_trace_with_observations(trace_id)
+        trace_data = await _run_blocking(get_trace_with_observations, trace_id,
+                                         include_payloads=include_payloads)
 
         import json
         parsed = json.loads(trace_data)
@@ -386,12 +583,9 @@ async def coaia_fuse_trace_get(trace_id: str, json_output: bool = False) -> Dict
 
         # Get project ID for constructing proper URL
         try:
-            projects_json = list_projects()
-            projects = json.loads(projects_json)
-            # Projects response has structure: {"data": [{"id": "...", "name": "...", ...}]}
-            project_id = None
-            if isinstance(projects, dict) and 'data' in projects and isinstance(projects['data'], list) and len(projects['data']) > 0:
-                project_id = projects['data'][0].get('id')
+            # Cached per credentials, so this is normally not a network call
+            project_info = await _run_blocking(get_current_project_info)
+            project_id = project_info.get('id') if project_info else None
 
             # Construct proper Langfuse URL with project_id
             langfuse_host = config.get('langfuse_host', 'https://cloud.langfuse.com')
@@ -409,12 +603,15 @@ async def coaia_fuse_trace_get(trace_id: str, json_output: bool = False) -> Dict
                 "json": trace_data
             }
         else:
-            formatted = format_trace_tree(parsed)
+            index = TraceTreeIndex(parsed.get('observations', []))
+            formatted = '\n'.join(iter_trace_tree_lines(parsed, max_depth=max_depth, max_children=max_children,
+                                                         index=index))
             return {
                 "success": True,
                 "trace": parsed,
                 "trace_url": trace_url,
-                "formatted": formatted
+                "formatted": formatted,
+                "tree_stats": index.stats()
             }
     except Exception as e:
         return {
@@ -423,18 +620,28 @@ async def coaia_fuse_trace_get(trace_id: str, json_output: bool = False) -> Dict
         }
 
 
-async def coaia_fuse_trace_view(trace_id: str, json_output: bool = False) -> Dict[str, Any]:
+async def coaia_fuse_trace_view(
+    trace_id: str,
+    json_output: bool = False,
+    max_depth: Optional[int] = None,
+    max_children: Optional[int] = None,
+    include_payloads: bool = True,
+) -> Dict[str, Any]:
     """
     View trace details with observations from Langfuse (alias for coaia_fuse_trace_get).
 
     Args:
         trace_id: Trace identifier to fetch
         json_output: If True, return raw JSON; if False, return formatted tree
+        max_depth: Only expand this many observation levels in the tree
+        max_children: Show at most this many children per observation in the tree
+        include_payloads: If False, drop input/output payloads (structure only)
 
     Returns:
         Dict with success status and trace data/error
     """
-    return await coaia_fuse_trace_get(trace_id, json_output)
+    return await coaia_fuse_trace_get(trace_id, json_output, max_depth=max_depth, max_children=max_children,
+                                      include_payloads=include_payloads)
 
 
 async def coaia_fuse_observation_get(observation_id: str, json_output: bool = False) -> Dict[str, Any]:
@@ -456,7 +663,7 @@ async def coaia_fuse_observation_get(observation_id: str, json_output: bool = Fa
 
     try:
         # Use coaiapy's get_observation function
-        obs_data = get_observation(observation_id)
+        obs_data = await _run_blocking(get_observation, observation_id)
 
         import json
         parsed = json.loads(obs_data)
@@ -499,7 +706,9 @@ async def coaia_fuse_traces_list(
     environment: Optional[List[str]] = None,
     page: Optional[int] = 1,
     limit: Optional[int] = 50,
-    json_output: bool = False
+    json_output: bool = False,
+    include_observations: bool = False,
+    observations_mode: str = "concurrent"
 ) -> Dict[str, Any]:
     """
     List traces with comprehensive filtering options.
@@ -519,6 +728,8 @@ async def coaia_fuse_traces_list(
         page: Page number (starts at 1)
         limit: Items per page (default 50)
         json_output: Return raw JSON instead of formatted table
+        include_observations: Attach each trace's observations
+        observations_mode: "concurrent" (parallel per-trace requests) or "bulk" (time-window query grouped by trace)
         
     Returns:
         Dict with success status and traces data or formatted table
@@ -531,8 +742,9 @@ async def coaia_fuse_traces_list(
     
     try:
         # Use coaiapy's list_traces function with all filters
-        traces_data = list_traces(
-            include_observations=False,
+        traces_data = await _run_blocking(list_traces,
+            include_observations=include_observations,
+            observations_mode=observations_mode,
             session_id=session_id,
             user_id=user_id,
             name=name,
@@ -620,12 +832,9 @@ async def coaia_fuse_traces_session_view(session_id: str, json_output: bool = Fa
 
         # Get project ID for constructing proper URL
         try:
-            projects_json = list_projects()
-            projects = json.loads(projects_json)
-            # Projects response has structure: {"data": [{"id": "...", "name": "...", ...}]}
-            project_id = None
-            if isinstance(projects, dict) and 'data' in projects and isinstance(projects['data'], list) and len(projects['data']) > 0:
-                project_id = projects['data'][0].get('id')
+            # Cached per credentials, so this is normally not a network call
+            project_info = await _run_blocking(get_current_project_info)
+            project_id = project_info.get('id') if project_info else None
 
             # Construct proper Langfuse URL with project_id
             langfuse_host = config.get('langfuse_host', 'https://cloud.langfuse.com')
@@ -636,7 +845,7 @@ async def coaia_fuse_traces_session_view(session_id: str, json_output: bool = Fa
             session_url = f"{langfuse_host}/sessions/{session_id}"
 
         # Call list_traces with session_id filter
-        traces_json = list_traces(session_id=session_id, include_observations=False)
+        traces_json = await _run_blocking(list_traces, session_id=session_id, include_observations=False)
 
         if json_output:
             # Return raw JSON
@@ -682,7 +891,7 @@ async def coaia_fuse_prompts_list() -> Dict[str, Any]:
     
     try:
         # Use coaiapy's list_prompts function
-        prompts_data = cofuse_list_prompts(debug=False)
+        prompts_data = await _run_blocking(cofuse_list_prompts, debug=False)
         
         # Parse the response (it might be a formatted string or dict)
         if isinstance(prompts_data, str):
@@ -728,7 +937,7 @@ async def coaia_fuse_prompts_get(name: str, label: Optional[str] = None) -> Dict
     
     try:
         # Use coaiapy's get_prompt function
-        prompt_data = cofuse_get_prompt(prompt_name=name, label=label)
+        prompt_data = await _run_blocking(cofuse_get_prompt, prompt_name=name, label=label)
         
         return {
             "success": True,
@@ -760,7 +969,7 @@ async def coaia_fuse_datasets_list() -> Dict[str, Any]:
     
     try:
         # Use coaiapy's list_datasets function
-        datasets_data = cofuse_list_datasets()
+        datasets_data = await _run_blocking(cofuse_list_datasets)
         
         return {
             "success": True,
@@ -791,7 +1000,7 @@ async def coaia_fuse_datasets_get(name: str) -> Dict[str, Any]:
     
     try:
         # Use coaiapy's get_dataset function
-        dataset_data = cofuse_get_dataset(dataset_name=name)
+        dataset_data = await _run_blocking(cofuse_get_dataset, dataset_name=name)
         
         return {
             "success": True,
@@ -823,7 +1032,7 @@ async def coaia_fuse_score_configs_list() -> Dict[str, Any]:
     
     try:
         # Use coaiapy's list_score_configs function
-        configs_data = list_score_configs(debug=False)
+        configs_data = await _run_blocking(list_score_configs, debug=False)
         
         return {
             "success": True,
@@ -854,7 +1063,7 @@ async def coaia_fuse_score_configs_get(name_or_id: str) -> Dict[str, Any]:
     
     try:
         # Use coaiapy's get_score_config function
-        config_data = get_score_config(config_id=name_or_id)
+        config_data = await _run_blocking(get_score_config, config_id=name_or_id)
         
         return {
             "success": True,
@@ -897,7 +1106,7 @@ async def coaia_fuse_score_apply(
     
     try:
         # Use coaiapy's apply_score_config function which handles validation
-        result = apply_score_config(
+        result = await _run_blocking(apply_score_config,
             config_name_or_id=config_name_or_id,
             target_type=target_type,
             target_id=target_id,
@@ -962,7 +1171,7 @@ async def coaia_fuse_comments_list(
 
     try:
         # Use coaiapy's get_comments function
-        comments_data = get_comments(
+        comments_data = await _run_blocking(get_comments,
             object_type=object_type,
             object_id=object_id,
             author_user_id=author_user_id,
@@ -1015,7 +1224,7 @@ async def coaia_fuse_comments_get(comment_id: str) -> Dict[str, Any]:
 
     try:
         # Use coaiapy's get_comment_by_id function
-        comment_data = get_comment_by_id(comment_id)
+        comment_data = await _run_blocking(get_comment_by_id, comment_id)
 
         # Parse response if it's a string
         import json
@@ -1070,7 +1279,7 @@ async def coaia_fuse_comments_create(
 
     try:
         # Use coaiapy's post_comment function
-        comment_data = post_comment(
+        comment_data = await _run_blocking(post_comment,
             text=text,
             object_type=object_type,
             object_id=object_id,
@@ -1159,7 +1368,7 @@ async def coaia_fuse_media_upload(
         ... )
     """
     try:
-        result = upload_and_attach_media(
+        result = await _run_blocking(upload_and_attach_media,
             file_path=file_path,
             trace_id=trace_id,
             field=field,
@@ -1246,7 +1455,7 @@ async def coaia_fuse_media_get(
     try:
         import json
 
-        media_json_str = get_media(media_id)
+        media_json_str = await _run_blocking(get_media, media_id)
         media_data = json.loads(media_json_str)
 
         if "error" in media_data:
@@ -1285,6 +1494,8 @@ TOOLS = {
     # Redis tools
     "coaia_tash": coaia_tash,
     "coaia_fetch": coaia_fetch,
+    "coaia_tash_many": coaia_tash_many,
+    "coaia_fetch_many": coaia_fetch_many,
 
     # Langfuse trace tools
     "coaia_fuse_trace_create": coaia_fuse_trace_create,
@@ -1323,6 +1534,8 @@ __all__ = [
     "TOOLS",
     "coaia_tash",
     "coaia_fetch",
+    "coaia_tash_many",
+    "coaia_fetch_many",
     "coaia_fuse_trace_create",
     "coaia_fuse_add_observation",
     "coaia_fuse_trace_patch_output",
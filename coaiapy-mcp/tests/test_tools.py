@@ -279,6 +279,8 @@ def test_tool_registry():
     expected_tools = [
         "coaia_tash",
         "coaia_fetch",
+        "coaia_tash_many",
+        "coaia_fetch_many",
         "coaia_fuse_trace_create",
         "coaia_fuse_add_observation",
         "coaia_fuse_trace_view",
@@ -303,3 +305,237 @@ def test_tool_functions_are_async():
     for tool_name, tool_func in tools.TOOLS.items():
         assert inspect.iscoroutinefunction(tool_func), \
             f"Tool {tool_name} is not an async function"
+
+
+class _FakeAsyncPipeline:
+    def __init__(self, store):
+        self.store = store
+        self.ops = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def set(self, key, value, ex=None):
+        self.ops.append((key, value, ex))
+
+    async def execute(self):
+        for key, value, _ in self.ops:
+            self.store[key] = value
+        return [True] * len(self.ops)
+
+
+class _FakeAsyncRedis:
+    def __init__(self):
+        self.store = {}
+        self.pipelines = []
+        self.mget_calls = 0
+
+    def pipeline(self, transaction=True):
+        pipe = _FakeAsyncPipeline(self.store)
+        self.pipelines.append(pipe)
+        return pipe
+
+    async def mget(self, keys):
+        self.mget_calls += 1
+        return [self.store.get(k) for k in keys]
+
+
+def _returning(client):
+    async def get_client():
+        return client
+    return get_client
+
+
+@pytest.mark.asyncio
+async def test_coaia_tash_many_and_fetch_many_single_round_trip(monkeypatch):
+    """Bulk tools use one pipeline and one MGET on the async client."""
+    fake = _FakeAsyncRedis()
+    monkeypatch.setattr(tools, "REDIS_AVAILABLE", True)
+    monkeypatch.setattr(tools, "_get_async_redis", _returning(fake))
+
+    stored = await tools.coaia_tash_many({"ctx:a": "1", "ctx:b": "2", "ctx:c": "3"}, ttl=60)
+    assert stored["success"] is True
+    assert len(fake.pipelines) == 1
+    assert [op[2] for op in fake.pipelines[0].ops] == [60, 60, 60]
+
+    fetched = await tools.coaia_fetch_many(["ctx:a", "ctx:c", "ctx:missing"])
+    assert fetched["success"] is True
+    assert fetched["values"] == {"ctx:a": "1", "ctx:c": "3"}
+    assert fetched["missing"] == ["ctx:missing"]
+    assert fake.mget_calls == 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_redis_tools_fall_back_to_sync_client(monkeypatch):
+    """Without redis.asyncio the bulk tools pipeline through the sync client."""
+    from unittest.mock import MagicMock
+
+    sync_client = MagicMock()
+    sync_client.mget.return_value = ["v1", None]
+    monkeypatch.setattr(tools, "REDIS_AVAILABLE", True)
+    monkeypatch.setattr(tools, "redis_client", sync_client)
+    monkeypatch.setattr(tools, "_get_async_redis", _returning(None))
+
+    stored = await tools.coaia_tash_many({"k1": "v1"})
+    assert stored["success"] is True
+    sync_client.pipeline.return_value.execute.assert_called_once()
+
+    fetched = await tools.coaia_fetch_many(["k1", "k2"])
+    assert fetched["values"] == {"k1": "v1"}
+    assert fetched["missing"] == ["k2"]
+
+
+def test_async_redis_client_closed_when_loop_changes(monkeypatch):
+    """Rebuilding the client for a new event loop closes the previous pool."""
+    import asyncio
+
+    created = []
+
+    class FakeClient:
+        def __init__(self, *args, **kwargs):
+            self.closed = False
+            created.append(self)
+
+        async def aclose(self):
+            self.closed = True
+
+    monkeypatch.setattr(tools, "REDIS_AVAILABLE", True)
+    monkeypatch.setattr(tools, "aioredis", type("aioredis", (), {"from_url": FakeClient}))
+    monkeypatch.setattr(tools, "_redis_async_url", "redis://localhost:6379")
+    monkeypatch.setattr(tools, "_async_redis_client", None)
+    monkeypatch.setattr(tools, "_async_redis_loop", None)
+
+    first = asyncio.run(tools._get_async_redis())
+    second = asyncio.run(tools._get_async_redis())
+
+    assert first is not second
+    assert first.closed is True
+    assert second.closed is False
+    asyncio.run(tools.close_async_redis())
+    assert second.closed is True
+    assert tools._async_redis_client is None
+
+
+@pytest.mark.asyncio
+async def test_bulk_redis_tools_require_input():
+    """Empty inputs return an error instead of raising."""
+    assert "success" in await tools.coaia_tash_many({})
+    assert "success" in await tools.coaia_fetch_many([])
+
+
+# ============================================================================
+# Concurrency Tests
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_blocking_calls_do_not_stall_event_loop(monkeypatch):
+    """Slow coaiapy calls run in the executor, so concurrent tools overlap."""
+    import asyncio
+    import json
+    import time
+
+    def slow_list_prompts(debug=False):
+        time.sleep(0.3)
+        return json.dumps([])
+
+    monkeypatch.setattr(tools, "LANGFUSE_AVAILABLE", True)
+    monkeypatch.setattr(tools, "cofuse_list_prompts", slow_list_prompts)
+
+    ticks = []
+
+    async def heartbeat():
+        for _ in range(5):
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.02)
+
+    start = time.monotonic()
+    results = await asyncio.gather(
+        tools.coaia_fuse_prompts_list(),
+        tools.coaia_fuse_prompts_list(),
+        tools.coaia_fuse_prompts_list(),
+        heartbeat(),
+    )
+    elapsed = time.monotonic() - start
+
+    assert all(r["success"] for r in results[:3])
+    # Three 0.3s calls overlap instead of running back to back
+    assert elapsed < 0.8
+    # The event loop kept running while the calls were in flight
+    assert len(ticks) == 5
+    assert ticks[-1] - ticks[0] < 0.25
+
+
+@pytest.mark.asyncio
+async def test_observation_get_runs_in_executor(monkeypatch):
+    """Observation lookups leave the event loop thread free."""
+    import json
+    import threading
+
+    callers = []
+
+    def fake_get_observation(observation_id):
+        callers.append(threading.current_thread())
+        return json.dumps({"id": observation_id, "type": "SPAN"})
+
+    monkeypatch.setattr(tools, "LANGFUSE_AVAILABLE", True)
+    monkeypatch.setattr(tools, "get_observation", fake_get_observation)
+
+    result = await tools.coaia_fuse_observation_get("obs-1", json_output=True)
+
+    assert result["success"] is True
+    assert callers and callers[0] is not threading.current_thread()
+
+
+@pytest.mark.asyncio
+async def test_trace_view_passes_tree_limits(monkeypatch):
+    """Trace view renders through the tree index and reports its stats."""
+    import json
+
+    trace = {
+        "id": "t-1",
+        "observations": [
+            {"id": "root", "name": "root"},
+            {"id": "child", "name": "child", "parentObservationId": "root"},
+            {"id": "stray", "name": "stray", "parentObservationId": "gone"},
+        ],
+    }
+    monkeypatch.setattr(tools, "LANGFUSE_AVAILABLE", True)
+    monkeypatch.setattr(tools, "get_trace_with_observations", lambda trace_id, **kwargs: json.dumps(trace))
+    monkeypatch.setattr(tools, "get_current_project_info", lambda: {"id": "p-1"})
+
+    result = await tools.coaia_fuse_trace_view("t-1", max_depth=1)
+
+    assert result["success"] is True
+    assert "depth limit 1" in result["formatted"]
+    assert result["tree_stats"]["orphans"] == 1
+    assert result["tree_stats"]["max_depth"] == 2
+
+
+@pytest.mark.asyncio
+async def test_trace_get_builds_tree_index_once(monkeypatch):
+    """The index used for tree_stats is reused for rendering."""
+    import json
+    from coaiapy import cofuse
+
+    built = []
+
+    class CountingIndex(cofuse.TraceTreeIndex):
+        def __init__(self, observations):
+            built.append(self)
+            super().__init__(observations)
+
+    trace = {"id": "t-1", "observations": [{"id": f"o-{i}", "name": "step"} for i in range(3)]}
+    monkeypatch.setattr(tools, "LANGFUSE_AVAILABLE", True)
+    monkeypatch.setattr(tools, "get_trace_with_observations", lambda trace_id, **kwargs: json.dumps(trace))
+    monkeypatch.setattr(tools, "get_current_project_info", lambda: {"id": "p-1"})
+    monkeypatch.setattr(tools, "TraceTreeIndex", CountingIndex)
+    monkeypatch.setattr(cofuse, "TraceTreeIndex", CountingIndex)
+
+    result = await tools.coaia_fuse_trace_get("t-1")
+
+    assert result["success"] is True
+    assert "Observations (3)" in result["formatted"]
+    assert len(built) == 1
@@ -0,0 +1,62 @@
+"""
+Shared SQLite plumbing for the local stores (media index, outbox, mirror).
+
+Stores open one short-lived connection per operation, which keeps them safe
+to use from worker threads without sharing a connection. The directory, WAL
+journal mode and schema are set up once per database file and process.
+"""
+
+import os
+import sqlite3
+import threading
+
+_initialized = set()
+_init_lock = threading.Lock()
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def connect(db_path, schema, synchronous=None, **kwargs):
+    """
+    Open a connection, creating the database (WAL mode + schema) on first use.
+
+    Args:
+        db_path: Database file path
+        schema: SQL script of idempotent CREATE ... IF NOT EXISTS statements
+        synchronous: Optional PRAGMA synchronous level for the connection (e.g. "NORMAL")
+        **kwargs: Extra sqlite3.connect arguments (e.g. isolation_level)
+
+    Returns:
+        sqlite3.Connection
+    """
+    if db_path not in _initialized:
+        with _init_lock:
+            if db_path not in _initialized:
+                os.makedirs(os.path.dirname(db_path), exist_ok=True)
+                conn = sqlite3.connect(db_path, timeout=30)
+                try:
+                    conn.execute('PRAGMA journal_mode=WAL')
+                    conn.executescript(schema)
+                    conn.commit()
+                finally:
+                    conn.close()
+                _initialized.add(db_path)
+    conn = sqlite3.connect(db_path, timeout=30, **kwargs)
+    if synchronous:
+        conn.execute(f'PRAGMA synchronous={synchronous}')
+    return conn
+
+
+def db_size(db_path):
+    """Bytes used by a database file and its write-ahead log"""
+    return sum(os.path.getsize(db_path + suffix)
+               for suffix in ('', '-wal') if os.path.exists(db_path + suffix))
+
+
+def shared(store_class, db_path):
+    """Process-wide store_class(db_path) instance, one per class and path"""
+    with _shared_lock:
+        key = (store_class, db_path)
+        if key not in _shared:
+            _shared[key] = store_class(db_path)
+        return _shared[key]
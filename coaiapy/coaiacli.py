@@ -1,38 +1,73 @@
 import argparse
+import importlib
 import os
 import json
 import sys
 import warnings
 import uuid
 import re
+import glob
 #ignore : RequestsDependencyWarning: Unable to find acceptable character detection dependency (chardet or charset_normalizer).
 warnings.filterwarnings("ignore", message="Unable to find acceptable character detection dependency")
 
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
-from coaiamodule import read_config, transcribe_audio, summarizer, tash, abstract_process_send, initial_setup, fetch_key_val
-from cofuse import (
-    get_comments, post_comment,
-    create_session_and_save, add_trace_node_and_save,
-    load_session_file,
-    create_score, apply_score_to_trace, create_score_for_target, list_scores, format_scores_table,
-    list_score_configs, get_score_config, create_score_config, export_score_configs, format_score_configs_table,
-    import_score_configs, format_import_preview, apply_score_config, list_available_configs, validate_score_value, get_config_with_auto_refresh,
-    list_presets, get_preset_by_name, format_presets_table, format_preset_display, install_preset, install_presets_interactive,
-    list_prompts, get_prompt, create_prompt, format_prompts_table, format_prompt_display,
-    list_datasets, get_dataset, create_dataset, format_datasets_table,
-    list_dataset_items, format_dataset_display, format_dataset_for_finetuning,
-    list_traces, list_projects, create_dataset_item, format_traces_table,
-    add_trace, add_observation, add_observations_batch, patch_trace_output,
-    get_trace_with_observations, format_trace_tree,
-    get_observation, format_observation_display,
-    upload_and_attach_media, get_media, format_media_display
-)
-from cogh import (
-    list_issues, get_issue, format_issues_table
-)
-from .pipeline import TemplateLoader, TemplateRenderer, PipelineTemplate, PipelineVariable, PipelineStep
-from .environment import EnvironmentManager, format_environment_table
+from coaiamodule import read_config, transcribe_audio, summarizer, tash, tash_many, fetch_many, abstract_process_send, initial_setup, fetch_key_val
+
+def _lazy(module_name, name, package=None):
+    """Stand-in for `from module_name import name` that imports on first call."""
+    resolved = []
+
+    def call(*args, **kwargs):
+        if not resolved:
+            resolved.append(getattr(importlib.import_module(module_name, package), name))
+        return resolved[0](*args, **kwargs)
+
+    call.__name__ = name
+    return call
+
+# Subcommand modules are imported on first use, so `coaia tash`/`coaia fetch`
+# do not pay for the Langfuse, templating and GitHub imports at startup.
+_LAZY_IMPORTS = {
+    ('cofuse', None): (
+        'get_comments', 'post_comment',
+        'create_session_and_save', 'add_trace_node_and_save',
+        'load_session_file',
+        'create_score', 'apply_score_to_trace', 'create_score_for_target', 'list_scores', 'format_scores_table',
+        'list_score_configs', 'get_score_config', 'create_score_config', 'export_score_configs', 'format_score_configs_table',
+        'import_score_configs', 'format_import_preview', 'apply_score_config', 'list_available_configs', 'validate_score_value', 'get_config_with_auto_refresh',
+        'read_score_rows', 'apply_scores_batch',
+        'list_presets', 'get_preset_by_name', 'format_presets_table', 'format_preset_display', 'install_preset', 'install_presets_interactive',
+        'list_prompts', 'get_prompt', 'create_prompt', 'format_prompts_table', 'format_prompt_display',
+        'list_datasets', 'get_dataset', 'create_dataset', 'format_datasets_table',
+        'list_dataset_items', 'format_dataset_display', 'format_dataset_for_finetuning', 'export_finetuning_dataset',
+        'list_traces', 'iter_traces', 'list_projects', 'create_dataset_item', 'format_traces_table',
+        'add_trace', 'add_observation', 'add_observations_batch', 'patch_trace_output',
+        'build_trace_event', 'build_observation_event', 'ingest_events', 'flush_outbox',
+        'sync_mirror', 'open_mirror', 'export_records',
+        'get_trace_with_observations', 'format_trace_tree', 'write_trace_tree',
+        'get_observation', 'format_observation_display',
+        'upload_and_attach_media', 'upload_media_directory', 'get_media', 'format_media_display',
+    ),
+    ('cogh', None): (
+        'list_issues', 'get_issue', 'format_issues_table',
+    ),
+    ('.pipeline', __package__): (
+        'TemplateLoader', 'TemplateRenderer', 'PipelineTemplate', 'PipelineVariable', 'PipelineStep',
+    ),
+    ('.environment', __package__): (
+        'EnvironmentManager', 'format_environment_table',
+    ),
+    ('.mediaindex', __package__): (
+        'get_media_index',
+    ),
+    ('.outbox', __package__): (
+        'get_outbox',
+    ),
+}
+for (_module_name, _package), _names in _LAZY_IMPORTS.items():
+    for _name in _names:
+        globals()[_name] = _lazy(_module_name, _name, _package)
 
 # Security validation functions
 def validate_uuid(value, field_name="ID"):
@@ -86,6 +121,52 @@ Usage:
     cat myfile.txt | coaia p TAG
 """
 
+def make_upload_progress_printer(stream=None):
+    """Progress callback for media uploads: one self-overwriting line, redrawn per whole percent"""
+    stream = stream or sys.stderr
+    last = [None]
+
+    def _print(sent, total):
+        percent = int(100 * sent / total) if total else 100
+        if percent == last[0]:
+            return
+        last[0] = percent
+        stream.write(f"\r⬆️  {sent / 1048576:.1f}/{total / 1048576:.1f} MiB ({percent}%)")
+        stream.flush()
+
+    return _print
+
+
+def collect_tash_items(directory=None, pattern=None, prefix='', stream=None):
+    """
+    Build (key, value) pairs for tash-many from a directory, a glob pattern,
+    or NDJSON lines ({"key": ..., "value": ...}) read from stream.
+    """
+    items = []
+    if directory:
+        for root, _, files in os.walk(directory):
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                key = os.path.relpath(path, directory).replace(os.sep, '/')
+                with open(path, 'r') as file:
+                    items.append((prefix + key, file.read()))
+    if pattern:
+        for path in sorted(glob.glob(pattern, recursive=True)):
+            if os.path.isfile(path):
+                with open(path, 'r') as file:
+                    items.append((prefix + path.replace(os.sep, '/'), file.read()))
+    if stream is not None:
+        for line_number, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if 'key' not in record or 'value' not in record:
+                raise ValueError(f"NDJSON line {line_number} must have 'key' and 'value'")
+            value = record['value']
+            items.append((record['key'], value if isinstance(value, str) else json.dumps(value)))
+    return items
+
 def tash_key_val(key, value, ttl=None, verbose=False):
     tash(key, value, ttl, verbose=verbose)
     print(f"Key: {key}  was just saved to memory.")
@@ -126,6 +207,14 @@ def main():
     parser_tash.add_argument('-T','--ttl', type=int, help="Time to live in seconds.",default=5555)
     parser_tash.add_argument('-v', '--verbose', action='store_true', help="Show detailed Redis connection information.")
 
+    # Subparser for 'tash-many' command
+    parser_tash_many = subparsers.add_parser('tash-many', help='Stash many key/value pairs to Redis in one pipelined request.')
+    parser_tash_many.add_argument('--dir', type=str, help="Stash every file in this directory (key = relative path).")
+    parser_tash_many.add_argument('--glob', type=str, help="Stash every file matching this glob pattern (key = path as matched).")
+    parser_tash_many.add_argument('--prefix', type=str, default='', help="Prefix added to every key built from file paths.")
+    parser_tash_many.add_argument('-T','--ttl', type=int, help="Time to live, as for tash.",default=5555)
+    parser_tash_many.add_argument('-v', '--verbose', action='store_true', help="Show detailed Redis connection information.")
+
     # Subparser for 'transcribe' command
     parser_transcribe = subparsers.add_parser('transcribe',aliases="t", help='Transcribe an audio file to text.')
     parser_transcribe.add_argument('file_path', type=str, help="The path to the audio file.")
@@ -171,13 +260,20 @@ def main():
     parser_fuse_prompts.add_argument('--type', type=str, choices=['text', 'chat'], default='text', help="Prompt type (text or chat)")
     parser_fuse_prompts.add_argument('-f', '--file', type=str, help="Read prompt content from file")
 
-    parser_fuse_ds = sub_fuse.add_parser('datasets', help="Manage datasets in Langfuse (list, get, create)")
-    parser_fuse_ds.add_argument('action', choices=['list','get','create'], help="Action to perform.")
+    parser_fuse_ds = sub_fuse.add_parser('datasets', help="Manage datasets in Langfuse (list, get, create, export)")
+    parser_fuse_ds.add_argument('action', choices=['list','get','create','export'], help="Action to perform (export: stream fine-tuning JSONL).")
     parser_fuse_ds.add_argument('name', nargs='?', help="Dataset name.")
     parser_fuse_ds.add_argument('--json', action='store_true', help="Output in JSON format (default: table format)")
     parser_fuse_ds.add_argument('-oft', '--openai-ft', action='store_true', help="Format output for OpenAI fine-tuning.")
     parser_fuse_ds.add_argument('-gft', '--gemini-ft', action='store_true', help="Format output for Gemini fine-tuning.")
     parser_fuse_ds.add_argument('--system-instruction', type=str, default="You are a helpful assistant", help="System instruction for fine-tuning formats.")
+    # Streaming fine-tuning export arguments
+    parser_fuse_ds.add_argument('-o', '--output', type=str, help="export: training JSONL file (default: stdout)")
+    parser_fuse_ds.add_argument('--validation-output', type=str, help="export: validation JSONL file")
+    parser_fuse_ds.add_argument('--validation-size', type=int, help="export: number of validation records, sampled uniformly")
+    parser_fuse_ds.add_argument('--validation-ratio', type=float, help="export: fraction of items (0-1) for validation, stable per item")
+    parser_fuse_ds.add_argument('--shuffle-buffer', type=int, default=0, help="export: shuffle training records through a buffer of this many records")
+    parser_fuse_ds.add_argument('--seed', type=int, help="export: random seed for reproducible sampling and shuffling")
     # Enhanced dataset creation arguments
     parser_fuse_ds.add_argument('--description', type=str, help="Description for the dataset")
     parser_fuse_ds.add_argument('--metadata', type=str, help="Metadata for the dataset (JSON string or simple text)")
@@ -218,6 +314,13 @@ def main():
     parser_fuse_sc_apply.add_argument('-v','--value', type=float, default=1.0, help="Score value")
     parser_fuse_sc_apply.add_argument('-c', '--comment', help="Optional comment for the score")
 
+    parser_fuse_sc_batch = sub_fuse_sc.add_parser('apply-batch', help="Apply many config-based scores from NDJSON or CSV through the ingestion batch API")
+    parser_fuse_sc_batch.add_argument('file', nargs='?', default='-', help="NDJSON or CSV file with trace_id/session_id, config, value[, comment, observation_id] (default: stdin)")
+    parser_fuse_sc_batch.add_argument('--format', choices=['ndjson', 'csv'], help="Input format (default: from file extension, else ndjson)")
+    parser_fuse_sc_batch.add_argument('--batch-size', type=int, default=500, help="Maximum scores per ingestion request (default: 500)")
+    parser_fuse_sc_batch.add_argument('--max-workers', type=int, default=4, help="Maximum concurrent ingestion requests (default: 4)")
+    parser_fuse_sc_batch.add_argument('--json', action='store_true', help="Print one JSON summary instead of an NDJSON line per row")
+
     parser_fuse_sc_list = sub_fuse_sc.add_parser('list')
     parser_fuse_sc_list.add_argument('--json', action='store_true', help="Output in JSON format (default: table format)")
 
@@ -289,6 +392,8 @@ def main():
     parser_fuse_traces = sub_fuse.add_parser('traces', help="List or manage traces and observations in Langfuse")
     parser_fuse_traces.add_argument('--json', action='store_true', help="Output in JSON format (default: table format)")
     parser_fuse_traces.add_argument('--include-observations', action='store_true', help="Include detailed observation data for each trace")
+    parser_fuse_traces.add_argument('--observations-mode', choices=['concurrent', 'bulk'], default='concurrent', help="How observations are fetched: one request per trace in parallel (concurrent) or paged by time window and grouped by trace (bulk)")
+    parser_fuse_traces.add_argument('--max-workers', type=int, default=8, help="Maximum concurrent observation requests (default: 8)")
     sub_fuse_traces = parser_fuse_traces.add_subparsers(dest='trace_action')
 
     parser_fuse_traces_add = sub_fuse_traces.add_parser('create', help='Create a new trace')
@@ -300,6 +405,7 @@ def main():
     parser_fuse_traces_add.add_argument('-o','--output', help="Output data (JSON string or plain text)")
     parser_fuse_traces_add.add_argument('-m','--metadata', help="Additional metadata as JSON string")
     parser_fuse_traces_add.add_argument('--export-env', action='store_true', help="Export shell environment variables for pipeline workflows")
+    parser_fuse_traces_add.add_argument('--enqueue', action='store_true', default=None, help="Queue in the local outbox and return immediately (send later with 'coaia fuse flush')")
 
     parser_fuse_obs_add = sub_fuse_traces.add_parser('add-observation', help='Add an observation to a trace')
     parser_fuse_obs_add.add_argument('trace_id', help="Trace ID to add observation to")
@@ -322,6 +428,7 @@ def main():
     parser_fuse_obs_add.add_argument('--usage', help="Usage information as JSON string (tokens, cost, etc.)")
     parser_fuse_obs_add.add_argument('--export-env', action='store_true', 
                                    help="Export COAIA_TRACE_ID, COAIA_LAST_OBSERVATION_ID environment variables")
+    parser_fuse_obs_add.add_argument('--enqueue', action='store_true', default=None, help="Queue in the local outbox and return immediately (send later with 'coaia fuse flush')")
 
     
 
@@ -332,6 +439,10 @@ def main():
     parser_fuse_traces_trace_view = sub_fuse_traces.add_parser('trace-view', aliases=['tv'], help='View a specific trace with its observations in tree format')
     parser_fuse_traces_trace_view.add_argument('trace_id', help="ID of the trace to view")
     parser_fuse_traces_trace_view.add_argument('--json', action='store_true', help="Output in JSON format")
+    parser_fuse_traces_trace_view.add_argument('--max-depth', type=int, help="Only expand this many observation levels")
+    parser_fuse_traces_trace_view.add_argument('--max-children', type=int, help="Show at most this many children per observation")
+    parser_fuse_traces_trace_view.add_argument('--show-orphans', action='store_true', help="Also show observations whose parent is not in the trace")
+    parser_fuse_traces_trace_view.add_argument('--no-payloads', action='store_true', help="Drop input/output from the trace and observations (structure only)")
 
     parser_fuse_obs_get = sub_fuse_traces.add_parser('get-observation', aliases=['obs-get', 'get-obs'], help='Get a specific observation by ID')
     parser_fuse_obs_get.add_argument('observation_id', help="Observation ID to retrieve")
@@ -343,6 +454,8 @@ def main():
     parser_fuse_obs_batch.add_argument('-f','--file', help="File containing observations (JSON or YAML format)")
     parser_fuse_obs_batch.add_argument('--format', choices=['json', 'yaml'], default='json', help="Input format (default: json)")
     parser_fuse_obs_batch.add_argument('--dry-run', action='store_true', help="Show what would be created without actually creating")
+    parser_fuse_obs_batch.add_argument('--batch-size', type=int, default=500, help="Maximum observations per ingestion request (default: 500)")
+    parser_fuse_obs_batch.add_argument('--max-workers', type=int, default=4, help="Maximum concurrent ingestion requests (default: 4)")
 
     # Add patch-output command to update trace output
     parser_fuse_patch_output = sub_fuse_traces.add_parser('patch-output', help='Update the output field of an existing trace')
@@ -350,9 +463,95 @@ def main():
     parser_fuse_patch_output.add_argument('output_data', nargs='?', help="Output data (JSON string or plain text, or read from stdin if not provided)")
     parser_fuse_patch_output.add_argument('-f','--file', help="File containing output data (JSON)")
     parser_fuse_patch_output.add_argument('--json', action='store_true', help="Treat output_data as JSON (default: auto-detect)")
+    parser_fuse_patch_output.add_argument('--enqueue', action='store_true', default=None, help="Queue in the local outbox and return immediately (send later with 'coaia fuse flush')")
+
+    parser_fuse_traces_list = sub_fuse_traces.add_parser('list', help='List traces (one page, or all pages with --all)')
+    # SUPPRESS keeps the default from overwriting a --json given before 'list'
+    parser_fuse_traces_list.add_argument('--json', action='store_true', default=argparse.SUPPRESS, help="Output in JSON format")
+    parser_fuse_traces_list.add_argument('--all', action='store_true', help="Walk all pages instead of returning a single page")
+    parser_fuse_traces_list.add_argument('--stream', action='store_true', help="Emit one JSON trace per line (NDJSON) as pages arrive")
+    parser_fuse_traces_list.add_argument('--session-id', help="Filter by session ID")
+    parser_fuse_traces_list.add_argument('--user-id', help="Filter by user ID")
+    parser_fuse_traces_list.add_argument('--name', help="Filter by trace name")
+    parser_fuse_traces_list.add_argument('--from', dest='from_timestamp', help="Only traces from this timestamp (ISO 8601)")
+    parser_fuse_traces_list.add_argument('--to', dest='to_timestamp', help="Only traces before this timestamp (ISO 8601)")
+    parser_fuse_traces_list.add_argument('--order-by', help="Sort order (e.g. timestamp.asc)")
+    parser_fuse_traces_list.add_argument('--page', type=int, help="Page number (starts at 1)")
+    parser_fuse_traces_list.add_argument('--limit', type=int, help="Items per page")
 
     parser_fuse_projects = sub_fuse.add_parser('projects', help="List projects in Langfuse")
 
+    # Offline outbox (~/.coaia/outbox) for queued trace/observation events
+    parser_fuse_flush = sub_fuse.add_parser('flush', help="Send trace/observation events queued in the local outbox to Langfuse")
+    parser_fuse_flush.add_argument('--max-events', type=int, help="Send at most this many events (default: all that are due)")
+    parser_fuse_flush.add_argument('--batch-size', type=int, default=500, help="Maximum events per ingestion request (default: 500)")
+    parser_fuse_flush.add_argument('--max-workers', type=int, default=4, help="Maximum concurrent ingestion requests (default: 4)")
+    parser_fuse_flush.add_argument('--retry-dead', action='store_true', help="Requeue events that previously failed permanently before flushing")
+    parser_fuse_flush.add_argument('--json', action='store_true', help="Output the result as JSON")
+
+    # Local mirror (~/.coaia/mirror) for offline listing queries
+    parser_fuse_sync = sub_fuse.add_parser('sync', help="Incrementally mirror traces, observations and scores into a local SQLite database")
+    parser_fuse_sync.add_argument('--entities', nargs='+', choices=['traces', 'observations', 'scores'], default=['traces', 'observations', 'scores'], help="What to sync (default: all)")
+    parser_fuse_sync.add_argument('--full', action='store_true', help="Ignore the saved watermarks and fetch everything again")
+    parser_fuse_sync.add_argument('--overlap-minutes', type=float, default=10, help="Re-read this many minutes before each watermark to catch late updates (default: 10)")
+    parser_fuse_sync.add_argument('--json', action='store_true', help="Output the result as JSON")
+
+    parser_fuse_export = sub_fuse.add_parser('export', help="Stream traces, observations or scores into Parquet, Arrow IPC or JSON Lines files")
+    parser_fuse_export.add_argument('entity', choices=['traces', 'observations', 'scores'], help="What to export")
+    parser_fuse_export.add_argument('-o', '--output', required=True, help="Output file (.parquet, .arrow/.feather, .jsonl) or '-' for JSON Lines on stdout")
+    parser_fuse_export.add_argument('--format', choices=['parquet', 'arrow', 'jsonl'], help="Output format (default: from the file extension; Parquet/Arrow need pyarrow)")
+    parser_fuse_export.add_argument('--include-payloads', action='store_true', help="Also export input/output as JSON string columns")
+    parser_fuse_export.add_argument('--row-group-size', type=int, default=50000, help="Rows per row group / write (default: 50000)")
+    parser_fuse_export.add_argument('--from', dest='from_timestamp', help="Only records from this timestamp (ISO 8601; observation start time)")
+    parser_fuse_export.add_argument('--to', dest='to_timestamp', help="Only records before this timestamp (ISO 8601)")
+    parser_fuse_export.add_argument('--name', help="Filter by trace/observation/score name")
+    parser_fuse_export.add_argument('--trace-id', help="Filter observations or scores by trace ID")
+    parser_fuse_export.add_argument('--user-id', help="Filter by user ID")
+    parser_fuse_export.add_argument('--session-id', help="Filter traces or scores by session ID")
+    parser_fuse_export.add_argument('--type', dest='observation_type', choices=['EVENT', 'SPAN', 'GENERATION'], help="Filter observations by type")
+    parser_fuse_export.add_argument('--limit', type=int, help="Stop after this many records")
+    parser_fuse_export.add_argument('--max-workers', type=int, default=4, help="Maximum concurrent page requests (default: 4)")
+
+    parser_fuse_mirror = sub_fuse.add_parser('mirror', help="Query the local mirror filled by 'coaia fuse sync' (no API calls)")
+    sub_fuse_mirror = parser_fuse_mirror.add_subparsers(dest='mirror_action')
+    sub_fuse_mirror.add_parser('stats', help='Show row counts, watermarks and database size')
+    parser_mirror_traces = sub_fuse_mirror.add_parser('traces', help='List mirrored traces (newest first)')
+    parser_mirror_traces.add_argument('--session-id', help="Filter by session ID")
+    parser_mirror_traces.add_argument('--user-id', help="Filter by user ID")
+    parser_mirror_traces.add_argument('--name', help="Filter by trace name")
+    parser_mirror_traces.add_argument('--from', dest='from_timestamp', help="Only traces from this timestamp (ISO 8601)")
+    parser_mirror_traces.add_argument('--to', dest='to_timestamp', help="Only traces before this timestamp (ISO 8601)")
+    parser_mirror_traces.add_argument('--limit', type=int, default=50, help="Maximum traces (default: 50, 0 for all)")
+    parser_mirror_traces.add_argument('--json', action='store_true', help="Output in JSON format")
+    parser_mirror_tv = sub_fuse_mirror.add_parser('trace-view', aliases=['tv'], help='Show a mirrored trace with its observations as a tree')
+    parser_mirror_tv.add_argument('trace_id', help="ID of the trace to view")
+    parser_mirror_tv.add_argument('--json', action='store_true', help="Output in JSON format")
+    parser_mirror_obs = sub_fuse_mirror.add_parser('observations', aliases=['obs'], help='List mirrored observations as NDJSON')
+    parser_mirror_obs.add_argument('--trace-id', help="Filter by trace ID")
+    parser_mirror_obs.add_argument('--type', dest='observation_type', choices=['EVENT', 'SPAN', 'GENERATION'], help="Filter by observation type")
+    parser_mirror_obs.add_argument('--name', help="Filter by observation name")
+    parser_mirror_obs.add_argument('--level', choices=['DEBUG', 'DEFAULT', 'WARNING', 'ERROR'], help="Filter by level")
+    parser_mirror_obs.add_argument('--from', dest='from_timestamp', help="Only observations starting at/after this time (ISO 8601)")
+    parser_mirror_obs.add_argument('--to', dest='to_timestamp', help="Only observations starting before this time (ISO 8601)")
+    parser_mirror_obs.add_argument('--limit', type=int, help="Maximum observations")
+    parser_mirror_scores = sub_fuse_mirror.add_parser('scores', help='List mirrored scores (newest first)')
+    parser_mirror_scores.add_argument('--trace-id', help="Filter by trace ID")
+    parser_mirror_scores.add_argument('--name', help="Filter by score name")
+    parser_mirror_scores.add_argument('--from', dest='from_timestamp', help="Only scores from this timestamp (ISO 8601)")
+    parser_mirror_scores.add_argument('--to', dest='to_timestamp', help="Only scores before this timestamp (ISO 8601)")
+    parser_mirror_scores.add_argument('--limit', type=int, default=50, help="Maximum scores (default: 50, 0 for all)")
+    parser_mirror_scores.add_argument('--json', action='store_true', help="Output in JSON format")
+    parser_mirror_sql = sub_fuse_mirror.add_parser('sql', help='Run a read-only SQL query against the mirror (NDJSON rows)')
+    parser_mirror_sql.add_argument('query', help="SQL query, e.g. \"SELECT name, COUNT(*) FROM traces GROUP BY name\"")
+
+    parser_fuse_outbox = sub_fuse.add_parser('outbox', help="Inspect or maintain the local outbox of queued events")
+    sub_fuse_outbox = parser_fuse_outbox.add_subparsers(dest='outbox_action')
+    sub_fuse_outbox.add_parser('stats', help='Show pending, retrying and dead event counts')
+    parser_fuse_outbox_dead = sub_fuse_outbox.add_parser('dead', help='List events that will not be retried, with their last error')
+    parser_fuse_outbox_dead.add_argument('--limit', type=int, default=100, help="Maximum events to show (default: 100)")
+    parser_fuse_outbox_purge = sub_fuse_outbox.add_parser('purge', help='Delete dead events')
+    parser_fuse_outbox_purge.add_argument('--all', action='store_true', help="Delete every queued event, not only dead ones")
+
     # Media upload/attachment management
     parser_fuse_media = sub_fuse.add_parser('media', help="Upload and manage media attachments in Langfuse")
     sub_fuse_media = parser_fuse_media.add_subparsers(dest='media_action')
@@ -365,8 +564,33 @@ def main():
     parser_media_upload.add_argument('-f', '--field', choices=['input', 'output', 'metadata'], default='input',
                                     help='Field to attach to (default: input)')
     parser_media_upload.add_argument('-c', '--content-type', help='MIME type (auto-detected if not provided)')
+    parser_media_upload.add_argument('--no-index', action='store_true', help='Ignore the local media index (always hash and ask Langfuse)')
+    parser_media_upload.add_argument('--progress', action='store_true', help='Show upload progress on stderr')
     parser_media_upload.add_argument('--json', action='store_true', help='Output in JSON format')
 
+    # Upload a directory of files
+    parser_media_upload_dir = sub_fuse_media.add_parser('upload-dir', help='Upload all files in a directory to a trace (concurrent, resumable)')
+    parser_media_upload_dir.add_argument('directory', help='Directory containing the files')
+    parser_media_upload_dir.add_argument('trace_id', help='Trace ID to attach media to')
+    parser_media_upload_dir.add_argument('-o', '--observation-id', help='Parent observation for the per-file observations')
+    parser_media_upload_dir.add_argument('-f', '--field', choices=['input', 'output', 'metadata'], default='input',
+                                        help='Field to attach to (default: input)')
+    parser_media_upload_dir.add_argument('--glob', default='*', help="Filename pattern (default: '*')")
+    parser_media_upload_dir.add_argument('-r', '--recursive', action='store_true', help='Include subdirectories')
+    parser_media_upload_dir.add_argument('--max-workers', type=int, default=8, help='Maximum concurrent uploads (default: 8)')
+    parser_media_upload_dir.add_argument('--hash-workers', type=int, help='Hashing processes (default: CPU count)')
+    parser_media_upload_dir.add_argument('--manifest', help='Manifest path (default: <directory>/.coaia-media-manifest.json)')
+    parser_media_upload_dir.add_argument('--no-attach', action='store_true', help='Only upload/register media, do not create observations')
+    parser_media_upload_dir.add_argument('--json', action='store_true', help='Output in JSON format')
+
+    # Local media index maintenance
+    parser_media_index = sub_fuse_media.add_parser('index', help='Inspect or maintain the local media index (~/.coaia/media-index)')
+    sub_media_index = parser_media_index.add_subparsers(dest='media_index_action')
+    sub_media_index.add_parser('stats', help='Show index location, entry count and size')
+    parser_media_index_prune = sub_media_index.add_parser('prune', help='Drop entries for missing or changed files')
+    parser_media_index_prune.add_argument('--older-than', type=float, metavar='DAYS', help='Also drop entries unused for this many days')
+    sub_media_index.add_parser('compact', help='Reclaim space (checkpoint and VACUUM)')
+
     # Get media details
     parser_media_get = sub_fuse_media.add_parser('get', help='Get media object details')
     parser_media_get.add_argument('media_id', help='Media ID to retrieve')
@@ -391,6 +615,12 @@ def main():
     parser_fetch.add_argument('-O', '--output', type=str, help="Filename to save the fetched value.")
     parser_fetch.add_argument('-v', '--verbose', action='store_true', help="Show detailed Redis connection information.")
 
+    # Subparser for 'fetch-many' command
+    parser_fetch_many = subparsers.add_parser('fetch-many', help='Fetch many keys from Redis in one request (NDJSON output).')
+    parser_fetch_many.add_argument('keys', type=str, nargs='*', help="Keys to fetch (read one per line from stdin if omitted).")
+    parser_fetch_many.add_argument('-O', '--output-dir', type=str, help="Write each value to a file named after its key in this directory.")
+    parser_fetch_many.add_argument('-v', '--verbose', action='store_true', help="Show detailed Redis connection information.")
+
     # Pipeline template management commands
     parser_pipeline = subparsers.add_parser('pipeline', help='Manage pipeline templates for automated workflows')
     sub_pipeline = parser_pipeline.add_subparsers(dest='pipeline_action')
@@ -552,6 +782,24 @@ def main():
             tash_key_val(args.key, args.value, args.ttl, verbose=verbose)
         else:
             print("Error: You must provide a value or use the --file flag to read from a file.")
+    elif args.command == 'tash-many':
+        stream = sys.stdin if not (args.dir or args.glob) and not sys.stdin.isatty() else None
+        if args.dir and not os.path.isdir(args.dir):
+            print(f"Error: Directory '{args.dir}' does not exist.")
+            return
+        try:
+            items = collect_tash_items(args.dir, args.glob, args.prefix, stream)
+        except (ValueError, UnicodeDecodeError) as e:
+            print(f"Error: {e}")
+            return
+        if not items:
+            print("Error: Nothing to stash. Use --dir, --glob, or pipe NDJSON on stdin.")
+            return
+        stored = tash_many(items, args.ttl, verbose=getattr(args, 'verbose', False))
+        if stored is None:
+            print("Error: Stashing failed.")
+            sys.exit(2)
+        print(f"Stashed {stored} keys to memory.")
     elif args.command == 'transcribe' or args.command == 't':
         transcribed_text = transcribe_audio(args.file_path)
         if args.output:
@@ -580,6 +828,37 @@ def main():
     elif args.command == 'fetch':
         verbose = getattr(args, 'verbose', False)
         fetch_key_val(args.key, args.output, verbose=verbose)
+    elif args.command == 'fetch-many':
+        keys = args.keys
+        if not keys and not sys.stdin.isatty():
+            keys = [line.strip() for line in sys.stdin if line.strip()]
+        if not keys:
+            print("Error: No keys provided.")
+            return
+        values = fetch_many(keys, verbose=getattr(args, 'verbose', False))
+        if values is None:
+            print("Error: Redis connection failed.")
+            sys.exit(2)
+        missing = [k for k in keys if values.get(k) is None]
+        for key in keys:
+            value = values.get(key)
+            if value is None:
+                continue
+            if args.output_dir:
+                path = os.path.abspath(os.path.join(args.output_dir, key))
+                if not path.startswith(os.path.abspath(args.output_dir) + os.sep):
+                    print(f"Error: Key '{key}' escapes the output directory, skipped.", file=sys.stderr)
+                    continue
+                os.makedirs(os.path.dirname(path) or args.output_dir, exist_ok=True)
+                with open(path, 'w') as f:
+                    f.write(value)
+            else:
+                print(json.dumps({"key": key, "value": value}))
+        if args.output_dir:
+            print(f"Fetched {len(keys) - len(missing)} keys to {args.output_dir}")
+        if missing:
+            print(f"Error: {len(missing)} key(s) not found: {', '.join(missing)}", file=sys.stderr)
+            sys.exit(1)
     elif args.command == 'fuse':
         if args.fuse_command == 'comments':
             if args.action == 'list':
@@ -681,20 +960,41 @@ def main():
                     print("Error: dataset name missing.")
                     return
                 
+                if args.openai_ft or args.gemini_ft:
+                    try:
+                        export_finetuning_dataset(args.name, 'openai' if args.openai_ft else 'gemini',
+                                                  args.system_instruction)
+                    except Exception as e:
+                        print(f"Error: {e}", file=sys.stderr)
+                        sys.exit(1)
+                    return
+
                 dataset_json = get_dataset(args.name)
                 items_json = list_dataset_items(args.name)
 
-                if args.openai_ft:
-                    print(format_dataset_for_finetuning(items_json, 'openai', args.system_instruction))
-                elif args.gemini_ft:
-                    print(format_dataset_for_finetuning(items_json, 'gemini', args.system_instruction))
-                elif args.json:
+                if args.json:
                     dataset_data = json.loads(dataset_json)
                     items_data = json.loads(items_json)
                     dataset_data['items'] = items_data
                     print(json.dumps(dataset_data, indent=2))
                 else:
                     print(format_dataset_display(dataset_json, items_json))
+            elif args.action == 'export':
+                if not args.name:
+                    print("Error: dataset name missing.")
+                    return
+                try:
+                    counts = export_finetuning_dataset(
+                        args.name, 'gemini' if args.gemini_ft else 'openai', args.system_instruction,
+                        output=args.output, validation_output=args.validation_output,
+                        validation_size=args.validation_size, validation_ratio=args.validation_ratio,
+                        shuffle_buffer=args.shuffle_buffer, seed=args.seed
+                    )
+                except Exception as e:
+                    print(f"Error: {e}", file=sys.stderr)
+                    sys.exit(1)
+                print(f"Exported {counts['train']} training and {counts['validation']} validation records "
+                      f"({counts['skipped']} items without input/expected output skipped)", file=sys.stderr)
             elif args.action == 'create':
                 if not args.name:
                     print("Error: dataset name missing.")
@@ -769,6 +1069,27 @@ def main():
                     print(f"Error: {e}")
                     return
                 print(result)
+            elif args.scores_action == 'apply-batch':
+                fmt = args.format or ('csv' if args.file.lower().endswith('.csv') else 'ndjson')
+                try:
+                    if args.file == '-':
+                        rows = read_score_rows(sys.stdin, fmt)
+                    else:
+                        with open(args.file, newline='') as f:
+                            rows = read_score_rows(f, fmt)
+                except (OSError, ValueError) as e:
+                    print(f"Error: {e}", file=sys.stderr)
+                    sys.exit(1)
+                summary = apply_scores_batch(rows, max_batch_events=args.batch_size, max_workers=args.max_workers)
+                if args.json:
+                    print(json.dumps(summary, indent=2))
+                else:
+                    for report in summary['results']:
+                        print(json.dumps(report))
+                print(f"Created {summary['created']}, failed {summary['failed']}, invalid {summary['invalid']} "
+                      f"of {len(rows)} scores in {summary['batches']} batches", file=sys.stderr)
+                if summary['failed'] or summary['invalid']:
+                    sys.exit(1)
             elif args.scores_action == 'list':
                 scores_data = list_scores()
                 if args.json:
@@ -976,7 +1297,8 @@ def main():
                     name=args.name,
                     input_data=input_data,
                     output_data=output_data,
-                    metadata=metadata
+                    metadata=metadata,
+                    enqueue=args.enqueue
                 )
                 
                 # Handle environment variable export
@@ -1036,7 +1358,8 @@ def main():
                     end_time=getattr(args, 'end_time', None),
                     level=args.level,
                     model=args.model,
-                    usage=usage
+                    usage=usage,
+                    enqueue=args.enqueue
                 )
                 
                 # Handle environment variable export
@@ -1073,7 +1396,9 @@ def main():
                     args.trace_id,
                     observations_data,
                     format_type=args.format,
-                    dry_run=args.dry_run
+                    dry_run=args.dry_run,
+                    max_batch_events=args.batch_size,
+                    max_workers=args.max_workers
                 )
                 print(result)
             elif args.trace_action == 'patch-output':
@@ -1122,22 +1447,24 @@ def main():
                     return
 
                 # Patch the trace output
-                result = patch_trace_output(args.trace_id, parsed_output)
+                result = patch_trace_output(args.trace_id, parsed_output, enqueue=args.enqueue)
                 print(result)
             elif args.trace_action in ['session-view', 'sv']:
                 session_id = args.session_id
-                traces_data = list_traces(session_id=session_id, include_observations=getattr(args, 'include_observations', False))
+                traces_data = list_traces(session_id=session_id, include_observations=getattr(args, 'include_observations', False), observations_mode=args.observations_mode, max_workers=args.max_workers)
                 if args.json:
                     print(traces_data)
                 else:
                     print(format_traces_table(traces_data))
             elif args.trace_action in ['trace-view', 'tv']:
                 trace_id = args.trace_id
-                trace_data = get_trace_with_observations(trace_id)
+                trace_data = get_trace_with_observations(trace_id, include_payloads=not args.no_payloads,
+                                                         max_workers=args.max_workers)
                 if args.json:
                     print(trace_data)
                 else:
-                    print(format_trace_tree(trace_data))
+                    write_trace_tree(trace_data, sys.stdout, max_depth=args.max_depth,
+                                     max_children=args.max_children, show_orphans=args.show_orphans)
             elif args.trace_action in ['get-observation', 'obs-get', 'get-obs']:
                 observation_id = args.observation_id
                 obs_data = get_observation(observation_id)
@@ -1145,12 +1472,151 @@ def main():
                     print(obs_data)
                 else:
                     print(format_observation_display(obs_data))
+            elif args.trace_action == 'list' and (args.all or args.stream):
+                filters = dict(
+                    session_id=args.session_id, user_id=args.user_id, name=args.name,
+                    from_timestamp=args.from_timestamp, to_timestamp=args.to_timestamp,
+                    order_by=args.order_by
+                )
+                if args.all:
+                    traces_iter = iter_traces(limit=args.limit or 100, start_page=args.page or 1, **filters)
+                else:
+                    traces_iter = iter(json.loads(list_traces(page=args.page, limit=args.limit, **filters)))
+                if args.stream:
+                    try:
+                        for trace in traces_iter:
+                            sys.stdout.write(json.dumps(trace) + "\n")
+                    except BrokenPipeError:
+                        # Downstream consumer (e.g. head) closed the pipe
+                        sys.stderr.close()
+                        return
+                    sys.stdout.flush()
+                else:
+                    traces_data = json.dumps(list(traces_iter), indent=2)
+                    if args.json:
+                        print(traces_data)
+                    else:
+                        print(format_traces_table(traces_data))
+            elif args.trace_action == 'list':
+                traces_data = list_traces(
+                    session_id=args.session_id, user_id=args.user_id, name=args.name,
+                    from_timestamp=args.from_timestamp, to_timestamp=args.to_timestamp,
+                    order_by=args.order_by, page=args.page, limit=args.limit,
+                    include_observations=getattr(args, 'include_observations', False),
+                    observations_mode=args.observations_mode, max_workers=args.max_workers
+                )
+                if args.json:
+                    print(traces_data)
+                else:
+                    print(format_traces_table(traces_data))
             else:
-                traces_data = list_traces(include_observations=getattr(args, 'include_observations', False))
+                traces_data = list_traces(include_observations=getattr(args, 'include_observations', False), observations_mode=args.observations_mode, max_workers=args.max_workers)
                 if args.json:
                     print(traces_data)
                 else:
                     print(format_traces_table(traces_data))
+        elif args.fuse_command == 'flush':
+            if args.retry_dead:
+                get_outbox().retry_dead()
+            result = flush_outbox(max_events=args.max_events, max_batch_events=args.batch_size,
+                                  max_workers=args.max_workers)
+            if args.json:
+                print(json.dumps(result, indent=2))
+            else:
+                print(f"Sent {result['sent']} events in {result['batches']} batches, "
+                      f"{result['failed']} failed ({result['dead']} dead), {result['pending']} pending")
+            if result['failed']:
+                sys.exit(1)
+        elif args.fuse_command == 'sync':
+            def report(entity, fetched):
+                print(f"\r{entity}: {fetched} synced", end='', file=sys.stderr, flush=True)
+
+            result = sync_mirror(entities=args.entities, full=args.full,
+                                 overlap_seconds=args.overlap_minutes * 60,
+                                 progress=None if args.json else report)
+            if args.json:
+                print(json.dumps(result, indent=2))
+            else:
+                print(file=sys.stderr)
+                for entity, info in result['entities'].items():
+                    print(f"{entity}: {info['fetched']} fetched (since {info['from'] or 'the beginning'}), "
+                          f"watermark {info['watermark']}")
+                print(f"Mirror: {result['path']}")
+        elif args.fuse_command == 'export':
+            to_stdout = args.output == '-'
+
+            def report(rows):
+                print(f"\r{args.entity}: {rows} rows written", end='', file=sys.stderr, flush=True)
+
+            try:
+                result = export_records(
+                    args.entity, args.output, fmt=args.format, include_payloads=args.include_payloads,
+                    row_group_size=args.row_group_size, from_timestamp=args.from_timestamp,
+                    to_timestamp=args.to_timestamp, name=args.name, trace_id=args.trace_id,
+                    user_id=args.user_id, session_id=args.session_id, observation_type=args.observation_type,
+                    max_workers=args.max_workers, limit=args.limit, progress=None if to_stdout else report
+                )
+            except Exception as e:
+                print(f"\nError: {e}", file=sys.stderr)
+                sys.exit(1)
+            if not to_stdout:
+                print(file=sys.stderr)
+            if result['warning']:
+                print(f"Warning: {result['warning']}", file=sys.stderr)
+            print(f"Exported {result['rows']} {args.entity} to {result['path']} "
+                  f"({result['format']}, {result['row_groups']} row groups)", file=sys.stderr if to_stdout else sys.stdout)
+        elif args.fuse_command == 'mirror':
+            mirror = open_mirror()
+            if args.mirror_action == 'traces':
+                traces = mirror.query_traces(session_id=args.session_id, user_id=args.user_id, name=args.name,
+                                             from_timestamp=args.from_timestamp, to_timestamp=args.to_timestamp,
+                                             limit=args.limit or None)
+                print(json.dumps(traces, indent=2) if args.json else format_traces_table(traces))
+            elif args.mirror_action in ['trace-view', 'tv']:
+                trace = mirror.get_trace(args.trace_id)
+                if args.json:
+                    print(json.dumps(trace, indent=2))
+                else:
+                    write_trace_tree(trace, sys.stdout)
+            elif args.mirror_action in ['observations', 'obs']:
+                for obs in mirror.query_observations(trace_id=args.trace_id, observation_type=args.observation_type,
+                                                     name=args.name, level=args.level,
+                                                     from_start_time=args.from_timestamp,
+                                                     to_start_time=args.to_timestamp, limit=args.limit):
+                    print(json.dumps(obs))
+            elif args.mirror_action == 'scores':
+                scores = mirror.query_scores(trace_id=args.trace_id, name=args.name,
+                                             from_timestamp=args.from_timestamp, to_timestamp=args.to_timestamp,
+                                             limit=args.limit or None)
+                print(json.dumps(scores, indent=2) if args.json else format_scores_table(scores))
+            elif args.mirror_action == 'sql':
+                try:
+                    rows = mirror.execute(args.query)
+                except Exception as e:
+                    print(f"Error: {e}")
+                    sys.exit(1)
+                for row in rows:
+                    print(json.dumps(row))
+            else:
+                stats = mirror.stats()
+                print(f"Mirror: {stats['path']} ({stats['bytes']} bytes)")
+                for entity, info in stats['entities'].items():
+                    print(f"{entity}: {info['rows']} rows, watermark {info.get('watermark')}")
+        elif args.fuse_command == 'outbox':
+            outbox = get_outbox()
+            if args.outbox_action == 'dead':
+                for item in outbox.dead_events(limit=args.limit):
+                    print(json.dumps({'id': item['id'], 'attempts': item['attempts'], 'error': item['error']}))
+            elif args.outbox_action == 'purge':
+                removed = outbox.purge(dead_only=not args.all)
+                print(f"Removed {removed} events")
+            else:
+                stats = outbox.stats()
+                print(f"Outbox: {stats['path']}")
+                print(f"Pending: {stats['pending']} ({stats['retrying']} retrying)")
+                print(f"Dead: {stats['dead']}")
+                if stats['oldest_age_seconds'] is not None:
+                    print(f"Oldest pending: {stats['oldest_age_seconds']}s")
         elif args.fuse_command == 'projects':
             print(list_projects())
         elif args.fuse_command == 'media':
@@ -1161,8 +1627,12 @@ def main():
                     trace_id=args.trace_id,
                     field=args.field,
                     observation_id=getattr(args, 'observation_id', None),
-                    content_type=getattr(args, 'content_type', None)
+                    content_type=getattr(args, 'content_type', None),
+                    use_index=not args.no_index,
+                    progress=make_upload_progress_printer() if args.progress else None
                 )
+                if args.progress:
+                    print(file=sys.stderr)
 
                 if args.json:
                     print(json.dumps(result, indent=2))
@@ -1177,6 +1647,50 @@ def main():
                         print(f"❌ Upload failed: {result['error']}")
                         sys.exit(1)
 
+            elif args.media_action == 'upload-dir':
+                try:
+                    result = upload_media_directory(
+                        args.directory, args.trace_id,
+                        field=args.field,
+                        observation_id=args.observation_id,
+                        pattern=args.glob,
+                        recursive=args.recursive,
+                        max_workers=args.max_workers,
+                        hash_workers=args.hash_workers,
+                        manifest_path=args.manifest,
+                        attach=not args.no_attach
+                    )
+                except ValueError as e:
+                    print(f"❌ {e}")
+                    sys.exit(1)
+
+                if args.json:
+                    print(json.dumps(result, indent=2))
+                else:
+                    print(f"📁 {result['files']} files: {result['uploaded']} uploaded, "
+                          f"{result['deduplicated']} already stored, {result['skipped']} done in a previous run, "
+                          f"{result['failed']} failed")
+                    for item in result['results']:
+                        if item['status'] == 'failed':
+                            print(f"❌ {item['path']}: {item['error']}")
+                    print(f"📝 Manifest: {result['manifest']}")
+                if not result['success']:
+                    sys.exit(1)
+
+            elif args.media_action == 'index':
+                index = get_media_index()
+                if args.media_index_action == 'prune':
+                    removed = index.prune(older_than_days=args.older_than)
+                    print(f"Removed {removed} stale entries")
+                elif args.media_index_action == 'compact':
+                    stats = index.compact()
+                    print(f"Compacted {stats['path']}: {stats['entries']} entries, {stats['bytes']} bytes")
+                else:
+                    stats = index.stats()
+                    print(f"Index: {stats['path']}")
+                    print(f"Entries: {stats['entries']} ({stats['distinct_hashes']} distinct files)")
+                    print(f"Size: {stats['bytes']} bytes")
+
             elif args.media_action == 'get':
                 # Get media object details
                 media_json = get_media(args.media_id)
@@ -1370,8 +1884,9 @@ def main():
                 # Generate trace ID if not provided
                 trace_id = args.trace_id if args.trace_id else str(uuid.uuid4())
                 
-                # Create trace first
-                trace_result = add_trace(
+                # Build the trace and all observations locally, then send them
+                # in one ingestion batch (split only if it exceeds the size limit)
+                events = [build_trace_event(
                     trace_id=trace_id,
                     user_id=args.user_id,
                     session_id=args.session_id,
@@ -1381,12 +1896,9 @@ def main():
                         "template_version": template.version,
                         "variables": variables
                     }
-                )
+                )]
                 
-                print(f"Created trace: {trace_id}")
-                
-                # Create observations
-                observation_ids = {}  # Track created observations for parent references
+                observation_ids = {}  # Track observation IDs for parent references
                 
                 for obs_data in rendered_observations:
                     # Generate observation ID
@@ -1399,8 +1911,7 @@ def main():
                         if parent_name in observation_ids:
                             parent_id = observation_ids[parent_name]
                     
-                    # Create observation
-                    obs_result = add_observation(
+                    events.append(build_observation_event(
                         observation_id=obs_id,
                         trace_id=trace_id,
                         observation_type=obs_data['type'],
@@ -1409,11 +1920,25 @@ def main():
                         output_data=obs_data['variables'].get('output') if obs_data.get('variables') else None,
                         metadata=obs_data.get('metadata'),
                         parent_observation_id=parent_id
-                    )
+                    ))
                     
                     # Store observation ID for future parent references
                     observation_ids[obs_data['name']] = obs_id
-                    print(f"Created observation: {obs_data['name']} ({obs_id})")
+                
+                ingest_result = ingest_events(events)
+                failed_event_ids = {err.get('id') for err in ingest_result['errors']}
+                
+                if trace_id + "-event" in failed_event_ids:
+                    print(f"Failed to create trace: {trace_id}")
+                else:
+                    print(f"Created trace: {trace_id}")
+                for obs_name, obs_id in observation_ids.items():
+                    if obs_id + "-event" in failed_event_ids:
+                        print(f"Failed to create observation: {obs_name} ({obs_id})")
+                    else:
+                        print(f"Created observation: {obs_name} ({obs_id})")
+                for err in ingest_result['errors']:
+                    print(f"  Ingestion error [{err.get('status')}] {err.get('id')}: {err.get('message', err.get('error', ''))}")
                 
                 # Export environment variables if requested
                 if args.export_env:
@@ -1,8 +1,8 @@
-import requests
 import json
 import os
-import markdown
 import sys
+import threading
+import time
 from urllib.parse import urlparse
 
 # Redis is imported lazily to support environments where redis is not available
@@ -17,6 +17,18 @@ def _get_redis():
         _redis = redis
     return _redis
 
+# requests and markdown are only needed by the OpenAI/markdown helpers; importing
+# them lazily keeps `coaia tash`/`coaia fetch` startup fast
+def _get_requests():
+    """Lazy import of requests."""
+    import requests
+    return requests
+
+def _get_markdown():
+    """Lazy import of markdown."""
+    import markdown
+    return markdown
+
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
 # version in pyrec prod
@@ -107,160 +119,290 @@ def merge_configs(base_config, override_config):
             merged[key] = value
     return merged
 
-def read_config(env_path=None):
-    global config
-    global _loaded_env_path
+# read_config() keeps the resolved config in memory. Source files are re-checked
+# (stat only, no parsing) at most every CONFIG_CHECK_INTERVAL seconds and the
+# config is rebuilt only when a file's mtime/size or a tracked env var changed.
+CONFIG_CHECK_INTERVAL = float(os.getenv('COAIAPY_CONFIG_CHECK_INTERVAL', '2.0'))
+
+# Environment variables consulted by _build_config(); changing any invalidates the cache
+_CONFIG_ENV_KEYS = (
+    'HOME', 'OPENAI_API_KEY', 'AWS_KEY_ID', 'AWS_SECRET_KEY', 'AWS_REGION',
+    'UPSTASH_REDIS_REST_URL', 'KV_REST_API_URL', 'UPSTASH_REDIS_REST_TOKEN', 'KV_REST_API_TOKEN',
+    'KV_URL', 'REDIS_URL', 'REDIS_HOST', 'UPSTASH_HOST', 'REDIS_PORT', 'REDIS_PASSWORD', 'UPSTASH_PASSWORD',
+    'LANGFUSE_SECRET_KEY', 'LANGFUSE_PUBLIC_KEY', 'LANGFUSE_HOST', 'LANGFUSE_AUTH3',
+    'LANGFUSE_HTTP_POOL_CONNECTIONS', 'LANGFUSE_HTTP_POOL_MAXSIZE', 'LANGFUSE_HTTP_MAX_RETRIES',
+    'LANGFUSE_HTTP_BACKOFF', 'LANGFUSE_HTTP_TIMEOUT', 'GH_TOKEN',
+)
+
+_config_lock = threading.RLock()
+_config_state = {'config': None, 'sources': (), 'fingerprint': None, 'checked_at': 0.0}
+_config_stats = {
+    'loads': 0, 'hits': 0, 'validations': 0,
+    'last_load_ms': 0.0, 'total_load_ms': 0.0, 'loaded_at': None,
+}
+
+
+def _config_fingerprint(sources):
+    """Cheap identity of everything the config was built from: cwd, source file stats and env vars"""
+    files = []
+    for path in sources:
+        try:
+            st = os.stat(path)
+            files.append((path, st.st_mtime_ns, st.st_size))
+        except OSError:
+            files.append((path, None, None))
+    return (os.getcwd(), tuple(files), tuple(os.environ.get(k) for k in _CONFIG_ENV_KEYS))
 
-    # Determine .env path: explicit param > COAIAPY_ENV_PATH env var > default .env
-    if env_path is None:
-        env_path = os.getenv('COAIAPY_ENV_PATH', '.env')
 
-    # Reload config if env_path changed or config not loaded yet
-    if config is None or _loaded_env_path != env_path:
-        # Load .env file first if it exists
-        env_vars = load_env_file(env_path)
-        if not env_vars and env_path != '.env':
-            # Warn if custom env_path was specified but file not found
-            print(f"Warning: COAIAPY_ENV_PATH={env_path} was specified but file not found or empty")
-        
-        # Default configuration
-        config = {
-            "jtaleconf": {
-                "host": "localhost",
-                "port": 6379,
-                "password": "",
-                "ssl": False
-            },
-            "openai_api_key": "",
-            "pollyconf": {"key": "", "secret": "", "region": "us-east-1"},
-            "github": {
-                "api_token": "",
-                "base_url": "https://api.github.com"
-            }
+def _build_config(env_path):
+    """Resolve the configuration from defaults, config files, .env and environment.
+
+    Returns:
+        (config dict, tuple of source file paths that were consulted)
+    """
+    sources = [os.path.abspath(env_path)]
+    # Load .env file first if it exists
+    env_vars = load_env_file(env_path)
+    if not env_vars and env_path != '.env':
+        # Warn if custom env_path was specified but file not found
+        print(f"Warning: COAIAPY_ENV_PATH={env_path} was specified but file not found or empty")
+    
+    # Default configuration
+    config = {
+        "jtaleconf": {
+            "host": "localhost",
+            "port": 6379,
+            "password": "",
+            "ssl": False
+        },
+        "openai_api_key": "",
+        "pollyconf": {"key": "", "secret": "", "region": "us-east-1"},
+        "github": {
+            "api_token": "",
+            "base_url": "https://api.github.com"
+        },
+        "langfuse_http": {
+            "pool_connections": 10,
+            "pool_maxsize": 20,
+            "max_retries": 3,
+            "backoff_factor": 0.5,
+            "timeout": 60
         }
-        
-        # Load HOME config first (base configuration)
-        _home = os.getenv('HOME')
-        if _home is not None:
-            home_config_path = os.path.join(_home, 'coaia.json')
-            if os.path.exists(home_config_path):
-                try:
-                    with open(home_config_path) as config_file:
-                        home_config = json.load(config_file)
-                        config = merge_configs(config, home_config)
-                except Exception as e:
-                    print(f"Warning: Error loading HOME config: {e}")
-        
-        # Load current directory config for overrides
-        current_config_path = './coaia.json'
-        if os.path.exists(current_config_path):
-            try:
-                with open(current_config_path) as config_file:
-                    current_config = json.load(config_file)
-                    config = merge_configs(config, current_config)
-            except Exception as e:
-                print(f"Warning: Error loading current directory config: {e}")
-        
-        # If no configs found, try find_existing_config for backward compatibility
-        if not os.path.exists(os.path.join(_home, 'coaia.json') if _home else '') and not os.path.exists('./coaia.json'):
-            _cnf = find_existing_config()
-            if _cnf and os.path.exists(_cnf):
-                try:
-                    with open(_cnf) as config_file:
-                        fallback_config = json.load(config_file)
-                        config = merge_configs(config, fallback_config)
-                except Exception as e:
-                    print(f"Warning: Error loading fallback config: {e}")
-
-        # Helper function to get value from system env first, then .env, then config
-        def get_env_value(env_key, config_value, env_vars_dict=None):
-            if env_vars_dict is None:
-                env_vars_dict = env_vars
-            return os.getenv(env_key) or env_vars_dict.get(env_key) or config_value
-        
-        # Check for placeholder values and replace with environment variables if needed
-        config["openai_api_key"] = get_env_value("OPENAI_API_KEY", config["openai_api_key"])
-        config["pollyconf"]["key"] = get_env_value("AWS_KEY_ID", config["pollyconf"]["key"])
-        config["pollyconf"]["secret"] = get_env_value("AWS_SECRET_KEY", config["pollyconf"]["secret"])
-        config["pollyconf"]["region"] = get_env_value("AWS_REGION", config["pollyconf"]["region"])
-        
-        # Redis/Upstash configuration with priority order:
-        # 1. UPSTASH_REDIS_REST_URL/TOKEN (Upstash direct)
-        # 2. KV_REST_API_URL/TOKEN (Vercel)
-        # 3. KV_URL or REDIS_URL (Vercel connection strings)
-        # 4. REDIS_HOST/PASSWORD (traditional)
-        # 5. Config files
-        
-        # Check for REST API format first (HTTPS URLs)
-        upstash_rest_url = (get_env_value("UPSTASH_REDIS_REST_URL", "") or
-                            get_env_value("KV_REST_API_URL", ""))
-        upstash_rest_token = (get_env_value("UPSTASH_REDIS_REST_TOKEN", "") or
-                              get_env_value("KV_REST_API_TOKEN", ""))
-        
-        # Check for Redis connection string format (redis:// or rediss://)
-        redis_connection_url = (get_env_value("KV_URL", "") or
-                               get_env_value("REDIS_URL", ""))
-        
-        if upstash_rest_url:
-            # Parse Upstash REST URL to extract host, port, and SSL settings
+    }
+    
+    # Load HOME config first (base configuration)
+    _home = os.getenv('HOME')
+    if _home is not None:
+        home_config_path = os.path.join(_home, 'coaia.json')
+        sources.append(os.path.abspath(home_config_path))
+        if os.path.exists(home_config_path):
             try:
-                parsed_url = urlparse(upstash_rest_url)
-                config["jtaleconf"]["host"] = parsed_url.hostname or config["jtaleconf"]["host"]
-                # Upstash typically uses port 6379 for TLS connections
-                config["jtaleconf"]["port"] = parsed_url.port if parsed_url.port else 6379
-                # Enable SSL if the scheme is https
-                config["jtaleconf"]["ssl"] = (parsed_url.scheme == 'https')
-                # Use the REST token as password if available
-                if upstash_rest_token:
-                    config["jtaleconf"]["password"] = upstash_rest_token
+                with open(home_config_path) as config_file:
+                    home_config = json.load(config_file)
+                    config = merge_configs(config, home_config)
             except Exception as e:
-                print(f"Warning: Error parsing REST API URL: {e}")
-        elif redis_connection_url:
-            # Parse Redis connection string (redis://[user:password@]host[:port][/database])
+                print(f"Warning: Error loading HOME config: {e}")
+    
+    # Load current directory config for overrides
+    current_config_path = './coaia.json'
+    sources.append(os.path.abspath(current_config_path))
+    if os.path.exists(current_config_path):
+        try:
+            with open(current_config_path) as config_file:
+                current_config = json.load(config_file)
+                config = merge_configs(config, current_config)
+        except Exception as e:
+            print(f"Warning: Error loading current directory config: {e}")
+    
+    # If no configs found, try find_existing_config for backward compatibility
+    if not os.path.exists(os.path.join(_home, 'coaia.json') if _home else '') and not os.path.exists('./coaia.json'):
+        _cnf = find_existing_config()
+        if _cnf and os.path.exists(_cnf):
+            sources.append(os.path.abspath(_cnf))
             try:
-                parsed_url = urlparse(redis_connection_url)
-                config["jtaleconf"]["host"] = parsed_url.hostname or config["jtaleconf"]["host"]
-                config["jtaleconf"]["port"] = parsed_url.port if parsed_url.port else 6379
-                # rediss:// uses SSL, redis:// does not
-                config["jtaleconf"]["ssl"] = (parsed_url.scheme == 'rediss')
-                # Extract password from URL
-                if parsed_url.password:
-                    config["jtaleconf"]["password"] = parsed_url.password
+                with open(_cnf) as config_file:
+                    fallback_config = json.load(config_file)
+                    config = merge_configs(config, fallback_config)
             except Exception as e:
-                print(f"Warning: Error parsing Redis connection URL: {e}")
+                print(f"Warning: Error loading fallback config: {e}")
+
+    # Helper function to get value from system env first, then .env, then config
+    def get_env_value(env_key, config_value, env_vars_dict=None):
+        if env_vars_dict is None:
+            env_vars_dict = env_vars
+        return os.getenv(env_key) or env_vars_dict.get(env_key) or config_value
+    
+    # Check for placeholder values and replace with environment variables if needed
+    config["openai_api_key"] = get_env_value("OPENAI_API_KEY", config["openai_api_key"])
+    config["pollyconf"]["key"] = get_env_value("AWS_KEY_ID", config["pollyconf"]["key"])
+    config["pollyconf"]["secret"] = get_env_value("AWS_SECRET_KEY", config["pollyconf"]["secret"])
+    config["pollyconf"]["region"] = get_env_value("AWS_REGION", config["pollyconf"]["region"])
+    
+    # Redis/Upstash configuration with priority order:
+    # 1. UPSTASH_REDIS_REST_URL/TOKEN (Upstash direct)
+    # 2. KV_REST_API_URL/TOKEN (Vercel)
+    # 3. KV_URL or REDIS_URL (Vercel connection strings)
+    # 4. REDIS_HOST/PASSWORD (traditional)
+    # 5. Config files
+    
+    # Check for REST API format first (HTTPS URLs)
+    upstash_rest_url = (get_env_value("UPSTASH_REDIS_REST_URL", "") or
+                        get_env_value("KV_REST_API_URL", ""))
+    upstash_rest_token = (get_env_value("UPSTASH_REDIS_REST_TOKEN", "") or
+                          get_env_value("KV_REST_API_TOKEN", ""))
+    
+    # Check for Redis connection string format (redis:// or rediss://)
+    redis_connection_url = (get_env_value("KV_URL", "") or
+                           get_env_value("REDIS_URL", ""))
+    
+    if upstash_rest_url:
+        # Parse Upstash REST URL to extract host, port, and SSL settings
+        try:
+            parsed_url = urlparse(upstash_rest_url)
+            config["jtaleconf"]["host"] = parsed_url.hostname or config["jtaleconf"]["host"]
+            # Upstash typically uses port 6379 for TLS connections
+            config["jtaleconf"]["port"] = parsed_url.port if parsed_url.port else 6379
+            # Enable SSL if the scheme is https
+            config["jtaleconf"]["ssl"] = (parsed_url.scheme == 'https')
+            # Use the REST token as password if available
+            if upstash_rest_token:
+                config["jtaleconf"]["password"] = upstash_rest_token
+        except Exception as e:
+            print(f"Warning: Error parsing REST API URL: {e}")
+    elif redis_connection_url:
+        # Parse Redis connection string (redis://[user:password@]host[:port][/database])
+        try:
+            parsed_url = urlparse(redis_connection_url)
+            config["jtaleconf"]["host"] = parsed_url.hostname or config["jtaleconf"]["host"]
+            config["jtaleconf"]["port"] = parsed_url.port if parsed_url.port else 6379
+            # rediss:// uses SSL, redis:// does not
+            config["jtaleconf"]["ssl"] = (parsed_url.scheme == 'rediss')
+            # Extract password from URL
+            if parsed_url.password:
+                config["jtaleconf"]["password"] = parsed_url.password
+        except Exception as e:
+            print(f"Warning: Error parsing Redis connection URL: {e}")
+    else:
+        # Fallback to traditional Redis environment variables
+        # Try REDIS_HOST first, then fall back to UPSTASH_HOST if REDIS_HOST not set
+        redis_host = get_env_value("REDIS_HOST", "")
+        if redis_host:
+            config["jtaleconf"]["host"] = redis_host
         else:
-            # Fallback to traditional Redis environment variables
-            # Try REDIS_HOST first, then fall back to UPSTASH_HOST if REDIS_HOST not set
-            redis_host = get_env_value("REDIS_HOST", "")
-            if redis_host:
-                config["jtaleconf"]["host"] = redis_host
-            else:
-                config["jtaleconf"]["host"] = get_env_value("UPSTASH_HOST", config["jtaleconf"]["host"])
-
-            config["jtaleconf"]["port"] = int(get_env_value("REDIS_PORT", config["jtaleconf"]["port"]))
-            
-            # Try REDIS_PASSWORD first, then fall back to UPSTASH_PASSWORD if REDIS_PASSWORD not set
-            redis_password = get_env_value("REDIS_PASSWORD", "")
-            if redis_password:
-                config["jtaleconf"]["password"] = redis_password
-            else:
-                config["jtaleconf"]["password"] = get_env_value("UPSTASH_PASSWORD", config["jtaleconf"]["password"])
+            config["jtaleconf"]["host"] = get_env_value("UPSTASH_HOST", config["jtaleconf"]["host"])
+
+        config["jtaleconf"]["port"] = int(get_env_value("REDIS_PORT", config["jtaleconf"]["port"]))
         
-        # Add Langfuse environment variable support
-        config["langfuse_secret_key"] = get_env_value("LANGFUSE_SECRET_KEY", config.get("langfuse_secret_key", ""))
-        config["langfuse_public_key"] = get_env_value("LANGFUSE_PUBLIC_KEY", config.get("langfuse_public_key", ""))
-        config["langfuse_base_url"] = get_env_value("LANGFUSE_HOST", config.get("langfuse_base_url", "https://us.cloud.langfuse.com"))
-        config["langfuse_auth3"] = get_env_value("LANGFUSE_AUTH3", config.get("langfuse_auth3", ""))
+        # Try REDIS_PASSWORD first, then fall back to UPSTASH_PASSWORD if REDIS_PASSWORD not set
+        redis_password = get_env_value("REDIS_PASSWORD", "")
+        if redis_password:
+            config["jtaleconf"]["password"] = redis_password
+        else:
+            config["jtaleconf"]["password"] = get_env_value("UPSTASH_PASSWORD", config["jtaleconf"]["password"])
+    
+    # Add Langfuse environment variable support
+    config["langfuse_secret_key"] = get_env_value("LANGFUSE_SECRET_KEY", config.get("langfuse_secret_key", ""))
+    config["langfuse_public_key"] = get_env_value("LANGFUSE_PUBLIC_KEY", config.get("langfuse_public_key", ""))
+    config["langfuse_base_url"] = get_env_value("LANGFUSE_HOST", config.get("langfuse_base_url", "https://us.cloud.langfuse.com"))
+    config["langfuse_auth3"] = get_env_value("LANGFUSE_AUTH3", config.get("langfuse_auth3", ""))
+
+    # Langfuse HTTP connection pool and retry settings (see fusehttp.py)
+    http_conf = config["langfuse_http"]
+    http_conf["pool_connections"] = int(get_env_value("LANGFUSE_HTTP_POOL_CONNECTIONS", http_conf["pool_connections"]))
+    http_conf["pool_maxsize"] = int(get_env_value("LANGFUSE_HTTP_POOL_MAXSIZE", http_conf["pool_maxsize"]))
+    http_conf["max_retries"] = int(get_env_value("LANGFUSE_HTTP_MAX_RETRIES", http_conf["max_retries"]))
+    http_conf["backoff_factor"] = float(get_env_value("LANGFUSE_HTTP_BACKOFF", http_conf["backoff_factor"]))
+    http_conf["timeout"] = float(get_env_value("LANGFUSE_HTTP_TIMEOUT", http_conf["timeout"]))
 
-        # Add GitHub environment variable support
-        config["github"]["api_token"] = get_env_value("GH_TOKEN", config.get("github", {}).get("api_token", ""))
+    # Add GitHub environment variable support
+    config["github"]["api_token"] = get_env_value("GH_TOKEN", config.get("github", {}).get("api_token", ""))
+
+    return config, tuple(sources)
+
+
+def read_config(env_path=None):
+    """Return the resolved configuration, rebuilding it only when its sources changed.
+
+    Args:
+        env_path: Path to .env file (defaults to COAIAPY_ENV_PATH or '.env')
 
+    Returns:
+        The config dict (shared; treat it as read-only)
+    """
+    global config
+
+    # Determine .env path: explicit param > COAIAPY_ENV_PATH env var > default .env
+    if env_path is None:
+        env_path = os.getenv('COAIAPY_ENV_PATH', '.env')
+
+    if config is not None and _loaded_env_path == env_path:
+        state = _config_state
+        if config is not state['config']:
+            # Assigned directly (tests, embedding applications): use as-is
+            return config
+        now = time.monotonic()
+        if now - state['checked_at'] < CONFIG_CHECK_INTERVAL:
+            _config_stats['hits'] += 1
+            return config
+        with _config_lock:
+            state['checked_at'] = now
+            _config_stats['validations'] += 1
+            if config is state['config'] and _config_fingerprint(state['sources']) == state['fingerprint']:
+                _config_stats['hits'] += 1
+                return config
+
+    return reload_config(env_path)
+
+
+def reload_config(env_path=None):
+    """Rebuild the configuration from its sources unconditionally.
+
+    Args:
+        env_path: Path to .env file (defaults to COAIAPY_ENV_PATH or '.env')
+
+    Returns:
+        The freshly loaded config dict
+    """
+    global config
+    global _loaded_env_path
+
+    if env_path is None:
+        env_path = os.getenv('COAIAPY_ENV_PATH', '.env')
+
+    with _config_lock:
+        started = time.perf_counter()
+        new_config, sources = _build_config(env_path)
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+
+        _config_state['config'] = new_config
+        _config_state['sources'] = sources
+        _config_state['fingerprint'] = _config_fingerprint(sources)
+        _config_state['checked_at'] = time.monotonic()
+        _config_stats['loads'] += 1
+        _config_stats['last_load_ms'] = elapsed_ms
+        _config_stats['total_load_ms'] += elapsed_ms
+        _config_stats['loaded_at'] = time.time()
+
+        config = new_config
         # Track which env_path was used to load this config
         _loaded_env_path = env_path
 
     return config
 
 
+def get_config_stats():
+    """Return config cache statistics.
+
+    Returns:
+        Dict with loads, hits, validations, last/total load time (ms), loaded_at,
+        the env_path in use and the source files consulted
+    """
+    stats = dict(_config_stats)
+    stats['env_path'] = _loaded_env_path
+    stats['sources'] = list(_config_state['sources'])
+    return stats
+
+
 
 def render_markdown(markdown_text):
   """Renders markdown to HTML.
@@ -269,7 +411,7 @@ def render_markdown(markdown_text):
     Returns:
       The HTML representation of the markdown text.
   """
-  html = markdown.markdown(markdown_text)
+  html = _get_markdown().markdown(markdown_text)
   return html
 
 #todo @STCGoal Utilities
@@ -309,7 +451,7 @@ def transcribe_audio(file_path):
     }
 
     # Send audio data to OpenAI for transcription
-    response = requests.post(openai_api_url, headers=headers, files=files, data=payload)
+    response = _get_requests().post(openai_api_url, headers=headers, files=files, data=payload)
     response_json = response.json()
     transcribed_text = response_json.get('text')
 
@@ -352,7 +494,7 @@ def abstract_send(input_message, instructions_config_name,temperature_config_nam
         'Authorization': f'Bearer {openai_api_key}',
         'Content-Type': 'application/json'
         }
-  response = requests.post(openai_api_url, json=payload, headers=headers)
+  response = _get_requests().post(openai_api_url, json=payload, headers=headers)
 
   # Check if the request was successful
   if response.status_code == 200:
@@ -420,7 +562,7 @@ def csv2json_legacy(input_message, temperature=None,pre=''):
         'Authorization': f'Bearer {openai_api_key}',
         'Content-Type': 'application/json'
         }
-  response = requests.post(openai_api_url, json=payload, headers=headers)
+  response = _get_requests().post(openai_api_url, json=payload, headers=headers)
 
   # Check if the request was successful
   if response.status_code == 200:
@@ -467,7 +609,7 @@ def d2s_send(input_message, temperature=None,pre=''):
         'Authorization': f'Bearer {openai_api_key}',
         'Content-Type': 'application/json'
         }
-  response = requests.post(openai_api_url, json=payload, headers=headers)
+  response = _get_requests().post(openai_api_url, json=payload, headers=headers)
 
   # Check if the request was successful
   if response.status_code == 200:
@@ -515,7 +657,7 @@ def dictkore_send(input_message, temperature=None,pre=''):
         'Authorization': f'Bearer {openai_api_key}',
         'Content-Type': 'application/json'
         }
-  response = requests.post(openai_api_url, json=payload, headers=headers)
+  response = _get_requests().post(openai_api_url, json=payload, headers=headers)
 
   # Check if the request was successful
   if response.status_code == 200:
@@ -553,7 +695,7 @@ def llm(user,system, temperature=0.3):
         'Authorization': f'Bearer {openai_api_key}',
         'Content-Type': 'application/json'
         }
-  response = requests.post(openai_api_url, json=payload, headers=headers)
+  response = _get_requests().post(openai_api_url, json=payload, headers=headers)
 
   # Check if the request was successful
   if response.status_code == 200:
@@ -606,7 +748,7 @@ def send_openai_request(input_message, use_config=False, temperature=None, prepr
         'Authorization': f'Bearer {openai_api_key}',
         'Content-Type': 'application/json'
         }
-  response = requests.post(openai_api_url, json=payload, headers=headers)
+  response = _get_requests().post(openai_api_url, json=payload, headers=headers)
 
   # Check if the request was successful
   if response.status_code == 200:
@@ -655,7 +797,7 @@ def send_openai_request_v4(input_message, use_config=False, temperature=None, pr
         'Authorization': f"Bearer {openai_api_key}",
         'Content-Type': "application/json"
     }
-    response = requests.post(openai_api_url, json=payload, headers=headers)
+    response = _get_requests().post(openai_api_url, json=payload, headers=headers)
 
     # Check if the request was successful
     if response.status_code == 200:
@@ -692,7 +834,7 @@ def generate_image(prompt,size=None,nb_img=1):
   }
 
   # Send the request.
-  response = requests.post(api_endpoint, headers=headers, json=data)
+  response = _get_requests().post(api_endpoint, headers=headers, json=data)
 
   # Check for errors.
   if response.status_code != 200:
@@ -728,7 +870,7 @@ def send_openai_request_v3(input_message, temperature=0.7, preprompt_instruction
         'Authorization': f'Bearer {openai_api_key}',
         'Content-Type': 'application/json'
     }
-    response = requests.post(openai_api_url, json=payload, headers=headers)
+    response = _get_requests().post(openai_api_url, json=payload, headers=headers)
 
     # Check if the request was successful
     if response.status_code == 200:
@@ -744,6 +886,32 @@ def send_openai_request_v3(input_message, temperature=0.7, preprompt_instruction
 
 
 #@STCGoal Tasher/Taler
+# Connection pools shared by every client built from the same jtaleconf, so
+# repeated tash/fetch calls in one process reuse their (TLS) connections
+_jtaler_pools = {}
+_jtaler_pools_lock = threading.Lock()
+
+def _get_jtaler_pool(jtalecnf):
+  redis = _get_redis()
+  key = (jtalecnf['host'], int(jtalecnf['port']), jtalecnf['password'], bool(jtalecnf['ssl']))
+  with _jtaler_pools_lock:
+    pool = _jtaler_pools.get(key)
+    if pool is None:
+      pool = redis.ConnectionPool(
+        host=jtalecnf['host'],
+        port=int(jtalecnf['port']),
+        password=jtalecnf['password'],  # nosec - password needed for authentication
+        connection_class=redis.SSLConnection if jtalecnf['ssl'] else redis.Connection)
+      _jtaler_pools[key] = pool
+    return pool
+
+def reset_jtaler_pools():
+  """Disconnect and drop the cached Redis connection pools."""
+  with _jtaler_pools_lock:
+    for pool in _jtaler_pools.values():
+      pool.disconnect()
+    _jtaler_pools.clear()
+
 def _newjtaler(jtalecnf, verbose=False):
   redis = _get_redis()
   try:
@@ -761,11 +929,7 @@ def _newjtaler(jtalecnf, verbose=False):
         else:
             print(f"  Password: (empty)")
     
-    _r = redis.Redis(
-    host=jtalecnf['host'],
-    port=int(jtalecnf['port']),
-    password=jtalecnf['password'],  # nosec - password needed for authentication
-    ssl=jtalecnf['ssl'])
+    _r = redis.Redis(connection_pool=_get_jtaler_pool(jtalecnf))
     
     if verbose:
         print("  Status: Connection established successfully")
@@ -784,13 +948,14 @@ def _newjtaler(jtalecnf, verbose=False):
     print("  5. Use --verbose flag to see detailed connection information")
     return None
 
-def _taleadd(_r,k:str,c:str,quiet=False,ttl=None):
+def _taleadd(_r,k:str,c:str,quiet=False,ttl=None,verify=False):
+  """SET k; read the value back with a GET only when verify is requested."""
   try:
     if ttl:
       _r.set(k, c, ex=ttl)
     else:
       _r.set(k, c)
-    _kv=_r.get(k)
+    _kv=_r.get(k) if verify else c
     if not quiet:
       print(_kv)
     return _kv
@@ -798,7 +963,7 @@ def _taleadd(_r,k:str,c:str,quiet=False,ttl=None):
     print(e)
     return None
 
-def tash(k:str,v:str,ttl=None,quiet=True,verbose=False):
+def tash(k:str,v:str,ttl=None,quiet=True,verbose=False,verify=False):
   
   _r=None
   try:
@@ -811,13 +976,70 @@ def tash(k:str,v:str,ttl=None,quiet=True,verbose=False):
     return None
   if _r is not None:
     ttl_seconds = ttl * 60 if ttl > 0 else None
-    result=_taleadd(_r,k,v,quiet,ttl_seconds)
+    result=_taleadd(_r,k,v,quiet,ttl_seconds,verify=verify)
     if result is not None:
       if not quiet: print('Stashed success:'+k)
     else:
       if not quiet: print('Stashing failed')
     return result
 
+def tash_many(items,ttl=None,quiet=True,verbose=False):
+  """
+  Stash many key/value pairs in one pipelined round trip.
+
+  Args:
+    items: dict or iterable of (key, value) pairs
+    ttl: Time to live, same unit as tash()
+    quiet: Suppress progress output
+    verbose: Show detailed Redis connection information
+
+  Returns:
+    Number of keys stored, or None on failure
+  """
+  try:
+    jtalecnf=read_config()['jtaleconf']
+    _r=_newjtaler(jtalecnf, verbose=verbose)
+  except Exception as e:
+    print(e)
+    print('init error')
+    return None
+  if _r is None:
+    return None
+  pairs = list(items.items()) if isinstance(items, dict) else list(items)
+  ttl_seconds = ttl * 60 if ttl and ttl > 0 else None
+  try:
+    pipe = _r.pipeline(transaction=False)
+    for k, v in pairs:
+      pipe.set(k, v, ex=ttl_seconds)
+    pipe.execute()
+  except Exception as e:
+    print(e)
+    if not quiet: print('Stashing failed')
+    return None
+  if not quiet: print(f'Stashed success: {len(pairs)} keys')
+  return len(pairs)
+
+def fetch_many(keys, verbose=False):
+  """
+  Fetch many keys with a single MGET.
+
+  Returns:
+    dict mapping each key to its decoded value (None when missing),
+    or None if Redis is unreachable
+  """
+  redis = _get_redis()
+  keys = list(keys)
+  try:
+    jtalecnf = read_config()['jtaleconf']
+    _r = _newjtaler(jtalecnf, verbose=verbose)
+    if _r is None:
+      return None
+    values = _r.mget(keys) if keys else []
+  except redis.ConnectionError as e:
+    print(f"Error: Redis connection failed - {e}")
+    return None
+  return {k: (v.decode('utf-8') if isinstance(v, bytes) else v) for k, v in zip(keys, values)}
+
 def fetch_key_val(key, output_file=None, verbose=False):
     redis = _get_redis()
     try:
@@ -1,6 +1,9 @@
-import requests
-from requests.auth import HTTPBasicAuth
 from coaiapy.coaiamodule import read_config
+from coaiapy.fusehttp import get_fuse_session, get_storage_session
+from coaiapy.mediaindex import get_media_index
+from coaiapy.outbox import get_outbox, outbox_enabled
+from coaiapy.mirror import get_mirror, MIRROR_ENTITIES
+from coaiapy.export import EXPORT_ROW_GROUP_SIZE, flatten_record, open_export_writer, parse_timestamp
 import datetime
 import yaml
 import json
@@ -12,8 +15,14 @@ from dataclasses import dataclass, field
 from typing import Optional, List, Dict, Any, Union
 import hashlib
 import mimetypes
+import random
+import sys
 import time
+import threading
+import atexit
 from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque, OrderedDict
 
 @dataclass
 class ScoreCategory:
@@ -306,7 +315,7 @@ def get_comments(object_type=None, object_id=None, author_user_id=None, page=1,
         JSON response with comments data
     """
     config = read_config()
-    auth = HTTPBasicAuth(config['langfuse_public_key'], config['langfuse_secret_key'])
+    session = get_fuse_session(config)
     url = f"{config['langfuse_base_url']}/api/public/comments"
 
     # Build query parameters
@@ -322,7 +331,7 @@ def get_comments(object_type=None, object_id=None, author_user_id=None, page=1,
     if author_user_id:
         params['authorUserId'] = author_user_id
 
-    response = requests.get(url, auth=auth, params=params)
+    response = session.get(url, params=params)
     return response.text
 
 def get_comment_by_id(comment_id):
@@ -336,9 +345,9 @@ def get_comment_by_id(comment_id):
         JSON response with comment data
     """
     config = read_config()
-    auth = HTTPBasicAuth(config['langfuse_public_key'], config['langfuse_secret_key'])
+    session = get_fuse_session(config)
     url = f"{config['langfuse_base_url']}/api/public/comments/{comment_id}"
-    response = requests.get(url, auth=auth)
+    response = session.get(url)
     return response.text
 
 def post_comment(text, object_type, object_id, author_user_id=None):
@@ -355,7 +364,7 @@ def post_comment(text, object_type, object_id, author_user_id=None):
         JSON response with created comment data
     """
     config = read_config()
-    auth = HTTPBasicAuth(config['langfuse_public_key'], config['langfuse_secret_key'])
+    session = get_fuse_session(config)
     url = f"{config['langfuse_base_url']}/api/public/comments"
 
     # Get current project ID (required by API)
@@ -374,106 +383,160 @@ def post_comment(text, object_type, object_id, author_user_id=None):
     if author_user_id:
         data['authorUserId'] = author_user_id
 
-    response = requests.post(url, json=data, auth=auth)
+    response = session.post(url, json=data)
     return response.text
 
-def list_prompts(debug=False):
-    c = read_config()
-    auth = HTTPBasicAuth(c['langfuse_public_key'], c['langfuse_secret_key'])
-    base = f"{c['langfuse_base_url']}/api/public/v2/prompts"
-    page = 1
-    all_prompts = []
-    
+PAGINATION_MAX_WORKERS = 4
+
+def _fetch_page(session, url, params, page):
+    """Fetch one page; returns (data, error_message)"""
+    try:
+        r = session.get(url, params=dict(params or {}, page=page))
+    except Exception as e:
+        return None, f"Request error: {e}"
+    if r.status_code != 200:
+        return None, f"Request failed with status {r.status_code}: {r.text}"
+    try:
+        return r.json(), None
+    except ValueError as e:
+        return None, f"JSON parsing error: {e}"
+
+def iter_paginated(url, params=None, label="items", debug=False,
+                   max_workers=PAGINATION_MAX_WORKERS, max_pages=None, strict=False):
+    """
+    Lazily yield items from a paginated Langfuse list endpoint.
+
+    Page 1 is fetched first; once it reports meta.totalPages, the remaining
+    pages are fetched concurrently (at most max_workers in flight) and their
+    items are yielded in page order. Endpoints that only expose hasNextPage,
+    nextPage or a top-level totalPages are walked sequentially. Iteration stops
+    at the first failed or empty page, like the previous per-function loops.
+
+    Closing the generator early (e.g. via itertools.islice or break) stops
+    further requests.
+
+    Args:
+        url: Endpoint URL
+        params: Extra query parameters sent with every page
+        label: Item name used in debug output
+        debug: Print pagination progress
+        max_workers: Maximum concurrent page requests
+        max_pages: Optional cap on the number of pages fetched
+        strict: Raise on a failed page instead of stopping quietly (for callers
+                that must not mistake a partial result for a complete one)
+
+    Yields:
+        Individual items from each page's data
+
+    Raises:
+        Exception: With strict=True, if a page cannot be fetched
+    """
+    session = get_fuse_session(read_config())
+    params = dict(params or {})
+
     if debug:
-        print(f"Starting pagination from: {base}")
-    
-    while True:
-        url = f"{base}?page={page}"
-        if debug:
-            print(f"Fetching page {page}: {url}")
-            
-        r = requests.get(url, auth=auth)
-        if r.status_code != 200:
+        print(f"Starting pagination from: {url}")
+
+    def page_items(page, data, error):
+        if error:
+            if strict:
+                raise Exception(f"Failed to fetch {label} page {page}: {error}")
             if debug:
-                print(f"Request failed with status {r.status_code}: {r.text}")
-            break
-            
-        try:
-            data = r.json()
-        except ValueError as e:
+                print(error)
+            return None
+        items = data.get('data') if isinstance(data, dict) else data
+        if not items:
             if debug:
-                print(f"JSON parsing error: {e}")
-            break
+                print(f"No {label} found, breaking")
+            return None
+        if not isinstance(items, list):
+            items = [items]
+        if debug:
+            print(f"Added {len(items)} {label} from page {page}")
+        return items
 
+    page = 1
+    pages_fetched = 0
+    while True:
         if debug:
-            print(f"Response keys: {list(data.keys()) if isinstance(data, dict) else 'Not a dict'}")
-            if isinstance(data, dict):
-                print(f"  data length: {len(data.get('data', [])) if data.get('data') else 'No data key'}")
-                meta = data.get('meta', {})
-                print(f"  meta: {meta}")
-                if meta:
-                    print(f"    page: {meta.get('page')}")
-                    print(f"    limit: {meta.get('limit')}")
-                    print(f"    totalPages: {meta.get('totalPages')}")
-                    print(f"    totalItems: {meta.get('totalItems')}")
-                # Also check for other pagination formats
-                print(f"  hasNextPage: {data.get('hasNextPage')}")
-                print(f"  nextPage: {data.get('nextPage')}")
-                print(f"  totalPages: {data.get('totalPages')}")
-
-        prompts = data.get('data') if isinstance(data, dict) else data
-        if not prompts:
+            print(f"Fetching page {page}: {url} with params {params}")
+        data, error = _fetch_page(session, url, params, page)
+        pages_fetched += 1
+        items = page_items(page, data, error)
+        if items is None:
+            return
+        for item in items:
+            yield item
+        if max_pages and pages_fetched >= max_pages:
+            return
+        if not isinstance(data, dict):
             if debug:
-                print("No prompts found, breaking")
-            break
-            
-        if isinstance(prompts, list):
-            all_prompts.extend(prompts)
+                print("No pagination indicators found, stopping")
+            return
+
+        meta = data.get('meta') or {}
+        if meta.get('totalPages'):
+            current_page = meta.get('page', page)
+            total_pages = meta.get('totalPages')
+            if current_page >= total_pages:
+                if debug:
+                    print(f"Meta pagination: page {current_page} >= totalPages {total_pages}, stopping")
+                return
+            remaining = list(range(current_page + 1, total_pages + 1))
+            if max_pages:
+                remaining = remaining[:max_pages - pages_fetched]
             if debug:
-                print(f"Added {len(prompts)} prompts, total now: {len(all_prompts)}")
+                print(f"Meta pagination: fetching pages {remaining[0]}-{remaining[-1]} concurrently")
+            yield from _iter_pages_concurrently(session, url, params, remaining, page_items, max_workers)
+            return
+        # Fallback to other pagination formats
+        elif data.get('hasNextPage'):
+            page += 1
+            if debug:
+                print(f"hasNextPage=True, continuing to page {page}")
+        elif data.get('nextPage'):
+            page = data['nextPage']
+            if debug:
+                print(f"nextPage={page}, continuing")
+        elif data.get('totalPages') and page < data['totalPages']:
+            page += 1
+            if debug:
+                print(f"page {page} < totalPages {data.get('totalPages')}, continuing")
         else:
-            all_prompts.append(prompts)
             if debug:
-                print(f"Added 1 prompt, total now: {len(all_prompts)}")
+                print("No pagination indicators found, stopping")
+            return
+
+def _iter_pages_concurrently(session, url, params, pages, page_items, max_workers):
+    """Fetch pages with a bounded look-ahead window and yield their items in order"""
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers or 1))
+    pending = deque()
+    pages = iter(pages)
+    try:
+        for page in pages:
+            pending.append((page, executor.submit(_fetch_page, session, url, params, page)))
+            if len(pending) >= max(1, max_workers or 1):
+                break
+        while pending:
+            page, future = pending.popleft()
+            data, error = future.result()
+            items = page_items(page, data, error)
+            if items is None:
+                return
+            next_page = next(pages, None)
+            if next_page is not None:
+                pending.append((next_page, executor.submit(_fetch_page, session, url, params, next_page)))
+            for item in items:
+                yield item
+    finally:
+        for _, future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
 
-        # Check pagination conditions
-        should_continue = False
-        if isinstance(data, dict):
-            # Check for meta-based pagination (Langfuse v2 format)
-            meta = data.get('meta', {})
-            if meta and meta.get('totalPages'):
-                current_page = meta.get('page', page)
-                total_pages = meta.get('totalPages')
-                if current_page < total_pages:
-                    page += 1
-                    should_continue = True
-                    if debug:
-                        print(f"Meta pagination: page {current_page} < totalPages {total_pages}, continuing to page {page}")
-                else:
-                    if debug:
-                        print(f"Meta pagination: page {current_page} >= totalPages {total_pages}, stopping")
-            # Fallback to other pagination formats
-            elif data.get('hasNextPage'):
-                page += 1
-                should_continue = True
-                if debug:
-                    print(f"hasNextPage=True, continuing to page {page}")
-            elif data.get('nextPage'):
-                page = data['nextPage']
-                should_continue = True
-                if debug:
-                    print(f"nextPage={page}, continuing")
-            elif data.get('totalPages') and page < data['totalPages']:
-                page += 1
-                should_continue = True
-                if debug:
-                    print(f"page {page} < totalPages {data.get('totalPages')}, continuing")
-            else:
-                if debug:
-                    print("No pagination indicators found, stopping")
-        
-        if not should_continue:
-            break
+def list_prompts(debug=False):
+    c = read_config()
+    base = f"{c['langfuse_base_url']}/api/public/v2/prompts"
+    all_prompts = list(iter_paginated(base, label="prompts", debug=debug))
 
     if debug:
         print(f"Final result: {len(all_prompts)} total prompts")
@@ -756,14 +819,14 @@ def format_prompt_display(prompt_json):
 
 def get_prompt(prompt_name, label=None):
     c = read_config()
-    auth = HTTPBasicAuth(c['langfuse_public_key'], c['langfuse_secret_key'])
+    session = get_fuse_session(c)
     
     url = f"{c['langfuse_base_url']}/api/public/v2/prompts/{prompt_name}"
     params = {}
     if label:
         params['label'] = label
     
-    r = requests.get(url, auth=auth, params=params)
+    r = session.get(url, params=params)
     
     return r.text
 
@@ -781,7 +844,7 @@ def create_prompt(prompt_name, content, commit_message=None, labels=None, tags=N
         config: Optional configuration object
     """
     c = read_config()
-    auth = HTTPBasicAuth(c['langfuse_public_key'], c['langfuse_secret_key'])
+    session = get_fuse_session(c)
     url = f"{c['langfuse_base_url']}/api/public/v2/prompts"
     
     # Build the request data based on prompt type
@@ -804,21 +867,21 @@ def create_prompt(prompt_name, content, commit_message=None, labels=None, tags=N
     if config:
         data["config"] = config
     
-    r = requests.post(url, json=data, auth=auth)
+    r = session.post(url, json=data)
     return r.text
 
 def list_datasets():
     c = read_config()
-    auth = HTTPBasicAuth(c['langfuse_public_key'], c['langfuse_secret_key'])
+    session = get_fuse_session(c)
     url = f"{c['langfuse_base_url']}/api/public/v2/datasets"
-    r = requests.get(url, auth=auth)
+    r = session.get(url)
     return r.text
 
 def get_dataset(dataset_name):
     c = read_config()
-    auth = HTTPBasicAuth(c['langfuse_public_key'], c['langfuse_secret_key'])
+    session = get_fuse_session(c)
     url = f"{c['langfuse_base_url']}/api/public/v2/datasets/{dataset_name}"
-    r = requests.get(url, auth=auth)
+    r = session.get(url)
     return r.text
 
 def create_dataset(dataset_name, description=None, metadata=None):
@@ -831,7 +894,7 @@ def create_dataset(dataset_name, description=None, metadata=None):
         metadata: Optional metadata object
     """
     c = read_config()
-    auth = HTTPBasicAuth(c['langfuse_public_key'], c['langfuse_secret_key'])
+    session = get_fuse_session(c)
     url = f"{c['langfuse_base_url']}/api/public/v2/datasets"
     
     data = {"name": dataset_name}
@@ -848,47 +911,17 @@ def create_dataset(dataset_name, description=None, metadata=None):
         else:
             data["metadata"] = metadata
     
-    r = requests.post(url, json=data, auth=auth)
+    r = session.post(url, json=data)
     return r.text
 
-def list_dataset_items(dataset_name, debug=False):
+def iter_dataset_items(dataset_name, debug=False, strict=False):
+    """Lazily yield the items of a dataset, page by page"""
     c = read_config()
-    auth = HTTPBasicAuth(c['langfuse_public_key'], c['langfuse_secret_key'])
     base = f"{c['langfuse_base_url']}/api/public/dataset-items"
-    page = 1
-    all_items = []
-    
-    while True:
-        params = {'name': dataset_name, 'page': page}
-        if debug:
-            print(f"Fetching page {page} for dataset {dataset_name}: {base} with params {params}")
-            
-        r = requests.get(base, auth=auth, params=params)
-        if r.status_code != 200:
-            if debug:
-                print(f"Request failed with status {r.status_code}: {r.text}")
-            break
-            
-        try:
-            data = r.json()
-        except ValueError as e:
-            if debug:
-                print(f"JSON parsing error: {e}")
-            break
-
-        items = data.get('data') if isinstance(data, dict) else data
-        if not items:
-            if debug:
-                print("No items found, breaking")
-            break
-            
-        all_items.extend(items)
-
-        meta = data.get('meta', {})
-        if meta.get('page', page) >= meta.get('totalPages', 1):
-            break
-        page += 1
+    return iter_paginated(base, params={'name': dataset_name}, label="items", debug=debug, strict=strict)
 
+def list_dataset_items(dataset_name, debug=False):
+    all_items = list(iter_dataset_items(dataset_name, debug=debug))
     return json.dumps(all_items, indent=2)
 
 def format_dataset_display(dataset_json, items_json):
@@ -960,6 +993,40 @@ def format_dataset_display(dataset_json, items_json):
     except Exception as e:
         return f"Error formatting dataset display: {str(e)}"
 
+def build_finetuning_record(item, format_type, system_instruction):
+    """
+    Build one OpenAI or Gemini fine-tuning record from a dataset item.
+
+    Returns:
+        dict: The record, or None if the item lacks input/expectedOutput or the format is unknown
+    """
+    input_content = item.get('input')
+    output_content = item.get('expectedOutput')
+
+    if not input_content or not output_content:
+        return None
+
+    if format_type == 'openai':
+        return {
+            "messages": [
+                {"role": "system", "content": system_instruction},
+                {"role": "user", "content": input_content},
+                {"role": "assistant", "content": output_content}
+            ]
+        }
+    if format_type == 'gemini':
+        return {
+            "systemInstruction": {
+                "role": "system",
+                "parts": [{"text": system_instruction}]
+            },
+            "contents": [
+                {"role": "user", "parts": [{"text": input_content}]},
+                {"role": "model", "parts": [{"text": output_content}]}
+            ]
+        }
+    return None
+
 def format_dataset_for_finetuning(items_json, format_type, system_instruction):
     """Formats dataset items for fine-tuning."""
     try:
@@ -967,56 +1034,142 @@ def format_dataset_for_finetuning(items_json, format_type, system_instruction):
         output_lines = []
 
         for item in items:
-            input_content = item.get('input')
-            output_content = item.get('expectedOutput')
-
-            if not input_content or not output_content:
-                continue
-
-            if format_type == 'openai':
-                record = {
-                    "messages": [
-                        {"role": "system", "content": system_instruction},
-                        {"role": "user", "content": input_content},
-                        {"role": "assistant", "content": output_content}
-                    ]
-                }
-            elif format_type == 'gemini':
-                record = {
-                    "systemInstruction": {
-                        "role": "system",
-                        "parts": [{"text": system_instruction}]
-                    },
-                    "contents": [
-                        {"role": "user", "parts": [{"text": input_content}]},
-                        {"role": "model", "parts": [{"text": output_content}]}
-                    ]
-                }
-            else:
-                continue
-            
-            output_lines.append(json.dumps(record))
+            record = build_finetuning_record(item, format_type, system_instruction)
+            if record is not None:
+                output_lines.append(json.dumps(record))
 
         return '\n'.join(output_lines)
 
     except Exception as e:
         return f"Error formatting for fine-tuning: {str(e)}"
 
-def add_trace(trace_id, user_id=None, session_id=None, name=None, input_data=None, output_data=None, metadata=None):
+FINETUNING_SHUFFLE_BUFFER = 10000
+
+def _in_validation_split(item, ratio, rng):
+    """Stable per-item split: the same item lands in the same split on every export"""
+    item_id = item.get('id')
+    if item_id is None:
+        return rng.random() < ratio
+    bucket = int(hashlib.sha1(str(item_id).encode('utf-8')).hexdigest()[:8], 16) / float(0x100000000)
+    return bucket < ratio
+
+def export_finetuning_dataset(dataset_name, format_type='openai', system_instruction="You are a helpful assistant",
+                              output=None, validation_output=None, validation_size=None, validation_ratio=None,
+                              shuffle_buffer=0, seed=None, items=None):
     """
-    Create a trace in Langfuse with enhanced features
-    
+    Stream a dataset into fine-tuning JSONL without holding it in memory.
+
+    Items are paged lazily and each record is written as soon as it leaves
+    the (optional) shuffle buffer. A validation split is either a fixed-size
+    uniform sample kept with reservoir sampling (validation_size; only that
+    many records are held in memory) or a stable hash-based fraction of items
+    (validation_ratio).
+
     Args:
-        trace_id: Unique identifier for the trace
-        user_id: Optional user ID
-        session_id: Optional session ID  
-        name: Optional trace name
-        input_data: Optional input data
-        output_data: Optional output data
-        metadata: Optional metadata object
+        dataset_name: Langfuse dataset name
+        format_type: "openai" or "gemini"
+        system_instruction: System prompt included in every record
+        output: Training output path or writable stream (default: stdout)
+        validation_output: Validation output path or stream (required for a split)
+        validation_size: Number of validation records, sampled uniformly (reservoir)
+        validation_ratio: Fraction of items (0-1) assigned to validation by item id
+        shuffle_buffer: Shuffle training records through a buffer of this many records (0: keep order)
+        seed: Random seed for reproducible sampling and shuffling
+        items: Optional iterable of items to use instead of fetching the dataset
+
+    Returns:
+        dict: {"train", "validation", "skipped"} record counts
+    """
+    if format_type not in ('openai', 'gemini'):
+        raise ValueError(f"Unknown fine-tuning format '{format_type}'. Use 'openai' or 'gemini'.")
+    if validation_size and validation_ratio:
+        raise ValueError("Use either validation_size or validation_ratio, not both")
+    if (validation_size or validation_ratio) and validation_output is None:
+        raise ValueError("A validation split needs validation_output")
+    if validation_ratio is not None and not 0 <= validation_ratio <= 1:
+        raise ValueError("validation_ratio must be between 0 and 1")
+
+    rng = random.Random(seed)
+    opened = []
+
+    def open_output(target):
+        if target is None or target == '-':
+            return sys.stdout
+        if isinstance(target, str):
+            stream = open(target, 'w', encoding='utf-8')
+            opened.append(stream)
+            return stream
+        return target
+
+    counts = {"train": 0, "validation": 0, "skipped": 0}
+    shuffle_pool = []
+    reservoir = []
+    seen_for_reservoir = 0
+
+    try:
+        train_stream = open_output(output)
+        validation_stream = open_output(validation_output) if validation_output is not None else None
+
+        def write_train(line):
+            if shuffle_buffer and shuffle_buffer > 1:
+                if len(shuffle_pool) < shuffle_buffer:
+                    shuffle_pool.append(line)
+                    return
+                index = rng.randrange(len(shuffle_pool))
+                line, shuffle_pool[index] = shuffle_pool[index], line
+            train_stream.write(line + "\n")
+            counts["train"] += 1
+
+        if items is None:
+            items = iter_dataset_items(dataset_name, strict=True)
+        for item in items:
+            record = build_finetuning_record(item, format_type, system_instruction)
+            if record is None:
+                counts["skipped"] += 1
+                continue
+            line = json.dumps(record)
+
+            if validation_size:
+                # Algorithm R: every record ends up in the reservoir with equal probability
+                seen_for_reservoir += 1
+                if len(reservoir) < validation_size:
+                    reservoir.append(line)
+                    continue
+                index = rng.randrange(seen_for_reservoir)
+                if index < validation_size:
+                    line, reservoir[index] = reservoir[index], line
+                write_train(line)
+            elif validation_ratio and _in_validation_split(item, validation_ratio, rng):
+                validation_stream.write(line + "\n")
+                counts["validation"] += 1
+            else:
+                write_train(line)
+
+        rng.shuffle(shuffle_pool)
+        for line in shuffle_pool:
+            train_stream.write(line + "\n")
+            counts["train"] += 1
+        rng.shuffle(reservoir)
+        for line in reservoir:
+            validation_stream.write(line + "\n")
+            counts["validation"] += 1
+    finally:
+        for stream in opened:
+            stream.close()
+        sys.stdout.flush()
+
+    return counts
+
+def build_trace_event(trace_id, user_id=None, session_id=None, name=None, input_data=None, output_data=None, metadata=None):
+    """
+    Build a trace-create ingestion event without sending it.
+
+    The event ID is derived from the trace ID so the same call can be
+    resubmitted (e.g. as part of a larger batch) without creating duplicates.
+
+    Returns:
+        dict: Ingestion event envelope ready for /api/public/ingestion
     """
-    c = read_config()
-    auth = HTTPBasicAuth(c['langfuse_public_key'], c['langfuse_secret_key'])
     now = datetime.datetime.utcnow().isoformat() + 'Z'
     
     # Build the trace body
@@ -1038,24 +1191,47 @@ def add_trace(trace_id, user_id=None, session_id=None, name=None, input_data=Non
     if metadata:
         body["metadata"] = metadata
     
-    # Build the ingestion event
-    event_id = trace_id + "-event"  # Create unique event ID
-    data = {
-        "batch": [
-            {
-                "id": event_id,
-                "timestamp": now,
-                "type": "trace-create",
-                "body": body
-            }
-        ]
+    return {
+        "id": trace_id + "-event",  # Create unique event ID
+        "timestamp": now,
+        "type": "trace-create",
+        "body": body
     }
+
+def _should_enqueue(enqueue):
+    """Explicit enqueue flag, falling back to the COAIAPY_OUTBOX default"""
+    return outbox_enabled() if enqueue is None else bool(enqueue)
+
+def add_trace(trace_id, user_id=None, session_id=None, name=None, input_data=None, output_data=None, metadata=None,
+              enqueue=None):
+    """
+    Create a trace in Langfuse with enhanced features
+    
+    Args:
+        trace_id: Unique identifier for the trace
+        user_id: Optional user ID
+        session_id: Optional session ID  
+        name: Optional trace name
+        input_data: Optional input data
+        output_data: Optional output data
+        metadata: Optional metadata object
+        enqueue: Queue the event in the local outbox instead of sending it
+                 (default: COAIAPY_OUTBOX environment variable)
+    """
+    event = build_trace_event(trace_id, user_id=user_id, session_id=session_id, name=name,
+                              input_data=input_data, output_data=output_data, metadata=metadata)
+    if _should_enqueue(enqueue):
+        return enqueue_ingestion_events([event], trace_id)
+
+    c = read_config()
+    session = get_fuse_session(c)
+    data = {"batch": [event]}
     
     url = f"{c['langfuse_base_url']}/api/public/ingestion"
-    r = requests.post(url, json=data, auth=auth)
+    r = session.post(url, json=data)
     return process_langfuse_response(r.text, trace_id, "trace creation")
 
-def patch_trace_output(trace_id, output_data):
+def patch_trace_output(trace_id, output_data, enqueue=None):
     """
     Update the output field of an existing trace in Langfuse.
 
@@ -1065,12 +1241,12 @@ def patch_trace_output(trace_id, output_data):
     Args:
         trace_id: ID of the trace to update
         output_data: New output data (can be string, object, or any JSON-serializable data)
+        enqueue: Queue the event in the local outbox instead of sending it
+                 (default: COAIAPY_OUTBOX environment variable)
 
     Returns:
         Processed response with success/error status
     """
-    c = read_config()
-    auth = HTTPBasicAuth(c['langfuse_public_key'], c['langfuse_secret_key'])
     now = datetime.datetime.utcnow().isoformat() + 'Z'
 
     # Build minimal trace body with just ID and output
@@ -1085,45 +1261,36 @@ def patch_trace_output(trace_id, output_data):
     # Using timestamp-based suffix to make it deterministic but unique
     event_id = f"{trace_id}-patch-{uuid.uuid4().hex[:8]}"
 
-    data = {
-        "batch": [
-            {
-                "id": event_id,
-                "timestamp": now,
-                "type": "trace-create",
-                "body": body
-            }
-        ]
+    event = {
+        "id": event_id,
+        "timestamp": now,
+        "type": "trace-create",
+        "body": body
     }
+    if _should_enqueue(enqueue):
+        return enqueue_ingestion_events([event], trace_id)
+
+    c = read_config()
+    session = get_fuse_session(c)
+    data = {"batch": [event]}
 
     url = f"{c['langfuse_base_url']}/api/public/ingestion"
-    r = requests.post(url, json=data, auth=auth)
+    r = session.post(url, json=data)
     return process_langfuse_response(r.text, trace_id, "trace output patch")
 
-def add_observation(observation_id, trace_id, observation_type="EVENT", name=None, 
-                   input_data=None, output_data=None, metadata=None, parent_observation_id=None,
-                   start_time=None, end_time=None, level="DEFAULT", model=None, usage=None):
+def build_observation_event(observation_id, trace_id, observation_type="EVENT", name=None,
+                            input_data=None, output_data=None, metadata=None, parent_observation_id=None,
+                            start_time=None, end_time=None, level="DEFAULT", model=None, usage=None):
     """
-    Create an observation (event, span, or generation) in Langfuse
-    
-    Args:
-        observation_id: Unique identifier for the observation
-        trace_id: ID of the trace this observation belongs to
-        observation_type: Type of observation ("EVENT", "SPAN", "GENERATION")
-        name: Optional observation name
-        input_data: Optional input data
-        output_data: Optional output data
-        metadata: Optional metadata object
-        parent_observation_id: Optional parent observation ID for nesting
-        start_time: Optional start time (ISO format or tlid format yyMMddHHmmss)
-        end_time: Optional end time (ISO format or tlid format yyMMddHHmmss)
-        level: Observation level ("DEBUG", "DEFAULT", "WARNING", "ERROR")
-        model: Optional model name
-        usage: Optional usage information
+    Build an observation-create ingestion event without sending it.
+
+    Accepts the same arguments as add_observation(). IDs are chosen by the
+    caller, so parent references can point at observations that are part of
+    the same (not yet sent) batch.
+
+    Returns:
+        dict: Ingestion event envelope ready for /api/public/ingestion
     """
-    c = read_config()
-    auth = HTTPBasicAuth(c['langfuse_public_key'], c['langfuse_secret_key'])
-    
     # Auto-detect and parse datetime formats
     if start_time:
         start_time = detect_and_parse_datetime(start_time)
@@ -1159,43 +1326,301 @@ def add_observation(observation_id, trace_id, observation_type="EVENT", name=Non
         body["usage"] = usage
     
     # Build the ingestion event with proper envelope structure
-    event_id = observation_id + "-event"  # Create unique event ID
-    now = datetime.datetime.utcnow().isoformat() + 'Z'
-    data = {
-        "batch": [
-            {
-                "id": event_id,
-                "timestamp": now,
-                "type": "observation-create",
-                "body": body
-            }
-        ]
+    return {
+        "id": observation_id + "-event",  # Create unique event ID
+        "timestamp": datetime.datetime.utcnow().isoformat() + 'Z',
+        "type": "observation-create",
+        "body": body
     }
+
+def add_observation(observation_id, trace_id, observation_type="EVENT", name=None, 
+                   input_data=None, output_data=None, metadata=None, parent_observation_id=None,
+                   start_time=None, end_time=None, level="DEFAULT", model=None, usage=None, enqueue=None):
+    """
+    Create an observation (event, span, or generation) in Langfuse
+    
+    Args:
+        observation_id: Unique identifier for the observation
+        trace_id: ID of the trace this observation belongs to
+        observation_type: Type of observation ("EVENT", "SPAN", "GENERATION")
+        name: Optional observation name
+        input_data: Optional input data
+        output_data: Optional output data
+        metadata: Optional metadata object
+        parent_observation_id: Optional parent observation ID for nesting
+        start_time: Optional start time (ISO format or tlid format yyMMddHHmmss)
+        end_time: Optional end time (ISO format or tlid format yyMMddHHmmss)
+        level: Observation level ("DEBUG", "DEFAULT", "WARNING", "ERROR")
+        model: Optional model name
+        usage: Optional usage information
+        enqueue: Queue the event in the local outbox instead of sending it
+                 (default: COAIAPY_OUTBOX environment variable)
+    """
+    event = build_observation_event(
+        observation_id, trace_id, observation_type=observation_type, name=name,
+        input_data=input_data, output_data=output_data, metadata=metadata,
+        parent_observation_id=parent_observation_id, start_time=start_time,
+        end_time=end_time, level=level, model=model, usage=usage
+    )
+    if _should_enqueue(enqueue):
+        return enqueue_ingestion_events([event], observation_id)
+
+    c = read_config()
+    session = get_fuse_session(c)
+    data = {"batch": [event]}
     
     url = f"{c['langfuse_base_url']}/api/public/ingestion"
-    r = requests.post(url, json=data, auth=auth)
+    r = session.post(url, json=data)
     return process_langfuse_response(r.text, observation_id, "observation creation")
 
-def add_observations_batch(trace_id, observations_data, format_type='json', dry_run=False):
+# Langfuse rejects ingestion batches above 3.5 MB; keep headroom for the envelope
+MAX_INGESTION_BATCH_BYTES = 3000000
+MAX_INGESTION_BATCH_EVENTS = 500
+INGESTION_MAX_WORKERS = 4
+
+def chunk_ingestion_events(events, max_batch_bytes=MAX_INGESTION_BATCH_BYTES, max_batch_events=MAX_INGESTION_BATCH_EVENTS):
     """
-    Add multiple observations to a trace from structured data
-    
+    Split ingestion events into batches bounded by JSON payload size and event count.
+
+    Event order is preserved. An event larger than the limit on its own is
+    placed in a batch by itself so the server can report it as an error.
+
+    Yields:
+        list: Consecutive events forming one batch
+    """
+    envelope_bytes = len('{"batch": []}')
+    batch = []
+    batch_bytes = envelope_bytes
+    for event in events:
+        event_bytes = len(json.dumps(event).encode('utf-8')) + 2  # ", " separator
+        if batch and (batch_bytes + event_bytes > max_batch_bytes or
+                      (max_batch_events and len(batch) >= max_batch_events)):
+            yield batch
+            batch = []
+            batch_bytes = envelope_bytes
+        batch.append(event)
+        batch_bytes += event_bytes
+    if batch:
+        yield batch
+
+def _parse_ingestion_response(response, batch):
+    """Normalize an ingestion response into (successes, errors) lists"""
+    if response.status_code in (200, 201, 207):
+        try:
+            data = response.json()
+            return data.get('successes', []), data.get('errors', [])
+        except ValueError:
+            pass
+    # The whole request failed; flag it so callers can tell it from per-event rejections
+    errors = [
+        {"id": event["id"], "status": response.status_code, "message": response.text, "batchError": True}
+        for event in batch
+    ]
+    return [], errors
+
+def _send_ingestion_chunk(session, url, batch):
+    """
+    POST one ingestion chunk; a chunk that still fails is reported as errors for all its events.
+
+    Network errors, timeouts and 429/5xx are retried by the shared session
+    (ingestion is the one POST endpoint it resends, since events carry their
+    own ids), so there is no second retry loop here.
+    """
+    try:
+        r = session.post(url, json={"batch": batch})
+    except Exception as e:
+        return [], [{"id": event["id"], "status": None, "message": str(e)} for event in batch]
+    return _parse_ingestion_response(r, batch)
+
+def ingest_events(events, max_batch_bytes=MAX_INGESTION_BATCH_BYTES, max_batch_events=MAX_INGESTION_BATCH_EVENTS,
+                  max_workers=INGESTION_MAX_WORKERS):
+    """
+    Send ingestion events to Langfuse in size- and count-bounded batches.
+
+    Chunks are submitted concurrently through a bounded worker pool sharing
+    the pooled session; results from the 207 multi-status responses are
+    merged in chunk order.
+
     Args:
-        trace_id: ID of the trace to add observations to
-        observations_data: List of observation dictionaries or string data to parse.
-                          start_time and end_time fields support ISO format, tlid format (yyMMddHHmmss), 
-                          or short tlid format (yyMMddHHmm)
-        format_type: Format of input data ('json' or 'yaml')
-        dry_run: If True, show what would be created without actually creating
-    
+        events: List of event envelopes (see build_trace_event/build_observation_event)
+        max_batch_bytes: Maximum JSON payload size per request
+        max_batch_events: Maximum number of events per request
+        max_workers: Maximum number of chunks in flight at once
+
     Returns:
-        Results from batch creation or dry run preview
+        dict: {"successes": [...], "errors": [...], "batches": int} merged across batches
     """
     c = read_config()
-    auth = HTTPBasicAuth(c['langfuse_public_key'], c['langfuse_secret_key'])
-    
-    # Parse input data if it's a string
-    if isinstance(observations_data, str):
+    session = get_fuse_session(c)
+    url = f"{c['langfuse_base_url']}/api/public/ingestion"
+
+    batches = list(chunk_ingestion_events(events, max_batch_bytes, max_batch_events))
+    result = {"successes": [], "errors": [], "batches": len(batches)}
+    if not batches:
+        return result
+
+    if max_workers and max_workers > 1 and len(batches) > 1:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as executor:
+            outcomes = list(executor.map(lambda batch: _send_ingestion_chunk(session, url, batch), batches))
+    else:
+        outcomes = [_send_ingestion_chunk(session, url, batch) for batch in batches]
+
+    for successes, errors in outcomes:
+        result["successes"].extend(successes)
+        result["errors"].extend(errors)
+    return result
+
+OUTBOX_FLUSH_INTERVAL = 5.0
+
+def enqueue_ingestion_events(events, actual_id=None):
+    """
+    Queue ingestion events in the local outbox instead of sending them now.
+
+    build_trace_event/build_observation_event derive the event id from the
+    trace/observation id, so a create followed by an update of the same object
+    would share one id. Each queued event therefore gets its own id (kept for
+    every resend of that event), and both are delivered like direct posts.
+
+    Args:
+        events: Event envelopes (see build_trace_event/build_observation_event)
+        actual_id: Trace/observation ID to report back to the caller
+
+    Returns:
+        JSON string with the queued event IDs and the outbox location
+    """
+    outbox = get_outbox()
+    events = [dict(event, id=f"{event['id']}-{uuid.uuid4().hex[:12]}") for event in events]
+    queued = outbox.enqueue(_project_credential_key(read_config()), events)
+    if queued < len(events):
+        print(f"Warning: {len(events) - queued} event(s) were already queued and not added again", file=sys.stderr)
+    return json.dumps({
+        "queued": queued,
+        "id": actual_id,
+        "eventIds": [event["id"] for event in events],
+        "outbox": outbox.db_path,
+    }, indent=2)
+
+def _is_permanent_ingestion_error(error):
+    status = error.get("status")
+    if not isinstance(status, int):
+        return False
+    if error.get("batchError"):
+        # 401/403/404/408/413... on the whole request say nothing about the events
+        # (expired key, proxy, wrong base URL); only a malformed batch is final
+        return status == 400
+    # 4xx other than 429 in a multi-status response means Langfuse rejected the event itself
+    return 400 <= status < 500 and status != 429
+
+def flush_outbox(max_events=None, max_batch_events=MAX_INGESTION_BATCH_EVENTS,
+                 max_workers=INGESTION_MAX_WORKERS):
+    """
+    Send queued ingestion events to Langfuse.
+
+    Events are claimed oldest first, sent through ingest_events, removed once
+    Langfuse reports them as successes and otherwise rescheduled with
+    exponential backoff (or kept as dead after permanent errors / too many
+    attempts). Only events queued under the current credentials are sent.
+
+    Args:
+        max_events: Stop after this many events (default: drain everything due)
+        max_batch_events: Maximum number of events per ingestion request
+        max_workers: Maximum number of ingestion requests in flight at once
+
+    Returns:
+        dict: {"sent", "failed", "dead", "batches", "pending"} counts
+    """
+    outbox = get_outbox()
+    scope = _project_credential_key(read_config())
+    claim_size = max(max_batch_events, 1) * max(max_workers or 1, 1)
+    result = {"sent": 0, "failed": 0, "dead": 0, "batches": 0}
+
+    while max_events is None or result["sent"] + result["failed"] < max_events:
+        limit = claim_size if max_events is None else min(claim_size, max_events - result["sent"] - result["failed"])
+        events = outbox.claim(scope, limit)
+        if not events:
+            break
+        try:
+            response = ingest_events(events, max_batch_events=max_batch_events, max_workers=max_workers)
+        except Exception:
+            outbox.release(scope, [event["id"] for event in events])
+            raise
+        succeeded = {s.get("id") for s in response["successes"]}
+        failures = [(e.get("id"), e.get("message") or json.dumps(e), _is_permanent_ingestion_error(e))
+                    for e in response["errors"]]
+        reported = succeeded | {event_id for event_id, _, _ in failures}
+        # Events missing from the multi-status response are retried
+        failures.extend((event["id"], "no result in ingestion response", False)
+                        for event in events if event["id"] not in reported)
+
+        outbox.ack(scope, succeeded)
+        result["dead"] += outbox.fail(scope, failures)
+        result["sent"] += len(succeeded)
+        result["failed"] += len(failures)
+        result["batches"] += response["batches"]
+        if failures:
+            # Failed events are backed off; stop instead of hammering a struggling server
+            break
+
+    result["pending"] = outbox.stats(scope)["pending"]
+    return result
+
+class OutboxFlusher(threading.Thread):
+    """
+    Daemon thread that drains the outbox periodically.
+
+    Long-running processes (e.g. the MCP server) can start one so queued
+    events reach Langfuse without a separate `coaia fuse flush`.
+    """
+
+    def __init__(self, interval=OUTBOX_FLUSH_INTERVAL, **flush_kwargs):
+        super().__init__(name="coaia-outbox-flusher", daemon=True)
+        self.interval = interval
+        self.flush_kwargs = flush_kwargs
+        self.last_result = None
+        self.last_error = None
+        self._stop_event = threading.Event()
+        self._wake = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.last_result = flush_outbox(**self.flush_kwargs)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def flush_now(self):
+        """Wake the flusher without waiting for the interval"""
+        self._wake.set()
+
+    def stop(self, timeout=None):
+        """Stop after the current flush and wait for the thread to exit"""
+        self._stop_event.set()
+        self._wake.set()
+        self.join(timeout)
+
+def add_observations_batch(trace_id, observations_data, format_type='json', dry_run=False,
+                           max_batch_events=MAX_INGESTION_BATCH_EVENTS, max_workers=INGESTION_MAX_WORKERS):
+    """
+    Add multiple observations to a trace from structured data
+    
+    Args:
+        trace_id: ID of the trace to add observations to
+        observations_data: List of observation dictionaries or string data to parse.
+                          start_time and end_time fields support ISO format, tlid format (yyMMddHHmmss), 
+                          or short tlid format (yyMMddHHmm)
+        format_type: Format of input data ('json' or 'yaml')
+        dry_run: If True, show what would be created without actually creating
+        max_batch_events: Maximum number of observations per ingestion request
+        max_workers: Maximum number of ingestion requests in flight at once
+    
+    Returns:
+        JSON with aggregated successes/errors/batches, or dry run preview
+    """
+    # Parse input data if it's a string
+    if isinstance(observations_data, str):
         try:
             if format_type == 'yaml':
                 observations = yaml.safe_load(observations_data)
@@ -1290,12 +1715,10 @@ def add_observations_batch(trace_id, observations_data, format_type='json', dry_
         
         batch_events.append(event)
     
-    # Send batch request
-    data = {"batch": batch_events}
-    url = f"{c['langfuse_base_url']}/api/public/ingestion"
-    r = requests.post(url, json=data, auth=auth)
-    # For batch operations, we don't have a single ID to clean up, so return as-is
-    return r.text
+    # Send in size/count-bounded chunks; the aggregated result keeps the
+    # ingestion API's successes/errors shape
+    result = ingest_events(batch_events, max_batch_events=max_batch_events, max_workers=max_workers)
+    return json.dumps(result, indent=2)
 
 def create_session(session_id, user_id, session_name="New Session"):
     return add_trace(trace_id=session_id, user_id=user_id, session_id=session_id, name=session_name)
@@ -1305,14 +1728,14 @@ def add_trace_node(session_id, trace_id, user_id, node_name="Child Node"):
 
 def create_score(score_id, score_name="New Score", score_value=1.0):
     c = read_config()
-    auth = HTTPBasicAuth(c['langfuse_public_key'], c['langfuse_secret_key'])
+    session = get_fuse_session(c)
     url = f"{c['langfuse_base_url']}/api/public/scores"
     data = {
         "id": score_id,
         "name": score_name,
         "value": score_value
     }
-    r = requests.post(url, json=data, auth=auth)
+    r = session.post(url, json=data)
     return r.text
 
 def apply_score_to_trace(trace_id, score_id, score_value=1.0):
@@ -1339,7 +1762,7 @@ def create_score_for_target(target_type, target_id, score_id, score_value=1.0, s
         comment: Optional comment for the score
     """
     c = read_config()
-    auth = HTTPBasicAuth(c['langfuse_public_key'], c['langfuse_secret_key'])
+    session = get_fuse_session(c)
     url = f"{c['langfuse_base_url']}/api/public/scores"
     
     # Build the request data
@@ -1370,110 +1793,28 @@ def create_score_for_target(target_type, target_id, score_id, score_value=1.0, s
     if comment:
         data["comment"] = comment
     
-    r = requests.post(url, json=data, auth=auth)
+    r = session.post(url, json=data)
     return r.text
 
 def list_scores(debug=False, user_id=None, name=None, from_timestamp=None, to_timestamp=None, config_id=None):
     """List all scores from Langfuse with optional filtering"""
     c = read_config()
-    auth = HTTPBasicAuth(c['langfuse_public_key'], c['langfuse_secret_key'])
     base = f"{c['langfuse_base_url']}/api/public/v2/scores"
-    page = 1
-    all_scores = []
     
-    if debug:
-        print(f"Starting pagination from: {base}")
-    
-    while True:
-        # Build query parameters
-        params = {"page": page}
-        if user_id:
-            params["userId"] = user_id
-        if name:
-            params["name"] = name
-        if from_timestamp:
-            params["fromTimestamp"] = from_timestamp
-        if to_timestamp:
-            params["toTimestamp"] = to_timestamp
-        if config_id:
-            params["configId"] = config_id
-            
-        if debug:
-            print(f"Fetching page {page}: {base} with params {params}")
-            
-        r = requests.get(base, params=params, auth=auth)
-        if r.status_code != 200:
-            if debug:
-                print(f"Request failed with status {r.status_code}: {r.text}")
-            break
-            
-        try:
-            data = r.json()
-        except ValueError as e:
-            if debug:
-                print(f"JSON parsing error: {e}")
-            break
-
-        if debug:
-            print(f"Response keys: {list(data.keys()) if isinstance(data, dict) else 'Not a dict'}")
-            if isinstance(data, dict):
-                print(f"  data length: {len(data.get('data', [])) if data.get('data') else 'No data key'}")
-                meta = data.get('meta', {})
-                print(f"  meta: {meta}")
-
-        scores = data.get('data') if isinstance(data, dict) else data
-        if not scores:
-            if debug:
-                print("No scores found, breaking")
-            break
-            
-        if isinstance(scores, list):
-            all_scores.extend(scores)
-            if debug:
-                print(f"Added {len(scores)} scores, total now: {len(all_scores)}")
-        else:
-            all_scores.append(scores)
-            if debug:
-                print(f"Added 1 score, total now: {len(all_scores)}")
+    # Build query parameters
+    params = {}
+    if user_id:
+        params["userId"] = user_id
+    if name:
+        params["name"] = name
+    if from_timestamp:
+        params["fromTimestamp"] = from_timestamp
+    if to_timestamp:
+        params["toTimestamp"] = to_timestamp
+    if config_id:
+        params["configId"] = config_id
 
-        # Check pagination conditions
-        should_continue = False
-        if isinstance(data, dict):
-            # Check for meta-based pagination (Langfuse v2 format)
-            meta = data.get('meta', {})
-            if meta and meta.get('totalPages'):
-                current_page = meta.get('page', page)
-                total_pages = meta.get('totalPages')
-                if current_page < total_pages:
-                    page += 1
-                    should_continue = True
-                    if debug:
-                        print(f"Meta pagination: page {current_page} < totalPages {total_pages}, continuing to page {page}")
-                else:
-                    if debug:
-                        print(f"Meta pagination: page {current_page} >= totalPages {total_pages}, stopping")
-            # Fallback to other pagination formats
-            elif data.get('hasNextPage'):
-                page += 1
-                should_continue = True
-                if debug:
-                    print(f"hasNextPage=True, continuing to page {page}")
-            elif data.get('nextPage'):
-                page = data['nextPage']
-                should_continue = True
-                if debug:
-                    print(f"nextPage={page}, continuing")
-            elif data.get('totalPages') and page < data['totalPages']:
-                page += 1
-                should_continue = True
-                if debug:
-                    print(f"page {page} < totalPages {data.get('totalPages')}, continuing")
-            else:
-                if debug:
-                    print("No pagination indicators found, stopping")
-        
-        if not should_continue:
-            break
+    all_scores = list(iter_paginated(base, params=params, label="scores", debug=debug))
 
     if debug:
         print(f"Final result: {len(all_scores)} total scores")
@@ -1540,92 +1881,8 @@ def format_scores_table(scores_json):
 def list_score_configs(debug=False):
     """List all score configs from Langfuse"""
     c = read_config()
-    auth = HTTPBasicAuth(c['langfuse_public_key'], c['langfuse_secret_key'])
     base = f"{c['langfuse_base_url']}/api/public/score-configs"
-    page = 1
-    all_configs = []
-    
-    if debug:
-        print(f"Starting pagination from: {base}")
-    
-    while True:
-        url = f"{base}?page={page}"
-        if debug:
-            print(f"Fetching page {page}: {url}")
-            
-        r = requests.get(url, auth=auth)
-        if r.status_code != 200:
-            if debug:
-                print(f"Request failed with status {r.status_code}: {r.text}")
-            break
-            
-        try:
-            data = r.json()
-        except ValueError as e:
-            if debug:
-                print(f"JSON parsing error: {e}")
-            break
-
-        if debug:
-            print(f"Response keys: {list(data.keys()) if isinstance(data, dict) else 'Not a dict'}")
-            if isinstance(data, dict):
-                print(f"  data length: {len(data.get('data', [])) if data.get('data') else 'No data key'}")
-                meta = data.get('meta', {})
-                print(f"  meta: {meta}")
-
-        configs = data.get('data') if isinstance(data, dict) else data
-        if not configs:
-            if debug:
-                print("No score configs found, breaking")
-            break
-            
-        if isinstance(configs, list):
-            all_configs.extend(configs)
-            if debug:
-                print(f"Added {len(configs)} score configs, total now: {len(all_configs)}")
-        else:
-            all_configs.append(configs)
-            if debug:
-                print(f"Added 1 score config, total now: {len(all_configs)}")
-
-        # Check pagination conditions
-        should_continue = False
-        if isinstance(data, dict):
-            # Check for meta-based pagination (Langfuse v2 format)
-            meta = data.get('meta', {})
-            if meta and meta.get('totalPages'):
-                current_page = meta.get('page', page)
-                total_pages = meta.get('totalPages')
-                if current_page < total_pages:
-                    page += 1
-                    should_continue = True
-                    if debug:
-                        print(f"Meta pagination: page {current_page} < totalPages {total_pages}, continuing to page {page}")
-                else:
-                    if debug:
-                        print(f"Meta pagination: page {current_page} >= totalPages {total_pages}, stopping")
-            # Fallback to other pagination formats
-            elif data.get('hasNextPage'):
-                page += 1
-                should_continue = True
-                if debug:
-                    print(f"hasNextPage=True, continuing to page {page}")
-            elif data.get('nextPage'):
-                page = data['nextPage']
-                should_continue = True
-                if debug:
-                    print(f"nextPage={page}, continuing")
-            elif data.get('totalPages') and page < data['totalPages']:
-                page += 1
-                should_continue = True
-                if debug:
-                    print(f"page {page} < totalPages {data.get('totalPages')}, continuing")
-            else:
-                if debug:
-                    print("No pagination indicators found, stopping")
-        
-        if not should_continue:
-            break
+    all_configs = list(iter_paginated(base, label="score configs", debug=debug))
 
     if debug:
         print(f"Final result: {len(all_configs)} total score configs")
@@ -1692,9 +1949,9 @@ def format_score_configs_table(configs_json):
 def get_score_config(config_id):
     """Get a specific score config by ID"""
     c = read_config()
-    auth = HTTPBasicAuth(c['langfuse_public_key'], c['langfuse_secret_key'])
+    session = get_fuse_session(c)
     url = f"{c['langfuse_base_url']}/api/public/score-configs/{config_id}"
-    r = requests.get(url, auth=auth)
+    r = session.get(url)
     return r.text
 
 def create_score_config(name, data_type, description=None, categories=None, min_value=None, max_value=None):
@@ -1710,7 +1967,7 @@ def create_score_config(name, data_type, description=None, categories=None, min_
         max_value: Optional maximum value for numerical scores
     """
     c = read_config()
-    auth = HTTPBasicAuth(c['langfuse_public_key'], c['langfuse_secret_key'])
+    session = get_fuse_session(c)
     url = f"{c['langfuse_base_url']}/api/public/score-configs"
     
     # Build the request data
@@ -1732,7 +1989,7 @@ def create_score_config(name, data_type, description=None, categories=None, min_
     if max_value is not None:
         data["maxValue"] = max_value
     
-    r = requests.post(url, json=data, auth=auth)
+    r = session.post(url, json=data)
     return r.text
 
 # Built-in preset library of unified score configurations
@@ -2687,6 +2944,140 @@ def add_trace_node_and_save(session_file, session_id, trace_id, user_id, node_na
     save_session_file(session_file, data)
     return result
 
+OBSERVATIONS_MAX_WORKERS = 8
+OBSERVATIONS_PAGE_LIMIT = 100
+# Without an explicit end, bulk observation windows reach this far past the newest
+# listed trace (observations of long-running traces can start after the trace timestamp)
+BULK_OBSERVATIONS_WINDOW_MARGIN_SECONDS = 3600
+
+def _fetch_trace_observations(session, observations_url, trace_id):
+    """Fetch the observations of one trace; returns [] on error"""
+    try:
+        obs_r = session.get(observations_url, params={'traceId': trace_id})
+    except Exception:
+        return []
+    if obs_r.status_code != 200:
+        return []  # No observations or error fetching
+    obs_data = json.loads(obs_r.text)
+    if isinstance(obs_data, dict) and 'data' in obs_data:
+        return obs_data['data']
+    return obs_data
+
+def fetch_observations_for_traces(trace_ids, max_workers=OBSERVATIONS_MAX_WORKERS):
+    """
+    Fetch observations for several traces concurrently.
+
+    Args:
+        trace_ids: List of trace IDs
+        max_workers: Maximum number of requests in flight at once
+
+    Returns:
+        dict: trace_id -> list of observations (empty list on error)
+    """
+    if not trace_ids:
+        return {}
+    c = read_config()
+    session = get_fuse_session(c)
+    observations_url = f"{c['langfuse_base_url']}/api/public/observations"
+
+    workers = max(1, min(max_workers or 1, len(trace_ids)))
+    if workers == 1:
+        results = [_fetch_trace_observations(session, observations_url, tid) for tid in trace_ids]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(
+                lambda tid: _fetch_trace_observations(session, observations_url, tid), trace_ids
+            ))
+    return dict(zip(trace_ids, results))
+
+def fetch_observations_in_window(from_start_time=None, to_start_time=None, trace_ids=None,
+                                 limit=OBSERVATIONS_PAGE_LIMIT):
+    """
+    Fetch all observations started within a time window and group them by traceId.
+
+    This replaces one request per trace with a handful of paged requests when
+    listing many traces from the same period. Pages after the first are
+    fetched concurrently.
+
+    Args:
+        from_start_time: Only observations starting at/after this time (ISO 8601)
+        to_start_time: Only observations starting before this time (ISO 8601)
+        trace_ids: Optional list of trace IDs to keep (others are discarded)
+        limit: Page size for the observations endpoint
+
+    Returns:
+        dict: trace_id -> list of observations
+
+    Raises:
+        Exception: If any page cannot be fetched (a partial grouping would
+                   silently show traces with missing observations)
+    """
+    c = read_config()
+    observations_url = f"{c['langfuse_base_url']}/api/public/observations"
+
+    wanted = set(trace_ids) if trace_ids is not None else None
+    grouped = {tid: [] for tid in trace_ids} if trace_ids is not None else {}
+
+    params = {'limit': limit}
+    if from_start_time:
+        params['fromStartTime'] = from_start_time
+    if to_start_time:
+        params['toStartTime'] = to_start_time
+
+    for obs in iter_paginated(observations_url, params, label="observations", strict=True):
+        trace_id = obs.get('traceId')
+        if wanted is not None and trace_id not in wanted:
+            continue
+        grouped.setdefault(trace_id, []).append(obs)
+    return grouped
+
+def _bulk_observations_window(traces, from_timestamp=None, to_timestamp=None,
+                              margin_seconds=BULK_OBSERVATIONS_WINDOW_MARGIN_SECONDS):
+    """
+    (from, to) start-time window covering the observations of listed traces.
+
+    Missing bounds are derived from the trace timestamps; returns None when no
+    end can be derived, since an open window would page through every later
+    observation of the project.
+    """
+    times = sorted((parse_timestamp(trace.get('timestamp')), trace['timestamp']) for trace in traces
+                   if parse_timestamp(trace.get('timestamp')))
+    if not from_timestamp and times:
+        from_timestamp = times[0][1]
+    if not to_timestamp:
+        if not times:
+            return None
+        newest = times[-1][0] + datetime.timedelta(seconds=margin_seconds)
+        to_timestamp = newest.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+    return from_timestamp, to_timestamp
+
+def _build_traces_params(session_id=None, user_id=None, name=None, tags=None,
+                         from_timestamp=None, to_timestamp=None, order_by=None,
+                         version=None, release=None, environment=None):
+    """Build /api/public/traces filter query parameters"""
+    params = {}
+    if session_id:
+        params['sessionId'] = session_id
+    if user_id:
+        params['userId'] = user_id
+    if name:
+        params['name'] = name
+    if tags:
+        params['tags'] = tags if isinstance(tags, list) else [tags]
+    if from_timestamp:
+        params['fromTimestamp'] = from_timestamp
+    if to_timestamp:
+        params['toTimestamp'] = to_timestamp
+    if order_by:
+        params['orderBy'] = order_by
+    if version:
+        params['version'] = version
+    if release:
+        params['release'] = release
+    if environment:
+        params['environment'] = environment if isinstance(environment, list) else [environment]
+    return params
+
 def list_traces(
     include_observations=False, 
     session_id=None,
@@ -2700,7 +3091,9 @@ def list_traces(
     release=None,
     environment=None,
     page=None,
-    limit=None
+    limit=None,
+    observations_mode="concurrent",
+    max_workers=OBSERVATIONS_MAX_WORKERS
 ):
     """
     List traces with comprehensive filtering support.
@@ -2719,44 +3112,33 @@ def list_traces(
         environment: List of environments
         page: Page number (starts at 1)
         limit: Items per page
+        observations_mode: How observations are fetched when include_observations is set:
+                          "concurrent" (one request per trace, run in parallel) or
+                          "bulk" (page through observations in the traces' time window
+                          and group them by traceId client-side; without to_timestamp the
+                          window ends an hour after the newest trace)
+        max_workers: Maximum concurrent observation requests
     
     Returns:
         JSON string of traces
     """
     c = read_config()
-    auth = HTTPBasicAuth(c['langfuse_public_key'], c['langfuse_secret_key'])
+    session = get_fuse_session(c)
     base_url = c['langfuse_base_url']
 
     traces_url = f"{base_url}/api/public/traces"
 
-    # Build query parameters
-    params = {}
-    if session_id:
-        params['sessionId'] = session_id
-    if user_id:
-        params['userId'] = user_id
-    if name:
-        params['name'] = name
-    if tags:
-        params['tags'] = tags if isinstance(tags, list) else [tags]
-    if from_timestamp:
-        params['fromTimestamp'] = from_timestamp
-    if to_timestamp:
-        params['toTimestamp'] = to_timestamp
-    if order_by:
-        params['orderBy'] = order_by
-    if version:
-        params['version'] = version
-    if release:
-        params['release'] = release
-    if environment:
-        params['environment'] = environment if isinstance(environment, list) else [environment]
+    params = _build_traces_params(
+        session_id=session_id, user_id=user_id, name=name, tags=tags,
+        from_timestamp=from_timestamp, to_timestamp=to_timestamp, order_by=order_by,
+        version=version, release=release, environment=environment
+    )
     if page:
         params['page'] = page
     if limit:
         params['limit'] = limit
 
-    r = requests.get(traces_url, auth=auth, params=params)
+    r = session.get(traces_url, params=params)
 
     if r.status_code != 200:
         return r.text # Return error if traces cannot be fetched
@@ -2770,30 +3152,120 @@ def list_traces(
         traces = traces_data
         
     if include_observations:
-        observations_url = f"{base_url}/api/public/observations"
+        trace_ids = [trace.get('id') for trace in traces if trace.get('id')]
+        window = _bulk_observations_window(traces, from_timestamp, to_timestamp) \
+            if observations_mode == "bulk" and traces else None
+        incomplete = False
+        if window:
+            try:
+                grouped = fetch_observations_in_window(from_start_time=window[0], to_start_time=window[1],
+                                                       trace_ids=trace_ids)
+            except Exception as e:
+                print(f"Warning: Could not fetch observations: {e}", file=sys.stderr)
+                grouped, incomplete = {}, True
+        else:
+            grouped = fetch_observations_for_traces(trace_ids, max_workers=max_workers)
         for trace in traces:
-            trace_id = trace.get('id')
-            if trace_id:
-                # Fetch observations for each trace
-                obs_r = requests.get(f"{observations_url}?traceId={trace_id}", auth=auth)
-                if obs_r.status_code == 200:
-                    obs_data = json.loads(obs_r.text)
-                    if isinstance(obs_data, dict) and 'data' in obs_data:
-                        trace['observations'] = obs_data['data']
-                    else:
-                        trace['observations'] = obs_data
-                else:
-                    trace['observations'] = [] # No observations or error fetching
-            else:
-                trace['observations'] = [] # No trace ID
+            trace['observations'] = grouped.get(trace.get('id'), []) if trace.get('id') else []
+            if incomplete:
+                trace['observationsIncomplete'] = True
                 
     return json.dumps(traces, indent=2)
 
+TRACES_PAGE_LIMIT = 100
+
+def iter_traces(
+    session_id=None,
+    user_id=None,
+    name=None,
+    tags=None,
+    from_timestamp=None,
+    to_timestamp=None,
+    order_by=None,
+    version=None,
+    release=None,
+    environment=None,
+    limit=TRACES_PAGE_LIMIT,
+    start_page=1,
+    prefetch=True
+):
+    """
+    Iterate over all traces matching the filters, one parsed dict at a time.
+
+    Pages are walked transparently; with prefetch enabled, page N+1 is
+    requested in the background while the caller consumes page N, so only
+    about two pages are held in memory at once.
+
+    Args:
+        session_id, user_id, name, tags, from_timestamp, to_timestamp, order_by,
+        version, release, environment: Same filters as list_traces()
+        limit: Page size
+        start_page: First page to fetch (starts at 1)
+        prefetch: Fetch the next page while the current one is consumed
+
+    Yields:
+        dict: One trace per iteration
+
+    Raises:
+        Exception: If a page cannot be fetched
+    """
+    c = read_config()
+    session = get_fuse_session(c)
+    traces_url = f"{c['langfuse_base_url']}/api/public/traces"
+    base_params = _build_traces_params(
+        session_id=session_id, user_id=user_id, name=name, tags=tags,
+        from_timestamp=from_timestamp, to_timestamp=to_timestamp, order_by=order_by,
+        version=version, release=release, environment=environment
+    )
+
+    def fetch(page):
+        params = dict(base_params, page=page, limit=limit)
+        r = session.get(traces_url, params=params)
+        if r.status_code != 200:
+            raise Exception(f"Failed to fetch traces page {page}: HTTP {r.status_code} {r.text}")
+        data = json.loads(r.text)
+        if isinstance(data, dict):
+            return data.get('data', []), data.get('meta', {}).get('totalPages')
+        return data, None
+
+    def has_more(page, traces, total_pages):
+        if not traces:
+            return False
+        if total_pages is not None:
+            return page < total_pages
+        return len(traces) >= limit
+
+    page = start_page
+    if not prefetch:
+        while True:
+            traces, total_pages = fetch(page)
+            for trace in traces:
+                yield trace
+            if not has_more(page, traces, total_pages):
+                return
+            page += 1
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        pending = executor.submit(fetch, page)
+        while True:
+            traces, total_pages = pending.result()
+            more = has_more(page, traces, total_pages)
+            if more:
+                pending = executor.submit(fetch, page + 1)
+            for trace in traces:
+                yield trace
+            if not more:
+                return
+            page += 1
+    finally:
+        executor.shutdown(wait=False)
+
 def list_projects():
     c = read_config()
-    auth = HTTPBasicAuth(c['langfuse_public_key'], c['langfuse_secret_key'])
+    session = get_fuse_session(c)
     url = f"{c['langfuse_base_url']}/api/public/projects"
-    r = requests.get(url, auth=auth)
+    r = session.get(url)
     return r.text
 
 def create_dataset_item(dataset_name, input_data, expected_output=None, metadata=None, 
@@ -2812,7 +3284,7 @@ def create_dataset_item(dataset_name, input_data, expected_output=None, metadata
         status: Optional status (DatasetStatus enum)
     """
     c = read_config()
-    auth = HTTPBasicAuth(c['langfuse_public_key'], c['langfuse_secret_key'])
+    session = get_fuse_session(c)
     url = f"{c['langfuse_base_url']}/api/public/dataset-items"
     
     data = {
@@ -2844,7 +3316,7 @@ def create_dataset_item(dataset_name, input_data, expected_output=None, metadata
     if status:
         data["status"] = status
     
-    r = requests.post(url, json=data, auth=auth)
+    r = session.post(url, json=data)
     return r.text
 
 
@@ -2852,8 +3324,63 @@ def create_dataset_item(dataset_name, input_data, expected_output=None, metadata
 # Project-Aware Smart Caching System for Score Configs (Phase 2)
 # ============================================================================
 
-def get_current_project_info():
-    """Get current project ID and name from Langfuse API"""
+# Resolved project identity, cached per credential set in memory and on disk so
+# score/comment/URL helpers don't pay a /projects round trip on every call
+PROJECT_INFO_TTL = int(os.getenv('COAIAPY_PROJECT_INFO_TTL', '86400'))  # seconds
+_project_info_cache = {}  # credential key -> {'id', 'name', 'expires_at'}
+_project_info_lock = threading.Lock()
+
+
+def _project_credential_key(config):
+    """Stable, non-reversible key for the Langfuse host and public key in use"""
+    raw = f"{config.get('langfuse_base_url', '')}|{config.get('langfuse_public_key', '')}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+
+def get_project_info_cache_path():
+    """Path of the on-disk project identity cache (~/.coaia/projects.json)"""
+    return Path.home() / '.coaia' / 'projects.json'
+
+
+def _load_project_info_file():
+    try:
+        with open(get_project_info_cache_path(), 'r') as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_project_info_entry(key, entry):
+    """Merge one entry into the on-disk cache with an atomic replace"""
+    import tempfile
+    cache_path = get_project_info_cache_path()
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        data = _load_project_info_file()
+        now = time.time()
+        data = {k: v for k, v in data.items() if isinstance(v, dict) and v.get('expires_at', 0) > now}
+        data[key] = entry
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.tmp', dir=cache_path.parent, delete=False) as tmp_file:
+            json.dump(data, tmp_file, indent=2)
+            tmp_path = tmp_file.name
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        print(f"Warning: Could not save project info cache: {e}")
+
+
+def clear_project_info_cache(disk=True):
+    """Forget cached project identities (memory, and the on-disk file unless disk=False)"""
+    with _project_info_lock:
+        _project_info_cache.clear()
+        if disk:
+            try:
+                get_project_info_cache_path().unlink()
+            except OSError:
+                pass
+
+
+def _fetch_current_project_info():
     try:
         projects_json = list_projects()
         response = json.loads(projects_json)
@@ -2875,6 +3402,41 @@ def get_current_project_info():
         return None
 
 
+def get_current_project_info(refresh=False):
+    """
+    Get current project ID and name, cached per credentials.
+
+    Looks in memory, then ~/.coaia/projects.json, and only calls the
+    /projects API when neither has a fresh entry (TTL: COAIAPY_PROJECT_INFO_TTL).
+
+    Args:
+        refresh: Bypass the cache and re-resolve from the API
+
+    Returns:
+        dict with 'id' and 'name', or None if the project could not be determined
+    """
+    key = _project_credential_key(read_config())
+    with _project_info_lock:
+        now = time.time()
+        if not refresh:
+            entry = _project_info_cache.get(key)
+            if entry is None:
+                entry = _load_project_info_file().get(key)
+                if isinstance(entry, dict) and entry.get('id') and entry.get('expires_at', 0) > now:
+                    _project_info_cache[key] = entry
+                else:
+                    entry = None
+            if entry is not None and entry['expires_at'] > now:
+                return {'id': entry['id'], 'name': entry.get('name', 'unknown')}
+
+        info = _fetch_current_project_info()
+        if info and info.get('id'):
+            entry = dict(info, expires_at=now + PROJECT_INFO_TTL)
+            _project_info_cache[key] = entry
+            _save_project_info_entry(key, entry)
+        return info
+
+
 def get_project_cache_path(project_id):
     """Generate project-specific cache file path with security validation"""
     import re
@@ -2957,95 +3519,220 @@ def load_project_cache(project_id):
 
 def save_project_cache(project_id, cache_data):
     """Save cache data to project-specific cache file"""
+    import tempfile
     cache_path = get_project_cache_path(project_id)
     
     try:
-        with open(cache_path, 'w') as f:
-            json.dump(cache_data, f, indent=2)
+        # Write to a temporary file and rename so readers never see a partial file
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.tmp', dir=cache_path.parent, delete=False) as tmp_file:
+            json.dump(cache_data, tmp_file, indent=2)
+            tmp_path = tmp_file.name
+        os.replace(tmp_path, cache_path)
         return True
     except Exception as e:
         print(f"Warning: Could not save cache to {cache_path}: {e}")
         return False
 
 
-def cache_score_config(cache_path, config):
-    """Store a single config in the project cache with atomic writes"""
-    import tempfile
-    import shutil
-    
-    try:
-        # Validate input config
-        if not isinstance(config, dict):
-            raise ValueError("Config must be a dictionary")
-        
-        if not config.get('name') and not config.get('id'):
-            raise ValueError("Config must have either name or id")
-        
-        # Load existing cache with validation
-        if cache_path.exists():
-            with open(cache_path, 'r') as f:
-                cache_data = json.load(f)
-                
-            # Validate loaded data structure
-            if not isinstance(cache_data, dict):
-                print(f"Warning: Corrupted cache file {cache_path}, reinitializing")
-                cache_data = {'configs': []}
-            elif 'configs' not in cache_data or not isinstance(cache_data['configs'], list):
-                print(f"Warning: Invalid cache structure in {cache_path}, reinitializing")
-                cache_data = {'configs': []}
-        else:
-            cache_data = {'configs': []}
-        
-        # Add cached_at timestamp to config (create copy to avoid modifying input)
-        config_copy = config.copy()
-        config_copy['cached_at'] = datetime.datetime.now(datetime.timezone.utc).isoformat()
-        
-        # Update or add config in cache
-        existing_index = None
-        for i, cached_config in enumerate(cache_data['configs']):
-            if (cached_config.get('id') and cached_config.get('id') == config_copy.get('id')) or \
-               (cached_config.get('name') and cached_config.get('name') == config_copy.get('name')):
-                existing_index = i
-                break
-        
-        if existing_index is not None:
-            cache_data['configs'][existing_index] = config_copy
-        else:
-            cache_data['configs'].append(config_copy)
-        
-        # Update cache metadata
-        cache_data['last_sync'] = datetime.datetime.now(datetime.timezone.utc).isoformat()
-        
-        # Atomic write using temporary file to prevent corruption
-        cache_dir = cache_path.parent
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.tmp', dir=cache_dir, delete=False) as tmp_file:
-            json.dump(cache_data, tmp_file, indent=2)
-            tmp_file.flush()
-            # Ensure data is written to disk before rename
-            import os
-            os.fsync(tmp_file.fileno())
-            tmp_path = tmp_file.name
-        
-        # Atomic rename (only works if tmp and target on same filesystem)
+SCORE_CONFIG_CACHE_MAX_AGE_HOURS = 24
+# Entries older than twice the max age are refreshed before use instead of in the background
+SCORE_CONFIG_CACHE_EXPIRE_FACTOR = 2
+# How long interpreter exit waits for a running background refresh
+SCORE_CONFIG_REFRESH_EXIT_TIMEOUT = 10
+# Minimum delay between API re-syncs triggered by lookups of unknown configs
+SCORE_CONFIG_MISS_RESYNC_SECONDS = 60
+
+
+class ScoreConfigCache:
+    """
+    Process-level score config cache for one project.
+
+    Configs are indexed by id and by name. The project's full set is fetched in
+    one pass (prefetch) and written back to the project cache file once, so a
+    scoring job touching a few configs many thousands of times costs one API
+    sync. Stale entries are served while a background refresh runs; entries
+    far past their TTL (e.g. in a one-shot CLI run after days) are refreshed
+    before they are returned. A refresh still running at interpreter exit is
+    waited for, so short-lived processes also persist it.
+    """
+
+    def __init__(self, project_id, project_name='unknown', max_age_hours=SCORE_CONFIG_CACHE_MAX_AGE_HOURS):
+        self.project_id = project_id
+        self.project_name = project_name
+        self.max_age_hours = max_age_hours
+        self._configs = []
+        self._by_id = {}
+        self._by_name = {}
+        self._loaded = False
+        self._last_sync = 0.0
+        self._refresh_thread = None
+        self._lock = threading.RLock()
+
+    def _index(self, configs):
+        by_id, by_name = {}, {}
+        for config in configs:
+            if config.get('id'):
+                by_id[config['id']] = config
+            if config.get('name'):
+                by_name[config['name']] = config
+        self._configs, self._by_id, self._by_name = list(configs), by_id, by_name
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if not self._loaded:
+                cache_data = load_project_cache(self.project_id)
+                if cache_data:
+                    self._index(cache_data.get('configs', []))
+                self._loaded = True
+
+    def configs(self):
+        """All cached configs (no API call)"""
+        self._ensure_loaded()
+        return list(self._configs)
+
+    def prefetch(self):
+        """
+        Fetch every score config of the project in one pass and write the set back atomically.
+
+        A failed fetch raises before anything is replaced, so the in-memory
+        index and the cache file keep their previous contents.
+
+        Returns:
+            int: Number of configs cached
+
+        Raises:
+            Exception: If any page of score configs cannot be fetched
+        """
+        c = read_config()
+        configs = list(iter_paginated(f"{c['langfuse_base_url']}/api/public/score-configs",
+                                      label="score configs", strict=True))
+        now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        configs = [dict(config, cached_at=now) for config in configs]
+        with self._lock:
+            self._index(configs)
+            self._loaded = True
+            self._last_sync = time.time()
+        save_project_cache(self.project_id, {
+            'project_id': self.project_id,
+            'project_name': self.project_name,
+            'last_sync': now,
+            'configs': configs,
+        })
+        return len(configs)
+
+    def refresh_in_background(self):
+        """Start a prefetch in a daemon thread unless one is already running"""
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return self._refresh_thread
+            self._refresh_thread = threading.Thread(target=self._background_refresh, daemon=True)
+            self._refresh_thread.start()
+            return self._refresh_thread
+
+    def _background_refresh(self):
         try:
-            shutil.move(tmp_path, cache_path)
-        except Exception as rename_error:
-            # Fallback: copy and remove (less atomic but more compatible)
-            try:
-                shutil.copy2(tmp_path, cache_path)
-                os.unlink(tmp_path)
-            except Exception as fallback_error:
-                # Clean up temporary file
-                try:
-                    os.unlink(tmp_path)
-                except:
-                    pass
-                raise fallback_error
-        
-        return True
-    except Exception as e:
-        print(f"Warning: Could not cache config: {e}")
-        return False
+            self.prefetch()
+        except Exception as e:
+            print(f"Warning: Background score config refresh failed: {e}")
+
+    def lookup(self, config_name_or_id):
+        """Indexed lookup by id, then name (no API call)"""
+        self._ensure_loaded()
+        return self._by_id.get(config_name_or_id) or self._by_name.get(config_name_or_id)
+
+    def get(self, config_name_or_id):
+        """
+        Get a config by id or name, syncing from the API only when needed.
+
+        Args:
+            config_name_or_id: Either config name or config ID
+
+        Returns:
+            dict: Config data, or None if the project has no such config
+        """
+        config = self.lookup(config_name_or_id)
+        if config is not None:
+            if is_cache_stale(config, self.max_age_hours * SCORE_CONFIG_CACHE_EXPIRE_FACTOR):
+                with self._lock:
+                    current = self.lookup(config_name_or_id)
+                    if current is not None and current is not config:
+                        return current  # refreshed by another thread meanwhile
+                    try:
+                        self.prefetch()
+                    except Exception as e:
+                        print(f"Warning: Could not refresh score configs, using cached copy: {e}")
+                        return config
+                    # Deleted upstream since it was cached
+                    return self.lookup(config_name_or_id)
+            if is_cache_stale(config, self.max_age_hours):
+                self.refresh_in_background()
+            return config
+
+        with self._lock:
+            # Another thread may have synced while we waited
+            config = self.lookup(config_name_or_id)
+            if config is None and time.time() - self._last_sync >= SCORE_CONFIG_MISS_RESYNC_SECONDS:
+                print(f"Fetching score configs from API for project '{self.project_name}'")
+                self.prefetch()
+                config = self.lookup(config_name_or_id)
+        return config
+
+    def invalidate(self):
+        """Drop in-memory entries; the next lookup reloads from disk"""
+        with self._lock:
+            self._index([])
+            self._loaded = False
+            self._last_sync = 0.0
+
+
+_score_config_caches = {}
+_score_config_caches_lock = threading.Lock()
+
+
+def _join_score_config_refreshes(timeout=SCORE_CONFIG_REFRESH_EXIT_TIMEOUT):
+    """Wait (bounded) for background refreshes so one-shot processes still write them back"""
+    deadline = time.monotonic() + timeout
+    with _score_config_caches_lock:
+        caches = list(_score_config_caches.values())
+    for cache in caches:
+        thread = cache._refresh_thread
+        if thread is not None and thread.is_alive():
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+
+atexit.register(_join_score_config_refreshes)
+
+
+def get_score_config_cache(project_info=None):
+    """
+    Get the process-level ScoreConfigCache for a project (defaults to the current project).
+
+    Returns:
+        ScoreConfigCache, or None if the project could not be determined
+    """
+    if project_info is None:
+        project_info = get_current_project_info()
+    if not project_info or not project_info.get('id'):
+        return None
+    with _score_config_caches_lock:
+        cache = _score_config_caches.get(project_info['id'])
+        if cache is None:
+            cache = ScoreConfigCache(project_info['id'], project_info.get('name', 'unknown'))
+            _score_config_caches[project_info['id']] = cache
+        return cache
+
+
+def prefetch_score_configs():
+    """
+    Load all score configs of the current project into the cache in one pass.
+
+    Returns:
+        int: Number of configs cached (0 if the project could not be determined)
+    """
+    cache = get_score_config_cache()
+    return cache.prefetch() if cache else 0
 
 
 def get_config_with_auto_refresh(config_name_or_id):
@@ -3059,71 +3746,21 @@ def get_config_with_auto_refresh(config_name_or_id):
     Returns:
         dict: Config data from cache or API, or None if not found
     """
-    # Get current project info
-    project_info = get_current_project_info()
-    if not project_info:
+    cache = get_score_config_cache()
+    if cache is None:
         print("Warning: Could not determine current project, falling back to API")
         return _fetch_config_from_api(config_name_or_id)
-    
-    project_id = project_info['id']
-    project_name = project_info['name']
-    
-    # Load project cache
-    cache_data = load_project_cache(project_id)
-    
-    # Search cache first if available
-    if cache_data:
-        for cached_config in cache_data.get('configs', []):
-            # Match by ID or name
-            if (cached_config.get('id') == config_name_or_id or 
-                cached_config.get('name') == config_name_or_id):
-                
-                # Check if cache is stale
-                if not is_cache_stale(cached_config):
-                    print(f"Cache hit for config '{config_name_or_id}' in project '{project_name}'")
-                    return cached_config
-                else:
-                    print(f"Cache stale for config '{config_name_or_id}', refreshing from API")
-                    break
-    
-    # Cache miss or stale - fetch from API
-    print(f"Fetching config '{config_name_or_id}' from API for project '{project_name}'")
-    
-    # Try to find config by name first (list all configs)
+
     try:
-        all_configs_json = list_score_configs()
-        all_configs = json.loads(all_configs_json)
-        
-        target_config = None
-        for config in all_configs:
-            if config.get('id') == config_name_or_id or config.get('name') == config_name_or_id:
-                target_config = config
-                break
-        
-        if not target_config:
-            print(f"Config '{config_name_or_id}' not found")
-            return None
-        
-        # Initialize cache structure if needed
-        if not cache_data:
-            cache_data = {
-                'project_id': project_id,
-                'project_name': project_name,
-                'last_sync': datetime.datetime.now(datetime.timezone.utc).isoformat(),
-                'configs': []
-            }
-        
-        # Add to cache
-        cache_path = get_project_cache_path(project_id)
-        if cache_score_config(cache_path, target_config):
-            print(f"Cached config '{config_name_or_id}' for project '{project_name}'")
-        
-        return target_config
-        
+        config = cache.get(config_name_or_id)
     except Exception as e:
         print(f"Error fetching config '{config_name_or_id}': {e}")
         return None
 
+    if config is None:
+        print(f"Config '{config_name_or_id}' not found")
+    return config
+
 
 def _fetch_config_from_api(config_name_or_id):
     """Fallback function to fetch config directly from API without caching"""
@@ -3303,54 +3940,248 @@ def validate_score_value(config, value):
         return False, None, f"Unknown data type '{data_type}'. Expected BOOLEAN, CATEGORICAL, or NUMERIC"
 
 
-def apply_score_config(config_name_or_id, target_type, target_id, value, observation_id=None, comment=None):
+def apply_score_config(config_name_or_id, target_type, target_id, value, observation_id=None, comment=None):
+    """
+    Apply a score using a score configuration with value validation.
+    
+    Args:
+        config_name_or_id: Name or ID of the score config
+        target_type: "trace" or "session"
+        target_id: ID of the trace or session
+        value: Score value to apply
+        observation_id: Optional observation ID for trace scores
+        comment: Optional comment for the score
+        
+    Returns:
+        str: API response or error message
+    """
+    # Get the config using smart caching
+    config = get_config_with_auto_refresh(config_name_or_id)
+    if not config:
+        return f"Error: Score config '{config_name_or_id}' not found"
+    
+    # Validate the value
+    is_valid, processed_value, error_message = validate_score_value(config, value)
+    if not is_valid:
+        return f"Error: {error_message}"
+    
+    # Apply the score using the existing function
+    try:
+        result = create_score_for_target(
+            target_type=target_type,
+            target_id=target_id,
+            score_id=None,  # Use config instead
+            score_value=processed_value,
+            score_name=None,  # Use config instead
+            observation_id=observation_id,
+            config_id=config['id'],
+            comment=comment
+        )
+        
+        config_name = config.get('name', config_name_or_id)
+        target_desc = f"{target_type} '{target_id}'"
+        if observation_id:
+            target_desc += f" (observation '{observation_id}')"
+        
+        print(f"Applied score config '{config_name}' with value {processed_value} to {target_desc}")
+        return result
+        
+    except Exception as e:
+        return f"Error applying score: {e}"
+
+
+def build_score_event(target_type, target_id, value, config_id=None, name=None, data_type=None,
+                      observation_id=None, comment=None, score_id=None):
+    """
+    Build a score-create ingestion event without sending it.
+
+    Args:
+        target_type: "trace" or "session"
+        target_id: ID of the trace or session
+        value: Score value (already validated; booleans are sent as 1/0)
+        config_id: Optional score config ID
+        name: Score name (Langfuse requires it for ingestion; use the config name)
+        data_type: Optional NUMERIC, CATEGORICAL or BOOLEAN
+        observation_id: Optional observation ID for trace scores
+        comment: Optional comment
+        score_id: Optional score ID (reusing an ID makes resubmission idempotent)
+
+    Returns:
+        dict: Ingestion event envelope ready for /api/public/ingestion
+    """
+    score_id = score_id or str(uuid.uuid4())
+    if isinstance(value, bool):
+        value = 1.0 if value else 0.0
+
+    body = {"id": score_id, "value": value}
+    if target_type == "trace":
+        body["traceId"] = target_id
+        if observation_id:
+            body["observationId"] = observation_id
+    elif target_type == "session":
+        body["sessionId"] = target_id
+    else:
+        raise ValueError("target_type must be 'trace' or 'session'")
+
+    if name:
+        body["name"] = name
+    if config_id:
+        body["configId"] = config_id
+    if data_type:
+        body["dataType"] = data_type
+    if comment:
+        body["comment"] = comment
+
+    return {
+        "id": score_id + "-event",
+        "timestamp": datetime.datetime.utcnow().isoformat() + 'Z',
+        "type": "score-create",
+        "body": body
+    }
+
+
+def read_score_rows(stream, fmt='ndjson'):
+    """
+    Parse score rows for apply_scores_batch from an NDJSON or CSV stream.
+
+    Each row needs a target (trace_id, session_id or target_type + target_id),
+    a config (config, config_id or config_name) and a value; comment,
+    observation_id and id are optional.
+
+    Returns:
+        list: Row dicts in input order
+    """
+    if fmt == 'csv':
+        import csv
+        return [{k: v for k, v in row.items() if v not in (None, '')} for row in csv.DictReader(stream)]
+
+    rows = []
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"Line {line_no}: invalid JSON: {e}")
+        if not isinstance(row, dict):
+            raise ValueError(f"Line {line_no}: expected a JSON object")
+        rows.append(row)
+    return rows
+
+
+def _normalize_score_row(row):
+    """Extract (target_type, target_id, config key, value, observation_id, comment, score_id) from a row"""
+    target_type = row.get('target_type') or ('session' if row.get('session_id') else 'trace')
+    if target_type not in ('trace', 'session'):
+        raise ValueError(f"target_type must be 'trace' or 'session', got '{target_type}'")
+    target_id = row.get('target_id') or row.get('trace_id') or row.get('session_id')
+    if not target_id:
+        raise ValueError("Missing target (trace_id, session_id or target_id)")
+    config_key = row.get('config') or row.get('config_id') or row.get('config_name')
+    if not config_key:
+        raise ValueError("Missing config (config, config_id or config_name)")
+    if row.get('value') in (None, ''):
+        raise ValueError("Missing value")
+    return (target_type, target_id, config_key, row['value'],
+            row.get('observation_id'), row.get('comment'), row.get('id'))
+
+
+def validate_score_rows(rows):
+    """
+    Validate score rows and build their score-create events.
+
+    Each distinct config is resolved once (through the score config cache)
+    and each distinct (config, value) pair is validated once, so large
+    judge runs with a handful of configs and repeated values stay cheap.
+
+    Returns:
+        list: One dict per row: {"index", "config", "event"} or {"index", "error"}
+    """
+    cache = get_score_config_cache()
+    configs = {}
+    validations = {}
+    results = []
+
+    for index, row in enumerate(rows):
+        try:
+            target_type, target_id, config_key, value, observation_id, comment, score_id = _normalize_score_row(row)
+        except ValueError as e:
+            results.append({"index": index, "error": str(e)})
+            continue
+
+        if config_key not in configs:
+            try:
+                configs[config_key] = cache.get(config_key) if cache else _fetch_config_from_api(config_key)
+            except Exception as e:
+                print(f"Error fetching config '{config_key}': {e}")
+                configs[config_key] = None
+        config = configs[config_key]
+        if not config:
+            results.append({"index": index, "error": f"Score config '{config_key}' not found"})
+            continue
+
+        memo_key = (config.get('id'), type(value).__name__, value if not isinstance(value, (dict, list)) else json.dumps(value))
+        if memo_key not in validations:
+            validations[memo_key] = validate_score_value(config, value)
+        is_valid, processed_value, error_message = validations[memo_key]
+        if not is_valid:
+            results.append({"index": index, "error": error_message})
+            continue
+
+        try:
+            event = build_score_event(
+                target_type, target_id, processed_value,
+                config_id=config.get('id'), name=config.get('name'), data_type=config.get('dataType'),
+                observation_id=observation_id, comment=comment, score_id=score_id
+            )
+        except ValueError as e:
+            results.append({"index": index, "error": str(e)})
+            continue
+        results.append({"index": index, "config": config.get('name', config_key), "event": event})
+
+    return results
+
+
+def apply_scores_batch(rows, max_batch_events=MAX_INGESTION_BATCH_EVENTS, max_workers=INGESTION_MAX_WORKERS):
     """
-    Apply a score using a score configuration with value validation.
-    
+    Validate and submit many config-based scores through the ingestion batch endpoint.
+
     Args:
-        config_name_or_id: Name or ID of the score config
-        target_type: "trace" or "session"
-        target_id: ID of the trace or session
-        value: Score value to apply
-        observation_id: Optional observation ID for trace scores
-        comment: Optional comment for the score
-        
+        rows: Row dicts (see read_score_rows)
+        max_batch_events: Maximum number of scores per ingestion request
+        max_workers: Maximum number of ingestion requests in flight at once
+
     Returns:
-        str: API response or error message
+        dict: {"results": [per-row {"index", "status", "score_id", "target_id", "config", "error"}],
+               "created": int, "failed": int, "invalid": int, "batches": int}
+        where status is "created", "failed" (rejected by Langfuse) or "invalid" (not sent)
     """
-    # Get the config using smart caching
-    config = get_config_with_auto_refresh(config_name_or_id)
-    if not config:
-        return f"Error: Score config '{config_name_or_id}' not found"
-    
-    # Validate the value
-    is_valid, processed_value, error_message = validate_score_value(config, value)
-    if not is_valid:
-        return f"Error: {error_message}"
-    
-    # Apply the score using the existing function
-    try:
-        result = create_score_for_target(
-            target_type=target_type,
-            target_id=target_id,
-            score_id=None,  # Use config instead
-            score_value=processed_value,
-            score_name=None,  # Use config instead
-            observation_id=observation_id,
-            config_id=config['id'],
-            comment=comment
-        )
-        
-        config_name = config.get('name', config_name_or_id)
-        target_desc = f"{target_type} '{target_id}'"
-        if observation_id:
-            target_desc += f" (observation '{observation_id}')"
-        
-        print(f"Applied score config '{config_name}' with value {processed_value} to {target_desc}")
-        return result
-        
-    except Exception as e:
-        return f"Error applying score: {e}"
+    validated = validate_score_rows(rows)
+    events = [v["event"] for v in validated if "event" in v]
+    if events:
+        ingestion = ingest_events(events, max_batch_events=max_batch_events, max_workers=max_workers)
+    else:
+        ingestion = {"successes": [], "errors": [], "batches": 0}
+    errors_by_id = {e.get("id"): e for e in ingestion["errors"]}
+
+    summary = {"results": [], "created": 0, "failed": 0, "invalid": 0, "batches": ingestion["batches"]}
+    for entry in validated:
+        report = {"index": entry["index"]}
+        if "event" not in entry:
+            report.update(status="invalid", error=entry["error"])
+        else:
+            event = entry["event"]
+            report.update(score_id=event["body"]["id"], config=entry["config"],
+                          target_id=event["body"].get("traceId") or event["body"].get("sessionId"))
+            error = errors_by_id.get(event["id"])
+            if error:
+                report.update(status="failed", error=error.get("message") or error.get("error") or str(error))
+            else:
+                report["status"] = "created"
+        summary[report["status"]] += 1
+        summary["results"].append(report)
+    return summary
 
 
 def list_available_configs(category=None, cached_only=False):
@@ -3366,15 +4197,11 @@ def list_available_configs(category=None, cached_only=False):
     """
     if cached_only:
         # Get from cache only
-        project_info = get_current_project_info()
-        if not project_info:
-            return []
-        
-        cache_data = load_project_cache(project_info['id'])
-        if not cache_data:
+        cache = get_score_config_cache()
+        if cache is None:
             return []
         
-        configs = cache_data.get('configs', [])
+        configs = cache.configs()
     else:
         # Get from API
         try:
@@ -3396,153 +4223,481 @@ def list_available_configs(category=None, cached_only=False):
     
     return configs
 
-def get_trace_with_observations(trace_id):
-    """Get a specific trace with all its observations"""
+# Langfuse caps /observations pages at 100 items
+OBSERVATIONS_PAGE_SIZE = 100
+OBSERVATION_PAYLOAD_FIELDS = ('input', 'output')
+
+def _strip_payloads(item):
+    """Drop input/output payloads in place (structure-only views)"""
+    for key in OBSERVATION_PAYLOAD_FIELDS:
+        item.pop(key, None)
+    return item
+
+def get_trace_with_observations(trace_id, include_payloads=True, page_size=OBSERVATIONS_PAGE_SIZE,
+                                max_workers=PAGINATION_MAX_WORKERS):
+    """
+    Get a specific trace with all its observations.
+
+    The trace and the first observation page are requested in parallel; the
+    remaining observation pages are then fetched concurrently and appended in
+    page order, so traces larger than one page are returned complete.
+
+    Args:
+        trace_id: ID of the trace
+        include_payloads: If False, drop input/output from the trace and its
+                          observations (e.g. when only the tree structure is needed)
+        page_size: Observations per page request
+        max_workers: Maximum concurrent observation page requests
+
+    Returns:
+        JSON string of the trace with an "observations" list; if any observation
+        page fails, "observationsIncomplete" is set to true
+    """
     c = read_config()
-    auth = HTTPBasicAuth(c['langfuse_public_key'], c['langfuse_secret_key'])
+    session = get_fuse_session(c)
     base_url = c['langfuse_base_url']
 
-    # Get the trace
     trace_url = f"{base_url}/api/public/traces/{trace_id}"
-    r = requests.get(trace_url, auth=auth)
+    observations_url = f"{base_url}/api/public/observations"
+    params = {'traceId': trace_id, 'limit': page_size}
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        trace_future = executor.submit(session.get, trace_url)
+        first_page_future = executor.submit(_fetch_page, session, observations_url, params, 1)
+        r = trace_future.result()
+        first_page, first_error = first_page_future.result()
 
     if r.status_code != 200:
         return json.dumps({"error": f"Trace not found: {r.text}"}, indent=2)
 
     trace = json.loads(r.text)
 
-    # Get observations for this trace
-    observations_url = f"{base_url}/api/public/observations"
-    obs_r = requests.get(f"{observations_url}?traceId={trace_id}", auth=auth)
+    observations = []
+    complete = True
+    if first_error is None:
+        if isinstance(first_page, dict) and 'data' in first_page:
+            observations = list(first_page['data'] or [])
+            total_pages = (first_page.get('meta') or {}).get('totalPages') or 1
+            if total_pages > 1:
+                failed = []
+
+                def page_items(page, data, error):
+                    if error:
+                        failed.append(page)
+                        return None
+                    return (data.get('data') if isinstance(data, dict) else data) or []
 
-    if obs_r.status_code == 200:
-        obs_data = json.loads(obs_r.text)
-        if isinstance(obs_data, dict) and 'data' in obs_data:
-            trace['observations'] = obs_data['data']
+                observations.extend(_iter_pages_concurrently(
+                    session, observations_url, params, range(2, total_pages + 1), page_items, max_workers))
+                complete = not failed
         else:
-            trace['observations'] = obs_data
+            observations = first_page
     else:
-        trace['observations'] = []
+        complete = False
+
+    # Observations created while paging shift later pages; keep first occurrences
+    seen_ids = set()
+    unique = []
+    for obs in observations or []:
+        obs_id = obs.get('id') if isinstance(obs, dict) else None
+        if obs_id is not None:
+            if obs_id in seen_ids:
+                continue
+            seen_ids.add(obs_id)
+        unique.append(obs)
+    trace['observations'] = unique
+    if not complete:
+        trace['observationsIncomplete'] = True
+
+    if not include_payloads:
+        _strip_payloads(trace)
+        for obs in trace['observations']:
+            if isinstance(obs, dict):
+                _strip_payloads(obs)
 
     return json.dumps(trace, indent=2)
 
-def format_trace_tree(trace_json):
-    """Format a trace with its observations as an ASCII tree"""
+class TraceTreeIndex:
+    """
+    Parent/child index over a trace's observations, built in one pass.
+
+    Children keep the order they have in the observation list. Observations
+    whose parentObservationId does not match any observation are orphans;
+    observations that can only be reached through a parent cycle are
+    unreachable. Neither is part of the tree rooted at root observations.
+    """
+
+    def __init__(self, observations):
+        self.observations = list(observations or [])
+        self.by_id = {}
+        self._children = {}
+        self.roots = []
+        for obs in self.observations:
+            self.by_id[obs.get('id')] = obs
+            parent_id = obs.get('parentObservationId')
+            if parent_id:
+                self._children.setdefault(parent_id, []).append(obs)
+            else:
+                self.roots.append(obs)
+        self.orphans = [obs for obs in self.observations
+                        if obs.get('parentObservationId') and obs.get('parentObservationId') not in self.by_id]
+        self._stats = None
+
+    def children(self, obs):
+        """Direct children of an observation (or observation ID)"""
+        obs_id = obs.get('id') if isinstance(obs, dict) else obs
+        return self._children.get(obs_id, [])
+
+    def walk(self, roots=None):
+        """
+        Depth-first traversal from the roots (or given observations).
+
+        Yields:
+            tuple: (observation, depth) with roots at depth 0; each observation
+                   is visited once even if parent links form a cycle
+        """
+        seen = set()
+        stack = [(obs, 0) for obs in reversed(self.roots if roots is None else roots)]
+        while stack:
+            obs, depth = stack.pop()
+            if id(obs) in seen:
+                continue
+            seen.add(id(obs))
+            yield obs, depth
+            stack.extend((child, depth + 1) for child in reversed(self.children(obs)))
+
+    def stats(self):
+        """Observation, root, orphan and unreachable counts plus depth and breadth"""
+        if self._stats is None:
+            reachable = 0
+            max_depth = 0
+            max_breadth = len(self.roots)
+            for obs, depth in self.walk(self.roots + self.orphans):
+                reachable += 1
+                max_depth = max(max_depth, depth + 1)
+                max_breadth = max(max_breadth, len(self.children(obs)))
+            self._stats = {
+                'observations': len(self.observations),
+                'roots': len(self.roots),
+                'orphans': len(self.orphans),
+                'unreachable': len(self.observations) - reachable,
+                'max_depth': max_depth,
+                'max_breadth': max_breadth,
+            }
+        return self._stats
+
+
+# Tree symbols
+_TREE_BRANCH = "├── "
+_TREE_LAST_BRANCH = "└── "
+_TREE_VERTICAL = "│   "
+_TREE_SPACE = "    "
+
+_OBSERVATION_TYPE_GLYPHS = {
+    'SPAN': '🔗',        # Link/chain for spans
+    'GENERATION': '🤖',   # Robot for AI generation
+    'EVENT': '⚡',        # Lightning for events
+    'SCORE': '📊',        # Chart for scoring
+    'TRACE': '🛤️',        # Railway track for traces
+    'DEFAULT': '📦',      # Package for default/unknown
+}
+
+def _observation_tree_lines(obs, prefix, is_last):
+    """Header and detail lines for one observation; returns (lines, child_prefix)"""
+    obs_name = obs.get('name', f"Observation {obs.get('id', 'Unknown')[:8]}")
+    obs_type = obs.get('type', 'unknown').upper()
+    obs_status = obs.get('level', 'N/A')
+    obs_time = obs.get('startTime', 'N/A')[:19] if obs.get('startTime') else 'N/A'
+    symbol = _TREE_LAST_BRANCH if is_last else _TREE_BRANCH
+    next_prefix = prefix + (_TREE_SPACE if is_last else _TREE_VERTICAL)
+    glyph = _OBSERVATION_TYPE_GLYPHS.get(obs_type, _OBSERVATION_TYPE_GLYPHS['DEFAULT'])
+
+    lines = [f"{prefix}{symbol}{glyph} [{obs_type}] {obs_name} ({obs.get('id', 'N/A')})",
+             f"{next_prefix}├── ⏰ {obs_time}"]
+    if obs_status != 'N/A':
+        lines.append(f"{next_prefix}├── 📊 {obs_status}")
+    for key, label in (('input', '📥 Input'), ('output', '📤 Output')):
+        if obs.get(key):
+            text = str(obs[key]).replace('\n', ' ').replace('\r', ' ')
+            if len(text) > 90:
+                text = text[:90] + "..."
+            lines.append(f"{next_prefix}├── {label}: {text}")
+    return lines, next_prefix
+
+def iter_trace_tree_lines(trace, max_depth=None, max_children=None, show_orphans=False, index=None):
+    """
+    Render a trace with its observations as ASCII tree lines, one at a time.
+
+    Args:
+        trace: Trace dict with an "observations" list (see get_trace_with_observations)
+        max_depth: Only expand this many observation levels; deeper children are summarized
+        max_children: Show at most this many children per observation (and roots)
+        show_orphans: Also render observations whose parent is missing from the trace
+        index: Optional prebuilt TraceTreeIndex for trace["observations"]
+
+    Yields:
+        str: Output lines without trailing newlines
+    """
+    trace_name = trace.get('name', 'Unnamed')
+    timestamp = trace.get('timestamp', 'N/A')[:19] if trace.get('timestamp') else 'N/A'
+
+    yield f"🔗 Trace: {trace_name}"
+    yield f"├── 🆔 ID: {trace.get('id', 'N/A')}"
+    yield f"├── 👤 User: {trace.get('userId', 'N/A')}"
+    yield f"├── 🔗 Session: {trace.get('sessionId', 'N/A')}"
+    yield f"├── ⏰ Time: {timestamp}"
+
+    metadata = trace.get('metadata', {})
+    if metadata:
+        yield "├── 📋 Metadata:"
+        metadata_items = list(metadata.items())
+        for i, (key, value) in enumerate(metadata_items):
+            prefix = _TREE_LAST_BRANCH if i == len(metadata_items) - 1 else _TREE_BRANCH
+            yield f"│   {prefix}{key}: {value}"
+
+    observations = trace.get('observations', [])
+    if not observations:
+        yield "└── 📝 No observations"
+        return
+
+    yield f"└── 📝 Observations ({len(observations)}):"
+    index = index or TraceTreeIndex(observations)
+    if not index.roots:
+        yield "    └── (No root observations found)"
+    else:
+        yield from _iter_observation_subtrees(index, index.roots, _TREE_SPACE, max_depth, max_children)
+    if show_orphans and index.orphans:
+        yield f"⚠️ Orphaned observations ({len(index.orphans)}):"
+        yield from _iter_observation_subtrees(index, index.orphans, _TREE_SPACE, max_depth, max_children)
+
+def _iter_observation_subtrees(index, roots, prefix, max_depth, max_children):
+    """Iterative depth-first rendering of observation subtrees (no recursion limit)"""
+    # IDs of the observations whose children are being rendered; stops parent cycles
+    ancestors = set()
+
+    def frame(obs_list, prefix, depth, owner_id=None):
+        hidden = 0
+        if max_children is not None and len(obs_list) > max_children:
+            hidden = len(obs_list) - max_children
+            obs_list = obs_list[:max_children]
+        return [obs_list, 0, prefix, depth, hidden, owner_id]
+
+    stack = [frame(roots, prefix, 1)]
+    while stack:
+        top = stack[-1]
+        obs_list, i, prefix, depth, hidden, owner_id = top
+        if i >= len(obs_list):
+            stack.pop()
+            ancestors.discard(owner_id)
+            if hidden:
+                yield f"{prefix}└── … {hidden} more observations"
+            continue
+        top[1] += 1
+        obs = obs_list[i]
+        is_last = i == len(obs_list) - 1 and not hidden
+        lines, next_prefix = _observation_tree_lines(obs, prefix, is_last)
+
+        obs_id = obs.get('id')
+        children = [] if obs_id in ancestors else index.children(obs_id)
+        if children and max_depth is not None and depth >= max_depth:
+            lines.append(f"{next_prefix}└── 🌿 Children ({len(children)}): (not shown, depth limit {max_depth})")
+            children = []
+        elif children:
+            lines.append(f"{next_prefix}└── 🌿 Children ({len(children)}):")
+        elif lines[-1].startswith(next_prefix + "├──"):
+            # Last detail line of a leaf closes its branch
+            lines[-1] = lines[-1].replace("├──", "└──", 1)
+        yield from lines
+        if children:
+            ancestors.add(obs_id)
+            stack.append(frame(children, next_prefix + _TREE_SPACE, depth + 1, obs_id))
+
+def write_trace_tree(trace_json, stream, max_depth=None, max_children=None, show_orphans=False):
+    """
+    Write a trace tree to a text stream as it is rendered.
+
+    Args:
+        trace_json: Trace JSON string or dict (see get_trace_with_observations)
+        stream: Writable text stream (e.g. sys.stdout)
+        max_depth, max_children, show_orphans: See iter_trace_tree_lines
+
+    Returns:
+        int: Number of lines written
+    """
+    trace = json.loads(trace_json) if isinstance(trace_json, str) else trace_json
+    if 'error' in trace:
+        stream.write(f"Error: {trace['error']}\n")
+        return 1
+    count = 0
+    for line in iter_trace_tree_lines(trace, max_depth, max_children, show_orphans):
+        stream.write(line + "\n")
+        count += 1
+    return count
+
+def format_trace_tree(trace_json, max_depth=None, max_children=None, show_orphans=False):
+    """Format a trace with its observations as an ASCII tree (see iter_trace_tree_lines)"""
     try:
         trace = json.loads(trace_json) if isinstance(trace_json, str) else trace_json
 
         if 'error' in trace:
             return f"Error: {trace['error']}"
 
-        # Tree symbols
-        BRANCH = "├── "
-        LAST_BRANCH = "└── "
-        VERTICAL = "│   "
-        SPACE = "    "
+        return '\n'.join(iter_trace_tree_lines(trace, max_depth, max_children, show_orphans))
 
-        lines = []
+    except Exception as e:
+        return f"Error formatting trace tree: {str(e)}\n\nRaw JSON:\n{trace_json}"
 
-        # Trace header with key info
-        trace_name = trace.get('name', 'Unnamed')
-        trace_id = trace.get('id', 'N/A')
-        user_id = trace.get('userId', 'N/A')
-        session_id = trace.get('sessionId', 'N/A')
-        timestamp = trace.get('timestamp', 'N/A')[:19] if trace.get('timestamp') else 'N/A'
-
-        lines.append(f"🔗 Trace: {trace_name}")
-        lines.append(f"├── 🆔 ID: {trace_id}")
-        lines.append(f"├── 👤 User: {user_id}")
-        lines.append(f"├── 🔗 Session: {session_id}")
-        lines.append(f"├── ⏰ Time: {timestamp}")
+# Re-read this much before the watermark so late-ingested or updated records are picked up
+MIRROR_SYNC_OVERLAP_SECONDS = 600
+MIRROR_SYNC_CHUNK = 500
 
-        # Add metadata if present
-        metadata = trace.get('metadata', {})
-        if metadata:
-            lines.append(f"├── 📋 Metadata:")
-            metadata_items = list(metadata.items())
-            for i, (key, value) in enumerate(metadata_items):
-                is_last_meta = i == len(metadata_items) - 1
-                prefix = LAST_BRANCH if is_last_meta else BRANCH
-                lines.append(f"│   {prefix}{key}: {value}")
-
-        # Process observations
-        observations = trace.get('observations', [])
-        if not observations:
-            lines.append(f"└── 📝 No observations")
-            return '\n'.join(lines)
-
-        lines.append(f"└── 📝 Observations ({len(observations)}):")
-
-        # Build observation hierarchy
-        obs_by_id = {obs.get('id'): obs for obs in observations}
-        root_observations = [obs for obs in observations if not obs.get('parentObservationId')]
-
-        def add_observation_tree(obs_list, prefix="    ", is_last_group=True):
-            for i, obs in enumerate(obs_list):
-                is_last = i == len(obs_list) - 1
-                obs_name = obs.get('name', f"Observation {obs.get('id', 'Unknown')[:8]}")
-                obs_type = obs.get('type', 'unknown').upper()
-                obs_status = obs.get('level', 'N/A')
-                obs_time = obs.get('startTime', 'N/A')[:19] if obs.get('startTime') else 'N/A'
-
-                # Choose symbol
-                if is_last:
-                    symbol = LAST_BRANCH
-                    next_prefix = prefix + SPACE
-                else:
-                    symbol = BRANCH
-                    next_prefix = prefix + VERTICAL
-
-                obs_id_full = obs.get('id', 'N/A')
-
-                # Add beautiful glyphs for different observation types
-                type_glyphs = {
-                    'SPAN': '🔗',        # Link/chain for spans
-                    'GENERATION': '🤖',   # Robot for AI generation
-                    'EVENT': '⚡',        # Lightning for events
-                    'SCORE': '📊',        # Chart for scoring
-                    'TRACE': '🛤️',        # Railway track for traces
-                    'DEFAULT': '📦',      # Package for default/unknown
-                }
+def open_mirror():
+    """Local mirror (see coaiapy.mirror) for the Langfuse credentials in use"""
+    return get_mirror(_project_credential_key(read_config()))
 
-                glyph = type_glyphs.get(obs_type, type_glyphs['DEFAULT'])
-                lines.append(f"{prefix}{symbol}{glyph} [{obs_type}] {obs_name} ({obs_id_full})")
-                lines.append(f"{next_prefix}├── ⏰ {obs_time}")
-                if obs_status != 'N/A':
-                    lines.append(f"{next_prefix}├── 📊 {obs_status}")
-
-                # Add input/output if present with proper line formatting
-                if obs.get('input'):
-                    input_text = str(obs['input']).replace('\n', ' ').replace('\r', ' ')
-                    if len(input_text) > 90:
-                        input_text = input_text[:90] + "..."
-                    lines.append(f"{next_prefix}├── 📥 Input: {input_text}")
-
-                if obs.get('output'):
-                    output_text = str(obs['output']).replace('\n', ' ').replace('\r', ' ')
-                    if len(output_text) > 90:
-                        output_text = output_text[:90] + "..."
-                    lines.append(f"{next_prefix}├── 📤 Output: {output_text}")
-
-                # Find child observations
-                children = [child for child in observations if child.get('parentObservationId') == obs.get('id')]
-                if children:
-                    lines.append(f"{next_prefix}└── 🌿 Children ({len(children)}):")
-                    add_observation_tree(children, next_prefix + "    ", True)
-                else:
-                    # Remove the last ├── and make it └── for better formatting
-                    if lines[-1].startswith(next_prefix + "├──"):
-                        lines[-1] = lines[-1].replace("├──", "└──", 1)
+def _mirror_sync_start(watermark, overlap_seconds):
+    """Timestamp to resume a sync from: the watermark minus the overlap window"""
+    if not watermark:
+        return None
+    try:
+        dt = datetime.datetime.strptime(watermark[:19], '%Y-%m-%dT%H:%M:%S')
+    except ValueError:
+        return watermark
+    return (dt - datetime.timedelta(seconds=overlap_seconds)).strftime('%Y-%m-%dT%H:%M:%S') + 'Z'
 
-        if root_observations:
-            add_observation_tree(root_observations)
-        else:
-            lines.append("    └── (No root observations found)")
+def _iter_entity_records(entity, from_timestamp=None, to_timestamp=None, name=None, trace_id=None,
+                         user_id=None, session_id=None, observation_type=None, max_workers=PAGINATION_MAX_WORKERS):
+    """
+    Stream traces, observations or scores from the API, raising on failed pages.
 
-        return '\n'.join(lines)
+    from_timestamp/to_timestamp filter on the trace/score timestamp or the
+    observation start time; filters that an endpoint does not support are ignored.
+    """
+    base_url = read_config()['langfuse_base_url']
+    if entity == 'traces':
+        return iter_traces(from_timestamp=from_timestamp, to_timestamp=to_timestamp, name=name,
+                           user_id=user_id, session_id=session_id)
+    if entity == 'observations':
+        params = {'limit': OBSERVATIONS_PAGE_SIZE, 'fromStartTime': from_timestamp, 'toStartTime': to_timestamp,
+                  'name': name, 'traceId': trace_id, 'userId': user_id, 'type': observation_type}
+        return iter_paginated(f"{base_url}/api/public/observations",
+                              params={k: v for k, v in params.items() if v is not None},
+                              label="observations", max_workers=max_workers, strict=True)
+    if entity == 'scores':
+        params = {'fromTimestamp': from_timestamp, 'toTimestamp': to_timestamp, 'name': name,
+                  'traceId': trace_id, 'userId': user_id, 'sessionId': session_id}
+        return iter_paginated(f"{base_url}/api/public/v2/scores",
+                              params={k: v for k, v in params.items() if v is not None},
+                              label="scores", max_workers=max_workers, strict=True)
+    raise ValueError(f"Unknown entity '{entity}'")
+
+def sync_mirror(entities=MIRROR_ENTITIES, full=False, overlap_seconds=MIRROR_SYNC_OVERLAP_SECONDS, progress=None):
+    """
+    Incrementally copy traces, observations and scores into the local mirror.
 
-    except Exception as e:
-        return f"Error formatting trace tree: {str(e)}\n\nRaw JSON:\n{trace_json}"
+    Each entity resumes from its persisted watermark (the newest timestamp
+    seen by the last completed sync) minus overlap_seconds, and records are
+    upserted by id in chunks. The watermark only advances once an entity has
+    been fetched completely, so an interrupted sync is simply repeated.
+
+    Args:
+        entities: Entities to sync ("traces", "observations", "scores")
+        full: Ignore watermarks and fetch everything again
+        overlap_seconds: How far before the watermark to start re-reading
+        progress: Optional callable(entity, fetched_so_far) called per chunk
+
+    Returns:
+        dict: {"path": db path, "entities": {entity: {"fetched", "from", "watermark"}}}
+    """
+    mirror = open_mirror()
+    results = {}
+    for entity in entities:
+        if entity not in MIRROR_ENTITIES:
+            raise ValueError(f"Unknown entity '{entity}'. Use one of: {', '.join(MIRROR_ENTITIES)}")
+        previous = None if full else mirror.get_watermark(entity)
+        since = _mirror_sync_start(previous, overlap_seconds)
+        fetched = 0
+        newest = previous
+        chunk = []
+
+        def write_chunk():
+            nonlocal fetched, newest
+            written, chunk_newest = mirror.upsert(entity, chunk)
+            fetched += written
+            if chunk_newest and (newest is None or chunk_newest > newest):
+                newest = chunk_newest
+            chunk.clear()
+            if progress:
+                progress(entity, fetched)
+
+        for record in _iter_entity_records(entity, from_timestamp=since):
+            chunk.append(record)
+            if len(chunk) >= MIRROR_SYNC_CHUNK:
+                write_chunk()
+        if chunk:
+            write_chunk()
+        mirror.set_watermark(entity, newest, fetched)
+        results[entity] = {'fetched': fetched, 'from': since, 'watermark': newest}
+    return {'path': mirror.db_path, 'entities': results}
+
+def export_records(entity, path, fmt=None, include_payloads=False, row_group_size=EXPORT_ROW_GROUP_SIZE,
+                   from_timestamp=None, to_timestamp=None, name=None, trace_id=None, user_id=None,
+                   session_id=None, observation_type=None, max_workers=PAGINATION_MAX_WORKERS,
+                   limit=None, progress=None):
+    """
+    Stream traces, observations or scores from Langfuse into a columnar file.
+
+    Pages are consumed lazily and flattened rows are written every
+    row_group_size records, so memory stays bounded by one row group
+    regardless of the export size.
+
+    Args:
+        entity: "traces", "observations" or "scores"
+        path: Output file ('-' for JSON Lines on stdout)
+        fmt: "parquet", "arrow" or "jsonl" (default: from the file extension)
+        include_payloads: Also export input/output as JSON string columns
+        row_group_size: Rows buffered per row group / write
+        from_timestamp, to_timestamp, name, trace_id, user_id, session_id, observation_type:
+            API filters (see _iter_entity_records)
+        max_workers: Maximum concurrent page requests
+        limit: Stop after this many records
+        progress: Optional callable(rows_written) called after each row group
+
+    Returns:
+        dict: {"entity", "path", "format", "rows", "row_groups", "warning"}
+    """
+    writer, warning = open_export_writer(path, entity, fmt, include_payloads)
+    rows_written = 0
+    row_groups = 0
+    buffer = []
+    records = None
+    try:
+        records = _iter_entity_records(entity, from_timestamp=from_timestamp, to_timestamp=to_timestamp,
+                                       name=name, trace_id=trace_id, user_id=user_id, session_id=session_id,
+                                       observation_type=observation_type, max_workers=max_workers)
+        for record in records:
+            buffer.append(flatten_record(entity, record, include_payloads))
+            if len(buffer) >= row_group_size:
+                writer.write_rows(buffer)
+                rows_written += len(buffer)
+                row_groups += 1
+                buffer = []
+                if progress:
+                    progress(rows_written)
+            if limit and rows_written + len(buffer) >= limit:
+                break
+        if buffer:
+            writer.write_rows(buffer)
+            rows_written += len(buffer)
+            row_groups += 1
+            if progress:
+                progress(rows_written)
+    finally:
+        if records is not None and hasattr(records, 'close'):
+            records.close()
+        writer.close()
+    return {"entity": entity, "path": writer.path, "format": writer.format,
+            "rows": rows_written, "row_groups": row_groups, "warning": warning}
 
 def get_observation(observation_id):
     """
@@ -3555,11 +4710,11 @@ def get_observation(observation_id):
         JSON string with observation details or error message
     """
     c = read_config()
-    auth = HTTPBasicAuth(c['langfuse_public_key'], c['langfuse_secret_key'])
+    session = get_fuse_session(c)
     base_url = c['langfuse_base_url']
 
     url = f"{base_url}/api/public/observations/{observation_id}"
-    r = requests.get(url, auth=auth)
+    r = session.get(url)
 
     if r.status_code != 200:
         error_msg = f"Failed to retrieve observation {observation_id}: {r.status_code}"
@@ -3696,12 +4851,73 @@ SUPPORTED_CONTENT_TYPES = [
 ]
 
 
-def calculate_sha256(file_path):
+# Large files are hashed through mmap, smaller ones with a reusable 1 MiB buffer
+MEDIA_HASH_BUFFER_SIZE = 1024 * 1024
+MEDIA_HASH_MMAP_THRESHOLD = 8 * 1024 * 1024
+# Hashes are remembered per (path, size, mtime, inode) so re-uploads skip rehashing
+MEDIA_HASH_CACHE_SIZE = 4096
+_media_hash_cache = OrderedDict()
+_media_hash_lock = threading.Lock()
+
+
+def _media_hash_key(file_path, st):
+    return (os.path.abspath(file_path), st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+def _media_hash_cache_get(key):
+    with _media_hash_lock:
+        value = _media_hash_cache.get(key)
+        if value is not None:
+            _media_hash_cache.move_to_end(key)
+        return value
+
+
+def _media_hash_cache_put(key, value):
+    with _media_hash_lock:
+        _media_hash_cache[key] = value
+        _media_hash_cache.move_to_end(key)
+        while len(_media_hash_cache) > MEDIA_HASH_CACHE_SIZE:
+            _media_hash_cache.popitem(last=False)
+
+
+def clear_media_hash_cache():
+    """Forget remembered file hashes"""
+    with _media_hash_lock:
+        _media_hash_cache.clear()
+
+
+def _sha256_file(file_path, size):
+    """Raw SHA-256 digest of a file in one sequential pass"""
+    sha256_hash = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        if size >= MEDIA_HASH_MMAP_THRESHOLD:
+            import mmap
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                        mm.madvise(mmap.MADV_SEQUENTIAL)
+                    sha256_hash.update(mm)
+                return sha256_hash.digest()
+            except (ValueError, OSError):
+                # mmap not supported for this file/filesystem: use buffered reads
+                f.seek(0)
+        buffer = bytearray(MEDIA_HASH_BUFFER_SIZE)
+        view = memoryview(buffer)
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            sha256_hash.update(view[:n])
+    return sha256_hash.digest()
+
+
+def calculate_sha256(file_path, use_cache=True):
     """
     Calculate SHA-256 hash of a file for deduplication.
 
     Args:
         file_path: Path to the file
+        use_cache: Reuse the hash of an unchanged file (same path, size, mtime and inode)
 
     Returns:
         str: Base64-encoded SHA-256 hash (44 characters)
@@ -3712,18 +4928,24 @@ def calculate_sha256(file_path):
         'o7LB1OX2...'
     """
     import base64
-    sha256_hash = hashlib.sha256()
 
     try:
-        with open(file_path, "rb") as f:
-            # Read file in chunks to handle large files
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
-        # Return base64-encoded hash (Langfuse requires 44-char base64, not hex)
-        return base64.b64encode(sha256_hash.digest()).decode('utf-8')
+        st = os.stat(file_path)
+        key = _media_hash_key(file_path, st)
+        if use_cache:
+            cached = _media_hash_cache_get(key)
+            if cached is not None:
+                return cached
+        digest = _sha256_file(file_path, st.st_size)
     except OSError as e:
         raise Exception(f"Failed to calculate SHA-256 hash: {str(e)}")
 
+    # Return base64-encoded hash (Langfuse requires 44-char base64, not hex)
+    value = base64.b64encode(digest).decode('utf-8')
+    if use_cache:
+        _media_hash_cache_put(key, value)
+    return value
+
 
 def detect_content_type(file_path):
     """
@@ -3870,7 +5092,7 @@ def get_media_upload_url(trace_id, content_type, content_length, sha256_hash,
         }
     """
     config = read_config()
-    auth = HTTPBasicAuth(config['langfuse_public_key'], config['langfuse_secret_key'])
+    session = get_fuse_session(config)
     url = f"{config['langfuse_base_url']}/api/public/media"
 
     # Build request data
@@ -3886,7 +5108,7 @@ def get_media_upload_url(trace_id, content_type, content_length, sha256_hash,
         data["observationId"] = observation_id
 
     try:
-        response = requests.post(url, json=data, auth=auth)
+        response = session.post(url, json=data)
 
         # Accept both 200 and 201 as success (201 = Created)
         if response.status_code not in [200, 201]:
@@ -3908,17 +5130,217 @@ def get_media_upload_url(trace_id, content_type, content_length, sha256_hash,
         return json.dumps({"error": str(e)}, indent=2)
 
 
-def upload_media_to_url(upload_url, file_path, content_type, sha256_hash=None):
+def _is_trusted_storage_domain(domain):
+    """Check if domain is from a trusted cloud storage provider."""
+    # Exact matches for root domains
+    exact_matches = [
+        'amazonaws.com',
+        's3.amazonaws.com',
+        'storage.googleapis.com',
+        'blob.core.windows.net',
+        'r2.cloudflarestorage.com',
+    ]
+    
+    if domain in exact_matches:
+        return True
+    
+    # Subdomain patterns - must have subdomain.trusted-suffix format
+    # Split domain into parts to validate structure
+    trusted_suffixes = [
+        'amazonaws.com',
+        'storage.googleapis.com',
+        'blob.core.windows.net',
+        'r2.cloudflarestorage.com',
+    ]
+    
+    for suffix in trusted_suffixes:
+        # Check if domain ends with .suffix (note the dot)
+        # This ensures we have a subdomain prefix
+        if domain.endswith('.' + suffix):
+            # Verify there are no additional dots after the subdomain
+            # to prevent attacks like evil.amazonaws.com.malicious.com
+            prefix = domain[:-len('.' + suffix)]
+            # Prefix should not contain dots (single-level subdomain only for security)
+            # or allow multiple levels ONLY for AWS S3 patterns (bucket.s3.amazonaws.com)
+            if suffix == 'amazonaws.com':
+                # AWS: Accept single-level subdomains OR multi-level ending with .s3
+                # Valid: bucket.amazonaws.com, bucket.s3.amazonaws.com
+                # Invalid: evil.amazonaws.com (unless it's a known AWS service subdomain)
+                # For security, only allow multi-level if it ends with .s3
+                if '.' in prefix:
+                    # Multi-level subdomain - must end with .s3
+                    return prefix.endswith('.s3')
+                else:
+                    # Single-level subdomain - allow it
+                    return True
+            else:
+                # Other providers: allow single subdomain level only
+                return '.' not in prefix
+    
+    return False
+
+
+# Presigned storage uploads: files at least this large are sent in parallel
+# blocks where the storage backend allows it with the presigned URL alone
+MEDIA_MULTIPART_THRESHOLD = 64 * 1024 * 1024
+MEDIA_PART_SIZE = 16 * 1024 * 1024
+MEDIA_PART_WORKERS = 4
+MEDIA_PART_RETRIES = 3
+
+
+class _FileSection:
+    """
+    Seekable, read-only window onto part of a file, usable as a requests body.
+
+    Reads are reported to an optional callback with the number of new bytes;
+    rewinds (e.g. before a retried request) report negative deltas so
+    aggregated progress never overshoots.
+    """
+
+    def __init__(self, file_path, offset=0, length=None, on_bytes=None):
+        self._file = open(file_path, 'rb')
+        if length is None:
+            length = os.fstat(self._file.fileno()).st_size - offset
+        self._offset = offset
+        self._length = length
+        self._position = 0
+        self._on_bytes = on_bytes
+        self._file.seek(offset)
+
+    def __len__(self):
+        return self._length - self._position
+
+    def read(self, size=-1):
+        remaining = self._length - self._position
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        data = self._file.read(size) if size else b''
+        self._position += len(data)
+        if data and self._on_bytes:
+            self._on_bytes(len(data))
+        return data
+
+    def tell(self):
+        return self._position
+
+    def seek(self, position, whence=0):
+        if whence == 1:
+            position += self._position
+        elif whence == 2:
+            position += self._length
+        position = max(0, min(position, self._length))
+        if self._on_bytes and position != self._position:
+            self._on_bytes(position - self._position)
+        self._position = position
+        self._file.seek(self._offset + position)
+        return position
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _UploadProgress:
+    """Thread-safe byte counter forwarding (sent, total) to a user callback"""
+
+    def __init__(self, total, callback):
+        self.total = total
+        self.sent = 0
+        self._callback = callback
+        self._lock = threading.Lock()
+
+    def add(self, count):
+        with self._lock:
+            self.sent = max(0, min(self.total, self.sent + count))
+            sent = self.sent
+        if self._callback:
+            try:
+                self._callback(sent, self.total)
+            except Exception:
+                pass
+
+
+def _is_block_blob_url(upload_url):
+    """Azure SAS URLs allow Put Block/Put Block List, i.e. parallel parts, with the presigned URL alone"""
+    return urlparse(upload_url).netloc.lower().endswith('.blob.core.windows.net')
+
+
+def _put_part(session, url, file_path, offset, length, progress, retries, headers=None):
+    """PUT one block of a file with its own retries; returns the final response or raises"""
+    attempt = 0
+    with _FileSection(file_path, offset, length, progress.add) as body:
+        while True:
+            try:
+                response = session.put(url, data=body if length else b'', headers=dict(headers or {}, **{'Content-Length': str(length)}))
+                if response.status_code in (200, 201):
+                    return response
+                error = Exception(f"Part upload failed: {response.status_code} {response.text}")
+            except Exception as e:
+                error = e
+            if attempt >= retries:
+                raise error
+            attempt += 1
+            body.seek(0)
+            time.sleep(0.5 * (2 ** attempt))
+
+
+def _upload_block_blob(session, upload_url, file_path, size, content_type, part_size, max_workers, retries, progress):
+    """Upload a file as parallel Azure blocks, then commit the block list"""
+    import base64
+    from urllib.parse import quote
+
+    separator = '&' if '?' in upload_url else '?'
+    parts = []
+    for index, offset in enumerate(range(0, size, part_size)):
+        block_id = base64.b64encode(f"{index:08d}".encode('ascii')).decode('ascii')
+        parts.append((block_id, offset, min(part_size, size - offset)))
+
+    def _send(part):
+        block_id, offset, length = part
+        url = f"{upload_url}{separator}comp=block&blockid={quote(block_id, safe='')}"
+        _put_part(session, url, file_path, offset, length, progress, retries)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(parts)))) as executor:
+        list(executor.map(_send, parts))
+
+    block_list = ''.join(f"<Latest>{block_id}</Latest>" for block_id, _, _ in parts)
+    body = f'<?xml version="1.0" encoding="utf-8"?><BlockList>{block_list}</BlockList>'.encode('utf-8')
+    return session.put(
+        f"{upload_url}{separator}comp=blocklist",
+        data=body,
+        headers={'Content-Type': 'application/xml', 'x-ms-blob-content-type': content_type}
+    ), len(parts)
+
+
+def upload_media_to_url(upload_url, file_path, content_type, sha256_hash=None, progress=None,
+                        chunked=None, part_size=MEDIA_PART_SIZE, max_workers=MEDIA_PART_WORKERS,
+                        part_retries=MEDIA_PART_RETRIES):
     """
-    Upload file to presigned S3 URL with security validation.
+    Upload file to presigned storage URL with security validation.
 
-    PUT to presigned URL
+    PUT to presigned URL. The file is streamed from disk, never loaded whole.
+    Large files going to a backend whose presigned URL permits block uploads
+    (Azure Blob SAS) are sent as parallel parts with per-part retries, so a
+    dropped connection only resends one part. S3 and GCS presigned URLs are
+    signed for a single PUT, so those always use one streamed PUT (which the
+    shared storage session retries, rewinding the body).
 
     Args:
-        upload_url: Presigned S3 URL from get_media_upload_url()
+        upload_url: Presigned URL from get_media_upload_url()
         file_path: Path to file to upload
         content_type: MIME type (must match original request)
         sha256_hash: Base64-encoded SHA256 hash for x-amz-checksum-sha256 header
+        progress: Optional callback(bytes_sent, total_bytes); may be called from worker threads
+        chunked: Force (True) or disable (False) parallel parts; default: automatic for
+            files >= MEDIA_MULTIPART_THRESHOLD on block-capable backends
+        part_size: Part size in bytes for chunked uploads
+        max_workers: Parts in flight at once
+        part_retries: Retries per part
 
     Returns:
         dict: {
@@ -3926,67 +5348,14 @@ def upload_media_to_url(upload_url, file_path, content_type, sha256_hash=None):
             "status_code": int - HTTP status code (0 if domain validation failed)
             "message": str - Success or error message
             "upload_time_ms": float - Upload duration in milliseconds
+            "parts": int - Number of parts sent (1 for a single PUT)
         }
-
-    Raises:
-        ValueError: If upload_url domain is not from a trusted cloud storage provider
-    """
-    # Security validation: Verify presigned URL is from trusted cloud storage
-    # Only accept exact domain matches or proper subdomains (not spoofed domains)
-    def is_trusted_domain(domain):
-        """Check if domain is from a trusted cloud storage provider."""
-        # Exact matches for root domains
-        exact_matches = [
-            'amazonaws.com',
-            's3.amazonaws.com',
-            'storage.googleapis.com',
-            'blob.core.windows.net',
-            'r2.cloudflarestorage.com',
-        ]
-        
-        if domain in exact_matches:
-            return True
-        
-        # Subdomain patterns - must have subdomain.trusted-suffix format
-        # Split domain into parts to validate structure
-        trusted_suffixes = [
-            'amazonaws.com',
-            'storage.googleapis.com',
-            'blob.core.windows.net',
-            'r2.cloudflarestorage.com',
-        ]
-        
-        for suffix in trusted_suffixes:
-            # Check if domain ends with .suffix (note the dot)
-            # This ensures we have a subdomain prefix
-            if domain.endswith('.' + suffix):
-                # Verify there are no additional dots after the subdomain
-                # to prevent attacks like evil.amazonaws.com.malicious.com
-                prefix = domain[:-len('.' + suffix)]
-                # Prefix should not contain dots (single-level subdomain only for security)
-                # or allow multiple levels ONLY for AWS S3 patterns (bucket.s3.amazonaws.com)
-                if suffix == 'amazonaws.com':
-                    # AWS: Accept single-level subdomains OR multi-level ending with .s3
-                    # Valid: bucket.amazonaws.com, bucket.s3.amazonaws.com
-                    # Invalid: evil.amazonaws.com (unless it's a known AWS service subdomain)
-                    # For security, only allow multi-level if it ends with .s3
-                    if '.' in prefix:
-                        # Multi-level subdomain - must end with .s3
-                        return prefix.endswith('.s3')
-                    else:
-                        # Single-level subdomain - allow it
-                        return True
-                else:
-                    # Other providers: allow single subdomain level only
-                    return '.' not in prefix
-        
-        return False
-    
+    """
     try:
         parsed_url = urlparse(upload_url)
         domain = parsed_url.netloc.lower()
         
-        if not is_trusted_domain(domain):
+        if not _is_trusted_storage_domain(domain):
             return {
                 "success": False,
                 "status_code": 0,
@@ -3995,19 +5364,32 @@ def upload_media_to_url(upload_url, file_path, content_type, sha256_hash=None):
             }
         
         start_time = time.time()
+        size = os.path.getsize(file_path)
+        tracker = _UploadProgress(size, progress)
+        session = get_storage_session()
 
-        with open(file_path, 'rb') as f:
-            file_data = f.read()
+        if chunked is None:
+            chunked = size >= MEDIA_MULTIPART_THRESHOLD and _is_block_blob_url(upload_url)
 
-        headers = {
-            'Content-Type': content_type
-        }
+        if chunked and size > 0:
+            response, parts = _upload_block_blob(session, upload_url, file_path, size, content_type,
+                                                 int(part_size), max_workers, part_retries, tracker)
+        else:
+            parts = 1
+            headers = {
+                'Content-Type': content_type
+            }
 
-        # Add SHA256 checksum header if provided (required by S3 presigned URL)
-        if sha256_hash:
-            headers['x-amz-checksum-sha256'] = sha256_hash
+            # Add SHA256 checksum header if provided (required by S3 presigned URL)
+            if sha256_hash:
+                headers['x-amz-checksum-sha256'] = sha256_hash
 
-        response = requests.put(upload_url, data=file_data, headers=headers)
+            # Stream the file instead of loading it into memory; the body is
+            # seekable, so transport-level retries rewind it before resending
+            headers['Content-Length'] = str(size)
+            with _FileSection(file_path, on_bytes=tracker.add) as body:
+                # An empty stream would be sent chunked, which presigned PUTs reject
+                response = session.put(upload_url, data=body if size else b'', headers=headers)
 
         end_time = time.time()
         upload_time_ms = (end_time - start_time) * 1000
@@ -4017,14 +5399,16 @@ def upload_media_to_url(upload_url, file_path, content_type, sha256_hash=None):
                 "success": True,
                 "status_code": response.status_code,
                 "message": "Upload successful",
-                "upload_time_ms": upload_time_ms
+                "upload_time_ms": upload_time_ms,
+                "parts": parts
             }
         else:
             return {
                 "success": False,
                 "status_code": response.status_code,
                 "message": f"Upload failed: {response.text}",
-                "upload_time_ms": upload_time_ms
+                "upload_time_ms": upload_time_ms,
+                "parts": parts
             }
 
     except Exception as e:
@@ -4052,7 +5436,7 @@ def patch_media_upload_status(media_id, status_code, upload_time_ms, error=None)
         JSON string with updated media object
     """
     config = read_config()
-    auth = HTTPBasicAuth(config['langfuse_public_key'], config['langfuse_secret_key'])
+    session = get_fuse_session(config)
     url = f"{config['langfuse_base_url']}/api/public/media/{media_id}"
 
     from datetime import datetime, timezone
@@ -4067,7 +5451,7 @@ def patch_media_upload_status(media_id, status_code, upload_time_ms, error=None)
         data["uploadHttpError"] = str(error)
 
     try:
-        response = requests.patch(url, json=data, auth=auth)
+        response = session.patch(url, json=data)
 
         if response.status_code != 200:
             error_detail = response.text
@@ -4129,11 +5513,11 @@ def get_media(media_id):
         └── 📏 Size: 193424 bytes
     """
     config = read_config()
-    auth = HTTPBasicAuth(config['langfuse_public_key'], config['langfuse_secret_key'])
+    session = get_fuse_session(config)
     url = f"{config['langfuse_base_url']}/api/public/media/{media_id}"
 
     try:
-        response = requests.get(url, auth=auth)
+        response = session.get(url)
 
         if response.status_code != 200:
             error_detail = response.text
@@ -4208,7 +5592,7 @@ def attach_media_token_to_trace(trace_id, media_token, field="input"):
         >>> result = attach_media_token_to_trace("trace_001", token, field="input")
     """
     config = read_config()
-    auth = HTTPBasicAuth(config['langfuse_public_key'], config['langfuse_secret_key'])
+    session = get_fuse_session(config)
     now = datetime.datetime.utcnow().isoformat() + 'Z'
     
     # Build trace body with the media token in the specified field
@@ -4242,7 +5626,7 @@ def attach_media_token_to_trace(trace_id, media_token, field="input"):
     }
     
     url = f"{config['langfuse_base_url']}/api/public/ingestion"
-    response = requests.post(url, json=data, auth=auth)
+    response = session.post(url, json=data)
     return process_langfuse_response(response.text, trace_id, "media token attachment")
 
 
@@ -4267,7 +5651,7 @@ def attach_media_token_to_observation(observation_id, trace_id, media_token, fie
         >>> result = attach_media_token_to_observation("obs_456", "trace_001", token, field="output")
     """
     config = read_config()
-    auth = HTTPBasicAuth(config['langfuse_public_key'], config['langfuse_secret_key'])
+    session = get_fuse_session(config)
     now = datetime.datetime.utcnow().isoformat() + 'Z'
     
     # Build observation body with the media token in the specified field
@@ -4303,12 +5687,12 @@ def attach_media_token_to_observation(observation_id, trace_id, media_token, fie
     }
     
     url = f"{config['langfuse_base_url']}/api/public/ingestion"
-    response = requests.post(url, json=data, auth=auth)
+    response = session.post(url, json=data)
     return process_langfuse_response(response.text, observation_id, "media token attachment")
 
 
 def upload_and_attach_media(file_path, trace_id, field="input",
-                           observation_id=None, content_type=None):
+                           observation_id=None, content_type=None, use_index=True, progress=None):
     """
     Upload a file and attach it to a Langfuse trace or observation.
 
@@ -4323,6 +5707,9 @@ def upload_and_attach_media(file_path, trace_id, field="input",
         field (str): Semantic context - "input", "output", or "metadata" (default: "input")
         observation_id (str, optional): Attach to specific observation instead of trace
         content_type (str, optional): MIME type (auto-detected from file extension if omitted)
+        use_index (bool): Consult/update the local media index (see mediaindex.py); a file
+            uploaded before is reattached without hashing or a presigned-URL request
+        progress (callable, optional): callback(bytes_sent, total_bytes) during the storage upload
 
     Returns:
         dict: {
@@ -4374,67 +5761,101 @@ def upload_and_attach_media(file_path, trace_id, field="input",
                 "error": validation["message"]
             }
 
-        # Calculate SHA-256 hash
-        sha256_hash = calculate_sha256(file_path)
-
-        # Get file size
-        content_length = os.path.getsize(file_path)
-
-        # Step 1: Request presigned upload URL
-        upload_response = get_media_upload_url(
-            trace_id=trace_id,
-            content_type=content_type,
-            content_length=content_length,
-            sha256_hash=sha256_hash,
-            field=field,
-            observation_id=observation_id
-        )
+        st = os.stat(file_path)
+        content_length = st.st_size
 
-        upload_data = json.loads(upload_response)
-        if "error" in upload_data:
-            return {
-                "success": False,
-                "error": f"Failed to get upload URL: {upload_data['error']}"
-            }
+        # Known locally (same file, or same bytes under another path)? Then no
+        # hashing and no presigned-URL request are needed
+        index = None
+        scope = None
+        known = None
+        if use_index:
+            try:
+                index = get_media_index()
+                scope = _project_credential_key(read_config())
+                known = index.lookup(scope, file_path, st)
+            except Exception as e:
+                print(f"Warning: Media index unavailable: {e}")
+                index = None
 
-        upload_url = upload_data.get("uploadUrl")
-        media_id = upload_data.get("mediaId")
+        # Calculate SHA-256 hash
+        sha256_hash = known['sha256'] if known else calculate_sha256(file_path)
+        if index is not None and known is None:
+            known = index.find_by_hash(scope, sha256_hash, content_type)
 
-        if not media_id:
-            return {
-                "success": False,
-                "error": "Invalid response from Langfuse: missing mediaId"
+        storage_ok = True
+        if known and known['content_type'] == content_type:
+            media_id = known['media_id']
+            upload_time_ms = 0
+            media_data = {
+                "id": media_id,
+                "contentType": content_type,
+                "contentLength": content_length,
+                "source": "local media index"
             }
-
-        # Handle deduplication: uploadUrl is null when file already exists
-        if upload_url:
-            # Step 2: Upload file to S3
-            upload_result = upload_media_to_url(upload_url, file_path, content_type, sha256_hash)
-
-            # Step 3: Update Langfuse with upload status
-            patch_response = patch_media_upload_status(
-                media_id=media_id,
-                status_code=upload_result["status_code"],
-                upload_time_ms=upload_result["upload_time_ms"],
-                error=upload_result.get("message") if not upload_result["success"] else None
+        else:
+            # Step 1: Request presigned upload URL
+            upload_response = get_media_upload_url(
+                trace_id=trace_id,
+                content_type=content_type,
+                content_length=content_length,
+                sha256_hash=sha256_hash,
+                field=field,
+                observation_id=observation_id
             )
 
-            patch_data = json.loads(patch_response)
-            if "error" in patch_data:
+            upload_data = json.loads(upload_response)
+            if "error" in upload_data:
                 return {
                     "success": False,
-                    "error": f"Upload succeeded but status update failed: {patch_data['error']}",
-                    "detail": patch_data.get('detail', 'No additional detail provided'),
-                    "media_id": media_id
+                    "error": f"Failed to get upload URL: {upload_data['error']}"
                 }
-            upload_time_ms = upload_result["upload_time_ms"]
-            media_data = patch_data
-        else:
-            # File already exists (deduplication) - skip upload
-            upload_time_ms = 0
-            # Get existing media data
-            media_response = get_media(media_id)
-            media_data = json.loads(media_response) if isinstance(media_response, str) else media_response
+
+            upload_url = upload_data.get("uploadUrl")
+            media_id = upload_data.get("mediaId")
+
+            if not media_id:
+                return {
+                    "success": False,
+                    "error": "Invalid response from Langfuse: missing mediaId"
+                }
+
+            # Handle deduplication: uploadUrl is null when file already exists
+            if upload_url:
+                # Step 2: Upload file to S3
+                upload_result = upload_media_to_url(upload_url, file_path, content_type, sha256_hash, progress=progress)
+
+                # Step 3: Update Langfuse with upload status
+                patch_response = patch_media_upload_status(
+                    media_id=media_id,
+                    status_code=upload_result["status_code"],
+                    upload_time_ms=upload_result["upload_time_ms"],
+                    error=upload_result.get("message") if not upload_result["success"] else None
+                )
+
+                patch_data = json.loads(patch_response)
+                if "error" in patch_data:
+                    return {
+                        "success": False,
+                        "error": f"Upload succeeded but status update failed: {patch_data['error']}",
+                        "detail": patch_data.get('detail', 'No additional detail provided'),
+                        "media_id": media_id
+                    }
+                upload_time_ms = upload_result["upload_time_ms"]
+                media_data = patch_data
+                storage_ok = upload_result["success"]
+            else:
+                # File already exists (deduplication) - skip upload
+                upload_time_ms = 0
+                # Get existing media data
+                media_response = get_media(media_id)
+                media_data = json.loads(media_response) if isinstance(media_response, str) else media_response
+
+        if index is not None and storage_ok:
+            try:
+                index.record(scope, file_path, sha256_hash, media_id, content_type, st)
+            except Exception as e:
+                print(f"Warning: Could not update media index: {e}")
 
         # Step 4: Create and attach Langfuse Media Token to trace/observation
         media_token = create_langfuse_media_token(media_id, content_type, source="file")
@@ -4478,4 +5899,322 @@ def upload_and_attach_media(file_path, trace_id, field="input",
         return {
             "success": False,
             "error": f"Unexpected error: {str(e)}"
-        }
\ No newline at end of file
+        }
+
+# ============================================================================
+# Directory upload engine
+# ============================================================================
+
+MEDIA_UPLOAD_MAX_WORKERS = 8
+MEDIA_MANIFEST_NAME = '.coaia-media-manifest.json'
+# Manifest is rewritten at most this often while uploads are in flight (seconds)
+MEDIA_MANIFEST_SAVE_INTERVAL = 2.0
+
+
+def _hash_files(paths, hash_workers=None):
+    """
+    SHA-256 many files, in a process pool when there is enough work.
+
+    Falls back to threads where process pools are unavailable (e.g. Pythonista).
+
+    Returns:
+        dict: path -> base64 SHA-256, or an Exception for files that could not be read
+    """
+    try:
+        from concurrent.futures import ProcessPoolExecutor
+        from concurrent.futures.process import BrokenProcessPool
+    except ImportError:
+        ProcessPoolExecutor = None
+
+        class BrokenProcessPool(Exception):
+            pass
+
+    hashes = {}
+    keys = {}
+    for path in paths:
+        try:
+            keys[path] = _media_hash_key(path, os.stat(path))
+        except OSError as e:
+            hashes[path] = Exception(f"Failed to calculate SHA-256 hash: {str(e)}")
+            continue
+        cached = _media_hash_cache_get(keys[path])
+        if cached is not None:
+            hashes[path] = cached
+    paths = [path for path in paths if path not in hashes]
+    if not paths:
+        return hashes
+
+    def _collect(executor):
+        futures = {executor.submit(calculate_sha256, path, False): path for path in paths}
+        for future, path in futures.items():
+            try:
+                hashes[path] = future.result()
+                _media_hash_cache_put(keys[path], hashes[path])
+            except BrokenProcessPool:
+                raise
+            except Exception as e:
+                hashes[path] = e
+
+    workers = hash_workers or os.cpu_count() or 1
+    if ProcessPoolExecutor is not None and workers > 1 and len(paths) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as executor:
+                _collect(executor)
+            return hashes
+        except (OSError, NotImplementedError, BrokenProcessPool):
+            pass
+    with ThreadPoolExecutor(max_workers=min(workers, len(paths))) as executor:
+        _collect(executor)
+    return hashes
+
+
+def load_media_manifest(manifest_path):
+    """Load an upload-dir manifest (relative path -> file entry); empty if missing or unreadable"""
+    try:
+        with open(manifest_path, 'r') as f:
+            data = json.load(f)
+        files = data.get('files') if isinstance(data, dict) else None
+        return files if isinstance(files, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_media_manifest(manifest_path, files):
+    """Atomically write an upload-dir manifest"""
+    import tempfile
+    directory = os.path.dirname(os.path.abspath(manifest_path))
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.tmp', dir=directory, delete=False) as tmp_file:
+        json.dump({'version': 1, 'files': files}, tmp_file, indent=2)
+        tmp_path = tmp_file.name
+    os.replace(tmp_path, manifest_path)
+
+
+def _find_media_files(directory, pattern='*', recursive=False, exclude=()):
+    import fnmatch
+    found = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            rel = os.path.relpath(path, directory).replace(os.sep, '/')
+            if fnmatch.fnmatch(name, pattern) and os.path.abspath(path) not in exclude:
+                found.append((rel, path))
+        if not recursive:
+            break
+    return found
+
+
+def _upload_registered_media(path, trace_id, field, observation_id, entry):
+    """Request an upload URL and PUT the file unless Langfuse already has it; updates entry in place"""
+    upload_data = json.loads(get_media_upload_url(
+        trace_id=trace_id,
+        content_type=entry['content_type'],
+        content_length=entry['size'],
+        sha256_hash=entry['sha256'],
+        field=field,
+        observation_id=observation_id
+    ))
+    if 'error' in upload_data:
+        raise Exception(f"Failed to get upload URL: {upload_data['error']}")
+    media_id = upload_data.get('mediaId')
+    if not media_id:
+        raise Exception("Invalid response from Langfuse: missing mediaId")
+    entry['media_id'] = media_id
+
+    upload_url = upload_data.get('uploadUrl')
+    if not upload_url:
+        # Same bytes already stored for this project
+        entry['status'] = 'deduplicated'
+        return
+
+    upload_result = upload_media_to_url(upload_url, path, entry['content_type'], entry['sha256'])
+    patch_data = json.loads(patch_media_upload_status(
+        media_id=media_id,
+        status_code=upload_result['status_code'],
+        upload_time_ms=upload_result['upload_time_ms'],
+        error=upload_result.get('message') if not upload_result['success'] else None
+    ))
+    if not upload_result['success']:
+        raise Exception(upload_result['message'])
+    if 'error' in patch_data:
+        raise Exception(f"Upload succeeded but status update failed: {patch_data['error']}")
+    entry['status'] = 'uploaded'
+    entry['upload_time_ms'] = upload_result['upload_time_ms']
+
+
+def upload_media_directory(directory, trace_id, field="input", observation_id=None, pattern='*',
+                           recursive=False, max_workers=MEDIA_UPLOAD_MAX_WORKERS, hash_workers=None,
+                           manifest_path=None, attach=True):
+    """
+    Upload every matching file in a directory and attach it to a trace.
+
+    Files are hashed in a process pool, then upload URLs are requested and
+    files PUT to storage by a bounded thread pool. Files Langfuse already
+    holds (same SHA-256) are not re-sent. Each file is attached as its own
+    EVENT observation (named after its relative path, child of
+    observation_id if given), sent through the ingestion batch API.
+
+    Progress is kept in a manifest (default: <directory>/.coaia-media-manifest.json),
+    so re-running after an interruption only processes files that are new,
+    changed or not yet done.
+
+    Args:
+        directory: Directory containing the files
+        trace_id: Trace to attach the media to
+        field: "input", "output" or "metadata"
+        observation_id: Optional parent observation for the per-file observations
+        pattern: Filename glob (default: all files)
+        recursive: Include subdirectories
+        max_workers: Maximum concurrent uploads
+        hash_workers: Hashing processes (default: CPU count)
+        manifest_path: Manifest location override
+        attach: Create the per-file observations (False only uploads/registers the media)
+
+    Returns:
+        dict: {"success", "files", "uploaded", "deduplicated", "skipped", "failed",
+               "manifest", "results": [per-file {"path", "status", "media_id", "media_token", "error"}]}
+    """
+    if field not in ('input', 'output', 'metadata'):
+        raise ValueError(f"Invalid field: {field}. Must be 'input', 'output', or 'metadata'")
+    if not os.path.isdir(directory):
+        raise ValueError(f"Not a directory: {directory}")
+
+    manifest_path = manifest_path or os.path.join(directory, MEDIA_MANIFEST_NAME)
+    manifest = load_media_manifest(manifest_path)
+    files = _find_media_files(directory, pattern, recursive, exclude={os.path.abspath(manifest_path)})
+
+    done_states = ('uploaded', 'deduplicated')
+    pending = []
+    to_hash = []
+    for rel, path in files:
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            # Removed or unreadable since discovery
+            manifest[rel] = {'trace_id': trace_id, 'field': field, 'observation_id': observation_id,
+                             'status': 'failed', 'attached': False, 'error': f"Cannot read file: {e}"}
+            pending.append((rel, path))
+            continue
+        previous = manifest.get(rel) or {}
+        unchanged = previous.get('size') == st.st_size and previous.get('mtime_ns') == st.st_mtime_ns
+        same_target = previous.get('trace_id') == trace_id and previous.get('field') == field and \
+            previous.get('observation_id') == observation_id
+        if unchanged and same_target and previous.get('status') in done_states and \
+                (previous.get('attached') or not attach):
+            continue
+        entry = {
+            'size': st.st_size, 'mtime_ns': st.st_mtime_ns,
+            'trace_id': trace_id, 'field': field, 'observation_id': observation_id,
+            'content_type': detect_content_type(path), 'status': 'pending', 'attached': False,
+        }
+        if unchanged and previous.get('sha256'):
+            entry['sha256'] = previous['sha256']
+        if unchanged and same_target and previous.get('status') in done_states:
+            # Uploaded before but never attached: only the attach step is left
+            entry.update(status=previous['status'], media_id=previous.get('media_id'))
+        manifest[rel] = entry
+        pending.append((rel, path))
+        if 'sha256' not in entry:
+            to_hash.append(path)
+
+    skipped = len(files) - len(pending)
+    lock = threading.Lock()
+    last_save = [time.monotonic()]
+
+    def _checkpoint(force=False):
+        with lock:
+            if force or time.monotonic() - last_save[0] >= MEDIA_MANIFEST_SAVE_INTERVAL:
+                save_media_manifest(manifest_path, manifest)
+                last_save[0] = time.monotonic()
+
+    hashes = _hash_files(to_hash, hash_workers)
+    uploads = []
+    for rel, path in pending:
+        entry = manifest[rel]
+        if entry['status'] == 'failed':
+            continue
+        if path in hashes:
+            if isinstance(hashes[path], Exception):
+                entry.update(status='failed', error=str(hashes[path]))
+                continue
+            entry['sha256'] = hashes[path]
+        validation = validate_content_type(entry['content_type'])
+        if not validation['valid']:
+            entry.update(status='failed', error=validation['message'])
+            continue
+        if entry['status'] == 'pending':
+            uploads.append((rel, path))
+
+    def _upload(item):
+        rel, path = item
+        # Work on a copy so a concurrent checkpoint never serializes an entry mid-update
+        with lock:
+            entry = dict(manifest[rel])
+        try:
+            _upload_registered_media(path, trace_id, field, observation_id, entry)
+            entry.pop('error', None)
+        except Exception as e:
+            entry.update(status='failed', error=str(e))
+        with lock:
+            manifest[rel] = entry
+        _checkpoint()
+
+    try:
+        if uploads:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(uploads)))) as executor:
+                list(executor.map(_upload, uploads))
+
+        if attach:
+            events = []
+            event_paths = {}
+            for rel, _ in pending:
+                entry = manifest[rel]
+                if entry['status'] not in done_states:
+                    continue
+                token = create_langfuse_media_token(entry['media_id'], entry['content_type'], source="file")
+                event = build_observation_event(
+                    str(uuid.uuid5(uuid.NAMESPACE_URL, f"coaia-media:{trace_id}:{field}:{rel}:{entry['media_id']}")),
+                    trace_id, observation_type="EVENT", name=rel,
+                    input_data=token if field == 'input' else None,
+                    output_data=token if field == 'output' else None,
+                    metadata={"media": token} if field == 'metadata' else None,
+                    parent_observation_id=observation_id
+                )
+                entry['media_token'] = token
+                events.append(event)
+                event_paths[event['id']] = rel
+            if events:
+                ingestion = ingest_events(events)
+                failed_ids = {e.get('id'): e for e in ingestion['errors']}
+                for event_id, rel in event_paths.items():
+                    if event_id in failed_ids:
+                        error = failed_ids[event_id]
+                        manifest[rel]['error'] = f"Token attachment failed: {error.get('message') or error}"
+                    else:
+                        manifest[rel]['attached'] = True
+    finally:
+        _checkpoint(force=True)
+
+    results = []
+    counts = {'uploaded': 0, 'deduplicated': 0, 'failed': 0}
+    for rel, _ in pending:
+        entry = manifest[rel]
+        status = entry['status']
+        if status in done_states and attach and not entry.get('attached'):
+            status = 'failed'
+        counts[status if status in counts else 'failed'] += 1
+        results.append({
+            'path': rel, 'status': status, 'media_id': entry.get('media_id'),
+            'media_token': entry.get('media_token'), 'error': entry.get('error'),
+        })
+
+    return {
+        'success': counts['failed'] == 0,
+        'files': len(files),
+        'uploaded': counts['uploaded'],
+        'deduplicated': counts['deduplicated'],
+        'skipped': skipped,
+        'failed': counts['failed'],
+        'manifest': manifest_path,
+        'results': results,
+    }
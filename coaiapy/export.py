@@ -0,0 +1,253 @@
+"""
+Columnar export of Langfuse traces, observations and scores.
+
+Records are flattened into typed columns (timestamps, latency, token usage,
+cost, model, level, ...) and written in bounded row groups to Parquet or
+Arrow IPC files, which pandas, polars and DuckDB scan directly. Both need the
+optional ``pyarrow`` package (``pip install coaiapy[export]``); without it,
+or when asked for, the same flattened rows are written as JSON Lines.
+"""
+
+import datetime
+import json
+import os
+import re
+import sys
+
+EXPORT_ENTITIES = ('traces', 'observations', 'scores')
+EXPORT_FORMATS = ('parquet', 'arrow', 'jsonl')
+EXPORT_ROW_GROUP_SIZE = 50000
+
+_FORMAT_EXTENSIONS = {
+    '.parquet': 'parquet', '.pq': 'parquet',
+    '.arrow': 'arrow', '.feather': 'arrow', '.ipc': 'arrow',
+    '.jsonl': 'jsonl', '.ndjson': 'jsonl',
+}
+
+# Column types: string, timestamp (UTC), float, int, string_list, json (serialized string)
+_COLUMNS = {
+    'traces': [
+        ('id', 'string'), ('timestamp', 'timestamp'), ('name', 'string'), ('user_id', 'string'),
+        ('session_id', 'string'), ('release', 'string'), ('version', 'string'), ('environment', 'string'),
+        ('tags', 'string_list'), ('latency', 'float'), ('total_cost', 'float'),
+        ('observation_count', 'int'), ('score_count', 'int'), ('metadata', 'json'),
+    ],
+    'observations': [
+        ('id', 'string'), ('trace_id', 'string'), ('parent_observation_id', 'string'), ('type', 'string'),
+        ('name', 'string'), ('start_time', 'timestamp'), ('end_time', 'timestamp'),
+        ('completion_start_time', 'timestamp'), ('latency', 'float'), ('time_to_first_token', 'float'),
+        ('level', 'string'), ('status_message', 'string'), ('model', 'string'),
+        ('input_tokens', 'int'), ('output_tokens', 'int'), ('total_tokens', 'int'),
+        ('total_cost', 'float'), ('metadata', 'json'),
+    ],
+    'scores': [
+        ('id', 'string'), ('trace_id', 'string'), ('observation_id', 'string'), ('session_id', 'string'),
+        ('name', 'string'), ('value', 'float'), ('string_value', 'string'), ('data_type', 'string'),
+        ('source', 'string'), ('timestamp', 'timestamp'), ('comment', 'string'), ('config_id', 'string'),
+    ],
+}
+_PAYLOAD_COLUMNS = [('input', 'json'), ('output', 'json')]
+
+_TIMESTAMP_RE = re.compile(r'^(\d{4}-\d{2}-\d{2})[T ](\d{2}:\d{2}:\d{2})(?:\.(\d{1,6})\d*)?(Z|[+-]\d{2}:?\d{2})?$')
+
+
+def export_columns(entity, include_payloads=False):
+    """(name, type) column list of an entity's export schema"""
+    if entity not in _COLUMNS:
+        raise ValueError(f"Unknown entity '{entity}'. Use one of: {', '.join(EXPORT_ENTITIES)}")
+    columns = list(_COLUMNS[entity])
+    if include_payloads and entity != 'scores':
+        columns += _PAYLOAD_COLUMNS
+    return columns
+
+
+def detect_export_format(path, fmt=None):
+    """Explicit format, else the one implied by the file extension (default: parquet)"""
+    if fmt:
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown format '{fmt}'. Use one of: {', '.join(EXPORT_FORMATS)}")
+        return fmt
+    if path in (None, '-'):
+        return 'jsonl'
+    return _FORMAT_EXTENSIONS.get(os.path.splitext(path)[1].lower(), 'parquet')
+
+
+def parse_timestamp(value):
+    """ISO 8601 string -> naive UTC datetime (None if missing or unparseable)"""
+    if not value or not isinstance(value, str):
+        return None
+    match = _TIMESTAMP_RE.match(value.strip())
+    if not match:
+        return None
+    date, clock, fraction, zone = match.groups()
+    dt = datetime.datetime.strptime(f"{date}T{clock}", '%Y-%m-%dT%H:%M:%S')
+    if fraction:
+        dt = dt.replace(microsecond=int(fraction.ljust(6, '0')))
+    if zone and zone != 'Z':
+        sign = 1 if zone[0] == '+' else -1
+        hours, minutes = int(zone[1:3]), int(zone[-2:])
+        dt -= sign * datetime.timedelta(hours=hours, minutes=minutes)
+    return dt
+
+
+def _first(*values):
+    for value in values:
+        if value is not None:
+            return value
+    return None
+
+
+def _number(value, cast):
+    try:
+        return cast(value) if value is not None and value != '' else None
+    except (TypeError, ValueError):
+        return None
+
+
+def flatten_record(entity, record, include_payloads=False):
+    """
+    Flatten one API record into the export columns of its entity.
+
+    Timestamps stay ISO strings here; writers convert them to their own types.
+    """
+    r = record
+    if entity == 'traces':
+        row = {
+            'id': r.get('id'), 'timestamp': r.get('timestamp'), 'name': r.get('name'),
+            'user_id': r.get('userId'), 'session_id': r.get('sessionId'), 'release': r.get('release'),
+            'version': r.get('version'), 'environment': r.get('environment'),
+            'tags': [str(t) for t in r.get('tags') or []],
+            'latency': _number(r.get('latency'), float), 'total_cost': _number(r.get('totalCost'), float),
+            'observation_count': len(r['observations']) if isinstance(r.get('observations'), list) else None,
+            'score_count': len(r['scores']) if isinstance(r.get('scores'), list) else None,
+            'metadata': r.get('metadata'),
+        }
+    elif entity == 'observations':
+        usage = r.get('usage') or {}
+        details = r.get('usageDetails') or {}
+        latency = r.get('latency')
+        if latency is None:
+            start, end = parse_timestamp(r.get('startTime')), parse_timestamp(r.get('endTime'))
+            if start and end:
+                latency = (end - start).total_seconds()
+        row = {
+            'id': r.get('id'), 'trace_id': r.get('traceId'), 'parent_observation_id': r.get('parentObservationId'),
+            'type': r.get('type'), 'name': r.get('name'), 'start_time': r.get('startTime'),
+            'end_time': r.get('endTime'), 'completion_start_time': r.get('completionStartTime'),
+            'latency': _number(latency, float), 'time_to_first_token': _number(r.get('timeToFirstToken'), float),
+            'level': r.get('level'), 'status_message': r.get('statusMessage'), 'model': r.get('model'),
+            'input_tokens': _number(_first(details.get('input'), usage.get('input'), r.get('promptTokens')), int),
+            'output_tokens': _number(_first(details.get('output'), usage.get('output'), r.get('completionTokens')), int),
+            'total_tokens': _number(_first(details.get('total'), usage.get('total'), r.get('totalTokens')), int),
+            'total_cost': _number(_first(r.get('calculatedTotalCost'), r.get('totalCost'),
+                                         (r.get('costDetails') or {}).get('total')), float),
+            'metadata': r.get('metadata'),
+        }
+    elif entity == 'scores':
+        value = r.get('value')
+        row = {
+            'id': r.get('id'), 'trace_id': r.get('traceId'), 'observation_id': r.get('observationId'),
+            'session_id': r.get('sessionId'), 'name': r.get('name'),
+            'value': _number(value, float) if not isinstance(value, bool) else float(value),
+            'string_value': r.get('stringValue'), 'data_type': r.get('dataType'), 'source': r.get('source'),
+            'timestamp': r.get('timestamp'), 'comment': r.get('comment'), 'config_id': r.get('configId'),
+        }
+    else:
+        raise ValueError(f"Unknown entity '{entity}'. Use one of: {', '.join(EXPORT_ENTITIES)}")
+    if include_payloads and entity != 'scores':
+        row['input'] = r.get('input')
+        row['output'] = r.get('output')
+    return row
+
+
+def _json_cell(value):
+    if value is None:
+        return None
+    return value if isinstance(value, str) else json.dumps(value, default=str)
+
+
+class JsonlExportWriter:
+    """Writes flattened rows as JSON Lines (file path or '-' for stdout)"""
+
+    format = 'jsonl'
+
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = columns
+        self._stream = sys.stdout if path in (None, '-') else open(path, 'w', encoding='utf-8')
+
+    def write_rows(self, rows):
+        for row in rows:
+            self._stream.write(json.dumps(row, default=str) + "\n")
+
+    def close(self):
+        if self._stream is sys.stdout:
+            self._stream.flush()
+        else:
+            self._stream.close()
+
+
+class ArrowExportWriter:
+    """Writes row groups to a Parquet or Arrow IPC file through pyarrow"""
+
+    def __init__(self, path, columns, fmt='parquet', compression='zstd'):
+        import pyarrow as pa
+
+        self.path = path
+        self.columns = columns
+        self.format = fmt
+        self._pa = pa
+        types = {
+            'string': pa.string(), 'timestamp': pa.timestamp('us', tz='UTC'), 'float': pa.float64(),
+            'int': pa.int64(), 'string_list': pa.list_(pa.string()), 'json': pa.string(),
+        }
+        self.schema = pa.schema([(name, types[kind]) for name, kind in columns])
+        if fmt == 'parquet':
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(path, self.schema, compression=compression)
+        else:
+            self._writer = pa.ipc.new_file(path, self.schema)
+
+    def write_rows(self, rows):
+        data = {}
+        for name, kind in self.columns:
+            values = [row.get(name) for row in rows]
+            if kind == 'timestamp':
+                values = [parse_timestamp(v) for v in values]
+            elif kind == 'json':
+                values = [_json_cell(v) for v in values]
+            data[name] = values
+        self._writer.write_table(self._pa.Table.from_pydict(data, schema=self.schema))
+
+    def close(self):
+        self._writer.close()
+
+
+def pyarrow_available():
+    """Whether Parquet/Arrow output is possible"""
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def open_export_writer(path, entity, fmt=None, include_payloads=False):
+    """
+    Open a writer for an entity export.
+
+    Parquet and Arrow fall back to JSON Lines (next to the requested path, with
+    a .jsonl extension) when pyarrow is not installed.
+
+    Returns:
+        tuple: (writer, warning message or None)
+    """
+    columns = export_columns(entity, include_payloads)
+    fmt = detect_export_format(path, fmt)
+    if fmt != 'jsonl':
+        if pyarrow_available():
+            return ArrowExportWriter(path, columns, fmt), None
+        jsonl_path = os.path.splitext(path)[0] + '.jsonl'
+        warning = f"pyarrow is not installed (pip install coaiapy[export]); writing JSON Lines to {jsonl_path}"
+        return JsonlExportWriter(jsonl_path, columns), warning
+    return JsonlExportWriter(path, columns), None
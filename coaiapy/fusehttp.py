@@ -0,0 +1,199 @@
+"""
+Shared HTTP layer for Langfuse calls made by cofuse.
+
+Every cofuse function used to call bare ``requests.get/post`` with a freshly
+built ``HTTPBasicAuth``, paying a new TCP+TLS handshake per call. This module
+keeps one keep-alive ``requests.Session`` per Langfuse credential set, with a
+bounded connection pool and retry/backoff on 429/5xx responses.
+
+Read timeouts and 429/5xx responses are only retried for idempotent methods
+and for POST endpoints that are safe to resend (ingestion events carry their
+own ids, so Langfuse deduplicates a resent batch). Other POSTs (scores,
+comments, prompts, datasets, media registrations, ...) are only retried when
+the connection could not be established, since the server may already have
+acted on a request whose response was lost.
+
+Pool and retry settings come from the ``langfuse_http`` section of the config
+(see ``read_config``), which can be overridden by environment variables:
+
+    LANGFUSE_HTTP_POOL_CONNECTIONS  number of per-host pools kept alive
+    LANGFUSE_HTTP_POOL_MAXSIZE      max connections per host
+    LANGFUSE_HTTP_MAX_RETRIES       retries on connect errors, timeouts and 429/500/502/503/504
+    LANGFUSE_HTTP_BACKOFF           backoff factor between retries (seconds)
+    LANGFUSE_HTTP_TIMEOUT           default request timeout (seconds)
+"""
+
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
+
+from coaiapy.coaiamodule import read_config
+
+DEFAULT_HTTP_SETTINGS = {
+    "pool_connections": 10,
+    "pool_maxsize": 20,
+    "max_retries": 3,
+    "backoff_factor": 0.5,
+    "timeout": 60,
+}
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+RETRY_METHODS = frozenset(["HEAD", "GET", "PUT", "DELETE", "OPTIONS"])
+# Langfuse POST endpoints that can be resent without creating duplicates
+IDEMPOTENT_POST_PATHS = ('/api/public/ingestion',)
+
+_lock = threading.Lock()
+_fuse_session = None
+_fuse_session_key = None
+_storage_session = None
+_storage_session_key = None
+
+
+class _TimeoutSession(requests.Session):
+    """Session that applies a default timeout to every request"""
+
+    def __init__(self, timeout=None):
+        super().__init__()
+        self.default_timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get('timeout') is None and self.default_timeout:
+            kwargs['timeout'] = self.default_timeout
+        return super().request(method, url, **kwargs)
+
+
+def get_http_settings(config=None):
+    """Return the effective pool/retry settings from config with defaults applied"""
+    if config is None:
+        config = read_config()
+    settings = DEFAULT_HTTP_SETTINGS.copy()
+    settings.update({k: v for k, v in (config.get('langfuse_http') or {}).items() if v is not None})
+    return settings
+
+
+def _build_retry(max_retries, backoff_factor, methods=RETRY_METHODS):
+    """
+    Build a urllib3 Retry compatible with both urllib3 1.x and 2.x.
+
+    Connect errors are retried for every method; read errors and retryable
+    statuses only for `methods`.
+    """
+    retry_kwargs = dict(
+        total=int(max_retries),
+        connect=int(max_retries),
+        read=int(max_retries),
+        status=int(max_retries),
+        backoff_factor=float(backoff_factor),
+        status_forcelist=RETRY_STATUS_CODES,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    try:
+        return Retry(allowed_methods=methods, **retry_kwargs)
+    except TypeError:
+        # urllib3 < 1.26 uses the older keyword
+        return Retry(method_whitelist=methods, **retry_kwargs)
+
+
+def _build_adapter(settings, methods=RETRY_METHODS):
+    return HTTPAdapter(
+        pool_connections=int(settings['pool_connections']),
+        pool_maxsize=int(settings['pool_maxsize']),
+        max_retries=_build_retry(settings['max_retries'], settings['backoff_factor'], methods),
+        pool_block=True,
+    )
+
+
+def _build_session(settings, auth=None, idempotent_post_prefixes=()):
+    """Create a pooled session with retry adapters mounted for http and https"""
+    session = _TimeoutSession(timeout=settings.get('timeout'))
+    adapter = _build_adapter(settings)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if idempotent_post_prefixes:
+        post_adapter = _build_adapter(settings, RETRY_METHODS | {"POST"})
+        for prefix in idempotent_post_prefixes:
+            session.mount(prefix, post_adapter)
+    if auth is not None:
+        session.auth = auth
+    return session
+
+
+def get_fuse_session(config=None):
+    """
+    Get the shared, authenticated session for Langfuse API calls.
+
+    The session is created once per (base URL, credentials, pool settings)
+    and reused across calls and threads, so connections stay warm. If the
+    credentials change (e.g. a different .env is loaded) a new session is
+    built and the previous one is closed.
+
+    Args:
+        config: Optional config dict (defaults to read_config())
+
+    Returns:
+        requests.Session with Langfuse basic auth applied
+    """
+    global _fuse_session, _fuse_session_key
+    if config is None:
+        config = read_config()
+    settings = get_http_settings(config)
+    key = (
+        config.get('langfuse_base_url'),
+        config.get('langfuse_public_key'),
+        config.get('langfuse_secret_key'),
+        tuple(sorted(settings.items())),
+    )
+    session = _fuse_session
+    if session is not None and _fuse_session_key == key:
+        return session
+    with _lock:
+        if _fuse_session is None or _fuse_session_key != key:
+            previous = _fuse_session
+            auth = HTTPBasicAuth(config['langfuse_public_key'], config['langfuse_secret_key'])
+            base_url = (config.get('langfuse_base_url') or '').rstrip('/')
+            prefixes = [base_url + path for path in IDEMPOTENT_POST_PATHS] if base_url else []
+            _fuse_session = _build_session(settings, auth=auth, idempotent_post_prefixes=prefixes)
+            _fuse_session_key = key
+            if previous is not None:
+                previous.close()
+        return _fuse_session
+
+
+def get_storage_session(config=None):
+    """
+    Get the shared session for presigned storage uploads (S3, GCS, Azure, R2).
+
+    This session deliberately carries no Langfuse credentials: presigned URLs
+    embed their own signature and reject extra Authorization headers.
+    """
+    global _storage_session, _storage_session_key
+    settings = get_http_settings(config)
+    key = tuple(sorted(settings.items()))
+    session = _storage_session
+    if session is not None and _storage_session_key == key:
+        return session
+    with _lock:
+        if _storage_session is None or _storage_session_key != key:
+            previous = _storage_session
+            _storage_session = _build_session(settings)
+            _storage_session_key = key
+            if previous is not None:
+                previous.close()
+        return _storage_session
+
+
+def reset_sessions():
+    """Close and drop the shared sessions (next call rebuilds them)"""
+    global _fuse_session, _fuse_session_key, _storage_session, _storage_session_key
+    with _lock:
+        for session in (_fuse_session, _storage_session):
+            if session is not None:
+                session.close()
+        _fuse_session = None
+        _fuse_session_key = None
+        _storage_session = None
+        _storage_session_key = None
@@ -0,0 +1,180 @@
+"""
+Local index of media already uploaded to Langfuse.
+
+Langfuse deduplicates media by SHA-256, but finding that out costs a hash of
+the file plus a presigned-URL request. This module remembers, per Langfuse
+credential set ("scope"), which local files (by path, size, mtime and inode)
+were uploaded under which SHA-256, media id and content type, so
+``upload_and_attach_media`` can reattach a known asset with a local lookup
+and a single attach call.
+
+The index is a SQLite database under ``~/.coaia/media-index/`` (override the
+directory with COAIAPY_MEDIA_INDEX_DIR). Use ``coaia fuse media index`` to
+inspect, prune or compact it.
+"""
+
+import os
+import time
+from pathlib import Path
+
+from coaiapy import _sqlite
+
+MEDIA_INDEX_FILENAME = 'index.sqlite3'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS media (
+    scope TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    media_id TEXT NOT NULL,
+    content_type TEXT NOT NULL,
+    uploaded_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (scope, path)
+);
+CREATE INDEX IF NOT EXISTS media_by_hash ON media (scope, sha256, content_type);
+"""
+
+_COLUMNS = ('scope', 'path', 'size', 'mtime_ns', 'inode', 'sha256', 'media_id',
+            'content_type', 'uploaded_at', 'last_used')
+
+
+def get_media_index_path():
+    """Path of the media index database"""
+    directory = os.getenv('COAIAPY_MEDIA_INDEX_DIR') or str(Path.home() / '.coaia' / 'media-index')
+    return os.path.join(directory, MEDIA_INDEX_FILENAME)
+
+
+class MediaIndex:
+    """SQLite-backed map of local file fingerprints to uploaded Langfuse media"""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or get_media_index_path()
+
+    def _connect(self):
+        return _sqlite.connect(self.db_path, _SCHEMA)
+
+    @staticmethod
+    def _row(row):
+        return dict(zip(_COLUMNS, row)) if row else None
+
+    def lookup(self, scope, file_path, st=None):
+        """
+        Find the entry for an unchanged file.
+
+        Args:
+            scope: Credential scope the media id belongs to
+            file_path: Local file path
+            st: Optional os.stat_result of the file (saves a stat call)
+
+        Returns:
+            dict: Entry if the file's size, mtime and inode still match, else None
+        """
+        path = os.path.abspath(file_path)
+        st = st or os.stat(path)
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM media WHERE scope = ? AND path = ? "
+                "AND size = ? AND mtime_ns = ? AND inode = ?",
+                (scope, path, st.st_size, st.st_mtime_ns, st.st_ino)
+            ).fetchone()
+        finally:
+            conn.close()
+        return self._row(row)
+
+    def find_by_hash(self, scope, sha256, content_type):
+        """Find any entry with the same content (e.g. a copied file)"""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM media WHERE scope = ? AND sha256 = ? AND content_type = ? "
+                "ORDER BY last_used DESC LIMIT 1",
+                (scope, sha256, content_type)
+            ).fetchone()
+        finally:
+            conn.close()
+        return self._row(row)
+
+    def record(self, scope, file_path, sha256, media_id, content_type, st=None):
+        """Insert or update the entry for a file that is now known to Langfuse"""
+        path = os.path.abspath(file_path)
+        st = st or os.stat(path)
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO media (scope, path, size, mtime_ns, inode, sha256, media_id, "
+                "content_type, uploaded_at, last_used) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (scope, path, st.st_size, st.st_mtime_ns, st.st_ino, sha256, media_id, content_type, now, now)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def touch(self, scope, file_path):
+        """Mark an entry as used now (prune keeps recently used entries)"""
+        conn = self._connect()
+        try:
+            conn.execute("UPDATE media SET last_used = ? WHERE scope = ? AND path = ?",
+                         (time.time(), scope, os.path.abspath(file_path)))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def stats(self):
+        """Entry count, distinct hashes and database size"""
+        conn = self._connect()
+        try:
+            entries, hashes = conn.execute("SELECT COUNT(*), COUNT(DISTINCT sha256) FROM media").fetchone()
+        finally:
+            conn.close()
+        return {'path': self.db_path, 'entries': entries, 'distinct_hashes': hashes,
+                'bytes': _sqlite.db_size(self.db_path)}
+
+    def prune(self, older_than_days=None):
+        """
+        Remove entries whose file is gone or changed, and optionally ones unused for a while.
+
+        Args:
+            older_than_days: Also drop entries not used in this many days
+
+        Returns:
+            int: Number of entries removed
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT scope, path, size, mtime_ns, inode, last_used FROM media").fetchall()
+            cutoff = time.time() - older_than_days * 86400 if older_than_days is not None else None
+            stale = []
+            for scope, path, size, mtime_ns, inode, last_used in rows:
+                try:
+                    st = os.stat(path)
+                    changed = (st.st_size, st.st_mtime_ns, st.st_ino) != (size, mtime_ns, inode)
+                except OSError:
+                    changed = True
+                if changed or (cutoff is not None and last_used < cutoff):
+                    stale.append((scope, path))
+            conn.executemany("DELETE FROM media WHERE scope = ? AND path = ?", stale)
+            conn.commit()
+        finally:
+            conn.close()
+        return len(stale)
+
+    def compact(self):
+        """Checkpoint the WAL and VACUUM the database; returns stats afterwards"""
+        conn = self._connect()
+        try:
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            conn.execute('VACUUM')
+        finally:
+            conn.close()
+        return self.stats()
+
+
+def get_media_index():
+    """Shared MediaIndex for the configured location"""
+    return _sqlite.shared(MediaIndex, get_media_index_path())
@@ -0,0 +1,276 @@
+"""
+Local SQLite mirror of Langfuse traces, observations and scores.
+
+``coaia fuse sync`` copies new and recently changed records into the mirror,
+resuming from a per-entity timestamp watermark, and the ``coaia fuse mirror``
+commands answer listing queries from it without touching the API.
+
+Each Langfuse credential set ("scope") gets its own database under
+``~/.coaia/mirror/`` (override the directory with COAIAPY_MIRROR_DIR). Rows
+keep the full API record as JSON next to indexed columns for filtering.
+"""
+
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+from coaiapy import _sqlite
+
+MIRROR_ENTITIES = ('traces', 'observations', 'scores')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS traces (
+    id TEXT PRIMARY KEY,
+    timestamp TEXT,
+    name TEXT,
+    user_id TEXT,
+    session_id TEXT,
+    release TEXT,
+    version TEXT,
+    environment TEXT,
+    tags TEXT,
+    latency REAL,
+    total_cost REAL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS traces_by_timestamp ON traces (timestamp);
+CREATE INDEX IF NOT EXISTS traces_by_session ON traces (session_id, timestamp);
+CREATE INDEX IF NOT EXISTS traces_by_user ON traces (user_id, timestamp);
+CREATE INDEX IF NOT EXISTS traces_by_name ON traces (name, timestamp);
+
+CREATE TABLE IF NOT EXISTS observations (
+    id TEXT PRIMARY KEY,
+    trace_id TEXT,
+    parent_observation_id TEXT,
+    type TEXT,
+    name TEXT,
+    start_time TEXT,
+    end_time TEXT,
+    level TEXT,
+    model TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS observations_by_trace ON observations (trace_id, start_time);
+CREATE INDEX IF NOT EXISTS observations_by_start ON observations (start_time);
+CREATE INDEX IF NOT EXISTS observations_by_name ON observations (name, start_time);
+
+CREATE TABLE IF NOT EXISTS scores (
+    id TEXT PRIMARY KEY,
+    trace_id TEXT,
+    observation_id TEXT,
+    session_id TEXT,
+    name TEXT,
+    value REAL,
+    string_value TEXT,
+    data_type TEXT,
+    source TEXT,
+    timestamp TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_by_trace ON scores (trace_id);
+CREATE INDEX IF NOT EXISTS scores_by_name ON scores (name, timestamp);
+CREATE INDEX IF NOT EXISTS scores_by_timestamp ON scores (timestamp);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    entity TEXT PRIMARY KEY,
+    watermark TEXT,
+    last_sync REAL,
+    last_fetched INTEGER
+);
+"""
+
+# entity -> (timestamp field in the API record, [(column, record field), ...])
+_ENTITY_COLUMNS = {
+    'traces': ('timestamp', [
+        ('id', 'id'), ('timestamp', 'timestamp'), ('name', 'name'), ('user_id', 'userId'),
+        ('session_id', 'sessionId'), ('release', 'release'), ('version', 'version'),
+        ('environment', 'environment'), ('tags', 'tags'), ('latency', 'latency'), ('total_cost', 'totalCost'),
+    ]),
+    'observations': ('startTime', [
+        ('id', 'id'), ('trace_id', 'traceId'), ('parent_observation_id', 'parentObservationId'),
+        ('type', 'type'), ('name', 'name'), ('start_time', 'startTime'), ('end_time', 'endTime'),
+        ('level', 'level'), ('model', 'model'),
+    ]),
+    'scores': ('timestamp', [
+        ('id', 'id'), ('trace_id', 'traceId'), ('observation_id', 'observationId'),
+        ('session_id', 'sessionId'), ('name', 'name'), ('value', 'value'), ('string_value', 'stringValue'),
+        ('data_type', 'dataType'), ('source', 'source'), ('timestamp', 'timestamp'),
+    ]),
+}
+
+
+def get_mirror_path(scope):
+    """Path of the mirror database for a credential scope"""
+    directory = os.getenv('COAIAPY_MIRROR_DIR') or str(Path.home() / '.coaia' / 'mirror')
+    return os.path.join(directory, f"{scope}.sqlite3")
+
+
+def _column_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+
+class Mirror:
+    """SQLite-backed copy of traces, observations and scores for one scope"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+    def _connect(self):
+        return _sqlite.connect(self.db_path, _SCHEMA, synchronous='NORMAL')
+
+    def upsert(self, entity, records):
+        """
+        Insert or replace API records of one entity type.
+
+        Args:
+            entity: "traces", "observations" or "scores"
+            records: Iterable of API records (dicts with an "id")
+
+        Returns:
+            tuple: (number of records written, newest timestamp among them or None)
+        """
+        ts_field, columns = _ENTITY_COLUMNS[entity]
+        rows = []
+        newest = None
+        for record in records:
+            rows.append([_column_value(record.get(field)) for _, field in columns] + [json.dumps(record)])
+            ts = record.get(ts_field)
+            if ts and (newest is None or ts > newest):
+                newest = ts
+        if not rows:
+            return 0, None
+        names = [column for column, _ in columns] + ['data']
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO {entity} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})",
+                    rows
+                )
+        finally:
+            conn.close()
+        return len(rows), newest
+
+    def get_watermark(self, entity):
+        """Newest timestamp mirrored by the last completed sync of an entity"""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT watermark FROM sync_state WHERE entity = ?", (entity,)).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else None
+
+    def set_watermark(self, entity, watermark, fetched):
+        """Record a completed sync of an entity"""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO sync_state (entity, watermark, last_sync, last_fetched) VALUES (?, ?, ?, ?)",
+                    (entity, watermark, time.time(), fetched)
+                )
+        finally:
+            conn.close()
+
+    def reset(self, entities=MIRROR_ENTITIES):
+        """Forget the watermark of entities so the next sync starts from the beginning"""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany("DELETE FROM sync_state WHERE entity = ?", [(e,) for e in entities])
+        finally:
+            conn.close()
+
+    def _select(self, entity, filters, order_by, limit):
+        clauses, params = [], []
+        for clause, value in filters:
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        query = f"SELECT data FROM {entity}"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += f" ORDER BY {order_by}"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        conn = self._connect()
+        try:
+            return [json.loads(data) for (data,) in conn.execute(query, params)]
+        finally:
+            conn.close()
+
+    def query_traces(self, session_id=None, user_id=None, name=None, from_timestamp=None,
+                     to_timestamp=None, limit=None):
+        """Mirrored traces matching the filters, newest first"""
+        return self._select('traces', [
+            ("session_id = ?", session_id), ("user_id = ?", user_id), ("name = ?", name),
+            ("timestamp >= ?", from_timestamp), ("timestamp < ?", to_timestamp),
+        ], "timestamp DESC", limit)
+
+    def query_observations(self, trace_id=None, observation_type=None, name=None, level=None,
+                           from_start_time=None, to_start_time=None, limit=None):
+        """Mirrored observations matching the filters, in start time order"""
+        return self._select('observations', [
+            ("trace_id = ?", trace_id), ("type = ?", observation_type), ("name = ?", name),
+            ("level = ?", level), ("start_time >= ?", from_start_time), ("start_time < ?", to_start_time),
+        ], "start_time, id", limit)
+
+    def query_scores(self, trace_id=None, name=None, from_timestamp=None, to_timestamp=None, limit=None):
+        """Mirrored scores matching the filters, newest first"""
+        return self._select('scores', [
+            ("trace_id = ?", trace_id), ("name = ?", name),
+            ("timestamp >= ?", from_timestamp), ("timestamp < ?", to_timestamp),
+        ], "timestamp DESC", limit)
+
+    def get_trace(self, trace_id):
+        """
+        A mirrored trace with its observations, shaped like get_trace_with_observations.
+
+        Returns:
+            dict: Trace with "observations", or {"error": ...} if nothing is mirrored for it
+        """
+        traces = self._select('traces', [("id = ?", trace_id)], "id", 1)
+        observations = self.query_observations(trace_id=trace_id)
+        if not traces and not observations:
+            return {"error": f"Trace not in mirror: {trace_id} (run 'coaia fuse sync')"}
+        trace = traces[0] if traces else {'id': trace_id}
+        trace['observations'] = observations
+        return trace
+
+    def execute(self, sql, params=()):
+        """Run a read-only SQL query; returns rows as dicts"""
+        self._connect().close()
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, timeout=30)
+        try:
+            cursor = conn.execute(sql, params)
+            names = [d[0] for d in cursor.description or []]
+            return [dict(zip(names, row)) for row in cursor]
+        finally:
+            conn.close()
+
+    def stats(self):
+        """Row counts and sync state per entity, plus database size"""
+        conn = self._connect()
+        try:
+            counts = {e: conn.execute(f"SELECT COUNT(*) FROM {e}").fetchone()[0] for e in MIRROR_ENTITIES}
+            state = {entity: {'watermark': watermark, 'last_sync': last_sync, 'last_fetched': fetched}
+                     for entity, watermark, last_sync, fetched
+                     in conn.execute("SELECT entity, watermark, last_sync, last_fetched FROM sync_state")}
+        finally:
+            conn.close()
+        return {
+            'path': self.db_path, 'bytes': _sqlite.db_size(self.db_path),
+            'entities': {e: dict({'rows': counts[e]}, **state.get(e, {})) for e in MIRROR_ENTITIES},
+        }
+
+
+def get_mirror(scope):
+    """Shared Mirror for a credential scope at the configured location"""
+    return _sqlite.shared(Mirror, get_mirror_path(scope))
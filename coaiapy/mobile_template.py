@@ -6,15 +6,27 @@ Replaces Jinja2 dependency with lightweight, build-free template processing.
 """
 
 import re
+import threading
 import uuid
+from collections import OrderedDict
 from datetime import datetime
 from typing import Dict, List, Optional, Any, Union
 
 
+# Compiled expression node kinds (literal text is kept as plain str nodes)
+_CALL = 'call'          # {{ uuid4() }}
+_FILTER = 'filter'      # {{ name|upper }}
+_DEFAULT = 'default'    # {{ name or 'fallback' }}
+_VAR = 'var'            # {{ name }}
+_IF = 'if'              # {% if cond %}...{% endif %}
+
+DEFAULT_TEMPLATE_CACHE_SIZE = 256
+
+
 class MobileTemplateEngine:
     """Lightweight templating designed for Pythonista workflows"""
     
-    def __init__(self):
+    def __init__(self, cache_size: int = DEFAULT_TEMPLATE_CACHE_SIZE):
         # Built-in functions for mobile workflows
         self.builtin_functions = {
             'uuid4': lambda: str(uuid.uuid4()),
@@ -27,6 +39,11 @@ class MobileTemplateEngine:
         # Patterns for template processing
         self.variable_pattern = re.compile(r'\{\{([^}]+)\}\}')
         self.condition_pattern = re.compile(r'\{\%\s*if\s+([^%]+)\%\}(.*?)\{\%\s*endif\s*\%\}', re.DOTALL)
+        
+        # Bounded LRU of compiled templates keyed by source text
+        self.cache_size = cache_size
+        self._compiled = OrderedDict()
+        self._compiled_lock = threading.Lock()
     
     def render_pipeline(self, template_name: str, **variables) -> Dict[str, Any]:
         """Fast, mobile-optimized template processing"""
@@ -47,6 +64,97 @@ class MobileTemplateEngine:
         
         return result
     
+    def compile_template(self, content: str) -> tuple:
+        """
+        Parse template text once into a node tuple, cached in a bounded LRU.
+        
+        Literal text is kept as str nodes; {{ ... }} expressions become
+        (kind, ...) tuples and {% if %} blocks become (_IF, condition, body).
+        """
+        compiled = self._compiled.get(content)
+        if compiled is not None:
+            with self._compiled_lock:
+                if content in self._compiled:
+                    self._compiled.move_to_end(content)
+            return compiled
+        
+        compiled = (self._compile_conditionals(content), self._compile_variables(content))
+        with self._compiled_lock:
+            self._compiled[content] = compiled
+            while len(self._compiled) > self.cache_size:
+                self._compiled.popitem(last=False)
+        return compiled
+    
+    def clear_cache(self):
+        """Drop all compiled templates"""
+        with self._compiled_lock:
+            self._compiled.clear()
+    
+    def _compile_conditionals(self, content: str) -> Optional[tuple]:
+        """Split content into literal and {% if %} nodes (None if there are none)"""
+        nodes = []
+        position = 0
+        for match in self.condition_pattern.finditer(content):
+            if match.start() > position:
+                nodes.append(content[position:match.start()])
+            nodes.append((_IF, self._compile_condition(match.group(1)), match.group(2)))
+            position = match.end()
+        if not nodes:
+            return None
+        if position < len(content):
+            nodes.append(content[position:])
+        return tuple(nodes)
+    
+    def _compile_variables(self, content: str) -> tuple:
+        """Split content into literal and {{ expression }} nodes"""
+        nodes = []
+        expressions = {}  # Identical expressions share one node
+        position = 0
+        for match in self.variable_pattern.finditer(content):
+            if match.start() > position:
+                nodes.append(content[position:match.start()])
+            var_expr = match.group(1).strip()
+            node = expressions.get(var_expr)
+            if node is None:
+                node = expressions[var_expr] = self._compile_expression(var_expr)
+            nodes.append(node)
+            position = match.end()
+        if position < len(content):
+            nodes.append(content[position:])
+        return tuple(nodes)
+    
+    def _compile_expression(self, var_expr: str) -> tuple:
+        """Compile one {{ ... }} expression into a node"""
+        # Handle function calls like uuid4()
+        if var_expr.endswith('()') and var_expr[:-2] in self.builtin_functions:
+            return (_CALL, var_expr[:-2])
+        
+        # Handle filters like variable|title, variable|upper
+        if '|' in var_expr:
+            parts = var_expr.split('|')
+            return (_FILTER, parts[0].strip(), parts[1].strip())
+        
+        # Handle 'variable or default' expressions
+        if ' or ' in var_expr:
+            return (_DEFAULT, tuple(p.strip().strip("'\"") for p in var_expr.split(' or ')))
+        
+        # Simple variable lookup
+        return (_VAR, var_expr)
+    
+    def _compile_condition(self, condition: str) -> tuple:
+        """Pre-split a condition so evaluation needs no string parsing"""
+        condition = condition.strip()
+        if condition.startswith('not '):
+            return ('not', condition[4:].strip())
+        comparison = None
+        if '==' in condition:
+            left, right = [p.strip() for p in condition.split('==', 1)]
+            comparison = ('==', left, right.strip("'\""))
+        elif '!=' in condition:
+            left, right = [p.strip() for p in condition.split('!=', 1)]
+            comparison = ('!=', left, right.strip("'\""))
+        return ('expr', condition, comparison)
+    
     def render_string(self, text: str, variables: Dict[str, Any]) -> str:
         """Render a string template with variables - API compatible with Jinja2"""
         return self.render_template_content(text, variables)
@@ -89,47 +197,43 @@ class MobileTemplateEngine:
     
     def _process_variables(self, content: str, variables: Dict[str, Any]) -> str:
         """Process {{variable}} substitutions with mobile-friendly fallbacks"""
-        def replace_variable(match):
-            var_expr = match.group(1).strip()
-            
-            # Handle function calls like uuid4()
-            if var_expr.endswith('()') and var_expr[:-2] in self.builtin_functions:
-                func_name = var_expr[:-2]
-                return str(self.builtin_functions[func_name]())
-            
-            # Handle filters like variable|title, variable|upper
-            if '|' in var_expr:
-                parts = var_expr.split('|')
-                var_name = parts[0].strip()
-                filter_name = parts[1].strip()
-                
-                if var_name in variables:
-                    value = str(variables[var_name]) if variables[var_name] is not None else ''
-                    return self._apply_filter(value, filter_name)
-                else:
-                    return f"[{var_name}]"  # Missing variable
-            
-            # Handle 'variable or default' expressions
-            if ' or ' in var_expr:
-                parts = [p.strip().strip("'\"") for p in var_expr.split(' or ')]
-                for part in parts:
-                    if part in variables and variables[part] is not None:
-                        return str(variables[part])
-                    elif part.startswith("'") and part.endswith("'"):
-                        return part[1:-1]  # Return string literal
-                    elif part.startswith('"') and part.endswith('"'):
-                        return part[1:-1]  # Return string literal
-                return parts[-1]  # Return last part as fallback
-            
-            # Simple variable lookup
+        _, nodes = self.compile_template(content)
+        parts = []
+        for node in nodes:
+            if node.__class__ is str:
+                parts.append(node)
+            else:
+                parts.append(self._render_expression(node, variables))
+        return ''.join(parts)
+    
+    def _render_expression(self, node: tuple, variables: Dict[str, Any]) -> str:
+        """Evaluate a compiled {{ ... }} node"""
+        kind = node[0]
+        
+        if kind == _VAR:
+            var_expr = node[1]
             if var_expr in variables:
                 value = variables[var_expr]
                 return str(value) if value is not None else ''
-            
             # Mobile-friendly fallback for missing variables
             return f"[{var_expr}]"  # Clear indication of missing variable
         
-        return self.variable_pattern.sub(replace_variable, content)
+        if kind == _FILTER:
+            var_name, filter_name = node[1], node[2]
+            if var_name in variables:
+                value = str(variables[var_name]) if variables[var_name] is not None else ''
+                return self._apply_filter(value, filter_name)
+            return f"[{var_name}]"  # Missing variable
+        
+        if kind == _DEFAULT:
+            parts = node[1]
+            for part in parts:
+                if part in variables and variables[part] is not None:
+                    return str(variables[part])
+            return parts[-1]  # Return last part as fallback
+        
+        # _CALL
+        return str(self.builtin_functions[node[1]]())
     
     def _apply_filter(self, value: str, filter_name: str) -> str:
         """Apply mobile-friendly filters to values"""
@@ -149,17 +253,32 @@ class MobileTemplateEngine:
     
     def _process_conditionals(self, content: str, variables: Dict[str, Any]) -> str:
         """Process {% if condition %}...{% endif %} blocks"""
-        def replace_condition(match):
-            condition_expr = match.group(1).strip()
-            conditional_content = match.group(2)
-            
-            # Simple condition evaluation
-            if self._evaluate_condition(condition_expr, variables):
-                return conditional_content
-            else:
-                return ""
+        nodes, _ = self.compile_template(content)
+        if nodes is None:
+            return content
+        parts = []
+        for node in nodes:
+            if node.__class__ is str:
+                parts.append(node)
+            elif self._evaluate_compiled_condition(node[1], variables):
+                parts.append(node[2])
+        return ''.join(parts)
+    
+    def _evaluate_compiled_condition(self, condition: tuple, variables: Dict[str, Any]) -> bool:
+        """Evaluate a condition produced by _compile_condition"""
+        if condition[0] == 'not':
+            return not self._is_truthy(variables.get(condition[1]))
         
-        return self.condition_pattern.sub(replace_condition, content)
+        _, expr, comparison = condition
+        if expr in variables:
+            return self._is_truthy(variables[expr])
+        if comparison is None:
+            return False
+        operator, left, right_val = comparison
+        left_val = variables.get(left, left.strip("'\""))
+        if operator == '==':
+            return str(left_val) == right_val
+        return str(left_val) != right_val
     
     def _evaluate_condition(self, condition: str, variables: Dict[str, Any]) -> bool:
         """Simple condition evaluation for mobile templates"""
@@ -0,0 +1,250 @@
+"""
+Durable local queue ("outbox") for Langfuse ingestion events.
+
+With the outbox enabled, ``add_trace``, ``add_observation`` and
+``patch_trace_output`` write their ingestion event here and return
+immediately instead of waiting on Langfuse. ``coaia fuse flush`` (or an
+``OutboxFlusher`` thread in long-running processes) later drains the queue
+in batches through the ingestion API.
+
+Each queued event keeps the id it was queued with, so a batch that is sent
+twice (e.g. a flusher crashed after Langfuse accepted it) is deduplicated by
+Langfuse instead of creating duplicates. Events are stored per Langfuse
+credential set ("scope") and only flushed with the credentials they were
+queued under.
+
+The queue is a SQLite database under ``~/.coaia/outbox/`` (override the
+directory with COAIAPY_OUTBOX_DIR).
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+
+from coaiapy import _sqlite
+
+OUTBOX_FILENAME = 'outbox.sqlite3'
+# Seconds a claimed batch is reserved for one flusher before others may retry it
+OUTBOX_LEASE_SECONDS = 120
+OUTBOX_RETRY_BASE_SECONDS = 5
+OUTBOX_RETRY_MAX_SECONDS = 900
+OUTBOX_MAX_ATTEMPTS = 10
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    scope TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    enqueued_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    lease_until REAL NOT NULL DEFAULT 0,
+    dead INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    UNIQUE (scope, event_id)
+);
+CREATE INDEX IF NOT EXISTS events_ready ON events (scope, dead, next_attempt_at, seq);
+"""
+
+
+def get_outbox_path():
+    """Path of the outbox database"""
+    directory = os.getenv('COAIAPY_OUTBOX_DIR') or str(Path.home() / '.coaia' / 'outbox')
+    return os.path.join(directory, OUTBOX_FILENAME)
+
+
+def outbox_enabled():
+    """Whether ingestion calls should be queued by default (COAIAPY_OUTBOX=1)"""
+    return os.getenv('COAIAPY_OUTBOX', '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def retry_delay(attempts):
+    """Backoff before the next attempt of an event that failed `attempts` times"""
+    return min(OUTBOX_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0)), OUTBOX_RETRY_MAX_SECONDS)
+
+
+class Outbox:
+    """SQLite-backed write-ahead queue of ingestion events"""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or get_outbox_path()
+
+    def _connect(self):
+        # WAL + NORMAL still survives process crashes; only an OS crash can
+        # lose the last few commits, which is an acceptable trade for fast enqueue
+        return _sqlite.connect(self.db_path, _SCHEMA, synchronous='NORMAL', isolation_level=None)
+
+    def enqueue(self, scope, events):
+        """
+        Append ingestion events to the queue.
+
+        Args:
+            scope: Credential scope the events must be sent with
+            events: Event envelopes (each with a unique "id")
+
+        Returns:
+            int: Number of events added (already queued ids are ignored)
+        """
+        now = time.time()
+        rows = [(scope, event['id'], json.dumps(event), now) for event in events]
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO events (scope, event_id, payload, enqueued_at) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            added = conn.total_changes - before
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+        return added
+
+    def claim(self, scope, limit, lease_seconds=OUTBOX_LEASE_SECONDS):
+        """
+        Reserve the oldest events that are due for sending.
+
+        Claimed events are leased so concurrent flushers do not send them
+        too; an unacknowledged lease simply expires and the events are retried.
+
+        Returns:
+            list: Event envelopes in enqueue order
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            rows = conn.execute(
+                "SELECT seq, payload FROM events WHERE scope = ? AND dead = 0 AND next_attempt_at <= ? "
+                "AND lease_until <= ? ORDER BY seq LIMIT ?",
+                (scope, now, now, limit)
+            ).fetchall()
+            conn.executemany("UPDATE events SET lease_until = ? WHERE seq = ?",
+                             [(now + lease_seconds, seq) for seq, _ in rows])
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+        return [json.loads(payload) for _, payload in rows]
+
+    def ack(self, scope, event_ids):
+        """Remove events Langfuse has accepted"""
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany("DELETE FROM events WHERE scope = ? AND event_id = ?",
+                             [(scope, event_id) for event_id in event_ids])
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+
+    def fail(self, scope, failures, max_attempts=OUTBOX_MAX_ATTEMPTS):
+        """
+        Record failed deliveries and schedule retries with exponential backoff.
+
+        Args:
+            scope: Credential scope of the events
+            failures: Iterable of (event_id, message, permanent) tuples; permanent
+                      failures (e.g. a 400 for a malformed event) are not retried
+            max_attempts: Attempts after which an event is kept as dead
+
+        Returns:
+            int: Number of events that became dead
+        """
+        now = time.time()
+        dead = 0
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for event_id, message, permanent in failures:
+                row = conn.execute("SELECT attempts FROM events WHERE scope = ? AND event_id = ?",
+                                   (scope, event_id)).fetchone()
+                if row is None:
+                    continue
+                attempts = row[0] + 1
+                is_dead = permanent or attempts >= max_attempts
+                dead += int(is_dead)
+                conn.execute(
+                    "UPDATE events SET attempts = ?, next_attempt_at = ?, lease_until = 0, dead = ?, last_error = ? "
+                    "WHERE scope = ? AND event_id = ?",
+                    (attempts, now + retry_delay(attempts), int(is_dead), message, scope, event_id)
+                )
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+        return dead
+
+    def release(self, scope, event_ids):
+        """Return claimed events to the queue without counting an attempt"""
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany("UPDATE events SET lease_until = 0 WHERE scope = ? AND event_id = ?",
+                             [(scope, event_id) for event_id in event_ids])
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+
+    def retry_dead(self, scope=None):
+        """Move dead events back into the queue; returns how many were revived"""
+        conn = self._connect()
+        try:
+            query = "UPDATE events SET dead = 0, attempts = 0, next_attempt_at = 0, lease_until = 0 WHERE dead = 1"
+            cursor = conn.execute(query + " AND scope = ?", (scope,)) if scope else conn.execute(query)
+            return cursor.rowcount
+        finally:
+            conn.close()
+
+    def dead_events(self, scope=None, limit=100):
+        """Dead events with their last error, oldest first"""
+        conn = self._connect()
+        try:
+            query = "SELECT event_id, attempts, last_error, payload FROM events WHERE dead = 1"
+            params = ()
+            if scope:
+                query += " AND scope = ?"
+                params = (scope,)
+            rows = conn.execute(query + " ORDER BY seq LIMIT ?", params + (limit,)).fetchall()
+        finally:
+            conn.close()
+        return [{'id': event_id, 'attempts': attempts, 'error': error, 'event': json.loads(payload)}
+                for event_id, attempts, error, payload in rows]
+
+    def purge(self, scope=None, dead_only=True):
+        """Delete dead (or all) events; returns the number removed"""
+        conn = self._connect()
+        try:
+            clauses, params = [], []
+            if dead_only:
+                clauses.append("dead = 1")
+            if scope:
+                clauses.append("scope = ?")
+                params.append(scope)
+            where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+            return conn.execute("DELETE FROM events" + where, params).rowcount
+        finally:
+            conn.close()
+
+    def stats(self, scope=None):
+        """Pending, retrying and dead event counts plus the oldest pending age"""
+        conn = self._connect()
+        try:
+            query = ("SELECT COALESCE(SUM(dead = 0), 0), COALESCE(SUM(dead = 0 AND attempts > 0), 0), "
+                     "COALESCE(SUM(dead = 1), 0), MIN(CASE WHEN dead = 0 THEN enqueued_at END) FROM events")
+            row = conn.execute(query + " WHERE scope = ?", (scope,)).fetchone() if scope \
+                else conn.execute(query).fetchone()
+        finally:
+            conn.close()
+        pending, retrying, dead, oldest = row
+        return {
+            'path': self.db_path, 'pending': pending, 'retrying': retrying, 'dead': dead,
+            'oldest_age_seconds': round(time.time() - oldest, 1) if oldest else None,
+            'bytes': _sqlite.db_size(self.db_path),
+        }
+
+
+def get_outbox():
+    """Shared Outbox for the configured location"""
+    return _sqlite.shared(Outbox, get_outbox_path())
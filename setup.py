@@ -26,6 +26,9 @@ setup(
         'markdown',
         'PyYAML',
     ],
+    extras_require={
+        'export': ['pyarrow'],
+    },
     classifiers=[
         'Programming Language :: Python :: 3',
         'License :: OSI Approved :: MIT License',
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Import-time budget for the `coaia` entry point.
+
+`coaia tash`/`coaia fetch` run from shell hooks thousands of times, so importing
+coaiapy.coaiacli must not pull in the Langfuse, templating or HTTP stacks.
+The budget can be adjusted with COAIAPY_IMPORT_BUDGET_MS on slow machines.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_BUDGET_MS = float(os.getenv('COAIAPY_IMPORT_BUDGET_MS', '150'))
+
+# Modules only needed by specific subcommands
+DEFERRED_MODULES = (
+    'requests', 'yaml', 'markdown',
+    'cofuse', 'cogh', 'coaiapy.pipeline', 'coaiapy.environment', 'coaiapy.fusehttp', 'coaiapy.outbox', 'coaiapy.mirror', 'coaiapy.export',
+)
+
+
+def _run(code, *flags):
+    return subprocess.run(
+        [sys.executable, *flags, '-c', code],
+        cwd=REPO_ROOT, capture_output=True, text=True, timeout=60,
+    )
+
+
+def _cumulative_import_us(stderr, module):
+    """Cumulative import time (microseconds) of a top-level module from -X importtime output"""
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, self_us, cumulative_us, name = [part.strip() for part in line.replace('import time:', '|', 1).split('|')]
+        if name == module:
+            return int(cumulative_us)
+    raise AssertionError(f"{module} not found in importtime output")
+
+
+def test_cli_import_defers_subcommand_modules():
+    code = (
+        "import sys, coaiapy.coaiacli\n"
+        f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    )
+    result = _run(code)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ''
+
+
+def test_cli_import_time_budget():
+    _run("import coaiapy.coaiacli")  # warm up bytecode caches
+    timings = []
+    for _ in range(3):
+        result = _run("import coaiapy.coaiacli", '-X', 'importtime')
+        assert result.returncode == 0, result.stderr
+        timings.append(_cumulative_import_us(result.stderr, 'coaiapy.coaiacli') / 1000.0)
+    best = min(timings)
+    assert best < IMPORT_BUDGET_MS, f"coaiapy.coaiacli import took {best:.1f}ms (budget {IMPORT_BUDGET_MS}ms)"
+
+
+def test_lazy_subcommand_functions_resolve():
+    code = (
+        "import sys, coaiapy.coaiacli as cli\n"
+        "print(cli.format_traces_table('[]'))\n"
+        "print('cofuse' in sys.modules)"
+    )
+    result = _run(code)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == 'True'
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
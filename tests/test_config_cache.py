@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests for the memoized, mtime-validated read_config()
+"""
+import json
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coaiapy import coaiamodule
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Isolated HOME and cwd, no stale cached config, validation on every call"""
+    home = tmp_path / 'home'
+    home.mkdir()
+    cwd = tmp_path / 'project'
+    cwd.mkdir()
+    monkeypatch.setenv('HOME', str(home))
+    monkeypatch.delenv('COAIAPY_ENV_PATH', raising=False)
+    monkeypatch.delenv('LANGFUSE_HOST', raising=False)
+    monkeypatch.chdir(cwd)
+    monkeypatch.setattr(coaiamodule, 'CONFIG_CHECK_INTERVAL', 0.0)
+    monkeypatch.setattr(coaiamodule, 'config', None)
+    yield cwd
+    coaiamodule.config = None
+
+
+def _write_config(directory, data):
+    path = directory / 'coaia.json'
+    path.write_text(json.dumps(data))
+    # Make sure the change is visible even on coarse mtime filesystems
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+
+class TestReadConfigCache:
+
+    def test_unchanged_sources_are_not_rebuilt(self, workspace):
+        _write_config(workspace, {'langfuse_base_url': 'https://a.example.com'})
+        with patch.object(coaiamodule, '_build_config', wraps=coaiamodule._build_config) as build:
+            first = coaiamodule.read_config()
+            for _ in range(20):
+                assert coaiamodule.read_config() is first
+        assert build.call_count == 1
+
+    def test_modified_file_triggers_reload(self, workspace):
+        _write_config(workspace, {'langfuse_base_url': 'https://a.example.com'})
+        assert coaiamodule.read_config()['langfuse_base_url'] == 'https://a.example.com'
+        _write_config(workspace, {'langfuse_base_url': 'https://b.example.com', 'extra': 1})
+        assert coaiamodule.read_config()['langfuse_base_url'] == 'https://b.example.com'
+
+    def test_created_file_triggers_reload(self, workspace):
+        assert 'extra' not in coaiamodule.read_config()
+        _write_config(workspace, {'extra': 'yes'})
+        assert coaiamodule.read_config()['extra'] == 'yes'
+
+    def test_env_var_change_triggers_reload(self, workspace, monkeypatch):
+        coaiamodule.read_config()
+        monkeypatch.setenv('LANGFUSE_HOST', 'https://env.example.com')
+        assert coaiamodule.read_config()['langfuse_base_url'] == 'https://env.example.com'
+
+    def test_check_interval_skips_stat(self, workspace, monkeypatch):
+        monkeypatch.setattr(coaiamodule, 'CONFIG_CHECK_INTERVAL', 3600.0)
+        coaiamodule.read_config()
+        with patch.object(coaiamodule, '_config_fingerprint') as fingerprint:
+            coaiamodule.read_config()
+        fingerprint.assert_not_called()
+
+    def test_reset_and_direct_assignment(self, workspace):
+        first = coaiamodule.read_config()
+        coaiamodule.config = None
+        assert coaiamodule.read_config() is not first
+        pinned = {'langfuse_base_url': 'https://pinned'}
+        coaiamodule.config = pinned
+        assert coaiamodule.read_config() is pinned
+
+    def test_reload_and_stats(self, workspace):
+        coaiamodule.read_config()
+        before = coaiamodule.get_config_stats()
+        coaiamodule.read_config()
+        coaiamodule.reload_config()
+        stats = coaiamodule.get_config_stats()
+        assert stats['loads'] == before['loads'] + 1
+        assert stats['hits'] >= before['hits'] + 1
+        assert stats['last_load_ms'] >= 0
+        assert str(workspace / 'coaia.json') in stats['sources']
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
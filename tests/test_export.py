@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Tests for columnar export (fuse export): flattening, writers and the pyarrow fallback
+"""
+import datetime
+import json
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coaiapy import cofuse
+from coaiapy import export
+
+OBSERVATION = {
+    'id': 'o-1', 'traceId': 't-1', 'type': 'GENERATION', 'name': 'llm', 'model': 'gpt-4', 'level': 'DEFAULT',
+    'startTime': '2026-01-01T10:00:00.000Z', 'endTime': '2026-01-01T10:00:02.500Z',
+    'usage': {'input': 10, 'output': 5, 'total': 15}, 'calculatedTotalCost': 0.002,
+    'input': {'messages': ['hi']}, 'output': 'hello', 'metadata': {'k': 'v'},
+}
+
+
+def _observations(count):
+    return [dict(OBSERVATION, id=f'o-{i}') for i in range(count)]
+
+
+class TestFlatten:
+
+    def test_observation_columns(self):
+        row = export.flatten_record('observations', OBSERVATION)
+        assert row['latency'] == 2.5
+        assert (row['input_tokens'], row['output_tokens'], row['total_tokens']) == (10, 5, 15)
+        assert row['total_cost'] == 0.002
+        assert row['model'] == 'gpt-4'
+        assert 'input' not in row
+        assert [name for name, _ in export.export_columns('observations')] == list(row)
+
+    def test_usage_details_and_legacy_token_fields(self):
+        row = export.flatten_record('observations', {'id': 'x', 'usageDetails': {'input': 7},
+                                                     'promptTokens': 1, 'completionTokens': 2})
+        assert (row['input_tokens'], row['output_tokens']) == (7, 2)
+
+    def test_payloads_optional(self):
+        row = export.flatten_record('traces', {'id': 't', 'input': 'q', 'output': 'a', 'tags': ['x'],
+                                               'observations': ['o-1', 'o-2']}, include_payloads=True)
+        assert (row['input'], row['output'], row['tags'], row['observation_count']) == ('q', 'a', ['x'], 2)
+
+    def test_score_boolean_value(self):
+        assert export.flatten_record('scores', {'id': 's', 'value': True})['value'] == 1.0
+
+    @pytest.mark.parametrize('value,expected', [
+        ('2026-01-01T10:00:00Z', datetime.datetime(2026, 1, 1, 10)),
+        ('2026-01-01T10:00:00.123Z', datetime.datetime(2026, 1, 1, 10, 0, 0, 123000)),
+        ('2026-01-01T12:00:00+02:00', datetime.datetime(2026, 1, 1, 10)),
+        ('not a date', None),
+        (None, None),
+    ])
+    def test_parse_timestamp(self, value, expected):
+        assert export.parse_timestamp(value) == expected
+
+    def test_detect_format(self):
+        assert export.detect_export_format('out.parquet') == 'parquet'
+        assert export.detect_export_format('out.feather') == 'arrow'
+        assert export.detect_export_format('-') == 'jsonl'
+        assert export.detect_export_format('out.parquet', 'jsonl') == 'jsonl'
+
+
+class RecordingWriter(export.JsonlExportWriter):
+    """JSONL writer that records the size of each write"""
+
+    writes = []
+
+    def write_rows(self, rows):
+        RecordingWriter.writes.append(len(rows))
+        super().write_rows(rows)
+
+
+def _export(records, path, **kwargs):
+    with patch.object(cofuse, '_iter_entity_records', return_value=iter(records)) as mock_source:
+        result = cofuse.export_records('observations', str(path), **kwargs)
+    return result, mock_source
+
+
+class TestExportRecords:
+
+    def test_jsonl_written_in_row_groups(self, tmp_path):
+        RecordingWriter.writes = []
+        path = tmp_path / 'obs.jsonl'
+        with patch.object(cofuse, 'open_export_writer',
+                          side_effect=lambda p, e, f, i: (RecordingWriter(p, export.export_columns(e, i)), None)):
+            result, _ = _export(_observations(25), path, row_group_size=10)
+        assert RecordingWriter.writes == [10, 10, 5]
+        assert (result['rows'], result['row_groups']) == (25, 3)
+        lines = path.read_text().splitlines()
+        assert json.loads(lines[0])['start_time'] == '2026-01-01T10:00:00.000Z'
+
+    def test_limit_and_filters(self, tmp_path):
+        result, mock_source = _export(_observations(30), tmp_path / 'obs.jsonl', limit=12,
+                                      observation_type='GENERATION', from_timestamp='2026-01-01')
+        assert result['rows'] == 12
+        assert mock_source.call_args.kwargs['observation_type'] == 'GENERATION'
+        assert mock_source.call_args.kwargs['from_timestamp'] == '2026-01-01'
+
+    def test_falls_back_to_jsonl_without_pyarrow(self, tmp_path):
+        with patch.object(export, 'pyarrow_available', return_value=False):
+            result, _ = _export(_observations(3), tmp_path / 'obs.parquet')
+        assert result['format'] == 'jsonl'
+        assert result['path'] == str(tmp_path / 'obs.jsonl')
+        assert 'pyarrow' in result['warning']
+        assert len((tmp_path / 'obs.jsonl').read_text().splitlines()) == 3
+
+    @pytest.mark.parametrize('suffix', ['.parquet', '.arrow'])
+    def test_columnar_output_is_typed(self, tmp_path, suffix):
+        pa = pytest.importorskip('pyarrow')
+        path = tmp_path / f'obs{suffix}'
+        result, _ = _export(_observations(7), path, row_group_size=3, include_payloads=True)
+        if suffix == '.parquet':
+            import pyarrow.parquet as pq
+            table = pq.read_table(str(path))
+            assert pq.ParquetFile(str(path)).num_row_groups == 3
+        else:
+            table = pa.ipc.open_file(str(path)).read_all()
+        assert table.num_rows == 7
+        assert table.schema.field('start_time').type == pa.timestamp('us', tz='UTC')
+        assert table.schema.field('total_tokens').type == pa.int64()
+        assert json.loads(table.column('input')[0].as_py()) == {'messages': ['hi']}
+
+
+class TestExportCommand:
+
+    def test_export_command(self, capsys):
+        from coaiapy import coaiacli
+        result = {'entity': 'scores', 'path': 'scores.parquet', 'format': 'parquet', 'rows': 4,
+                  'row_groups': 1, 'warning': None}
+        argv = ['coaia', 'fuse', 'export', 'scores', '-o', 'scores.parquet', '--name', 'quality']
+        with patch.object(coaiacli, 'export_records', return_value=result) as mock_export, \
+                patch.object(sys, 'argv', argv):
+            coaiacli.main()
+        assert mock_export.call_args.args == ('scores', 'scores.parquet')
+        assert mock_export.call_args.kwargs['name'] == 'quality'
+        assert 'Exported 4 scores to scores.parquet' in capsys.readouterr().out
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming fine-tuning dataset export
+"""
+import io
+import json
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coaiapy import cofuse
+
+
+def _items(count, start=0):
+    return [{'id': f'item-{i}', 'input': f'q{i}', 'expectedOutput': f'a{i}'} for i in range(start, start + count)]
+
+
+def _lines(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def _answers(records):
+    return [r['messages'][2]['content'] for r in records]
+
+
+class TestExportFinetuningDataset:
+
+    def test_matches_batch_formatter(self):
+        items = _items(3) + [{'id': 'empty', 'input': 'q'}]
+        for fmt in ('openai', 'gemini'):
+            out = io.StringIO()
+            counts = cofuse.export_finetuning_dataset('ds', fmt, 'sys', output=out, items=iter(items))
+            assert out.getvalue() == cofuse.format_dataset_for_finetuning(json.dumps(items), fmt, 'sys') + '\n'
+            assert counts == {'train': 3, 'validation': 0, 'skipped': 1}
+
+    def test_pages_items_lazily(self):
+        pulled = []
+
+        def items():
+            for item in _items(5):
+                pulled.append(item['id'])
+                yield item
+
+        class Watching(io.StringIO):
+            def write(self, text):
+                # Each record is written before the next item is fetched
+                assert len(pulled) == len(self.getvalue().splitlines()) + 1
+                return super().write(text)
+
+        cofuse.export_finetuning_dataset('ds', output=Watching(), items=items())
+
+    def test_fetches_dataset_strictly_when_no_items_given(self):
+        with patch.object(cofuse, 'iter_dataset_items', return_value=iter(_items(2))) as mock_iter:
+            out = io.StringIO()
+            cofuse.export_finetuning_dataset('my-ds', output=out)
+        mock_iter.assert_called_once_with('my-ds', strict=True)
+        assert len(_lines(out)) == 2
+
+    def test_validation_reservoir_has_exact_size_and_disjoint_split(self):
+        train, validation = io.StringIO(), io.StringIO()
+        counts = cofuse.export_finetuning_dataset('ds', output=train, validation_output=validation,
+                                                  validation_size=10, seed=7, items=iter(_items(200)))
+        assert counts == {'train': 190, 'validation': 10, 'skipped': 0}
+        train_answers, val_answers = _answers(_lines(train)), _answers(_lines(validation))
+        assert len(val_answers) == 10
+        assert not set(train_answers) & set(val_answers)
+        assert set(train_answers) | set(val_answers) == {f'a{i}' for i in range(200)}
+        # The sample is not just the first items
+        assert set(val_answers) != {f'a{i}' for i in range(10)}
+
+    def test_validation_ratio_is_stable_per_item(self):
+        def split(items):
+            train, validation = io.StringIO(), io.StringIO()
+            cofuse.export_finetuning_dataset('ds', output=train, validation_output=validation,
+                                             validation_ratio=0.2, items=iter(items))
+            return set(_answers(_lines(validation)))
+
+        first = split(_items(500))
+        assert 50 < len(first) < 150
+        # Adding items does not move existing ones between splits
+        assert split(_items(600)) & {f'a{i}' for i in range(500)} == first
+
+    def test_shuffle_buffer_is_seeded_and_complete(self):
+        def run(seed):
+            out = io.StringIO()
+            cofuse.export_finetuning_dataset('ds', output=out, shuffle_buffer=16, seed=seed, items=iter(_items(100)))
+            return _answers(_lines(out))
+
+        first = run(1)
+        assert first == run(1)
+        assert first != [f'a{i}' for i in range(100)]
+        assert sorted(first) == sorted(f'a{i}' for i in range(100))
+
+    def test_writes_files(self, tmp_path):
+        train, validation = tmp_path / 'train.jsonl', tmp_path / 'val.jsonl'
+        cofuse.export_finetuning_dataset('ds', 'gemini', output=str(train), validation_output=str(validation),
+                                         validation_size=2, items=iter(_items(5)))
+        assert len(train.read_text().splitlines()) == 3
+        assert 'contents' in json.loads(validation.read_text().splitlines()[0])
+
+    @pytest.mark.parametrize('kwargs', [
+        {'format_type': 'csv'},
+        {'validation_size': 5},
+        {'validation_size': 5, 'validation_ratio': 0.1, 'validation_output': io.StringIO()},
+        {'validation_ratio': 1.5, 'validation_output': io.StringIO()},
+    ])
+    def test_invalid_arguments(self, kwargs):
+        with pytest.raises(ValueError):
+            cofuse.export_finetuning_dataset('ds', output=io.StringIO(), items=iter([]), **kwargs)
+
+
+class TestDatasetExportCommand:
+
+    def test_export_action(self, capsys):
+        from coaiapy import coaiacli
+        argv = ['coaia', 'fuse', 'datasets', 'export', 'evals', '-gft', '-o', 'train.jsonl',
+                '--validation-output', 'val.jsonl', '--validation-size', '100', '--seed', '3']
+        counts = {'train': 900, 'validation': 100, 'skipped': 2}
+        with patch.object(coaiacli, 'export_finetuning_dataset', return_value=counts) as mock_export, \
+                patch.object(sys, 'argv', argv):
+            coaiacli.main()
+        assert mock_export.call_args.args == ('evals', 'gemini', 'You are a helpful assistant')
+        assert mock_export.call_args.kwargs['validation_size'] == 100
+        assert 'Exported 900 training and 100 validation records' in capsys.readouterr().err
+
+    def test_get_openai_ft_streams(self):
+        from coaiapy import coaiacli
+        argv = ['coaia', 'fuse', 'datasets', 'get', 'evals', '-oft']
+        with patch.object(coaiacli, 'export_finetuning_dataset') as mock_export, \
+                patch.object(coaiacli, 'list_dataset_items') as mock_list, \
+                patch.object(sys, 'argv', argv):
+            coaiacli.main()
+        mock_export.assert_called_once_with('evals', 'openai', 'You are a helpful assistant')
+        mock_list.assert_not_called()
+
+
+    def test_get_ft_reports_api_errors(self, capsys):
+        from coaiapy import coaiacli
+        argv = ['coaia', 'fuse', 'datasets', 'get', 'missing', '-gft']
+        error = Exception("Failed to fetch dataset items page 1: Request failed with status 404")
+        with patch.object(coaiacli, 'export_finetuning_dataset', side_effect=error), \
+                patch.object(sys, 'argv', argv), \
+                pytest.raises(SystemExit) as exit_info:
+            coaiacli.main()
+        assert exit_info.value.code == 1
+        assert 'status 404' in capsys.readouterr().err
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
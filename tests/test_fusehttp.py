@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared Langfuse HTTP session layer (coaiapy.fusehttp)
+"""
+import os
+import sys
+import threading
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coaiapy import fusehttp
+
+
+def _config(public_key='pk-test', secret_key='sk-test', **http):
+    return {
+        'langfuse_base_url': 'https://langfuse.example.com',
+        'langfuse_public_key': public_key,
+        'langfuse_secret_key': secret_key,
+        'langfuse_http': http,
+    }
+
+
+class TestFuseSession:
+
+    def setup_method(self):
+        fusehttp.reset_sessions()
+
+    def teardown_method(self):
+        fusehttp.reset_sessions()
+
+    def test_session_is_reused(self):
+        config = _config()
+        first = fusehttp.get_fuse_session(config)
+        second = fusehttp.get_fuse_session(config)
+        assert first is second
+
+    def test_session_carries_basic_auth(self):
+        session = fusehttp.get_fuse_session(_config())
+        assert session.auth.username == 'pk-test'
+        assert session.auth.password == 'sk-test'
+
+    def test_credential_change_rebuilds_session(self):
+        first = fusehttp.get_fuse_session(_config())
+        second = fusehttp.get_fuse_session(_config(public_key='pk-other'))
+        assert first is not second
+        assert second.auth.username == 'pk-other'
+
+    def test_pool_and_retry_settings_applied(self):
+        session = fusehttp.get_fuse_session(_config(pool_maxsize=7, max_retries=5, backoff_factor=0.1))
+        adapter = session.get_adapter('https://langfuse.example.com')
+        assert adapter._pool_maxsize == 7
+        assert adapter.max_retries.total == 5
+        assert 429 in adapter.max_retries.status_forcelist
+        assert 503 in adapter.max_retries.status_forcelist
+
+    def test_post_not_resent_after_timeout_or_5xx(self):
+        session = fusehttp.get_fuse_session(_config())
+        retry = session.get_adapter('https://langfuse.example.com/api/public/scores').max_retries
+        assert not retry.is_retry('POST', 503)
+        assert retry.is_retry('GET', 503)
+        assert not retry._is_method_retryable('POST')
+        assert retry.connect == 3
+
+    def test_ingestion_posts_are_retried(self):
+        session = fusehttp.get_fuse_session(_config())
+        retry = session.get_adapter('https://langfuse.example.com/api/public/ingestion').max_retries
+        assert retry.is_retry('POST', 503)
+        assert retry._is_method_retryable('POST')
+
+    def test_default_timeout_applied(self):
+        session = fusehttp.get_fuse_session(_config(timeout=12))
+        with patch('requests.Session.request') as mock_request:
+            session.get('https://langfuse.example.com/api/public/projects')
+        assert mock_request.call_args.kwargs['timeout'] == 12
+
+    def test_storage_session_has_no_auth(self):
+        fuse = fusehttp.get_fuse_session(_config())
+        storage = fusehttp.get_storage_session(_config())
+        assert storage is not fuse
+        assert storage.auth is None
+
+    def test_concurrent_access_builds_single_session(self):
+        config = _config()
+        sessions = []
+
+        def grab():
+            sessions.append(fusehttp.get_fuse_session(config))
+
+        threads = [threading.Thread(target=grab) for _ in range(16)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len({id(s) for s in sessions}) == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
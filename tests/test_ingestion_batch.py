@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Tests for batched Langfuse ingestion (build_*_event, chunk_ingestion_events, ingest_events)
+"""
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coaiapy import cofuse
+
+CONFIG = {
+    'langfuse_base_url': 'https://langfuse.example.com',
+    'langfuse_public_key': 'pk-test',
+    'langfuse_secret_key': 'sk-test',
+}
+
+
+def _response(status_code, payload):
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = payload
+    response.text = str(payload)
+    return response
+
+
+class TestEventBuilders:
+
+    def test_trace_event_envelope(self):
+        event = cofuse.build_trace_event('trace-1', name='Pipeline: demo', session_id='s-1')
+        assert event['id'] == 'trace-1-event'
+        assert event['type'] == 'trace-create'
+        assert event['body']['id'] == 'trace-1'
+        assert event['body']['sessionId'] == 's-1'
+        assert 'userId' not in event['body']
+
+    def test_observation_event_envelope(self):
+        event = cofuse.build_observation_event(
+            'obs-2', 'trace-1', observation_type='SPAN', name='step',
+            parent_observation_id='obs-1'
+        )
+        assert event['id'] == 'obs-2-event'
+        assert event['type'] == 'observation-create'
+        assert event['body']['traceId'] == 'trace-1'
+        assert event['body']['parentObservationId'] == 'obs-1'
+        assert event['body']['level'] == 'DEFAULT'
+
+
+class TestChunking:
+
+    def test_small_events_fit_one_batch(self):
+        events = [cofuse.build_observation_event(f'obs-{i}', 't') for i in range(50)]
+        batches = list(cofuse.chunk_ingestion_events(events))
+        assert len(batches) == 1
+        assert batches[0] == events
+
+    def test_batches_respect_size_limit_and_order(self):
+        events = [cofuse.build_observation_event(f'obs-{i}', 't', input_data='x' * 400) for i in range(20)]
+        batches = list(cofuse.chunk_ingestion_events(events, max_batch_bytes=2000))
+        assert len(batches) > 1
+        assert [e for b in batches for e in b] == events
+        for batch in batches:
+            assert len(cofuse.json.dumps({"batch": batch})) <= 2000
+
+    def test_batches_respect_event_count(self):
+        events = [cofuse.build_observation_event(f'obs-{i}', 't') for i in range(25)]
+        batches = list(cofuse.chunk_ingestion_events(events, max_batch_events=10))
+        assert [len(b) for b in batches] == [10, 10, 5]
+
+
+class TestIngestEvents:
+
+    def test_single_post_for_pipeline_sized_batch(self):
+        events = [cofuse.build_trace_event('t')] + [
+            cofuse.build_observation_event(f'obs-{i}', 't') for i in range(10)
+        ]
+        session = MagicMock()
+        session.post.return_value = _response(207, {
+            'successes': [{'id': e['id'], 'status': 201} for e in events],
+            'errors': [],
+        })
+        with patch.object(cofuse, 'read_config', return_value=CONFIG), \
+                patch.object(cofuse, 'get_fuse_session', return_value=session):
+            result = cofuse.ingest_events(events)
+        assert session.post.call_count == 1
+        assert session.post.call_args.kwargs['json'] == {'batch': events}
+        assert result['batches'] == 1
+        assert len(result['successes']) == 11
+        assert result['errors'] == []
+
+    def test_partial_failures_are_merged(self):
+        events = [cofuse.build_observation_event(f'obs-{i}', 't', input_data='x' * 400) for i in range(6)]
+        responses = [
+            _response(207, {'successes': [{'id': 'obs-0-event', 'status': 201}],
+                            'errors': [{'id': 'obs-1-event', 'status': 400, 'message': 'bad'}]}),
+            _response(500, None),
+        ]
+        session = MagicMock()
+        session.post.side_effect = responses + [_response(207, {'successes': [], 'errors': []})] * 4
+        with patch.object(cofuse, 'read_config', return_value=CONFIG), \
+                patch.object(cofuse, 'get_fuse_session', return_value=session):
+            result = cofuse.ingest_events(events, max_batch_bytes=1200, max_workers=1)
+        assert result['batches'] == session.post.call_count
+        error_ids = [e['id'] for e in result['errors']]
+        assert 'obs-1-event' in error_ids
+        # Every event of the chunk that got a 500 is reported as failed
+        second_chunk = session.post.call_args_list[1].kwargs['json']['batch']
+        for event in second_chunk:
+            assert event['id'] in error_ids
+
+    def test_chunks_dispatched_concurrently_in_order(self):
+        events = [cofuse.build_observation_event(f'obs-{i}', 't') for i in range(40)]
+
+        def post(url, json):
+            return _response(207, {
+                'successes': [{'id': e['id'], 'status': 201} for e in json['batch']],
+                'errors': [],
+            })
+
+        session = MagicMock()
+        session.post.side_effect = post
+        with patch.object(cofuse, 'read_config', return_value=CONFIG), \
+                patch.object(cofuse, 'get_fuse_session', return_value=session):
+            result = cofuse.ingest_events(events, max_batch_events=10, max_workers=4)
+        assert result['batches'] == 4
+        assert [s['id'] for s in result['successes']] == [e['id'] for e in events]
+
+    def test_chunk_sent_once_and_reported_failed_on_connection_error(self):
+        # Retries live in the shared session; the chunk itself is not resent
+        events = [cofuse.build_observation_event('obs-1', 't')]
+        session = MagicMock()
+        session.post.side_effect = ConnectionError('reset')
+        with patch.object(cofuse, 'read_config', return_value=CONFIG), \
+                patch.object(cofuse, 'get_fuse_session', return_value=session):
+            result = cofuse.ingest_events(events)
+        assert session.post.call_count == 1
+        assert result['errors'][0]['id'] == 'obs-1-event'
+
+
+class TestAddObservationsBatch:
+
+    def test_large_import_is_split_and_aggregated(self):
+        observations = [{'id': f'obs-{i}', 'name': f'step {i}'} for i in range(12)]
+        session = MagicMock()
+        session.post.return_value = _response(207, {'successes': [], 'errors': []})
+        with patch.object(cofuse, 'read_config', return_value=CONFIG), \
+                patch.object(cofuse, 'get_fuse_session', return_value=session):
+            result = cofuse.json.loads(cofuse.add_observations_batch(
+                'trace-1', cofuse.json.dumps(observations), max_batch_events=5, max_workers=2
+            ))
+        assert session.post.call_count == 3
+        assert result['batches'] == 3
+        sent = [e['body']['id'] for call in session.post.call_args_list for e in call.kwargs['json']['batch']]
+        assert sorted(sent) == sorted(o['id'] for o in observations)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
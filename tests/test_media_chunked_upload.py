@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Tests for streamed and parallel-part uploads in upload_media_to_url(), against a
+local HTTP stand-in for presigned storage (single PUT plus Azure-style Put Block / Put Block List)
+"""
+import os
+import re
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coaiapy import cofuse
+
+
+class StorageStandIn:
+    """Minimal presigned-storage server keeping blobs and uncommitted blocks in memory"""
+
+    def __init__(self, fail_block_once=None, server_error_once=False):
+        self.blobs = {}
+        self.blocks = {}
+        self.requests = []
+        self.fail_block_once = fail_block_once
+        self.server_error_once = server_error_once
+        self._lock = threading.Lock()
+        store = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_PUT(self):
+                parsed = urlparse(self.path)
+                query = parse_qs(parsed.query)
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                status = store.handle(parsed.path, query, body)
+                self.send_response(status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def handle(self, path, query, body):
+        comp = query.get('comp', [None])[0]
+        with self._lock:
+            self.requests.append((comp, len(body)))
+            if self.server_error_once:
+                self.server_error_once = False
+                return 503
+            if comp == 'block':
+                block_id = query['blockid'][0]
+                if block_id == self.fail_block_once:
+                    self.fail_block_once = None
+                    return 409
+                self.blocks[(path, block_id)] = body
+                return 201
+            if comp == 'blocklist':
+                ids = re.findall(r'<Latest>([^<]+)</Latest>', body.decode('utf-8'))
+                self.blobs[path] = b''.join(self.blocks.pop((path, i)) for i in ids)
+                return 201
+            self.blobs[path] = body
+            return 201
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/container/blob.mp4?sig=abc"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def trust_local_storage():
+    with patch.object(cofuse, '_is_trusted_storage_domain', return_value=True), \
+            patch.object(cofuse.time, 'sleep'):
+        yield
+
+
+@pytest.fixture
+def video(tmp_path):
+    data = os.urandom(1024 * 1024 + 123)
+    path = tmp_path / 'clip.mp4'
+    path.write_bytes(data)
+    return path, data
+
+
+class TestUploadMediaToUrl:
+
+    def test_single_put_streams_whole_file(self, video):
+        path, data = video
+        seen = []
+        with StorageStandIn() as storage:
+            result = cofuse.upload_media_to_url(storage.url, str(path), 'video/mp4', progress=lambda s, t: seen.append((s, t)))
+        assert result['success'] and result['parts'] == 1
+        assert storage.blobs['/container/blob.mp4'] == data
+        assert seen[-1] == (len(data), len(data))
+
+    def test_single_put_rewinds_on_transport_retry(self, video):
+        path, data = video
+        with StorageStandIn(server_error_once=True) as storage:
+            result = cofuse.upload_media_to_url(storage.url, str(path), 'video/mp4')
+        assert result['success']
+        assert storage.blobs['/container/blob.mp4'] == data
+
+    def test_parallel_parts_are_committed_in_order(self, video):
+        path, data = video
+        seen = []
+        with StorageStandIn() as storage:
+            result = cofuse.upload_media_to_url(storage.url, str(path), 'video/mp4', chunked=True,
+                                                part_size=256 * 1024, max_workers=3,
+                                                progress=lambda s, t: seen.append(s))
+        assert result['success']
+        assert result['parts'] == 5
+        assert storage.blobs['/container/blob.mp4'] == data
+        assert [comp for comp, _ in storage.requests].count('block') == 5
+        assert storage.requests[-1][0] == 'blocklist'
+        assert max(seen) == len(data)
+
+    def test_failed_part_is_retried_alone(self, video):
+        import base64
+        path, data = video
+        second_block = base64.b64encode(b'00000001').decode('ascii')
+        with StorageStandIn(fail_block_once=second_block) as storage:
+            result = cofuse.upload_media_to_url(storage.url, str(path), 'video/mp4', chunked=True,
+                                                part_size=512 * 1024, max_workers=1)
+        assert result['success']
+        assert storage.blobs['/container/blob.mp4'] == data
+        assert [comp for comp, _ in storage.requests] == ['block', 'block', 'block', 'block', 'blocklist']
+
+    def test_part_failure_exhausting_retries_fails_upload(self, video):
+        path, _ = video
+        with StorageStandIn() as storage, \
+                patch.object(storage, 'handle', return_value=409):
+            result = cofuse.upload_media_to_url(storage.url, str(path), 'video/mp4', chunked=True,
+                                                part_size=512 * 1024, part_retries=1)
+        assert not result['success']
+        assert 'Part upload failed' in result['message']
+
+    def test_small_files_and_s3_urls_use_single_put(self):
+        assert not cofuse._is_block_blob_url('https://bucket.s3.amazonaws.com/key?X-Amz-Signature=1')
+        assert cofuse._is_block_blob_url('https://acct.blob.core.windows.net/media/key?sig=1')
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Tests for large-buffer/mmap media hashing, the hash cache and streaming uploads
+"""
+import base64
+import hashlib
+import io
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coaiapy import cofuse
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    cofuse.clear_media_hash_cache()
+    yield
+    cofuse.clear_media_hash_cache()
+
+
+def _expected(data):
+    return base64.b64encode(hashlib.sha256(data).digest()).decode('utf-8')
+
+
+class TestCalculateSha256:
+
+    @pytest.mark.parametrize('threshold', [1, 10 ** 9])
+    def test_mmap_and_buffered_paths_agree(self, tmp_path, monkeypatch, threshold):
+        data = os.urandom(3 * 1024 * 1024 + 17)
+        path = tmp_path / 'clip.mp4'
+        path.write_bytes(data)
+        monkeypatch.setattr(cofuse, 'MEDIA_HASH_MMAP_THRESHOLD', threshold)
+        assert cofuse.calculate_sha256(str(path), use_cache=False) == _expected(data)
+
+    def test_empty_file(self, tmp_path, monkeypatch):
+        path = tmp_path / 'empty.bin'
+        path.write_bytes(b'')
+        monkeypatch.setattr(cofuse, 'MEDIA_HASH_MMAP_THRESHOLD', 0)
+        assert cofuse.calculate_sha256(str(path)) == _expected(b'')
+
+    def test_unchanged_file_is_not_rehashed(self, tmp_path):
+        path = tmp_path / 'a.png'
+        path.write_bytes(b'png')
+        with patch.object(cofuse, '_sha256_file', wraps=cofuse._sha256_file) as sha:
+            first = cofuse.calculate_sha256(str(path))
+            second = cofuse.calculate_sha256(str(path))
+        assert first == second == _expected(b'png')
+        assert sha.call_count == 1
+
+    def test_modified_file_is_rehashed(self, tmp_path):
+        path = tmp_path / 'a.png'
+        path.write_bytes(b'one')
+        cofuse.calculate_sha256(str(path))
+        path.write_bytes(b'two!')
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+        assert cofuse.calculate_sha256(str(path)) == _expected(b'two!')
+
+    def test_missing_file_raises(self, tmp_path):
+        with pytest.raises(Exception, match='Failed to calculate SHA-256'):
+            cofuse.calculate_sha256(str(tmp_path / 'missing'))
+
+    def test_hash_files_populates_cache(self, tmp_path):
+        paths = []
+        for i in range(3):
+            path = tmp_path / f'{i}.png'
+            path.write_bytes(b'x' * i)
+            paths.append(str(path))
+        cofuse._hash_files(paths, hash_workers=1)
+        with patch.object(cofuse, '_sha256_file') as sha:
+            assert cofuse.calculate_sha256(paths[2]) == _expected(b'xx')
+        sha.assert_not_called()
+
+
+class TestStreamingUpload:
+
+    URL = 'https://bucket.s3.amazonaws.com/upload'
+
+    def _put(self, path):
+        session = MagicMock()
+        seen = {}
+
+        def put(url, data=None, headers=None):
+            seen['is_stream'] = hasattr(data, 'read')
+            seen['body'] = data.read() if hasattr(data, 'read') else data
+            seen['headers'] = headers
+            return MagicMock(status_code=200, text='')
+
+        session.put.side_effect = put
+        with patch.object(cofuse, 'get_storage_session', return_value=session):
+            result = cofuse.upload_media_to_url(self.URL, str(path), 'video/mp4', 'abc=')
+        return result, seen
+
+    def test_file_is_streamed_not_loaded(self, tmp_path):
+        path = tmp_path / 'clip.mp4'
+        path.write_bytes(b'video-bytes')
+        result, seen = self._put(path)
+        assert result['success']
+        assert seen['is_stream']
+        assert seen['body'] == b'video-bytes'
+        assert seen['headers']['Content-Length'] == '11'
+        assert seen['headers']['x-amz-checksum-sha256'] == 'abc='
+
+    def test_empty_file_sent_with_explicit_length(self, tmp_path):
+        path = tmp_path / 'empty.mp4'
+        path.write_bytes(b'')
+        result, seen = self._put(path)
+        assert result['success']
+        assert seen['body'] == b''
+        assert seen['headers']['Content-Length'] == '0'
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Tests for the local media index and its use by upload_and_attach_media()
+"""
+import json
+import os
+import shutil
+import sys
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coaiapy import cofuse
+from coaiapy.mediaindex import MediaIndex
+
+CONFIG = {
+    'langfuse_base_url': 'https://langfuse.example.com',
+    'langfuse_public_key': 'pk-test',
+    'langfuse_secret_key': 'sk-test',
+}
+
+
+@pytest.fixture
+def index(tmp_path):
+    return MediaIndex(str(tmp_path / 'index' / 'index.sqlite3'))
+
+
+@pytest.fixture
+def image(tmp_path):
+    path = tmp_path / 'photo.png'
+    path.write_bytes(b'png-data')
+    return path
+
+
+class TestMediaIndex:
+
+    def test_lookup_requires_unchanged_fingerprint(self, index, image):
+        index.record('scope', str(image), 'sha', 'media-1', 'image/png')
+        assert index.lookup('scope', str(image))['media_id'] == 'media-1'
+        assert index.lookup('other-scope', str(image)) is None
+        image.write_bytes(b'different size')
+        assert index.lookup('scope', str(image)) is None
+
+    def test_find_by_hash(self, index, image):
+        index.record('scope', str(image), 'sha', 'media-1', 'image/png')
+        assert index.find_by_hash('scope', 'sha', 'image/png')['path'] == str(image)
+        assert index.find_by_hash('scope', 'sha', 'image/jpeg') is None
+
+    def test_prune_and_compact(self, index, tmp_path, image):
+        gone = tmp_path / 'gone.png'
+        gone.write_bytes(b'x')
+        index.record('scope', str(image), 'sha1', 'media-1', 'image/png')
+        index.record('scope', str(gone), 'sha2', 'media-2', 'image/png')
+        gone.unlink()
+        assert index.prune() == 1
+        assert index.stats()['entries'] == 1
+        assert index.prune(older_than_days=-1) == 1
+        assert index.compact()['entries'] == 0
+
+
+class TestUploadUsesIndex:
+
+    @pytest.fixture(autouse=True)
+    def environment(self, tmp_path, monkeypatch):
+        monkeypatch.setenv('COAIAPY_MEDIA_INDEX_DIR', str(tmp_path / 'media-index'))
+        cofuse.clear_media_hash_cache()
+        with patch.object(cofuse, 'read_config', return_value=CONFIG), \
+                patch.object(cofuse, 'get_media_upload_url',
+                             return_value=json.dumps({'mediaId': 'media-1', 'uploadUrl': 'https://b.s3.amazonaws.com/x'})) as get_url, \
+                patch.object(cofuse, 'upload_media_to_url',
+                             return_value={'success': True, 'status_code': 200, 'upload_time_ms': 5}) as upload, \
+                patch.object(cofuse, 'patch_media_upload_status', return_value=json.dumps({'id': 'media-1'})), \
+                patch.object(cofuse, 'attach_media_token_to_trace', return_value={'success': True}) as attach:
+            self.get_url, self.upload, self.attach = get_url, upload, attach
+            yield
+
+    def test_reattach_is_local_lookup_plus_attach(self, image):
+        first = cofuse.upload_and_attach_media(str(image), 'trace-1')
+        assert first['success']
+        with patch.object(cofuse, 'calculate_sha256') as sha:
+            second = cofuse.upload_and_attach_media(str(image), 'trace-2')
+        assert second['success']
+        assert second['media_id'] == 'media-1'
+        sha.assert_not_called()
+        assert self.get_url.call_count == 1
+        assert self.upload.call_count == 1
+        assert [c.kwargs['trace_id'] for c in self.attach.call_args_list] == ['trace-1', 'trace-2']
+
+    def test_copied_file_reuses_media_by_hash(self, image, tmp_path):
+        cofuse.upload_and_attach_media(str(image), 'trace-1')
+        copy = tmp_path / 'copy.png'
+        shutil.copy(str(image), str(copy))
+        result = cofuse.upload_and_attach_media(str(copy), 'trace-2')
+        assert result['media_id'] == 'media-1'
+        assert self.get_url.call_count == 1
+
+    def test_no_index_always_asks_langfuse(self, image):
+        cofuse.upload_and_attach_media(str(image), 'trace-1', use_index=False)
+        cofuse.upload_and_attach_media(str(image), 'trace-2', use_index=False)
+        assert self.get_url.call_count == 2
+
+    def test_failed_storage_upload_is_not_indexed(self, image):
+        self.upload.return_value = {'success': False, 'status_code': 500, 'message': 'boom', 'upload_time_ms': 1}
+        cofuse.upload_and_attach_media(str(image), 'trace-1')
+        self.upload.return_value = {'success': True, 'status_code': 200, 'upload_time_ms': 1}
+        cofuse.upload_and_attach_media(str(image), 'trace-2')
+        assert self.get_url.call_count == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
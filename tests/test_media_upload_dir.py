@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Tests for the concurrent, resumable directory upload engine (upload_media_directory)
+"""
+import json
+import os
+import sys
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coaiapy import cofuse
+
+
+class FakeMediaApi:
+    """Stands in for the Langfuse media endpoints and the storage PUT"""
+
+    def __init__(self, known_hashes=(), fail_names=(), delay=0.0):
+        self.known_hashes = set(known_hashes)
+        self.fail_names = set(fail_names)
+        self.delay = delay
+        self.url_requests = []
+        self.puts = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def get_media_upload_url(self, trace_id, content_type, content_length, sha256_hash, field="input", observation_id=None):
+        media_id = f"media-{len(self.url_requests)}-{sha256_hash[:6]}"
+        with self._lock:
+            self.url_requests.append(sha256_hash)
+        upload_url = None if sha256_hash in self.known_hashes else f"https://bucket.s3.amazonaws.com/{media_id}"
+        return json.dumps({"mediaId": media_id, "uploadUrl": upload_url})
+
+    def upload_media_to_url(self, upload_url, file_path, content_type, sha256_hash=None):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            with self._lock:
+                self.puts.append(os.path.basename(file_path))
+            if os.path.basename(file_path) in self.fail_names:
+                return {"success": False, "status_code": 500, "message": "Upload failed: boom", "upload_time_ms": 1}
+            return {"success": True, "status_code": 200, "message": "Upload successful", "upload_time_ms": 1}
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def patch_media_upload_status(self, media_id, status_code, upload_time_ms, error=None):
+        return json.dumps({"id": media_id})
+
+    def patches(self, ingest_errors=()):
+        def ingest(events, **kwargs):
+            self.ingested = events
+            errors = [{"id": e["id"], "message": "bad"} for e in events if e["body"]["name"] in ingest_errors]
+            return {"successes": [], "errors": errors, "batches": 1}
+        return patch.multiple(
+            cofuse,
+            get_media_upload_url=self.get_media_upload_url,
+            upload_media_to_url=self.upload_media_to_url,
+            patch_media_upload_status=self.patch_media_upload_status,
+            ingest_events=ingest,
+        )
+
+
+@pytest.fixture
+def media_dir(tmp_path):
+    for i in range(6):
+        (tmp_path / f"img{i}.png").write_bytes(b"png-bytes-%d" % i)
+    (tmp_path / "notes.txt").write_text("not matched")
+    return tmp_path
+
+
+class TestUploadMediaDirectory:
+
+    def test_uploads_concurrently_and_attaches_each_file(self, media_dir):
+        api = FakeMediaApi(delay=0.05)
+        with api.patches():
+            result = cofuse.upload_media_directory(str(media_dir), "trace-1", pattern="*.png",
+                                                   max_workers=3, hash_workers=1)
+        assert result["success"]
+        assert result["files"] == 6
+        assert result["uploaded"] == 6
+        assert 1 < api.max_in_flight <= 3
+        names = sorted(e["body"]["name"] for e in api.ingested)
+        assert names == [f"img{i}.png" for i in range(6)]
+        assert all(e["body"]["input"].startswith("@@@langfuseMedia:") for e in api.ingested)
+
+    def test_server_side_duplicates_are_not_uploaded(self, media_dir):
+        known = cofuse.calculate_sha256(str(media_dir / "img0.png"))
+        api = FakeMediaApi(known_hashes=[known])
+        with api.patches():
+            result = cofuse.upload_media_directory(str(media_dir), "trace-1", pattern="*.png", hash_workers=1)
+        assert result["deduplicated"] == 1
+        assert "img0.png" not in api.puts
+
+    def test_rerun_resumes_from_manifest(self, media_dir):
+        api = FakeMediaApi(fail_names=["img2.png"])
+        with api.patches():
+            first = cofuse.upload_media_directory(str(media_dir), "trace-1", pattern="*.png", hash_workers=1)
+        assert not first["success"]
+        assert first["failed"] == 1
+        assert os.path.exists(first["manifest"])
+
+        api = FakeMediaApi()
+        with api.patches():
+            second = cofuse.upload_media_directory(str(media_dir), "trace-1", pattern="*.png", hash_workers=1)
+        assert second["success"]
+        assert second["skipped"] == 5
+        assert api.puts == ["img2.png"]
+
+    def test_changed_file_is_uploaded_again(self, media_dir):
+        api = FakeMediaApi()
+        with api.patches():
+            cofuse.upload_media_directory(str(media_dir), "trace-1", pattern="*.png", hash_workers=1)
+        (media_dir / "img1.png").write_bytes(b"changed contents")
+        api = FakeMediaApi()
+        with api.patches():
+            result = cofuse.upload_media_directory(str(media_dir), "trace-1", pattern="*.png", hash_workers=1)
+        assert api.puts == ["img1.png"]
+        assert result["skipped"] == 5
+
+    def test_failed_attachment_retried_without_reupload(self, media_dir):
+        api = FakeMediaApi()
+        with api.patches(ingest_errors=["img3.png"]):
+            first = cofuse.upload_media_directory(str(media_dir), "trace-1", pattern="*.png", hash_workers=1)
+        assert first["failed"] == 1
+        api = FakeMediaApi()
+        with api.patches():
+            second = cofuse.upload_media_directory(str(media_dir), "trace-1", pattern="*.png", hash_workers=1)
+        assert second["success"]
+        assert api.puts == []
+        assert [e["body"]["name"] for e in api.ingested] == ["img3.png"]
+
+    def test_file_removed_after_discovery_is_reported_failed(self, media_dir):
+        files = cofuse._find_media_files(str(media_dir), "*.png", False, exclude=set())
+        files.append(("gone.png", str(media_dir / "gone.png")))
+        api = FakeMediaApi()
+        with api.patches(), patch.object(cofuse, '_find_media_files', return_value=files):
+            result = cofuse.upload_media_directory(str(media_dir), "trace-1", pattern="*.png", hash_workers=1)
+        assert result["uploaded"] == 6
+        assert result["failed"] == 1
+        gone = [r for r in result["results"] if r["path"] == "gone.png"][0]
+        assert gone["status"] == "failed"
+        assert "Cannot read file" in gone["error"]
+
+    def test_checkpoints_during_concurrent_uploads(self, tmp_path, monkeypatch):
+        for i in range(40):
+            (tmp_path / f"f{i}.png").write_bytes(b"bytes-%d" % i)
+        monkeypatch.setattr(cofuse, 'MEDIA_MANIFEST_SAVE_INTERVAL', 0)
+        api = FakeMediaApi(delay=0.001)
+        with api.patches():
+            result = cofuse.upload_media_directory(str(tmp_path), "trace-1", pattern="*.png",
+                                                   max_workers=8, hash_workers=1)
+        assert result["success"]
+        manifest = cofuse.load_media_manifest(result["manifest"])
+        assert all(manifest[f"f{i}.png"]["status"] == "uploaded" for i in range(40))
+
+    def test_process_pool_hashing_matches(self, media_dir):
+        paths = [str(media_dir / f"img{i}.png") for i in range(6)]
+        hashes = cofuse._hash_files(paths, hash_workers=2)
+        assert hashes == {path: cofuse.calculate_sha256(path) for path in paths}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Tests for the local SQLite mirror and incremental `fuse sync`
+"""
+import json
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coaiapy import cofuse
+
+CONFIG = {
+    'langfuse_base_url': 'https://langfuse.example.com',
+    'langfuse_public_key': 'pk-test',
+    'langfuse_secret_key': 'sk-test',
+}
+
+TRACES = [
+    {'id': 't-1', 'timestamp': '2026-01-01T10:00:00.000Z', 'name': 'chat', 'sessionId': 's-1', 'userId': 'u-1',
+     'tags': ['a'], 'latency': 1.5},
+    {'id': 't-2', 'timestamp': '2026-01-02T10:00:00.000Z', 'name': 'batch', 'sessionId': 's-2', 'userId': 'u-1'},
+]
+OBSERVATIONS = [
+    {'id': 'o-1', 'traceId': 't-1', 'type': 'SPAN', 'name': 'plan', 'startTime': '2026-01-01T10:00:01.000Z'},
+    {'id': 'o-2', 'traceId': 't-1', 'type': 'GENERATION', 'name': 'llm', 'parentObservationId': 'o-1',
+     'startTime': '2026-01-01T10:00:02.000Z', 'model': 'gpt-4'},
+]
+SCORES = [
+    {'id': 'sc-1', 'traceId': 't-1', 'name': 'quality', 'value': 0.9, 'dataType': 'NUMERIC',
+     'timestamp': '2026-01-01T11:00:00.000Z'},
+]
+
+
+@pytest.fixture(autouse=True)
+def mirror_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv('COAIAPY_MIRROR_DIR', str(tmp_path))
+    with patch.object(cofuse, 'read_config', return_value=CONFIG):
+        yield tmp_path
+
+
+class FakeSources:
+    """Stands in for iter_traces/iter_paginated and records the start timestamps"""
+
+    def __init__(self, traces, observations, scores):
+        self.data = {'traces': traces, 'observations': observations, 'scores': scores}
+        self.calls = []
+
+    def iter_traces(self, from_timestamp=None, **kwargs):
+        self.calls.append(('traces', from_timestamp))
+        return iter(list(self.data['traces']))
+
+    def iter_paginated(self, url, params=None, label='items', strict=False, **kwargs):
+        assert strict
+        since = params.get('fromStartTime') or params.get('fromTimestamp')
+        self.calls.append((label, since))
+        return iter(list(self.data[label]))
+
+
+def _sync(sources, **kwargs):
+    with patch.object(cofuse, 'iter_traces', side_effect=sources.iter_traces), \
+            patch.object(cofuse, 'iter_paginated', side_effect=sources.iter_paginated):
+        return cofuse.sync_mirror(**kwargs)
+
+
+class TestMirror:
+
+    def test_upsert_and_query(self):
+        mirror = cofuse.open_mirror()
+        assert mirror.upsert('traces', TRACES) == (2, '2026-01-02T10:00:00.000Z')
+        assert [t['id'] for t in mirror.query_traces()] == ['t-2', 't-1']
+        assert [t['id'] for t in mirror.query_traces(session_id='s-1')] == ['t-1']
+        assert [t['id'] for t in mirror.query_traces(from_timestamp='2026-01-02')] == ['t-2']
+        assert [t['id'] for t in mirror.query_traces(user_id='u-1', limit=1)] == ['t-2']
+        # Replacing a record updates it in place
+        mirror.upsert('traces', [dict(TRACES[0], name='renamed')])
+        assert mirror.query_traces(session_id='s-1')[0]['name'] == 'renamed'
+
+    def test_get_trace_assembles_observations(self):
+        mirror = cofuse.open_mirror()
+        mirror.upsert('traces', TRACES)
+        mirror.upsert('observations', list(reversed(OBSERVATIONS)))
+        trace = mirror.get_trace('t-1')
+        assert [o['id'] for o in trace['observations']] == ['o-1', 'o-2']
+        assert 'error' in mirror.get_trace('missing')
+
+    def test_scopes_are_separate_databases(self):
+        cofuse.open_mirror().upsert('traces', TRACES)
+        with patch.object(cofuse, 'read_config', return_value=dict(CONFIG, langfuse_public_key='pk-other')):
+            assert cofuse.open_mirror().query_traces() == []
+
+    def test_sql_is_read_only(self):
+        mirror = cofuse.open_mirror()
+        mirror.upsert('scores', SCORES)
+        assert mirror.execute("SELECT name, value FROM scores") == [{'name': 'quality', 'value': 0.9}]
+        with pytest.raises(Exception):
+            mirror.execute("DELETE FROM scores")
+
+
+class TestSync:
+
+    def test_first_sync_fetches_everything_and_sets_watermarks(self):
+        sources = FakeSources(TRACES, OBSERVATIONS, SCORES)
+        result = _sync(sources)
+        assert {e: info['fetched'] for e, info in result['entities'].items()} == \
+            {'traces': 2, 'observations': 2, 'scores': 1}
+        assert all(since is None for _, since in sources.calls)
+        stats = cofuse.open_mirror().stats()
+        assert stats['entities']['traces']['watermark'] == '2026-01-02T10:00:00.000Z'
+        assert stats['entities']['observations']['rows'] == 2
+
+    def test_next_sync_resumes_from_watermark_minus_overlap(self):
+        _sync(FakeSources(TRACES, OBSERVATIONS, SCORES))
+        sources = FakeSources([], [], [])
+        result = _sync(sources, overlap_seconds=600)
+        assert dict(sources.calls) == {
+            'traces': '2026-01-02T09:50:00Z',
+            'observations': '2026-01-01T09:50:02Z',
+            'scores': '2026-01-01T10:50:00Z',
+        }
+        # Nothing new: watermark stays where it was
+        assert result['entities']['traces']['watermark'] == '2026-01-02T10:00:00.000Z'
+
+    def test_full_sync_ignores_watermark(self):
+        _sync(FakeSources(TRACES, [], []), entities=['traces'])
+        sources = FakeSources(TRACES, [], [])
+        _sync(sources, entities=['traces'], full=True)
+        assert sources.calls == [('traces', None)]
+
+    def test_failed_sync_keeps_watermark(self):
+        _sync(FakeSources(TRACES[:1], [], []), entities=['traces'])
+
+        def broken(from_timestamp=None, **kwargs):
+            yield TRACES[1]
+            raise Exception('Failed to fetch traces page 2')
+
+        with patch.object(cofuse, 'iter_traces', side_effect=broken), pytest.raises(Exception):
+            cofuse.sync_mirror(entities=['traces'])
+        mirror = cofuse.open_mirror()
+        assert mirror.get_watermark('traces') == '2026-01-01T10:00:00.000Z'
+
+    def test_unknown_entity(self):
+        with pytest.raises(ValueError):
+            _sync(FakeSources([], [], []), entities=['prompts'])
+
+
+class TestMirrorCommands:
+
+    def test_mirror_trace_view_reads_local_data(self, capsys):
+        from coaiapy import coaiacli
+        mirror = cofuse.open_mirror()
+        mirror.upsert('traces', TRACES)
+        mirror.upsert('observations', OBSERVATIONS)
+        argv = ['coaia', 'fuse', 'mirror', 'trace-view', 't-1']
+        with patch.object(coaiacli, 'open_mirror', return_value=mirror), \
+                patch.object(coaiacli, 'get_trace_with_observations', side_effect=AssertionError('no API calls')), \
+                patch.object(sys, 'argv', argv):
+            coaiacli.main()
+        out = capsys.readouterr().out
+        assert '🤖 [GENERATION] llm (o-2)' in out
+
+    def test_sync_command_json(self, capsys):
+        from coaiapy import coaiacli
+        result = {'path': '/tmp/x.sqlite3', 'entities': {'traces': {'fetched': 1, 'from': None, 'watermark': 'w'}}}
+        argv = ['coaia', 'fuse', 'sync', '--entities', 'traces', '--json', '--overlap-minutes', '1']
+        with patch.object(coaiacli, 'sync_mirror', return_value=result) as mock_sync, \
+                patch.object(sys, 'argv', argv):
+            coaiacli.main()
+        assert json.loads(capsys.readouterr().out) == result
+        assert mock_sync.call_args.kwargs['entities'] == ['traces']
+        assert mock_sync.call_args.kwargs['overlap_seconds'] == 60
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
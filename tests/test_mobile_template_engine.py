@@ -250,6 +250,51 @@ class TestErrorHandling(unittest.TestCase):
         self.assertEqual(result, "John - APP")
 
 
+
+class TestCompiledTemplateCache(unittest.TestCase):
+    """Test the compile step and bounded LRU of compiled templates"""
+    
+    def test_template_compiled_once(self):
+        """Repeated renders reuse the compiled node list"""
+        engine = MobileTemplateEngine()
+        template = "Hello {{name}} {{score|upper}}"
+        first = engine.compile_template(template)
+        engine.render_template_content(template, {'name': 'a', 'score': 'b'})
+        self.assertIs(engine.compile_template(template), first)
+    
+    def test_compiled_nodes(self):
+        """Literals stay strings, expressions become typed nodes"""
+        engine = MobileTemplateEngine()
+        conditionals, nodes = engine.compile_template("Hi {{ name|title }} {{ uuid4() }} {{ a or 'b' }}")
+        self.assertIsNone(conditionals)
+        self.assertEqual(nodes[0], "Hi ")
+        self.assertEqual(nodes[1], ('filter', 'name', 'title'))
+        self.assertEqual(nodes[3], ('call', 'uuid4'))
+        self.assertEqual(nodes[5], ('default', ('a', 'b')))
+    
+    def test_cache_is_bounded_lru(self):
+        """Least recently used templates are evicted past cache_size"""
+        engine = MobileTemplateEngine(cache_size=2)
+        engine.render_template_content("A {{x}}", {'x': 1})
+        engine.render_template_content("B {{x}}", {'x': 1})
+        engine.render_template_content("A {{x}}", {'x': 1})
+        engine.render_template_content("C {{x}}", {'x': 1})
+        self.assertEqual(list(engine._compiled), ["A {{x}}", "C {{x}}"])
+    
+    def test_cached_render_matches_conditionals(self):
+        """Conditional branches still depend on each render's variables"""
+        engine = MobileTemplateEngine()
+        template = "{% if debug %}Debug {{user}}{% endif %}{% if env == 'prod' %}!{% endif %}"
+        self.assertEqual(engine.render_template_content(template, {'debug': True, 'user': 'u', 'env': 'prod'}), "Debug u!")
+        self.assertEqual(engine.render_template_content(template, {'debug': 'false', 'env': 'dev'}), "")
+    
+    def test_builtin_functions_called_per_render(self):
+        """Compiled builtin calls are evaluated on every render"""
+        engine = MobileTemplateEngine()
+        first = engine.render_template_content("{{uuid4()}}", {})
+        second = engine.render_template_content("{{uuid4()}}", {})
+        self.assertNotEqual(first, second)
+
 if __name__ == '__main__':
     # Run tests with verbose output
     unittest.main(verbosity=2)
\ No newline at end of file
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Tests for the local ingestion outbox: enqueue mode, flushing and the CLI
+"""
+import json
+import os
+import sys
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coaiapy import cofuse
+from coaiapy import outbox as outbox_module
+
+CONFIG = {
+    'langfuse_base_url': 'https://langfuse.example.com',
+    'langfuse_public_key': 'pk-test',
+    'langfuse_secret_key': 'sk-test',
+}
+SCOPE = cofuse._project_credential_key(CONFIG)
+
+
+@pytest.fixture(autouse=True)
+def outbox_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv('COAIAPY_OUTBOX_DIR', str(tmp_path))
+    monkeypatch.delenv('COAIAPY_OUTBOX', raising=False)
+    with patch.object(cofuse, 'read_config', return_value=CONFIG):
+        yield tmp_path
+
+
+def _event(event_id):
+    return {'id': event_id, 'timestamp': '2026-01-01T00:00:00Z', 'type': 'event-create', 'body': {'id': event_id}}
+
+
+class TestOutbox:
+
+    def test_enqueue_is_idempotent_per_event_id(self):
+        box = outbox_module.get_outbox()
+        assert box.enqueue(SCOPE, [_event('a'), _event('b')]) == 2
+        assert box.enqueue(SCOPE, [_event('a')]) == 0
+        assert box.stats()['pending'] == 2
+
+    def test_claim_leases_events_in_order(self):
+        box = outbox_module.get_outbox()
+        box.enqueue(SCOPE, [_event(f'e{i}') for i in range(5)])
+        first = box.claim(SCOPE, 3)
+        assert [e['id'] for e in first] == ['e0', 'e1', 'e2']
+        # Leased events are not handed to a second flusher
+        assert [e['id'] for e in box.claim(SCOPE, 10)] == ['e3', 'e4']
+        assert box.claim(SCOPE, 10) == []
+
+    def test_claim_only_returns_own_scope(self):
+        box = outbox_module.get_outbox()
+        box.enqueue('other-scope', [_event('x')])
+        assert box.claim(SCOPE, 10) == []
+
+    def test_fail_backs_off_and_marks_dead(self):
+        box = outbox_module.get_outbox()
+        box.enqueue(SCOPE, [_event('retry'), _event('bad')])
+        box.claim(SCOPE, 10)
+        dead = box.fail(SCOPE, [('retry', 'timeout', False), ('bad', 'invalid', True)])
+        assert dead == 1
+        stats = box.stats()
+        assert (stats['pending'], stats['retrying'], stats['dead']) == (1, 1, 1)
+        # Backed-off event is not due yet
+        assert box.claim(SCOPE, 10) == []
+        assert [d['id'] for d in box.dead_events()] == ['bad']
+        assert box.retry_dead() == 1
+        assert [e['id'] for e in box.claim(SCOPE, 10)] == ['bad']
+
+
+class TestEnqueueMode:
+
+    def test_add_trace_enqueue_skips_network(self):
+        with patch.object(cofuse, 'get_fuse_session') as mock_session:
+            result = json.loads(cofuse.add_trace('trace-1', name='demo', enqueue=True))
+        mock_session.assert_not_called()
+        assert result['queued'] == 1
+        assert result['eventIds'][0].startswith('trace-1-event-')
+        assert outbox_module.get_outbox().stats()['pending'] == 1
+
+    def test_create_then_update_both_queued(self):
+        with patch.object(cofuse, 'get_fuse_session'):
+            cofuse.add_observation('obs-1', 'trace-1', name='step', enqueue=True)
+            second = json.loads(cofuse.add_observation('obs-1', 'trace-1', end_time='2026-01-01T00:00:05Z',
+                                                       enqueue=True))
+        assert second['queued'] == 1
+        events = outbox_module.get_outbox().claim(SCOPE, 10)
+        assert len(events) == 2
+        assert len({e['id'] for e in events}) == 2
+        assert {e['body']['id'] for e in events} == {'obs-1'}
+
+    def test_env_enables_outbox_for_observations_and_patches(self, monkeypatch):
+        monkeypatch.setenv('COAIAPY_OUTBOX', '1')
+        with patch.object(cofuse, 'get_fuse_session') as mock_session:
+            cofuse.add_observation('obs-1', 'trace-1', name='step')
+            cofuse.patch_trace_output('trace-1', {'answer': 42})
+        mock_session.assert_not_called()
+        events = outbox_module.get_outbox().claim(SCOPE, 10)
+        assert [e['type'] for e in events] == ['observation-create', 'trace-create']
+        assert events[1]['body']['output'] == {'answer': 42}
+
+    def test_explicit_false_overrides_env(self, monkeypatch):
+        monkeypatch.setenv('COAIAPY_OUTBOX', '1')
+        session = MagicMock()
+        session.post.return_value.text = json.dumps({'successes': [{'id': 'trace-1-event', 'status': 201}], 'errors': []})
+        with patch.object(cofuse, 'get_fuse_session', return_value=session):
+            result = json.loads(cofuse.add_trace('trace-1', enqueue=False))
+        assert result['successes'][0]['id'] == 'trace-1'
+        assert outbox_module.get_outbox().stats()['pending'] == 0
+
+
+class TestFlush:
+
+    def _queue(self, *ids):
+        outbox_module.get_outbox().enqueue(SCOPE, [_event(i) for i in ids])
+
+    def test_flush_acks_successes_and_keeps_failures(self):
+        self._queue('ok-1', 'ok-2', 'flaky', 'bad')
+        response = {
+            'successes': [{'id': 'ok-1', 'status': 201}, {'id': 'ok-2', 'status': 201}],
+            'errors': [{'id': 'flaky', 'status': 500, 'message': 'oops'},
+                       {'id': 'bad', 'status': 400, 'message': 'invalid body'}],
+            'batches': 1,
+        }
+        with patch.object(cofuse, 'ingest_events', return_value=response) as mock_ingest:
+            result = cofuse.flush_outbox()
+        sent = mock_ingest.call_args.args[0]
+        assert [e['id'] for e in sent] == ['ok-1', 'ok-2', 'flaky', 'bad']
+        assert (result['sent'], result['failed'], result['dead'], result['pending']) == (2, 2, 1, 1)
+
+    def test_missing_results_are_retried(self):
+        self._queue('a', 'b')
+        response = {'successes': [{'id': 'a', 'status': 201}], 'errors': [], 'batches': 1}
+        with patch.object(cofuse, 'ingest_events', return_value=response):
+            result = cofuse.flush_outbox()
+        assert (result['sent'], result['failed'], result['pending']) == (1, 1, 1)
+
+    def test_flush_drains_in_claims_and_respects_max_events(self):
+        self._queue(*[f'e{i}' for i in range(7)])
+
+        def accept(events, **kwargs):
+            return {'successes': [{'id': e['id'], 'status': 201} for e in events], 'errors': [], 'batches': 1}
+
+        with patch.object(cofuse, 'ingest_events', side_effect=accept) as mock_ingest:
+            result = cofuse.flush_outbox(max_events=5, max_batch_events=2, max_workers=1)
+            assert (result['sent'], result['pending']) == (5, 2)
+            assert [len(c.args[0]) for c in mock_ingest.call_args_list] == [2, 2, 1]
+            assert cofuse.flush_outbox()['pending'] == 0
+
+    @pytest.mark.parametrize('status', [401, 404, 413])
+    def test_whole_request_failure_is_retried_not_dead(self, status):
+        self._queue('a', 'b')
+        session = MagicMock()
+        session.post.return_value.status_code = status
+        session.post.return_value.text = 'Unauthorized'
+        with patch.object(cofuse, 'get_fuse_session', return_value=session):
+            result = cofuse.flush_outbox()
+        assert (result['failed'], result['dead'], result['pending']) == (2, 0, 2)
+        assert outbox_module.get_outbox().stats()['retrying'] == 2
+
+    def test_per_event_rejection_is_dead(self):
+        self._queue('a')
+        session = MagicMock()
+        session.post.return_value.status_code = 207
+        session.post.return_value.json.return_value = {
+            'successes': [], 'errors': [{'id': 'a', 'status': 400, 'message': 'invalid body'}]}
+        with patch.object(cofuse, 'get_fuse_session', return_value=session):
+            result = cofuse.flush_outbox()
+        assert result['dead'] == 1
+
+    def test_network_error_releases_claim(self):
+        self._queue('a')
+        with patch.object(cofuse, 'ingest_events', side_effect=ConnectionError('down')), \
+                pytest.raises(ConnectionError):
+            cofuse.flush_outbox()
+        assert [e['id'] for e in outbox_module.get_outbox().claim(SCOPE, 10)] == ['a']
+
+    def test_background_flusher(self):
+        self._queue('a')
+        flushed = threading.Event()
+
+        def accept(events, **kwargs):
+            flushed.set()
+            return {'successes': [{'id': e['id'], 'status': 201} for e in events], 'errors': [], 'batches': 1}
+
+        with patch.object(cofuse, 'ingest_events', side_effect=accept):
+            flusher = cofuse.OutboxFlusher(interval=60)
+            flusher.start()
+            assert flushed.wait(5)
+            flusher.stop(timeout=5)
+        assert not flusher.is_alive()
+        assert flusher.last_result['sent'] == 1
+
+
+class TestOutboxCommands:
+
+    def test_trace_create_enqueue_flag(self, capsys):
+        from coaiapy import coaiacli
+        argv = ['coaia', 'fuse', 'traces', 'create', 'trace-1', '--enqueue']
+        with patch.object(coaiacli, 'add_trace', return_value='{}') as mock_add, \
+                patch.object(sys, 'argv', argv):
+            coaiacli.main()
+        assert mock_add.call_args.kwargs['enqueue'] is True
+
+    def test_flush_command_exit_code(self, capsys):
+        from coaiapy import coaiacli
+        result = {'sent': 3, 'failed': 1, 'dead': 0, 'batches': 1, 'pending': 1}
+        argv = ['coaia', 'fuse', 'flush', '--batch-size', '100']
+        with patch.object(coaiacli, 'flush_outbox', return_value=result) as mock_flush, \
+                patch.object(sys, 'argv', argv), \
+                pytest.raises(SystemExit) as exit_info:
+            coaiacli.main()
+        assert exit_info.value.code == 1
+        assert mock_flush.call_args.kwargs['max_batch_events'] == 100
+        assert 'Sent 3 events' in capsys.readouterr().out
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
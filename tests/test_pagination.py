@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared pagination engine (iter_paginated) and the list_* functions built on it
+"""
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coaiapy import cofuse
+
+CONFIG = {
+    'langfuse_base_url': 'https://langfuse.example.com',
+    'langfuse_public_key': 'pk-test',
+    'langfuse_secret_key': 'sk-test',
+}
+
+
+def _response(payload, status_code=200):
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = payload
+    response.text = json.dumps(payload)
+    return response
+
+
+class PagedEndpoint:
+    """Serves meta-paginated pages and records requests and concurrency"""
+
+    def __init__(self, total, page_size, delay=0.0, fail_page=None, meta=True):
+        self.total = total
+        self.page_size = page_size
+        self.delay = delay
+        self.fail_page = fail_page
+        self.meta = meta
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def total_pages(self):
+        return (self.total + self.page_size - 1) // self.page_size
+
+    def get(self, url, params=None):
+        page = params['page']
+        with self._lock:
+            self.requests.append((url, dict(params)))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            if page == self.fail_page:
+                return _response({'message': 'boom'}, status_code=500)
+            start = (page - 1) * self.page_size
+            data = [{'id': f'item-{i}'} for i in range(start, min(start + self.page_size, self.total))]
+            if self.meta:
+                return _response({'data': data, 'meta': {'page': page, 'totalPages': self.total_pages}})
+            return _response({'data': data, 'hasNextPage': page < self.total_pages})
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def _patched(fake):
+    return patch.multiple(cofuse, read_config=MagicMock(return_value=CONFIG),
+                          get_fuse_session=MagicMock(return_value=fake))
+
+
+class TestIterPaginated:
+
+    def test_yields_all_items_in_page_order(self):
+        fake = PagedEndpoint(total=47, page_size=5, delay=0.01)
+        with _patched(fake):
+            items = list(cofuse.iter_paginated('https://x/api/public/v2/prompts', max_workers=4))
+        assert [i['id'] for i in items] == [f'item-{i}' for i in range(47)]
+        assert sorted(p['page'] for _, p in fake.requests) == list(range(1, 11))
+
+    def test_remaining_pages_fetched_concurrently_and_bounded(self):
+        fake = PagedEndpoint(total=50, page_size=5, delay=0.02)
+        with _patched(fake):
+            list(cofuse.iter_paginated('https://x/api', max_workers=3))
+        assert 1 < fake.max_in_flight <= 3
+
+    def test_params_sent_with_every_page(self):
+        fake = PagedEndpoint(total=12, page_size=5)
+        with _patched(fake):
+            list(cofuse.iter_paginated('https://x/api', params={'name': 'ds'}))
+        assert all(p['name'] == 'ds' for _, p in fake.requests)
+
+    def test_early_termination_stops_requests(self):
+        fake = PagedEndpoint(total=500, page_size=5)
+        with _patched(fake):
+            gen = cofuse.iter_paginated('https://x/api', max_workers=2)
+            first = list(itertools.islice(gen, 7))
+            gen.close()
+        assert len(first) == 7
+        assert len(fake.requests) <= 4
+
+    def test_stops_at_failed_page(self):
+        fake = PagedEndpoint(total=30, page_size=5, fail_page=4)
+        with _patched(fake):
+            items = list(cofuse.iter_paginated('https://x/api'))
+        assert len(items) == 15
+
+    def test_has_next_page_fallback_is_sequential(self):
+        fake = PagedEndpoint(total=12, page_size=5, meta=False)
+        with _patched(fake):
+            items = list(cofuse.iter_paginated('https://x/api'))
+        assert len(items) == 12
+        assert [p['page'] for _, p in fake.requests] == [1, 2, 3]
+
+    def test_max_pages(self):
+        fake = PagedEndpoint(total=50, page_size=5)
+        with _patched(fake):
+            items = list(cofuse.iter_paginated('https://x/api', max_pages=3))
+        assert len(items) == 15
+
+
+class TestListFunctionsUseEngine:
+
+    @pytest.mark.parametrize('call,path', [
+        (lambda: cofuse.list_prompts(), '/api/public/v2/prompts'),
+        (lambda: cofuse.list_scores(name='quality'), '/api/public/v2/scores'),
+        (lambda: cofuse.list_dataset_items('my-dataset'), '/api/public/dataset-items'),
+        (lambda: cofuse.list_score_configs(), '/api/public/score-configs'),
+    ])
+    def test_list_returns_every_page(self, call, path):
+        fake = PagedEndpoint(total=23, page_size=10)
+        with _patched(fake):
+            result = json.loads(call())
+        assert len(result) == 23
+        assert all(url.endswith(path) for url, _ in fake.requests)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -338,9 +338,21 @@ class TestScalabilityBenchmarks(unittest.TestCase):
             self.assertIn(f'User{i}', result)
         second_batch_time = time.time() - start_time
         
+        # Third batch - recompile on every render for comparison
+        start_time = time.time()
+        for i in range(100):
+            engine.clear_cache()
+            engine.render_template_content(template, {'name': f'User{i}', 'score': 'low'})
+        uncached_batch_time = time.time() - start_time
+        
+        # The compiled template is served from the engine's cache
+        engine.render_template_content(template, {'name': 'x', 'score': 'y'})
+        self.assertIs(engine.compile_template(template), engine.compile_template(template))
+        
         # Print timing information
         print(f"Template reuse: First batch {first_batch_time*1000:.2f}ms, "
-              f"Second batch {second_batch_time*1000:.2f}ms")
+              f"Second batch {second_batch_time*1000:.2f}ms, "
+              f"Uncached batch {uncached_batch_time*1000:.2f}ms")
         
         # Both batches should be reasonably fast
         self.assertLess(first_batch_time, 0.5, "First batch too slow")
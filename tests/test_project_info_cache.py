@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-credential project identity cache behind get_current_project_info()
+"""
+import json
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coaiapy import cofuse
+
+CONFIG = {
+    'langfuse_base_url': 'https://langfuse.example.com',
+    'langfuse_public_key': 'pk-test',
+    'langfuse_secret_key': 'sk-test',
+}
+PROJECTS = json.dumps({'data': [{'id': 'proj-1', 'name': 'Demo'}]})
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    cofuse.clear_project_info_cache(disk=False)
+    with patch.object(cofuse, 'read_config', return_value=dict(CONFIG)):
+        yield tmp_path
+    cofuse.clear_project_info_cache(disk=False)
+
+
+class TestProjectInfoCache:
+
+    def test_resolved_once_per_credentials(self):
+        with patch.object(cofuse, 'list_projects', return_value=PROJECTS) as list_projects:
+            results = [cofuse.get_current_project_info() for _ in range(100)]
+        assert list_projects.call_count == 1
+        assert all(r == {'id': 'proj-1', 'name': 'Demo'} for r in results)
+
+    def test_disk_cache_survives_process_restart(self, isolated_cache):
+        with patch.object(cofuse, 'list_projects', return_value=PROJECTS):
+            cofuse.get_current_project_info()
+        assert (isolated_cache / '.coaia' / 'projects.json').exists()
+        cofuse.clear_project_info_cache(disk=False)
+        with patch.object(cofuse, 'list_projects') as list_projects:
+            assert cofuse.get_current_project_info()['id'] == 'proj-1'
+        list_projects.assert_not_called()
+
+    def test_expired_entry_is_refetched(self, monkeypatch):
+        monkeypatch.setattr(cofuse, 'PROJECT_INFO_TTL', -1)
+        with patch.object(cofuse, 'list_projects', return_value=PROJECTS) as list_projects:
+            cofuse.get_current_project_info()
+            cofuse.get_current_project_info()
+        assert list_projects.call_count == 2
+
+    def test_credentials_are_cached_separately(self):
+        with patch.object(cofuse, 'list_projects', return_value=PROJECTS) as list_projects:
+            cofuse.get_current_project_info()
+            with patch.object(cofuse, 'read_config', return_value=dict(CONFIG, langfuse_public_key='pk-other')):
+                cofuse.get_current_project_info()
+        assert list_projects.call_count == 2
+
+    def test_failures_are_not_cached(self):
+        with patch.object(cofuse, 'list_projects', side_effect=[json.dumps({'data': []}), PROJECTS]) as list_projects:
+            assert cofuse.get_current_project_info() is None
+            assert cofuse.get_current_project_info()['id'] == 'proj-1'
+        assert list_projects.call_count == 2
+
+    def test_refresh_bypasses_cache(self):
+        with patch.object(cofuse, 'list_projects', return_value=PROJECTS) as list_projects:
+            cofuse.get_current_project_info()
+            cofuse.get_current_project_info(refresh=True)
+        assert list_projects.call_count == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
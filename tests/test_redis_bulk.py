@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Tests for Redis connection reuse and pipelined multi-key tash/fetch
+"""
+import io
+import json
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coaiapy import coaiamodule
+from coaiapy import coaiacli
+
+JTALECONF = {'host': 'redis.example.com', 'port': 6379, 'password': 'secret', 'ssl': True}
+
+
+@pytest.fixture(autouse=True)
+def fresh_pools():
+    coaiamodule.reset_jtaler_pools()
+    yield
+    coaiamodule.reset_jtaler_pools()
+
+
+@pytest.fixture
+def config():
+    with patch.object(coaiamodule, 'read_config', return_value={'jtaleconf': dict(JTALECONF)}):
+        yield
+
+
+class TestConnectionReuse:
+
+    def test_clients_share_pool_for_same_config(self):
+        first = coaiamodule._newjtaler(dict(JTALECONF))
+        second = coaiamodule._newjtaler(dict(JTALECONF))
+        assert first.connection_pool is second.connection_pool
+
+    def test_different_config_gets_own_pool(self):
+        first = coaiamodule._newjtaler(dict(JTALECONF))
+        second = coaiamodule._newjtaler(dict(JTALECONF, host='other.example.com'))
+        assert first.connection_pool is not second.connection_pool
+
+    def test_ssl_config_uses_ssl_connections(self):
+        import redis
+        pool = coaiamodule._get_jtaler_pool(dict(JTALECONF))
+        assert pool.connection_class is redis.SSLConnection
+
+
+class TestTaleadd:
+
+    def test_no_verify_get_by_default(self):
+        client = MagicMock()
+        result = coaiamodule._taleadd(client, 'k', 'v', quiet=True, ttl=60)
+        client.set.assert_called_once_with('k', 'v', ex=60)
+        client.get.assert_not_called()
+        assert result == 'v'
+
+    def test_verify_reads_back(self):
+        client = MagicMock()
+        client.get.return_value = b'v'
+        result = coaiamodule._taleadd(client, 'k', 'v', quiet=True, verify=True)
+        client.get.assert_called_once_with('k')
+        assert result == b'v'
+
+
+class TestBulkOperations:
+
+    def test_tash_many_uses_one_pipeline(self, config):
+        client = MagicMock()
+        with patch.object(coaiamodule, '_newjtaler', return_value=client):
+            stored = coaiamodule.tash_many({'a': '1', 'b': '2'}, ttl=2)
+        assert stored == 2
+        client.pipeline.assert_called_once_with(transaction=False)
+        pipe = client.pipeline.return_value
+        assert pipe.set.call_count == 2
+        pipe.set.assert_any_call('a', '1', ex=120)
+        pipe.execute.assert_called_once()
+        client.set.assert_not_called()
+
+    def test_fetch_many_uses_mget(self, config):
+        client = MagicMock()
+        client.mget.return_value = [b'one', None]
+        with patch.object(coaiamodule, '_newjtaler', return_value=client):
+            values = coaiamodule.fetch_many(['a', 'missing'])
+        client.mget.assert_called_once_with(['a', 'missing'])
+        assert values == {'a': 'one', 'missing': None}
+
+
+class TestCollectTashItems:
+
+    def test_directory_keys_are_relative_paths(self, tmp_path):
+        (tmp_path / 'sub').mkdir()
+        (tmp_path / 'a.txt').write_text('A')
+        (tmp_path / 'sub' / 'b.md').write_text('B')
+        items = coaiacli.collect_tash_items(directory=str(tmp_path), prefix='ctx:')
+        assert sorted(items) == [('ctx:a.txt', 'A'), ('ctx:sub/b.md', 'B')]
+
+    def test_glob(self, tmp_path):
+        (tmp_path / 'a.txt').write_text('A')
+        (tmp_path / 'b.log').write_text('B')
+        items = coaiacli.collect_tash_items(pattern=str(tmp_path / '*.txt'))
+        assert [v for _, v in items] == ['A']
+
+    def test_ndjson_stream(self):
+        stream = io.StringIO('{"key": "a", "value": "1"}\n\n{"key": "b", "value": {"x": 1}}\n')
+        items = coaiacli.collect_tash_items(stream=stream)
+        assert items == [('a', '1'), ('b', '{"x": 1}')]
+
+    def test_ndjson_requires_key_and_value(self):
+        with pytest.raises(ValueError):
+            coaiacli.collect_tash_items(stream=io.StringIO('{"key": "a"}\n'))
+
+
+class TestBulkCommands:
+
+    def test_tash_many_dir(self, tmp_path, capsys):
+        (tmp_path / 'a.txt').write_text('A')
+        argv = ['coaia', 'tash-many', '--dir', str(tmp_path)]
+        with patch.object(coaiacli, 'tash_many', return_value=1) as mock_tash_many, \
+                patch.object(sys, 'argv', argv):
+            coaiacli.main()
+        assert mock_tash_many.call_args.args[0] == [('a.txt', 'A')]
+        assert 'Stashed 1 keys' in capsys.readouterr().out
+
+    def test_fetch_many_ndjson_and_missing_exit_code(self, capsys):
+        argv = ['coaia', 'fetch-many', 'a', 'b']
+        with patch.object(coaiacli, 'fetch_many', return_value={'a': 'one', 'b': None}), \
+                patch.object(sys, 'argv', argv), \
+                pytest.raises(SystemExit) as exit_info:
+            coaiacli.main()
+        assert exit_info.value.code == 1
+        out = capsys.readouterr()
+        assert [json.loads(line) for line in out.out.strip().splitlines()] == [{'key': 'a', 'value': 'one'}]
+        assert 'b' in out.err
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Tests for bulk score application (read_score_rows, validate_score_rows, apply_scores_batch)
+"""
+import io
+import json
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coaiapy import cofuse
+
+CONFIGS = {
+    'quality': {'id': 'cfg-q', 'name': 'quality', 'dataType': 'NUMERIC', 'minValue': 0, 'maxValue': 1},
+    'relevant': {'id': 'cfg-r', 'name': 'relevant', 'dataType': 'BOOLEAN'},
+    'verdict': {'id': 'cfg-v', 'name': 'verdict', 'dataType': 'CATEGORICAL',
+                'categories': [{'label': 'pass', 'value': 1}, {'label': 'fail', 'value': 0}]},
+}
+
+
+class FakeCache:
+    def __init__(self):
+        self.lookups = []
+
+    def get(self, key):
+        self.lookups.append(key)
+        return CONFIGS.get(key)
+
+
+@pytest.fixture
+def cache():
+    fake = FakeCache()
+    with patch.object(cofuse, 'get_score_config_cache', return_value=fake):
+        yield fake
+
+
+class TestReadScoreRows:
+
+    def test_ndjson(self):
+        rows = cofuse.read_score_rows(io.StringIO('{"trace_id": "t1", "config": "quality", "value": 0.5}\n\n'))
+        assert rows == [{'trace_id': 't1', 'config': 'quality', 'value': 0.5}]
+
+    def test_ndjson_error_reports_line(self):
+        with pytest.raises(ValueError, match='Line 2'):
+            cofuse.read_score_rows(io.StringIO('{"trace_id": "t1"}\nnot json\n'))
+
+    def test_csv_drops_empty_cells(self):
+        rows = cofuse.read_score_rows(io.StringIO('trace_id,config,value,comment\nt1,quality,0.5,\n'), 'csv')
+        assert rows == [{'trace_id': 't1', 'config': 'quality', 'value': '0.5'}]
+
+
+class TestValidateScoreRows:
+
+    def test_configs_resolved_once_and_events_built(self, cache):
+        rows = [{'trace_id': f't{i}', 'config': 'quality', 'value': '0.5'} for i in range(100)]
+        rows.append({'session_id': 's1', 'config': 'relevant', 'value': 'yes', 'comment': 'ok'})
+        results = cofuse.validate_score_rows(rows)
+        assert cache.lookups == ['quality', 'relevant']
+        event = results[0]['event']
+        assert event['type'] == 'score-create'
+        assert event['body']['traceId'] == 't0'
+        assert event['body']['configId'] == 'cfg-q'
+        assert event['body']['name'] == 'quality'
+        assert event['body']['value'] == 0.5
+        session_body = results[-1]['event']['body']
+        assert session_body['sessionId'] == 's1'
+        assert session_body['value'] == 1.0
+        assert session_body['comment'] == 'ok'
+
+    def test_invalid_rows_reported(self, cache):
+        rows = [
+            {'trace_id': 't1', 'config': 'quality', 'value': 'abc'},
+            {'trace_id': 't1', 'config': 'missing', 'value': 1},
+            {'config': 'quality', 'value': 1},
+            {'trace_id': 't1', 'config': 'verdict', 'value': 'pass'},
+        ]
+        results = cofuse.validate_score_rows(rows)
+        assert [('error' in r) for r in results] == [True, True, True, False]
+        assert 'missing' in results[1]['error']
+        assert results[3]['event']['body']['value'] == 1
+
+
+class TestApplyScoresBatch:
+
+    def test_per_row_report(self, cache):
+        rows = [
+            {'trace_id': 't1', 'config': 'quality', 'value': 0.9, 'id': 'score-1'},
+            {'trace_id': 't2', 'config': 'quality', 'value': 0.1, 'id': 'score-2'},
+            {'trace_id': 't3', 'config': 'quality', 'value': 7},
+        ]
+        ingestion = {'successes': [{'id': 'score-1-event'}],
+                     'errors': [{'id': 'score-2-event', 'status': 400, 'message': 'bad trace'}],
+                     'batches': 1}
+        with patch.object(cofuse, 'ingest_events', return_value=ingestion) as ingest:
+            summary = cofuse.apply_scores_batch(rows, max_batch_events=50, max_workers=2)
+        events = ingest.call_args.args[0]
+        assert [e['body']['id'] for e in events] == ['score-1', 'score-2']
+        assert ingest.call_args.kwargs['max_batch_events'] == 50
+        assert [r['status'] for r in summary['results']] == ['created', 'failed', 'invalid']
+        assert summary['results'][1]['error'] == 'bad trace'
+        assert (summary['created'], summary['failed'], summary['invalid']) == (1, 1, 1)
+
+    def test_many_scores_use_few_requests(self, cache):
+        rows = [{'trace_id': f't{i}', 'config': 'quality', 'value': 0.5} for i in range(1200)]
+        session = MagicMock()
+
+        def post(url, json):
+            response = MagicMock()
+            response.status_code = 207
+            response.json.return_value = {'successes': [{'id': e['id']} for e in json['batch']], 'errors': []}
+            return response
+
+        session.post.side_effect = post
+        config = {'langfuse_base_url': 'https://langfuse.example.com'}
+        with patch.object(cofuse, 'read_config', return_value=config), \
+                patch.object(cofuse, 'get_fuse_session', return_value=session):
+            summary = cofuse.apply_scores_batch(rows)
+        assert session.post.call_count == 3
+        assert summary['created'] == 1200
+
+
+class TestApplyBatchCommand:
+
+    def test_csv_file(self, tmp_path, capsys):
+        from coaiapy import coaiacli
+        path = tmp_path / 'scores.csv'
+        path.write_text('trace_id,config,value\nt1,quality,0.5\n')
+        summary = {'results': [{'index': 0, 'status': 'created'}], 'created': 1, 'failed': 0, 'invalid': 0, 'batches': 1}
+        argv = ['coaia', 'fuse', 'scores', 'apply-batch', str(path), '--batch-size', '100']
+        with patch.object(coaiacli, 'apply_scores_batch', return_value=summary) as apply_batch, \
+                patch.object(sys, 'argv', argv):
+            coaiacli.main()
+        assert apply_batch.call_args.args[0] == [{'trace_id': 't1', 'config': 'quality', 'value': '0.5'}]
+        assert apply_batch.call_args.kwargs['max_batch_events'] == 100
+        out = capsys.readouterr()
+        assert json.loads(out.out.strip()) == {'index': 0, 'status': 'created'}
+        assert 'Created 1' in out.err
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Tests for the indexed, process-level ScoreConfigCache behind get_config_with_auto_refresh()
+"""
+import datetime
+import json
+import os
+import sys
+import time
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coaiapy import cofuse
+
+PROJECT = {'id': 'proj-1', 'name': 'Demo'}
+CONFIGS = [
+    {'id': f'cfg-{i}', 'name': f'metric-{i}', 'dataType': 'NUMERIC', 'minValue': 0, 'maxValue': 10}
+    for i in range(30)
+]
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setattr(cofuse, '_score_config_caches', {})
+    with patch.object(cofuse, 'get_current_project_info', return_value=dict(PROJECT)):
+        yield tmp_path
+
+
+def _api(configs=CONFIGS):
+    return patch.object(cofuse, 'iter_paginated', side_effect=lambda *args, **kwargs: iter(configs))
+
+
+def _api_down():
+    return patch.object(cofuse, 'iter_paginated',
+                        side_effect=Exception("Failed to fetch score configs page 1: Request failed with status 503"))
+
+
+class TestScoreConfigCache:
+
+    def test_many_lookups_cost_one_sync(self):
+        with _api() as list_configs:
+            for i in range(3000):
+                config = cofuse.get_config_with_auto_refresh(f'metric-{i % 30}')
+                assert config['id'] == f'cfg-{i % 30}'
+            assert cofuse.get_config_with_auto_refresh('cfg-7')['name'] == 'metric-7'
+        assert list_configs.call_count == 1
+
+    def test_prefetch_writes_whole_set_once(self, isolated):
+        with _api():
+            assert cofuse.prefetch_score_configs() == 30
+        data = json.loads((isolated / '.coaia' / 'score-configs' / 'proj-1.json').read_text())
+        assert [c['id'] for c in data['configs']] == [c['id'] for c in CONFIGS]
+        assert data['project_name'] == 'Demo'
+
+    def test_disk_cache_used_by_fresh_process(self, monkeypatch):
+        with _api():
+            cofuse.prefetch_score_configs()
+        monkeypatch.setattr(cofuse, '_score_config_caches', {})
+        with patch.object(cofuse, 'iter_paginated') as list_configs:
+            assert cofuse.get_config_with_auto_refresh('metric-3')['id'] == 'cfg-3'
+        list_configs.assert_not_called()
+
+    def test_unknown_config_does_not_resync_every_time(self):
+        with _api() as list_configs:
+            assert cofuse.get_config_with_auto_refresh('nope') is None
+            assert cofuse.get_config_with_auto_refresh('nope') is None
+        assert list_configs.call_count == 1
+
+    def test_stale_entry_served_while_refreshing_in_background(self):
+        old = (datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=30)).isoformat()
+        cache = cofuse.get_score_config_cache()
+        cache._index([dict(CONFIGS[0], cached_at=old)])
+        cache._loaded = True
+        updated = [dict(CONFIGS[0], maxValue=5)]
+        with _api(updated) as list_configs:
+            config = cofuse.get_config_with_auto_refresh('metric-0')
+            assert config['maxValue'] == 10
+            cache._refresh_thread.join(timeout=5)
+        assert list_configs.call_count == 1
+        assert cache.lookup('metric-0')['maxValue'] == 5
+
+    def test_failed_sync_keeps_index_and_cache_file(self, isolated):
+        with _api():
+            cofuse.prefetch_score_configs()
+        cache_file = isolated / '.coaia' / 'score-configs' / 'proj-1.json'
+        before = cache_file.read_text()
+        cache = cofuse.get_score_config_cache()
+        with _api_down():
+            with pytest.raises(Exception):
+                cache.prefetch()
+            assert cofuse.get_config_with_auto_refresh('nope') is None
+        assert cache_file.read_text() == before
+        assert cofuse.get_config_with_auto_refresh('metric-1')['id'] == 'cfg-1'
+
+    def test_failed_background_refresh_keeps_stale_entries(self):
+        old = (datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=30)).isoformat()
+        cache = cofuse.get_score_config_cache()
+        cache._index([dict(CONFIGS[0], cached_at=old)])
+        cache._loaded = True
+        with _api_down():
+            assert cofuse.get_config_with_auto_refresh('metric-0')['id'] == 'cfg-0'
+            cache._refresh_thread.join(timeout=5)
+        assert cache.lookup('metric-0')['id'] == 'cfg-0'
+
+    def test_expired_entry_in_fresh_process_is_refreshed(self, isolated, monkeypatch):
+        old = (datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=72)).isoformat()
+        cofuse.save_project_cache('proj-1', {'configs': [dict(CONFIGS[0], cached_at=old)]})
+        monkeypatch.setattr(cofuse, '_score_config_caches', {})
+        with _api([dict(CONFIGS[0], maxValue=5)]) as list_configs:
+            assert cofuse.get_config_with_auto_refresh('metric-0')['maxValue'] == 5
+            assert cofuse.get_config_with_auto_refresh('metric-0')['maxValue'] == 5
+        assert list_configs.call_count == 1
+        data = json.loads((isolated / '.coaia' / 'score-configs' / 'proj-1.json').read_text())
+        assert data['configs'][0]['maxValue'] == 5
+
+    def test_expired_entry_served_when_refresh_fails(self):
+        old = (datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=72)).isoformat()
+        cache = cofuse.get_score_config_cache()
+        cache._index([dict(CONFIGS[0], cached_at=old)])
+        cache._loaded = True
+        with _api_down():
+            assert cofuse.get_config_with_auto_refresh('metric-0')['maxValue'] == 10
+
+    def test_background_refresh_is_awaited_at_exit(self):
+        old = (datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=30)).isoformat()
+        cache = cofuse.get_score_config_cache()
+        cache._index([dict(CONFIGS[0], cached_at=old)])
+        cache._loaded = True
+
+        def slow_api(*args, **kwargs):
+            time.sleep(0.2)
+            return iter([dict(CONFIGS[0], maxValue=5)])
+
+        with patch.object(cofuse, 'iter_paginated', side_effect=slow_api):
+            cofuse.get_config_with_auto_refresh('metric-0')
+            cofuse._join_score_config_refreshes(timeout=5)
+            assert not cache._refresh_thread.is_alive()
+        assert cache.lookup('metric-0')['maxValue'] == 5
+
+    def test_cached_only_listing_makes_no_api_call(self):
+        with _api():
+            cofuse.prefetch_score_configs()
+        with patch.object(cofuse, 'list_score_configs') as list_configs:
+            configs = cofuse.list_available_configs(cached_only=True)
+        list_configs.assert_not_called()
+        assert len(configs) == 30
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
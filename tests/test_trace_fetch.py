@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests for complete, concurrent observation retrieval in get_trace_with_observations
+"""
+import json
+import os
+import sys
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coaiapy import cofuse
+
+CONFIG = {
+    'langfuse_base_url': 'https://langfuse.example.com',
+    'langfuse_public_key': 'pk-test',
+    'langfuse_secret_key': 'sk-test',
+}
+
+
+def _response(payload, status_code=200):
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = payload
+    response.text = json.dumps(payload)
+    return response
+
+
+class FakeTraceApi:
+    """Serves one trace and its observations in pages, recording concurrency"""
+
+    def __init__(self, total, delay=0.0, fail_page=None, duplicate_on_page=None):
+        self.observations = [
+            {'id': f'obs-{i}', 'traceId': 't-1', 'input': 'x' * 100, 'output': {'big': True},
+             'parentObservationId': None if i == 0 else 'obs-0'}
+            for i in range(total)
+        ]
+        self.delay = delay
+        self.fail_page = fail_page
+        self.duplicate_on_page = duplicate_on_page
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None):
+        params = dict(params or {})
+        with self._lock:
+            self.calls.append((url, params))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            if '/traces/' in url:
+                return _response({'id': 't-1', 'name': 'agent', 'input': 'prompt', 'output': 'answer'})
+            page, limit = params['page'], params['limit']
+            if page == self.fail_page:
+                return _response({'message': 'boom'}, status_code=500)
+            chunk = self.observations[(page - 1) * limit:page * limit]
+            if page == self.duplicate_on_page:
+                chunk = [self.observations[(page - 1) * limit - 1]] + chunk[:-1]
+            total_pages = (len(self.observations) + limit - 1) // limit
+            return _response({'data': chunk, 'meta': {'page': page, 'totalPages': total_pages}})
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def _get(fake, **kwargs):
+    with patch.object(cofuse, 'read_config', return_value=CONFIG), \
+            patch.object(cofuse, 'get_fuse_session', return_value=fake):
+        return json.loads(cofuse.get_trace_with_observations('t-1', **kwargs))
+
+
+class TestGetTraceWithObservations:
+
+    def test_returns_every_page_in_order(self):
+        fake = FakeTraceApi(total=23)
+        trace = _get(fake, page_size=5)
+        assert [o['id'] for o in trace['observations']] == [f'obs-{i}' for i in range(23)]
+        obs_pages = sorted(p['page'] for url, p in fake.calls if url.endswith('/observations'))
+        assert obs_pages == [1, 2, 3, 4, 5]
+        assert 'observationsIncomplete' not in trace
+
+    def test_trace_and_first_page_fetched_in_parallel(self):
+        fake = FakeTraceApi(total=3, delay=0.05)
+        _get(fake)
+        assert fake.max_in_flight == 2
+
+    def test_remaining_pages_are_concurrent_and_bounded(self):
+        fake = FakeTraceApi(total=40, delay=0.02)
+        _get(fake, page_size=4, max_workers=3)
+        assert 1 < fake.max_in_flight <= 3
+
+    def test_strip_payloads(self):
+        trace = _get(FakeTraceApi(total=4), include_payloads=False)
+        assert 'input' not in trace and 'output' not in trace
+        assert all('input' not in o and 'output' not in o for o in trace['observations'])
+        assert trace['observations'][1]['parentObservationId'] == 'obs-0'
+
+    def test_duplicates_from_shifted_pages_are_dropped(self):
+        trace = _get(FakeTraceApi(total=10, duplicate_on_page=2), page_size=5)
+        ids = [o['id'] for o in trace['observations']]
+        assert len(ids) == len(set(ids))
+
+    def test_failed_page_marks_result_incomplete(self):
+        trace = _get(FakeTraceApi(total=20, fail_page=3), page_size=5)
+        assert trace['observationsIncomplete'] is True
+        assert len(trace['observations']) == 10
+
+    def test_failed_first_page_marks_result_incomplete(self):
+        trace = _get(FakeTraceApi(total=20, fail_page=1), page_size=5)
+        assert trace['observationsIncomplete'] is True
+        assert trace['observations'] == []
+
+    def test_missing_trace(self):
+        fake = MagicMock()
+        fake.get.return_value = _response({'message': 'not found'}, status_code=404)
+        assert 'error' in _get(fake)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Tests for trace listing: observation fetch modes and the paginating iter_traces()
+"""
+import json
+import os
+import sys
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coaiapy import cofuse
+
+CONFIG = {
+    'langfuse_base_url': 'https://langfuse.example.com',
+    'langfuse_public_key': 'pk-test',
+    'langfuse_secret_key': 'sk-test',
+}
+
+TRACES = [
+    {'id': f'trace-{i}', 'timestamp': f'2026-01-0{i + 1}T00:00:00Z'} for i in range(5)
+]
+
+
+def _response(payload, status_code=200):
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = payload
+    response.text = json.dumps(payload)
+    return response
+
+
+class FakeLangfuse:
+    """Serves /traces and /observations and records concurrency"""
+
+    def __init__(self, observations, obs_page_size=2, delay=0.0):
+        self.observations = observations
+        self.obs_page_size = obs_page_size
+        self.delay = delay
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None):
+        params = dict(params or {})
+        with self._lock:
+            self.calls.append((url, params))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            if url.endswith('/traces'):
+                return _response({'data': [dict(t) for t in TRACES], 'meta': {'totalPages': 1}})
+            if 'traceId' in params:
+                return _response({'data': [o for o in self.observations if o['traceId'] == params['traceId']]})
+            page = params.get('page', 1)
+            size = self.obs_page_size
+            chunk = self.observations[(page - 1) * size:page * size]
+            total_pages = (len(self.observations) + size - 1) // size
+            return _response({'data': chunk, 'meta': {'page': page, 'totalPages': total_pages}})
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+OBSERVATIONS = [
+    {'id': 'obs-a', 'traceId': 'trace-0'},
+    {'id': 'obs-b', 'traceId': 'trace-0'},
+    {'id': 'obs-c', 'traceId': 'trace-2'},
+    {'id': 'obs-x', 'traceId': 'other-trace'},
+]
+
+
+def _run(fake, **kwargs):
+    with patch.object(cofuse, 'read_config', return_value=CONFIG), \
+            patch.object(cofuse, 'get_fuse_session', return_value=fake):
+        return json.loads(cofuse.list_traces(include_observations=True, **kwargs))
+
+
+class TestListTracesObservations:
+
+    def test_concurrent_mode_attaches_observations(self):
+        fake = FakeLangfuse(OBSERVATIONS, delay=0.02)
+        traces = _run(fake, max_workers=5)
+        by_id = {t['id']: t for t in traces}
+        assert [o['id'] for o in by_id['trace-0']['observations']] == ['obs-a', 'obs-b']
+        assert by_id['trace-1']['observations'] == []
+        assert [o['id'] for o in by_id['trace-2']['observations']] == ['obs-c']
+        assert [t['id'] for t in traces] == [t['id'] for t in TRACES]
+        assert fake.max_in_flight > 1
+
+    def test_concurrency_is_capped(self):
+        fake = FakeLangfuse(OBSERVATIONS, delay=0.02)
+        _run(fake, max_workers=2)
+        assert fake.max_in_flight <= 2
+
+    def test_bulk_mode_groups_by_trace(self):
+        fake = FakeLangfuse(OBSERVATIONS, obs_page_size=2)
+        traces = _run(fake, observations_mode='bulk')
+        by_id = {t['id']: t for t in traces}
+        assert [o['id'] for o in by_id['trace-0']['observations']] == ['obs-a', 'obs-b']
+        assert [o['id'] for o in by_id['trace-2']['observations']] == ['obs-c']
+        assert by_id['trace-4']['observations'] == []
+        obs_calls = [params for url, params in fake.calls if url.endswith('/observations')]
+        # Two pages for four observations, no per-trace requests
+        assert len(obs_calls) == 2
+        assert all('traceId' not in params for params in obs_calls)
+        assert obs_calls[0]['fromStartTime'] == '2026-01-01T00:00:00Z'
+        # Without to_timestamp the window ends shortly after the newest trace
+        assert obs_calls[0]['toStartTime'] == '2026-01-05T01:00:00.000Z'
+
+    def test_bulk_mode_flags_traces_when_a_page_fails(self):
+        fake = FakeLangfuse(OBSERVATIONS, obs_page_size=2)
+        get = fake.get
+
+        def failing_get(url, params=None):
+            if url.endswith('/observations') and (params or {}).get('page') == 2:
+                return _response({'message': 'unavailable'}, status_code=503)
+            return get(url, params)
+
+        fake.get = failing_get
+        traces = _run(fake, observations_mode='bulk')
+        assert all(t['observationsIncomplete'] is True for t in traces)
+
+    def test_bulk_mode_without_trace_timestamps_falls_back_to_per_trace(self):
+        fake = FakeLangfuse(OBSERVATIONS)
+        get = fake.get
+
+        def untimed_get(url, params=None):
+            if url.endswith('/traces'):
+                return _response({'data': [{'id': t['id']} for t in TRACES], 'meta': {'totalPages': 1}})
+            return get(url, params)
+
+        fake.get = untimed_get
+        traces = _run(fake, observations_mode='bulk')
+        by_id = {t['id']: t for t in traces}
+        assert [o['id'] for o in by_id['trace-0']['observations']] == ['obs-a', 'obs-b']
+        assert all('traceId' in params for url, params in fake.calls if url.endswith('/observations'))
+
+
+class PagedTraces:
+    """Serves /traces pages and records which pages were requested when"""
+
+    def __init__(self, total, page_size, fail_page=None):
+        self.total = total
+        self.page_size = page_size
+        self.fail_page = fail_page
+        self.requested = []
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None):
+        page = params['page']
+        with self._lock:
+            self.requested.append(page)
+        if page == self.fail_page:
+            return _response({'message': 'boom'}, status_code=500)
+        start = (page - 1) * self.page_size
+        data = [{'id': f'trace-{i}'} for i in range(start, min(start + self.page_size, self.total))]
+        total_pages = (self.total + self.page_size - 1) // self.page_size
+        return _response({'data': data, 'meta': {'page': page, 'totalPages': total_pages}})
+
+
+def _iter(fake, **kwargs):
+    with patch.object(cofuse, 'read_config', return_value=CONFIG), \
+            patch.object(cofuse, 'get_fuse_session', return_value=fake):
+        yield from cofuse.iter_traces(**kwargs)
+
+
+class TestIterTraces:
+
+    @pytest.mark.parametrize('prefetch', [True, False])
+    def test_walks_all_pages(self, prefetch):
+        fake = PagedTraces(total=23, page_size=5)
+        ids = [t['id'] for t in _iter(fake, limit=5, name='demo', prefetch=prefetch)]
+        assert ids == [f'trace-{i}' for i in range(23)]
+        assert sorted(fake.requested) == [1, 2, 3, 4, 5]
+
+    def test_next_page_prefetched_while_consuming(self):
+        fake = PagedTraces(total=10, page_size=5)
+        it = _iter(fake, limit=5)
+        next(it)
+        deadline = time.time() + 2
+        while 2 not in fake.requested and time.time() < deadline:
+            time.sleep(0.01)
+        assert 2 in fake.requested
+        assert len(list(it)) == 9
+
+    def test_page_error_raises(self):
+        fake = PagedTraces(total=20, page_size=5, fail_page=3)
+        it = _iter(fake, limit=5)
+        received = []
+        with pytest.raises(Exception, match='page 3'):
+            for trace in it:
+                received.append(trace)
+        assert len(received) == 10
+
+
+class TestTracesListStreamCommand:
+
+    def test_all_stream_emits_ndjson(self, capsys):
+        from coaiapy import coaiacli
+        traces = [{'id': 'a'}, {'id': 'b'}]
+        argv = ['coaia', 'fuse', 'traces', 'list', '--all', '--stream', '--session-id', 's-1']
+        with patch.object(coaiacli, 'iter_traces', return_value=iter(traces)) as mock_iter, \
+                patch.object(sys, 'argv', argv):
+            coaiacli.main()
+        lines = capsys.readouterr().out.strip().splitlines()
+        assert [json.loads(line) for line in lines] == traces
+        assert mock_iter.call_args.kwargs['session_id'] == 's-1'
+
+
+    @pytest.mark.parametrize('argv', [
+        ['coaia', 'fuse', 'traces', '--json', 'list', '--limit', '5'],
+        ['coaia', 'fuse', 'traces', 'list', '--limit', '5', '--json'],
+    ])
+    def test_json_flag_reaches_list_action(self, capsys, argv):
+        from coaiapy import coaiacli
+        traces = json.dumps([{'id': 'a'}])
+        with patch.object(coaiacli, 'list_traces', return_value=traces), \
+                patch.object(sys, 'argv', argv):
+            coaiacli.main()
+        assert json.loads(capsys.readouterr().out) == [{'id': 'a'}]
+
+    def test_list_without_json_prints_table(self, capsys):
+        from coaiapy import coaiacli
+        argv = ['coaia', 'fuse', 'traces', 'list']
+        with patch.object(coaiacli, 'list_traces', return_value=json.dumps([{'id': 'a'}])), \
+                patch.object(coaiacli, 'format_traces_table', return_value='TABLE'), \
+                patch.object(sys, 'argv', argv):
+            coaiacli.main()
+        assert capsys.readouterr().out.strip() == 'TABLE'
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
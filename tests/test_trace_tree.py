@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Tests for the trace tree index and the streaming trace tree renderer
+"""
+import io
+import json
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coaiapy import cofuse
+
+TRACE = {
+    'id': 'trace-1',
+    'name': 'Pipeline',
+    'userId': 'u-1',
+    'sessionId': 's-1',
+    'timestamp': '2026-01-01T10:00:00.000Z',
+    'metadata': {'env': 'test'},
+    'observations': [
+        {'id': 'root-1', 'name': 'Plan', 'type': 'SPAN', 'level': 'DEFAULT',
+         'startTime': '2026-01-01T10:00:01.000Z', 'input': 'goal'},
+        {'id': 'gen-1', 'name': 'Call', 'type': 'GENERATION', 'parentObservationId': 'root-1',
+         'output': {'text': 'done'}},
+        {'id': 'root-2', 'name': 'Report', 'type': 'EVENT'},
+    ],
+}
+
+EXPECTED = """🔗 Trace: Pipeline
+├── 🆔 ID: trace-1
+├── 👤 User: u-1
+├── 🔗 Session: s-1
+├── ⏰ Time: 2026-01-01T10:00:00
+├── 📋 Metadata:
+│   └── env: test
+└── 📝 Observations (3):
+    ├── 🔗 [SPAN] Plan (root-1)
+    │   ├── ⏰ 2026-01-01T10:00:01
+    │   ├── 📊 DEFAULT
+    │   ├── 📥 Input: goal
+    │   └── 🌿 Children (1):
+    │       └── 🤖 [GENERATION] Call (gen-1)
+    │           ├── ⏰ N/A
+    │           └── 📤 Output: {'text': 'done'}
+    └── ⚡ [EVENT] Report (root-2)
+        └── ⏰ N/A"""
+
+
+def _chain(length):
+    return [dict({'id': f'o{i}', 'name': f'step {i}'}, **({'parentObservationId': f'o{i - 1}'} if i else {}))
+            for i in range(length)]
+
+
+class TestTraceTreeIndex:
+
+    def test_children_keep_list_order(self):
+        obs = [{'id': 'r'}, {'id': 'b', 'parentObservationId': 'r'}, {'id': 'a', 'parentObservationId': 'r'}]
+        index = cofuse.TraceTreeIndex(obs)
+        assert [o['id'] for o in index.roots] == ['r']
+        assert [o['id'] for o in index.children('r')] == ['b', 'a']
+
+    def test_stats_report_orphans_and_unreachable(self):
+        obs = _chain(4) + [
+            {'id': 'orphan', 'parentObservationId': 'missing'},
+            {'id': 'x', 'parentObservationId': 'y'},
+            {'id': 'y', 'parentObservationId': 'x'},
+        ]
+        stats = cofuse.TraceTreeIndex(obs).stats()
+        assert stats == {'observations': 7, 'roots': 1, 'orphans': 1, 'unreachable': 2,
+                         'max_depth': 4, 'max_breadth': 1}
+
+    def test_walk_handles_deep_traces(self):
+        index = cofuse.TraceTreeIndex(_chain(5000))
+        assert index.stats()['max_depth'] == 5000
+
+
+class TestRenderer:
+
+    def test_format_trace_tree_layout(self):
+        assert cofuse.format_trace_tree(json.dumps(TRACE)) == EXPECTED
+
+    def test_write_trace_tree_streams_same_lines(self):
+        stream = io.StringIO()
+        count = cofuse.write_trace_tree(TRACE, stream)
+        assert stream.getvalue() == EXPECTED + '\n'
+        assert count == len(EXPECTED.splitlines())
+
+    def test_deep_trace_renders_without_recursion_error(self):
+        out = cofuse.format_trace_tree({'id': 't', 'observations': _chain(3000)})
+        assert 'step 2999' in out
+        assert not out.startswith('Error')
+
+    def test_depth_limit_summarizes_children(self):
+        out = cofuse.format_trace_tree({'id': 't', 'observations': _chain(5)}, max_depth=2)
+        assert 'step 1' in out and 'step 2' not in out
+        assert '🌿 Children (1): (not shown, depth limit 2)' in out
+
+    def test_breadth_limit_summarizes_siblings(self):
+        obs = [{'id': f'r{i}', 'name': f'root {i}'} for i in range(5)]
+        lines = cofuse.format_trace_tree({'id': 't', 'observations': obs}, max_children=2).splitlines()
+        assert '    └── … 3 more observations' == lines[-1]
+        assert '    ├── 📦 [UNKNOWN] root 1 (r1)' in lines
+
+    def test_orphans_hidden_unless_requested(self):
+        obs = [{'id': 'r', 'name': 'root'}, {'id': 'o', 'name': 'lost', 'parentObservationId': 'gone'}]
+        assert 'lost' not in cofuse.format_trace_tree({'id': 't', 'observations': obs})
+        out = cofuse.format_trace_tree({'id': 't', 'observations': obs}, show_orphans=True)
+        assert '⚠️ Orphaned observations (1):' in out
+        assert 'lost (o)' in out
+
+    def test_error_payload(self):
+        assert cofuse.format_trace_tree({'error': 'Trace not found'}) == 'Error: Trace not found'
+
+
+class TestTraceViewCommand:
+
+    def test_trace_view_streams_with_limits(self, capsys):
+        from coaiapy import coaiacli
+        argv = ['coaia', 'fuse', 'traces', 'trace-view', 'trace-1', '--max-depth', '1']
+        with patch.object(coaiacli, 'get_trace_with_observations', return_value=json.dumps(TRACE)), \
+                patch.object(sys, 'argv', argv):
+            coaiacli.main()
+        out = capsys.readouterr().out
+        assert '🌿 Children (1): (not shown, depth limit 1)' in out
+        assert 'gen-1' not in out
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])